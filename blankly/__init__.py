@@ -35,6 +35,7 @@ from blankly.frameworks.screener.screener_state import ScreenerState
 from blankly.exchanges.managers.ticker_manager import TickerManager
 from blankly.exchanges.managers.orderbook_manager import OrderbookManager
 from blankly.exchanges.managers.general_stream_manager import GeneralManager
+from blankly.exchanges.managers.market_data_hub import MarketDataHub, get_market_data_hub
 from blankly.exchanges.interfaces.abc_exchange_interface import ABCExchangeInterface as Interface
 from blankly.frameworks.multiprocessing.blankly_bot import BlanklyBot
 from blankly.utils.utils import trunc
@@ -50,6 +51,7 @@ from blankly.frameworks.strategy import FuturesStrategy
 from blankly.frameworks.strategy import FuturesStrategyState
 
 from blankly.deployment.reporter_headers import Reporter as __Reporter_Headers
+from blankly.deployment.reporting_pipeline import ReportingPipeline as __ReportingPipeline
 
 is_deployed = False
 _screener_runner = None
@@ -58,7 +60,8 @@ _backtesting = blankly.utils.check_backtesting()
 try:
     from blankly_external import Reporter as __Reporter
 
-    reporter = __Reporter
+    # Calls that only report are queued & delivered in the background so they never hold up orders
+    reporter = __ReportingPipeline(__Reporter)
     is_deployed = True
 except ImportError:
-    reporter = __Reporter_Headers()
+    reporter = __ReportingPipeline(__Reporter_Headers())
@@ -17,6 +17,8 @@
 """
 
 from blankly.data.data_reader import PriceReader, JsonEventReader, TickReader, DataTypes
+from blankly.data.recorder import WebsocketRecorder, RecordingReader
+from blankly.data.orderbook_reader import OrderbookReader
 
 """
 Some datatype examples
@@ -0,0 +1,127 @@
+"""
+    Streaming readers for recorded level 2 orderbook data
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import typing
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.managers import orderbook
+
+
+class OrderbookMessage(typing.NamedTuple):
+    time: float
+    symbol: str
+    snapshot: bool
+    bids: list
+    asks: list
+
+
+class OrderbookReader:
+    def __init__(self, file_path: str, exchange: str = None, symbol: str = None, chunk_size: int = 100000):
+        """
+        Stream recorded orderbook snapshots & deltas from disk. Nothing is loaded past the current chunk, so full
+        trading days of deltas can be replayed.
+
+        Two formats are read:
+
+        Normalized csv (exchange=None) with one row per price level:
+            time,symbol,side,price,size,snapshot
+        side is 'bids'/'asks' (or 'buy'/'sell'). Consecutive rows with the same time, symbol & snapshot flag are one
+        message. A snapshot replaces the book, otherwise each row sets the size at that price and a size of 0 removes
+        the level. The symbol & snapshot columns are optional when a symbol is passed in.
+
+        Native json lines (exchange='coinbase_pro', 'binance', ...) with one message per line:
+            {"time": 1650000000.1, "snapshot": true, "message": {...}}
+        The message is exactly what the OrderbookManager receives from that exchange's websocket (or the snapshot
+        given to its pre-event callback), and it's parsed with the same code.
+
+        Args:
+            file_path: Path to the recording
+            exchange: The exchange of a native recording. None reads the normalized csv format.
+            symbol: Symbol for a normalized file without a symbol column. This also renames the symbol of a native
+                recording, such as 'BTCUSDT' on binance to 'BTC-USDT'.
+            chunk_size: Rows read from a csv at a time
+        """
+        if exchange is not None and exchange not in orderbook.parsers:
+            raise ValueError(f"Orderbook replay isn't supported for {exchange}.")
+        self.file_path = file_path
+        self.exchange = exchange
+        self.symbol = symbol
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> typing.Iterator[OrderbookMessage]:
+        if self.exchange is None:
+            return self.__read_normalized()
+        return self.__read_native()
+
+    def __read_native(self) -> typing.Iterator[OrderbookMessage]:
+        parse_snapshot, parse_update = orderbook.parsers[self.exchange]
+        with open(self.file_path) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                snapshot = bool(record.get('snapshot', False))
+                symbol, bids, asks = (parse_snapshot if snapshot else parse_update)(record['message'])
+                yield OrderbookMessage(float(record['time']), self.symbol or symbol, snapshot, bids, asks)
+
+    def __columns(self, chunk: pd.DataFrame) -> tuple:
+        times = chunk['time'].to_numpy(dtype=np.float64)
+        if 'symbol' in chunk:
+            symbols = chunk['symbol'].to_numpy()
+        else:
+            symbols = np.full(len(chunk), self.symbol, dtype=object)
+        if 'snapshot' in chunk:
+            snapshots = chunk['snapshot'].to_numpy().astype(bool)
+        else:
+            snapshots = np.zeros(len(chunk), dtype=bool)
+        is_bid = np.isin(chunk['side'].to_numpy(), ('bids', 'buy', 'bid'))
+        return times, symbols, snapshots, is_bid, chunk['price'].to_numpy(dtype=np.float64), \
+            chunk['size'].to_numpy(dtype=np.float64)
+
+    def __read_normalized(self) -> typing.Iterator[OrderbookMessage]:
+        # A message can be split across chunks, so the rows of the last one are carried into the next chunk
+        carry = None
+        for chunk in pd.read_csv(self.file_path, chunksize=self.chunk_size):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            columns = self.__columns(chunk)
+            times, symbols, snapshots = columns[:3]
+
+            # Messages begin wherever the time, symbol or snapshot flag changes
+            changed = (times[1:] != times[:-1]) | (symbols[1:] != symbols[:-1]) | (snapshots[1:] != snapshots[:-1])
+            starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+
+            carry = chunk.iloc[starts[-1]:]
+            for start, stop in zip(starts[:-1], starts[1:]):
+                yield self.__message(columns, start, stop)
+
+        if carry is not None and len(carry):
+            yield self.__message(self.__columns(carry), 0, len(carry))
+
+    @staticmethod
+    def __message(columns: tuple, start: int, stop: int) -> OrderbookMessage:
+        times, symbols, snapshots, is_bid, prices, sizes = columns
+        bid_levels = []
+        ask_levels = []
+        for price, size, bid in zip(prices[start:stop].tolist(), sizes[start:stop].tolist(),
+                                    is_bid[start:stop].tolist()):
+            (bid_levels if bid else ask_levels).append((price, size))
+        return OrderbookMessage(float(times[start]), symbols[start], bool(snapshots[start]), bid_levels, ask_levels)
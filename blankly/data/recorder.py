@@ -0,0 +1,399 @@
+"""
+    Buffered binary recording & replay of websocket feeds
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import queue
+import struct
+import threading
+import time
+import typing
+import zlib
+
+from blankly.utils.utils import info_print
+
+"""
+File layout
+
+The file starts with an 8 byte magic header and is then a sequence of append-only blocks. Each block is written by the
+background writer thread and holds one batch of records:
+
+    block header   <BII   flags (1 = zlib compressed), payload length, record count
+    block payload         concatenated records, optionally zlib compressed
+
+Each record inside of a block payload is:
+
+    record header  <dHBI  receive time (epoch), channel id, kind, data length
+    record data           utf-8 json (normalized), utf-8 text or raw bytes (raw messages)
+
+Channels are declared inline with a CHANNEL record whose data is "exchange\\x1fstream\\x1fsymbol". This keeps every
+record to a 15 byte header no matter how many feeds are written into the same file.
+"""
+
+MAGIC = b'BLKREC\x01\x00'
+
+_BLOCK_HEADER = struct.Struct('<BII')
+_RECORD_HEADER = struct.Struct('<dHBI')
+
+_BLOCK_COMPRESSED = 1
+
+KIND_RAW_TEXT = 0
+KIND_RAW_BYTES = 1
+KIND_NORMALIZED = 2
+KIND_CHANNEL = 3
+
+_CHANNEL_SEPARATOR = '\x1f'
+
+
+class Record(typing.NamedTuple):
+    time: float
+    exchange: str
+    stream: str
+    symbol: str
+    normalized: bool
+    message: typing.Any
+
+
+class BufferedFileWriter:
+    def __init__(self, file_path: str, header: [str, bytes] = None, batch_size: int = 1024,
+                 flush_interval: float = 1.0, max_queue: int = 0, binary: bool = False):
+        """
+        Append chunks to a file from a background thread so the calling thread never blocks on disk I/O
+
+        Args:
+            file_path: The file to append to. The header is only written if the file is created.
+            header: Optional first chunk written when the file is created (such as a csv header or magic bytes)
+            batch_size: Number of chunks that are gathered before a write is forced
+            flush_interval: Maximum number of seconds a chunk may wait in memory before it is written
+            max_queue: Bound on the number of chunks held in memory. When it is reached new chunks are dropped and
+             counted in `dropped` instead of stalling the producer. 0 means unbounded.
+            binary: Write bytes instead of text
+        """
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+
+        self.__binary = binary
+        self.__queue = queue.Queue(maxsize=max_queue)
+        self.__closed = False
+
+        mode = 'b' if binary else ''
+        try:
+            self.__file = open(file_path, 'x' + mode)
+            if header:
+                self.__file.write(header)
+        except FileExistsError:
+            self.__file = open(file_path, 'a' + mode)
+
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def write(self, chunk: [str, bytes], block: bool = False):
+        """
+        Queue a chunk for writing. This never blocks unless asked to, chunks that don't fit in a bounded queue are
+        dropped.
+        """
+        if self.__closed:
+            raise ValueError(f"Writer for {self.file_path} is already closed.")
+        try:
+            self.__queue.put(chunk, block=block)
+        except queue.Full:
+            self.dropped += 1
+
+    def _format_batch(self, batch: list) -> [str, bytes]:
+        """
+        Turn a list of queued chunks into what is actually written. Override this to change the on-disk format.
+        """
+        return (b'' if self.__binary else '').join(batch)
+
+    def __run(self):
+        batch = []
+        deadline = time.time() + self.flush_interval
+        while True:
+            try:
+                chunk = self.__queue.get(timeout=max(deadline - time.time(), 0))
+            except queue.Empty:
+                chunk = None
+
+            if isinstance(chunk, (str, bytes)):
+                batch.append(chunk)
+                if len(batch) < self.batch_size:
+                    continue
+
+            # Either the batch is full, the interval passed or a flush/close marker arrived
+            self.__write_batch(batch)
+            batch = []
+            deadline = time.time() + self.flush_interval
+
+            if isinstance(chunk, threading.Event):
+                chunk.set()
+            elif chunk is self.__queue:
+                # The queue itself is used as the close marker
+                break
+
+        self.__file.close()
+
+    def __write_batch(self, batch: list):
+        if not batch:
+            return
+        try:
+            self.__file.write(self._format_batch(batch))
+            self.__file.flush()
+            self.written += len(batch)
+        except Exception as e:
+            info_print(f"Failed writing to {self.file_path}: {e}")
+
+    def flush(self, timeout: float = None):
+        """
+        Block until everything queued so far is on disk
+        """
+        if self.__closed:
+            return
+        written = threading.Event()
+        self.__queue.put(written)
+        written.wait(timeout)
+
+    def close(self):
+        """
+        Write everything that is queued and close the file
+        """
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__queue.put(self.__queue)
+        self.__thread.join()
+
+
+class _BlockWriter(BufferedFileWriter):
+    def __init__(self, file_path, compress, **kwargs):
+        self.__compress = compress
+        super().__init__(file_path, header=MAGIC, binary=True, **kwargs)
+
+    def _format_batch(self, batch: list) -> bytes:
+        payload = b''.join(batch)
+        flags = 0
+        if self.__compress:
+            payload = zlib.compress(payload, 1)
+            flags |= _BLOCK_COMPRESSED
+        return _BLOCK_HEADER.pack(flags, len(payload), len(batch)) + payload
+
+
+class WebsocketRecorder:
+    def __init__(self, file_path: str, compress: bool = True, batch_size: int = 1024, flush_interval: float = 1.0,
+                 max_queue: int = 0):
+        """
+        Record raw or normalized websocket messages into a compact append-only binary file. Messages are only
+        timestamped and queued on the feed thread, a background thread batches and writes them.
+
+        Args:
+            file_path: Path of the recording. Existing recordings are appended to.
+            compress: Compress each written block with zlib
+            batch_size: Number of messages gathered per block
+            flush_interval: Maximum seconds before a partial block is written
+            max_queue: Bound on the number of messages held in memory, 0 is unbounded. When the bound is hit messages
+             are dropped (and counted in `dropped`) rather than stalling the feed.
+        """
+        self.file_path = file_path
+        self.__writer = _BlockWriter(file_path, compress, batch_size=batch_size, flush_interval=flush_interval,
+                                     max_queue=max_queue)
+        self.__channels = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        return self.__writer.dropped
+
+    @property
+    def written(self) -> int:
+        return self.__writer.written
+
+    def __channel_id(self, exchange: str, stream: str, symbol: str) -> int:
+        key = (exchange, stream, symbol)
+        channel = self.__channels.get(key)
+        if channel is None:
+            with self.__lock:
+                channel = self.__channels.get(key)
+                if channel is None:
+                    channel = len(self.__channels)
+                    data = _CHANNEL_SEPARATOR.join(key).encode('utf-8')
+                    # Channel declarations are never dropped, everything recorded on the channel depends on them
+                    self.__writer.write(_RECORD_HEADER.pack(time.time(), channel, KIND_CHANNEL, len(data)) + data,
+                                        block=True)
+                    self.__channels[key] = channel
+        return channel
+
+    def record(self, exchange: str, stream: str, symbol: str, message, normalized: bool = False,
+               receive_time: float = None):
+        """
+        Queue a single message for writing
+
+        Args:
+            exchange: Exchange the message came from, such as 'coinbase_pro'
+            stream: The stream/channel the message came from, such as 'ticker' or 'level2'
+            symbol: The symbol the websocket is subscribed to
+            message: The raw message (str or bytes) or a normalized dictionary
+            normalized: Set if the message has already been parsed into a blankly format
+            receive_time: Defaults to now
+        """
+        if receive_time is None:
+            receive_time = time.time()
+        channel = self.__channel_id(exchange, stream, symbol)
+
+        if normalized:
+            kind = KIND_NORMALIZED
+            data = json.dumps(message, separators=(',', ':'), default=str).encode('utf-8')
+        elif isinstance(message, (bytes, bytearray)):
+            kind = KIND_RAW_BYTES
+            data = bytes(message)
+        else:
+            kind = KIND_RAW_TEXT
+            data = str(message).encode('utf-8')
+
+        self.__writer.write(_RECORD_HEADER.pack(receive_time, channel, kind, len(data)) + data)
+
+    def attach(self, websocket, exchange: str, normalized: bool = False):
+        """
+        Record everything a websocket receives
+
+        Args:
+            websocket: A websocket object such as the ones created by the TickerManager or OrderbookManager
+            exchange: The exchange name the websocket is connected to
+            normalized: Record the parsed messages that callbacks receive instead of the raw exchange messages. Raw
+             recordings are required to rebuild orderbooks because they include the initial snapshot.
+        """
+        symbol = websocket.get_currency_id()
+        stream = getattr(websocket, 'stream', '')
+
+        if normalized:
+            def record_normalized(message, **kwargs):
+                self.record(exchange, stream, symbol, message, normalized=True)
+            websocket.append_callback(record_normalized)
+        else:
+            if not hasattr(websocket, 'append_raw_listener'):
+                raise NotImplementedError(f"Raw recording is not supported on {exchange} websockets, use "
+                                          f"normalized=True.")
+
+            def record_raw(message):
+                self.record(exchange, stream, symbol, message)
+            websocket.append_raw_listener(record_raw)
+
+    def flush(self, timeout: float = None):
+        self.__writer.flush(timeout)
+
+    def close(self):
+        self.__writer.close()
+
+
+class RecordingReader:
+    def __init__(self, file_path: str):
+        """
+        Read a recording created by the WebsocketRecorder
+
+        Args:
+            file_path: Path of the recording
+        """
+        self.file_path = file_path
+
+    def __iter__(self) -> typing.Iterator[Record]:
+        channels = {}
+        with open(self.file_path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.file_path} is not a blankly recording.")
+
+            while True:
+                header = file.read(_BLOCK_HEADER.size)
+                if len(header) < _BLOCK_HEADER.size:
+                    # End of file or a block that was cut off while being written
+                    return
+                flags, length, count = _BLOCK_HEADER.unpack(header)
+                payload = file.read(length)
+                if len(payload) < length:
+                    return
+                if flags & _BLOCK_COMPRESSED:
+                    payload = zlib.decompress(payload)
+
+                offset = 0
+                for _ in range(count):
+                    receive_time, channel, kind, data_length = _RECORD_HEADER.unpack_from(payload, offset)
+                    offset += _RECORD_HEADER.size
+                    data = payload[offset:offset + data_length]
+                    offset += data_length
+
+                    if kind == KIND_CHANNEL:
+                        channels[channel] = data.decode('utf-8').split(_CHANNEL_SEPARATOR)
+                        continue
+
+                    exchange, stream, symbol = channels[channel]
+                    if kind == KIND_NORMALIZED:
+                        message = json.loads(data)
+                    elif kind == KIND_RAW_TEXT:
+                        message = data.decode('utf-8')
+                    else:
+                        message = data
+
+                    yield Record(receive_time, exchange, stream, symbol, kind == KIND_NORMALIZED, message)
+
+    def replay(self, manager, speed: [int, float] = 1.0) -> int:
+        """
+        Push a recording into the websockets of a TickerManager or OrderbookManager. Create the tickers or orderbooks
+        as usual with initially_stopped=True so that no connection is made, then replay into them. Raw records are
+        parsed by the websocket exactly as if they were received live, so any orderbook maintenance and user callbacks
+        run unchanged.
+
+        Args:
+            manager: The TickerManager or OrderbookManager that owns the websockets to replay into
+            speed: Multiplier on the recorded pacing. 1 replays in real time, 10 is ten times faster and 0 or None
+             replays as fast as possible.
+
+        Returns:
+            The number of records that were replayed
+        """
+        websockets = {}
+
+        def index(exchange_, symbols_):
+            for websocket_ in symbols_.values():
+                if isinstance(websocket_, dict):
+                    index(exchange_, websocket_)
+                else:
+                    websockets[(exchange_, getattr(websocket_, 'stream', ''), websocket_.get_currency_id())] = \
+                        websocket_
+
+        for exchange, symbols in manager.get_all_tickers().items():
+            index(exchange, symbols)
+
+        replayed = 0
+        first_recorded = None
+        first_replayed = None
+        for record in self:
+            websocket = websockets.get((record.exchange, record.stream, record.symbol))
+            if websocket is None:
+                continue
+
+            if speed:
+                if first_recorded is None:
+                    first_recorded = record.time
+                    first_replayed = time.time()
+                delay = (record.time - first_recorded) / speed - (time.time() - first_replayed)
+                if delay > 0:
+                    time.sleep(delay)
+
+            websocket.inject(record.message, normalized=record.normalized)
+            replayed += 1
+
+        return replayed
@@ -26,6 +26,18 @@ from blankly.frameworks.strategy import Strategy
 from blankly.frameworks.screener.screener import Screener
 from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
 
+# Email to text gateways of each phone provider
+TEXT_PROVIDERS = {
+    'att': '@txt.att.net',
+    'boost': '@smsmyboostmobile.com',
+    'cricket': '@sms.cricketwireless.net',
+    'sprint': '@messaging.sprintpcs.com',
+    't_mobile': '@tmomail.net',
+    'us_cellular': '@email.uscc.net',
+    'verizon': '@vtext.com',
+    'virgin_mobile': '@vmobl.com'
+}
+
 
 class Reporter:
     def __init__(self):
@@ -137,26 +149,27 @@ class Reporter:
         Args:
             text: The message body to be sent to your phone number
         """
+        self.validate_notify('text')
         notify_preferences = load_notify_preferences()
         provider = notify_preferences['text']['provider']
         phone_number = notify_preferences['text']['phone_number']
 
-        email_lookup = {
-            'att': '@txt.att.net',
-            'boost': '@smsmyboostmobile.com',
-            'cricket': '@sms.cricketwireless.net',
-            'sprint': '@messaging.sprintpcs.com',
-            't_mobile': '@tmomail.net',
-            'us_cellular': '@email.uscc.net',
-            'verizon': '@vtext.com',
-            'virgin_mobile': '@vmobl.com'
-        }
-        try:
-            email = email_lookup[provider]
-        except KeyError:
-            raise KeyError("Provider not found. Check the notify.json documentation to see supported providers.")
+        self.__send_email(text, override_receiver=phone_number + TEXT_PROVIDERS[provider])
+
+    @staticmethod
+    def validate_notify(method: str):
+        """
+        Check that notify.json can send a text, email or chat. The reporting pipeline calls this before queueing one
+        of them so that a mistake is raised to the caller instead of on the background thread.
 
-        self.__send_email(text, override_receiver=phone_number + email)
+        Args:
+            method: 'text', 'email' or 'chat'
+        """
+        notify_preferences = load_notify_preferences()
+        if method == 'text' and notify_preferences['text']['provider'] not in TEXT_PROVIDERS:
+            raise KeyError("Provider not found. Check the notify.json documentation to see supported providers.")
+        elif method == 'chat' and 'webhook_url' not in notify_preferences.get('chat', {}):
+            raise KeyError("Google Chat webhook URL not found. Check the notify.json documentation")
 
     @staticmethod
     def __send_email(email_str: str, override_receiver=None):
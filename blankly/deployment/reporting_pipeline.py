@@ -0,0 +1,309 @@
+"""
+    Background queue that batches reporter events so that trading never waits on reporting I/O
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import atexit
+import collections
+import json
+import socket
+import threading
+import time
+import traceback
+import typing
+
+from blankly.utils.utils import load_user_preferences, info_print
+
+# Reporter methods that don't return anything, so they can be delivered later from the background thread. Order
+# annotations stay synchronous because Order.annotate() returns the reporter's result.
+QUEUED_METHODS = frozenset([
+    'log_market_order',
+    'log_limit_order',
+    'update_order',
+    'export_used_symbol',
+    'export_used_exchange',
+    'text',
+    'email',
+    'chat'
+])
+
+# Notifications whose configuration is checked on the calling thread before they are queued
+NOTIFY_METHODS = frozenset(['text', 'email', 'chat'])
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+
+class ReportEvent(typing.NamedTuple):
+    time: float
+    method: str
+    args: tuple
+    kwargs: dict
+
+    def to_json(self) -> str:
+        return json.dumps({'time': self.time, 'method': self.method, 'args': self.args, 'kwargs': self.kwargs},
+                          default=str)
+
+
+class FileSink:
+    def __init__(self, file_path: str):
+        """
+        Append every batch of events to a file as JSON lines
+
+        Args:
+            file_path: Path of the file to append to
+        """
+        self.file_path = file_path
+
+    def write(self, events: typing.List[ReportEvent]):
+        with open(self.file_path, 'a') as file:
+            file.write(''.join(event.to_json() + '\n' for event in events))
+
+    def close(self):
+        pass
+
+
+class UnixSocketSink:
+    def __init__(self, socket_path: str, timeout: float = 1.0):
+        """
+        Stream every batch of events as JSON lines to a process listening on a Unix socket. The connection is made
+        when the first batch is written and remade after any error.
+
+        Args:
+            socket_path: Path of the listening socket
+            timeout: Seconds to wait on the socket before the batch is counted as failed
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.__socket = None
+
+    def write(self, events: typing.List[ReportEvent]):
+        data = ''.join(event.to_json() + '\n' for event in events).encode('utf-8')
+        try:
+            if self.__socket is None:
+                self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.__socket.settimeout(self.timeout)
+                self.__socket.connect(self.socket_path)
+            self.__socket.sendall(data)
+        except OSError:
+            self.close()
+            raise
+
+    def close(self):
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+
+def create_sink(target: typing.Optional[str]):
+    """
+    Create the local sink for a settings value: None for no sink, unix:///path/to.sock for a Unix socket or a file path
+    """
+    if not target:
+        return None
+    if target.startswith('unix://'):
+        return UnixSocketSink(target[len('unix://'):])
+    return FileSink(target)
+
+
+class ReportingPipeline:
+    def __init__(self, reporter, asynchronous: bool = None, max_queued_events: int = None, batch_size: int = None,
+                 flush_interval: float = None, overflow_policy: str = None, sink=None):
+        """
+        Stand in front of a reporter so that calls which don't return anything are queued and delivered in batches
+        from a background thread. Calls that return something go straight to the reporter.
+
+        Anything left unset is read from the "reporting" block of settings.json the first time an event is queued.
+
+        Args:
+            reporter: The reporter that the events are delivered to
+            asynchronous: Set to False to deliver every event on the calling thread
+            max_queued_events: Events that can wait for delivery before the overflow policy applies
+            batch_size: Most events delivered in one batch
+            flush_interval: Seconds a partial batch waits before it is delivered
+            overflow_policy: drop_oldest to make room for new events or drop_newest to discard new events when full
+            sink: An object with write(events) & close() that receives every batch, such as a FileSink
+        """
+        self.reporter = reporter
+        self.__options = {
+            'asynchronous': asynchronous,
+            'max_queued_events': max_queued_events,
+            'batch_size': batch_size,
+            'flush_interval': flush_interval,
+            'overflow_policy': overflow_policy,
+            'local_sink': sink
+        }
+        self.__configured = False
+        self.sink = None
+
+        self.__events = collections.deque()
+        self.__condition = threading.Condition()
+        self.__in_flight = 0
+        self.__thread = None
+        self.__closed = False
+        # Callers waiting in flush() so partial batches go out without waiting for the interval
+        self.__flushing = 0
+        self.counters = collections.Counter()
+
+    def __configure(self):
+        settings = load_user_preferences(override_allow_nonexistent=True)['settings']['reporting']
+        for key, value in self.__options.items():
+            if value is None:
+                self.__options[key] = settings[key]
+        if self.__options['overflow_policy'] not in OVERFLOW_POLICIES:
+            raise ValueError(f"The reporting overflow policy must be one of {OVERFLOW_POLICIES}")
+
+        sink = self.__options['local_sink']
+        self.sink = create_sink(sink) if sink is None or isinstance(sink, str) else sink
+        self.__configured = True
+
+    def __getattr__(self, name):
+        # Only called for attributes the pipeline doesn't have, so everything else is the reporter's
+        if name == 'reporter':
+            raise AttributeError(name)
+        attribute = getattr(self.reporter, name)
+        if name not in QUEUED_METHODS:
+            return attribute
+
+        def queued(*args, **kwargs):
+            # A bad notify.json is raised here rather than printed later from the background thread
+            if name in NOTIFY_METHODS and hasattr(self.reporter, 'validate_notify'):
+                self.reporter.validate_notify(name)
+            self.submit(name, *args, **kwargs)
+        return queued
+
+    def submit(self, method: str, *args, **kwargs) -> bool:
+        """
+        Queue a reporter call
+
+        Args:
+            method: Name of the reporter method
+            args: Positional arguments of the call
+            kwargs: Keyword arguments of the call
+
+        Returns:
+            False if this event was dropped because the queue was full
+        """
+        event = ReportEvent(time.time(), method, args, kwargs)
+        with self.__condition:
+            if not self.__configured:
+                self.__configure()
+            self.counters['submitted'] += 1
+
+            if not self.__options['asynchronous'] or self.__closed:
+                self.__in_flight += 1
+            else:
+                if len(self.__events) >= self.__options['max_queued_events']:
+                    self.counters['dropped'] += 1
+                    if self.__options['overflow_policy'] == 'drop_newest':
+                        return False
+                    self.__events.popleft()
+                self.__events.append(event)
+                if self.__thread is None:
+                    self.__start()
+                elif len(self.__events) == 1 or len(self.__events) >= self.__options['batch_size']:
+                    self.__condition.notify_all()
+                return True
+
+        # Synchronous delivery
+        self.__deliver([event])
+        return True
+
+    def __start(self):
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        # Events that are still queued when the program exits are flushed
+        atexit.register(self.close)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__closed or self.__events)
+                # Give a partial batch the flush interval to fill up
+                deadline = time.time() + self.__options['flush_interval']
+                while not (self.__closed or self.__flushing) and len(self.__events) < self.__options['batch_size']:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.__condition.wait(remaining)
+
+                if not self.__events:
+                    return
+                batch = [self.__events.popleft() for _ in range(min(len(self.__events),
+                                                                   self.__options['batch_size']))]
+                self.__in_flight += len(batch)
+
+            self.__deliver(batch)
+
+    def __deliver(self, batch: typing.List[ReportEvent]):
+        if self.sink is not None:
+            try:
+                self.sink.write(batch)
+            except Exception:
+                self.counters['sink_failures'] += 1
+
+        delivered = 0
+        for event in batch:
+            try:
+                getattr(self.reporter, event.method)(*event.args, **event.kwargs)
+                delivered += 1
+            except Exception:
+                info_print(f"Reporter call {event.method} failed:")
+                traceback.print_exc()
+
+        with self.__condition:
+            self.counters['delivered'] += delivered
+            self.counters['failed'] += len(batch) - delivered
+            self.counters['batches'] += 1
+            self.__in_flight -= len(batch)
+            self.__condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait until every queued event has been delivered
+
+        Args:
+            timeout: Most seconds to wait, None waits until the queue is empty
+
+        Returns:
+            True if everything was delivered before the timeout
+        """
+        with self.__condition:
+            self.__flushing += 1
+            self.__condition.notify_all()
+            try:
+                return self.__condition.wait_for(lambda: not self.__events and not self.__in_flight, timeout)
+            finally:
+                self.__flushing -= 1
+
+    def close(self, timeout: float = 5):
+        """
+        Deliver what is queued and stop the background thread. Events submitted afterwards are delivered inline.
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__condition.notify_all()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        if self.sink is not None:
+            self.sink.close()
+
+    def stats(self) -> dict:
+        with self.__condition:
+            stats = dict(self.counters)
+            stats['pending'] = len(self.__events)
+        return stats
@@ -29,6 +29,7 @@ from blankly.exchanges.interfaces.alpaca.alpaca_interface import AlpacaInterface
 from blankly.exchanges.interfaces.binance.binance_interface import BinanceInterface
 from blankly.exchanges.interfaces.kucoin.kucoin_interface import KucoinInterface
 from blankly.exchanges.interfaces.okx.okx_interface import OkxInterface
+from blankly.exchanges.simulated_urls import check_simulated_exchange
 
 
 class Exchange(ABCExchange, abc.ABC):
@@ -42,6 +43,9 @@ class Exchange(ABCExchange, abc.ABC):
         self.portfolio_name = self.__name
 
         self.preferences = blankly.utils.load_user_preferences(preferences_path)
+        # Paper trade wraps an exchange that was already checked & keyless never connects
+        if exchange_type not in ('paper_trade', 'keyless'):
+            check_simulated_exchange(self.preferences['settings']['simulated_exchange_url'], exchange_type)
 
         self.models = {}
 
@@ -22,6 +22,7 @@ import blankly
 from blankly.exchanges.abc_base_exchange import ABCBaseExchange
 from blankly.exchanges.auth.utils import write_auth_cache
 from blankly.exchanges.interfaces.futures_exchange_interface import FuturesExchangeInterface
+from blankly.exchanges.simulated_urls import check_simulated_exchange
 
 
 class FuturesExchange(ABCBaseExchange, abc.ABC):
@@ -36,6 +37,7 @@ class FuturesExchange(ABCBaseExchange, abc.ABC):
         self.portfolio_name = portfolio_name  # my_cool_portfolio
         self.preferences = blankly.utils.load_user_preferences(
             preferences_path)
+        check_simulated_exchange(self.preferences['settings']['simulated_exchange_url'], exchange_type)
         self.models = {}
 
     @property
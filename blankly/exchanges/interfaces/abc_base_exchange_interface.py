@@ -28,12 +28,15 @@ import pandas
 import pandas as pd
 
 from blankly import utils
+from blankly.exchanges.interfaces.history_cache import HistoryCache
 from blankly.utils import time_interval_to_seconds
 
 
 # A lot of this class is just glue between ExchangeInterface and the new Futures classes.
 # At some point it should probably all be refactored away but for now let's get futures working!
 class ABCBaseExchangeInterface(abc.ABC):
+    # Set by interfaces that cache live history
+    history_cache: HistoryCache = None
 
     @abc.abstractmethod
     def get_exchange_type(self):
@@ -53,7 +56,15 @@ class ABCBaseExchangeInterface(abc.ABC):
 
         start, stop, res_seconds, to, present = self.calculate_epochs(start_date, end_date, resolution, to)
 
-        response = self.overridden_history(symbol, start, stop, res_seconds, to=to,)
+        if self.history_cache is not None and self.history_cache.enabled and self.backtesting_time() is None:
+            # Live calls only download the candles that closed since the previous call
+            response = self.history_cache.history(symbol, start, stop, res_seconds, to, present,
+                                                  lambda start_, stop_, to_: self.overridden_history(symbol, start_,
+                                                                                                     stop_,
+                                                                                                     res_seconds,
+                                                                                                     to=to_))
+        else:
+            response = self.overridden_history(symbol, start, stop, res_seconds, to=to,)
 
         # Add a check to make sure that coinbase pro has updated
         # I tried to delete this code but the entire function broke :(
@@ -86,7 +97,7 @@ class ABCBaseExchangeInterface(abc.ABC):
                     utils.info_print("Most recent bar at this resolution does not yet exist - skipping.")
                     break
 
-            response = response.append(data_append, ignore_index=True)
+            response = pd.concat([response, pd.DataFrame(data_append)], ignore_index=True)
 
         # Determine the deque length - we really should use this generally
         if isinstance(to, int):
@@ -211,6 +211,19 @@ class ABCExchangeInterface(ABCBaseExchangeInterface, abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def get_prices(self,
+                   symbols: list) -> dict:
+        """
+        Returns the prices of many symbols, using a single request on exchanges that can quote in bulk.
+        Args:
+            symbols: The assets such as ['BTC-USD', 'ETH-USD'] or ['MSFT', 'AAPL']
+
+        Returns:
+            A dictionary keyed by symbol: {'BTC-USD': 40000.0, 'ETH-USD': 3000.0}
+        """
+        pass
+
     @property
     @abc.abstractmethod
     def account(self) -> AttributeDict:
@@ -25,6 +25,8 @@ import pandas as pd
 from alpaca_trade_api.rest import APIError as AlpacaAPIError, TimeFrame
 
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
@@ -65,6 +67,7 @@ class AlpacaInterface(ExchangeInterface):
                 pass
         self.__unique_assets = filtered_assets
 
+    @cached_metadata('products')
     def get_products(self) -> dict:
         """
         [
@@ -110,6 +113,7 @@ class AlpacaInterface(ExchangeInterface):
         return float(account_dict['buying_power'])
 
     @utils.enforce_base_asset
+    @coalesced_read('account')
     def get_account(self, symbol=None):
         assert isinstance(self.calls, alpaca_trade_api.REST)
 
@@ -212,6 +216,7 @@ class AlpacaInterface(ExchangeInterface):
         return response
 
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol, side, size) -> MarketOrder:
         assert isinstance(self.calls, alpaca_trade_api.REST)
 
@@ -224,6 +229,7 @@ class AlpacaInterface(ExchangeInterface):
         return MarketOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self, symbol: str, side: str, price: float, size: float) -> LimitOrder:
         needed = self.needed['limit_order']
         order = utils.build_order_info(price, side, size, symbol, 'limit')
@@ -239,6 +245,7 @@ class AlpacaInterface(ExchangeInterface):
         return LimitOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self, symbol: str, price: float, size: float) -> TakeProfitOrder:
         side = 'sell'
         needed = self.needed['take_profit']
@@ -255,6 +262,7 @@ class AlpacaInterface(ExchangeInterface):
         return TakeProfitOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self, symbol: str, price: float, size: float) -> StopLossOrder:
         side = 'sell'
         needed = self.needed['stop_loss']
@@ -281,6 +289,7 @@ class AlpacaInterface(ExchangeInterface):
             response['time_in_force'] = response['time_in_force'].upper()
         return response
 
+    @invalidates_reads
     def cancel_order(self, symbol, order_id) -> dict:
         assert isinstance(self.calls, alpaca_trade_api.REST)
         self.calls.cancel_order(order_id)
@@ -288,6 +297,7 @@ class AlpacaInterface(ExchangeInterface):
         # TODO: handle the different response codes
         return {'order_id': order_id}
 
+    @coalesced_read('open_orders')
     def get_open_orders(self, symbol=None):
         assert isinstance(self.calls, alpaca_trade_api.REST)
         if symbol is None:
@@ -530,13 +540,7 @@ class AlpacaInterface(ExchangeInterface):
         assert isinstance(self.calls, alpaca_trade_api.REST)
         current_price = self.get_price(symbol)
 
-        products = self.get_products()
-
-        product = None
-        for i in products:
-            if i['symbol'] == symbol:
-                product = i
-                break
+        product = self.get_product(symbol)
         if product is None:
             raise APIException("Symbol not found.")
 
@@ -619,11 +623,22 @@ class AlpacaInterface(ExchangeInterface):
             }
         }
 
+    @coalesced_read('prices')
     def get_price(self, symbol) -> float:
         assert isinstance(self.calls, alpaca_trade_api.REST)
         response = self.calls.get_latest_trade(symbol=symbol)
         return float(response['p'])
 
+    @coalesced_read('prices')
+    def get_prices(self, symbols: list) -> dict:
+        assert isinstance(self.calls, alpaca_trade_api.REST)
+        # Alpaca quotes every symbol in a single request
+        response = self.calls.get_latest_trades(symbols=list(dict.fromkeys(symbols)))
+        try:
+            return {symbol: float(response[symbol]['p']) for symbol in symbols}
+        except KeyError as e:
+            raise APIException(f"No price found for {e}")
+
     @staticmethod
     def parse_yfinance(symbol: str, epoch_start: [int, float], epoch_stop: [int, float], resolution: int):
         try:
@@ -26,6 +26,7 @@ import msgpack
 from websocket import create_connection
 
 import blankly
+from blankly.data.recorder import BufferedFileWriter
 from blankly.utils.utils import info_print
 from blankly.exchanges.abc_exchange_websocket import ABCExchangeWebsocket
 from blankly.exchanges.auth.utils import load_auth
@@ -106,15 +107,11 @@ class Tickers(ABCExchangeWebsocket):
         self.__logging_callback, self.__interface_callback, log_message = switch_type(stream)
         self.__kwargs = kwargs
 
-        # Initialize log file
+        # Initialize log file, lines are handed to a background writer so the socket thread never waits on the disk
         if log is not None:
             self.__log = True
             self.__filePath = log
-            try:
-                self.__file = open(log, 'x+')
-                self.__file.write(log_message)
-            except FileExistsError:
-                self.__file = open(log, 'a')
+            self.__file = BufferedFileWriter(log, header=log_message)
         else:
             self.__log = False
 
@@ -125,6 +122,8 @@ class Tickers(ABCExchangeWebsocket):
         self.__most_recent_tick = None
         self.__most_recent_time = None
         self.__callbacks = []
+        # Called with each message before it is parsed, such as by a recorder
+        self.raw_listeners = []
         self.__pre_event_callback = pre_event_callback
 
         # Reload preferences
@@ -163,32 +162,9 @@ class Tickers(ABCExchangeWebsocket):
             persist_connected = self.ws.connected
             try:
                 received = self.ws.recv()
-                received = msgpack.unpackb(received)[0]  # type: dict
-                # Modify time to use epoch
-
-                if 't' in received:
-                    received['t'] = parse_alpaca_timestamp(received['t'])
-                    recent_time = received['t']
-                elif 'code' in received:
-                    continue
-                else:
-                    recent_time = time.time()
-
-                self.log_response(self.__logging_callback, received)
-
-                # Manage price events and fire for each manager attached
-                interface_message = self.__interface_callback(received)
-
-                self.__most_recent_time = recent_time
-                self.__time_feed.append(self.__most_recent_time)
-                self.__most_recent_tick = interface_message
-                self.__ticker_feed.append(interface_message)
-
-                try:
-                    for i in self.__callbacks:
-                        i(interface_message, **self.__kwargs)
-                except Exception:
-                    traceback.print_exc()
+                for listener in self.raw_listeners:
+                    listener(received)
+                self.__on_message(received)
 
                 counter += 1
             except Exception:
@@ -205,6 +181,64 @@ class Tickers(ABCExchangeWebsocket):
                     # Update response
                     self.__response = self.ws.recv()
 
+    def __on_message(self, message: bytes):
+        received = msgpack.unpackb(message)[0]  # type: dict
+        # Modify time to use epoch
+
+        if 't' in received:
+            received['t'] = parse_alpaca_timestamp(received['t'])
+            recent_time = received['t']
+        elif 'code' in received:
+            return
+        else:
+            recent_time = time.time()
+
+        self.log_response(self.__logging_callback, received)
+
+        # Manage price events and fire for each manager attached
+        interface_message = self.__interface_callback(received)
+        self.__on_interface_message(interface_message, recent_time)
+
+    def __on_interface_message(self, interface_message, recent_time):
+        self.__most_recent_time = recent_time
+        self.__time_feed.append(self.__most_recent_time)
+        self.__most_recent_tick = interface_message
+        self.__ticker_feed.append(interface_message)
+
+        try:
+            for i in self.__callbacks:
+                i(interface_message, **self.__kwargs)
+        except Exception:
+            traceback.print_exc()
+
+    def log_response(self, logging_callback: callable, message: dict):
+        if self.__log:
+            self.__file.write(logging_callback(message))
+
+    def append_raw_listener(self, listener: callable):
+        """
+        Add a function that is called with every message before it is parsed, such as a recorder
+        """
+        self.raw_listeners.append(listener)
+
+    def inject(self, message, normalized: bool = False):
+        """
+        Push a message into the websocket as if it was received live. This is used to replay recordings.
+
+        Args:
+            message: A raw msgpack message or a normalized message
+            normalized: If normalized the parsing is skipped and the message goes directly to the callbacks
+        """
+        if not normalized:
+            self.__on_message(message)
+            return
+        recent_time = message.get('time', time.time()) if isinstance(message, dict) else time.time()
+        self.__on_interface_message(message, recent_time)
+
+    @property
+    def stream(self):
+        return self.__stream
+
     """ Required in manager """
 
     def is_websocket_open(self):
@@ -218,6 +252,13 @@ class Tickers(ABCExchangeWebsocket):
     def append_callback(self, obj):
         self.__callbacks.append(obj)
 
+    def remove_callback(self, obj):
+        """
+        Stop calling a callback that was appended, leaving the websocket open for any others
+        """
+        # Swapped rather than modified because the websocket thread may be looping over the list
+        self.__callbacks = [i for i in self.__callbacks if i != obj]
+
     """ Define a variable each time so there is no array manipulation """
     """ Required in manager """
 
@@ -247,7 +288,12 @@ class Tickers(ABCExchangeWebsocket):
 
     """ Required in manager """
 
+    def flush_log(self):
+        if self.__log:
+            self.__file.flush()
+
     def close_websocket(self):
+        self.flush_log()
         if self.ws.connected:
             self.ws.close()
         else:
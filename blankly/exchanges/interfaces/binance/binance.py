@@ -20,6 +20,7 @@ from binance.client import Client
 
 from blankly.exchanges.exchange import Exchange
 from blankly.exchanges.auth.auth_constructor import AuthConstructor
+from blankly.exchanges.simulated_urls import binance_client
 from blankly.utils import utils
 
 
@@ -32,7 +33,11 @@ class Binance(Exchange):
 
         sandbox = super().evaluate_sandbox(auth)
 
-        if sandbox:
+        simulated_url = self.preferences['settings']['simulated_exchange_url']
+        if simulated_url:
+            calls = binance_client(simulated_url, api_key=auth.keys['API_KEY'], api_secret=auth.keys['API_SECRET'],
+                                   tld=self.preferences["settings"]['binance']["binance_tld"])
+        elif sandbox:
             calls = Client(api_key=auth.keys['API_KEY'], api_secret=auth.keys['API_SECRET'],
                            tld=self.preferences["settings"]['binance']["binance_tld"],
                            testnet=True)
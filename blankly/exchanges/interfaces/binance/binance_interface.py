@@ -23,6 +23,8 @@ import blankly.utils.exceptions as exceptions
 import blankly.utils.utils
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
@@ -66,6 +68,7 @@ class BinanceInterface(ExchangeInterface):
                 filtered_base_assets.append(i)
         self.__available_currencies = filtered_base_assets
 
+    @cached_metadata('products')
     def get_products(self):
         needed = self.needed['get_products']
         """
@@ -157,6 +160,7 @@ class BinanceInterface(ExchangeInterface):
         return products
 
     @utils.enforce_base_asset
+    @coalesced_read('account')
     def get_account(self, symbol=None) -> utils.AttributeDict:
         """
         Get all currencies in an account, or sort by asset/account_id
@@ -272,6 +276,7 @@ class BinanceInterface(ExchangeInterface):
         return response
 
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol, side, size) -> MarketOrder:
         """
         Used for buying or selling market orders
@@ -342,6 +347,7 @@ class BinanceInterface(ExchangeInterface):
         return MarketOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self, symbol, side, price, size) -> LimitOrder:
         """
         Used for buying or selling limit orders
@@ -399,6 +405,7 @@ class BinanceInterface(ExchangeInterface):
         return LimitOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self, symbol, price, size) -> TakeProfitOrder:
         """
         Used for sending take profit orders
@@ -455,6 +462,7 @@ class BinanceInterface(ExchangeInterface):
         return TakeProfitOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self, symbol, price, size) -> StopLossOrder:
         """
         Used for sending stop loss orders
@@ -510,6 +518,7 @@ class BinanceInterface(ExchangeInterface):
         response = self._fix_response(needed, response)
         return StopLossOrder(order, response, self)
 
+    @invalidates_reads
     def cancel_order(self, symbol, order_id) -> dict:
         """Cancel an active order. Either orderId or origClientOrderId must be sent.
 
@@ -547,6 +556,7 @@ class BinanceInterface(ExchangeInterface):
         response = utils.rename_to(renames, response)
         return utils.isolate_specific(needed, response)
 
+    @coalesced_read('open_orders')
     def get_open_orders(self, symbol=None):
         """
         List open orders.
@@ -646,6 +656,7 @@ class BinanceInterface(ExchangeInterface):
     binance: get_trade_fee
     """
 
+    @cached_metadata('fees')
     def get_fees(self, symbol) -> dict:
         needed = self.needed['get_fees']
         """
@@ -1097,6 +1108,7 @@ class BinanceInterface(ExchangeInterface):
             }
         }
 
+    @coalesced_read('prices')
     def get_price(self, symbol) -> float:
         """
         Returns just the price of an asset.
@@ -1104,3 +1116,14 @@ class BinanceInterface(ExchangeInterface):
         symbol = utils.to_exchange_symbol(symbol, "binance")
         response = self.calls.get_symbol_ticker(symbol=symbol)
         return float(response['price'])
+
+    @coalesced_read('prices')
+    def get_prices(self, symbols: list) -> dict:
+        """
+        Returns the prices of many assets from a single snapshot of every ticker
+        """
+        prices = {ticker['symbol']: float(ticker['price']) for ticker in self.calls.get_symbol_ticker()}
+        try:
+            return {symbol: prices[utils.to_exchange_symbol(symbol, "binance")] for symbol in symbols}
+        except KeyError as e:
+            raise exceptions.APIException(f"No price found for {e}")
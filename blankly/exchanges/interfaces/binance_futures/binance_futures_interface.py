@@ -42,6 +42,7 @@ from blankly.utils import utils, time_builder
 from blankly.enums import MarginType, PositionMode, Side, TimeInForce, HedgeMode, OrderType, ContractType, OrderStatus
 from blankly.exchanges.interfaces.futures_exchange_interface import FuturesExchangeInterface
 from blankly.exchanges.orders.futures.futures_order import FuturesOrder
+from blankly.utils.exceptions import APIException
 
 BINANCE_FUTURES_FEES = [
     (0.00020, 0.00040),
@@ -378,6 +379,14 @@ class BinanceFuturesInterface(FuturesExchangeInterface):
         symbol = self.to_exchange_symbol(symbol)
         return float(self.calls.futures_mark_price(symbol=symbol)['markPrice'])
 
+    def get_prices(self, symbols: list) -> dict:
+        # Without a symbol every mark price comes back in one request
+        marks = {mark['symbol']: float(mark['markPrice']) for mark in self.calls.futures_mark_price()}
+        try:
+            return {symbol: marks[self.to_exchange_symbol(symbol)] for symbol in symbols}
+        except KeyError as e:
+            raise APIException(f"No mark price found for {e}")
+
     def get_fees(self) -> dict:
         # https://www.binance.com/en/blog/futures/trade-crypto-futures-how-much-does-it-cost-421499824684902239
         tier = int(self.calls.futures_account()['feeTier'])
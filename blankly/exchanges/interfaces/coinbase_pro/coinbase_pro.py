@@ -19,6 +19,7 @@
 from blankly.exchanges.auth.auth_constructor import AuthConstructor
 from blankly.exchanges.exchange import Exchange
 from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_api import API as CoinbaseProAPI
+from blankly.exchanges.simulated_urls import rest_url
 from blankly.utils import info_print
 
 
@@ -35,7 +36,13 @@ class CoinbasePro(Exchange):
         sandbox = super().evaluate_sandbox(auth)
 
         keys = auth.keys
-        if sandbox:
+        simulated_url = self.preferences['settings']['simulated_exchange_url']
+        if simulated_url:
+            calls = CoinbaseProAPI(api_key=keys['API_KEY'],
+                                   api_secret=keys['API_SECRET'],
+                                   api_pass=keys['API_PASS'],
+                                   api_url=rest_url(simulated_url, 'coinbase_pro'))
+        elif sandbox:
             calls = CoinbaseProAPI(api_key=keys['API_KEY'],
                                    api_secret=keys['API_SECRET'],
                                    api_pass=keys['API_PASS'],
@@ -23,6 +23,8 @@ import pandas as pd
 import blankly.utils.time_builder
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_limit import StopLimit
@@ -48,6 +50,7 @@ class CoinbaseProInterface(ExchangeInterface):
         except KeyError:
             pass
 
+    @cached_metadata('products')
     def get_products(self):
         needed = self.needed['get_products']
         """
@@ -83,6 +86,7 @@ class CoinbaseProInterface(ExchangeInterface):
         return products
 
     @utils.enforce_base_asset
+    @coalesced_read('account')
     def get_account(self, symbol=None) -> utils.AttributeDict:
         """
         Get all currencies in an account, or sort by symbol/account_id
@@ -134,6 +138,7 @@ class CoinbaseProInterface(ExchangeInterface):
         return parsed_dictionary
 
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol, side, size) -> MarketOrder:
         """
         Used for buying or selling market orders
@@ -169,6 +174,7 @@ class CoinbaseProInterface(ExchangeInterface):
         return MarketOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self, symbol, side, price, size) -> LimitOrder:
         """
         Used for buying or selling limit orders
@@ -215,6 +221,7 @@ class CoinbaseProInterface(ExchangeInterface):
         return response
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self, symbol, price, size) -> TakeProfitOrder:
         """
         Used for placing a take-profit orders
@@ -250,6 +257,7 @@ class CoinbaseProInterface(ExchangeInterface):
         return TakeProfitOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self, symbol, price, size) -> StopLossOrder:
         """
         Used for placing a stop-loss order
@@ -345,6 +353,7 @@ class CoinbaseProInterface(ExchangeInterface):
         response["symbol"] = response.pop('product_id')
         return StopLimit(order, response, self)
 
+    @invalidates_reads
     def cancel_order(self, symbol, order_id) -> dict:
         """
         Returns:
@@ -353,6 +362,7 @@ class CoinbaseProInterface(ExchangeInterface):
         """
         return {"order_id": self.calls.cancel_order(order_id)}
 
+    @coalesced_read('open_orders')
     def get_open_orders(self, symbol=None):
         """
         List open orders.
@@ -471,6 +481,7 @@ class CoinbaseProInterface(ExchangeInterface):
     binance: get_trade_fee
     """
 
+    @cached_metadata('fees')
     def get_fees(self, symbol) -> dict:
         needed = self.needed['get_fees']
         """
@@ -560,6 +571,7 @@ class CoinbaseProInterface(ExchangeInterface):
     binance: get_products
     """
 
+    @cached_metadata('order_filter')
     def get_order_filter(self, symbol: str):
         """
         Returns:
@@ -586,12 +598,8 @@ class CoinbaseProInterface(ExchangeInterface):
                 ...
             ]
             """
-        response = self.calls.get_products()
-        products = None
-        for i in response:
-            if i["id"] == symbol:
-                products = i
-                break
+        # The raw catalogue is cached & indexed by id so this doesn't download every product
+        products = self.metadata_cache.lookup('exchange_products', 'id', symbol, self.calls.get_products)
 
         if products is None:
             raise LookupError("Specified market not found")
@@ -640,6 +648,7 @@ class CoinbaseProInterface(ExchangeInterface):
             "exchange_specific": {**products}
         }
 
+    @coalesced_read('prices')
     def get_price(self, symbol) -> float:
         """
         Returns just the price of a currency pair.
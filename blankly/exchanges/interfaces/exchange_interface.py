@@ -17,10 +17,31 @@
 """
 
 import abc
-from functools import lru_cache
+import concurrent.futures
+import typing
 
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.abc_exchange_interface import ABCExchangeInterface
+from blankly.exchanges.interfaces.history_cache import HistoryCache
+from blankly.exchanges.interfaces.metadata_cache import get_metadata_cache
+from blankly.exchanges.interfaces.request_coalescer import RequestCoalescer, coalesced_read
+
+# Shared so that quoting many symbols doesn't start a thread per symbol
+_price_executor = concurrent.futures.ThreadPoolExecutor(max_workers=16, thread_name_prefix='blankly_prices')
+
+
+def get_prices_concurrently(get_price: typing.Callable[[str], float], symbols: typing.Iterable[str]) -> dict:
+    """
+    Quote each symbol with its own request for exchanges that can't quote in bulk, running the requests concurrently
+
+    Args:
+        get_price: Function that prices a single symbol
+        symbols: The symbols to price, duplicates are only quoted once
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if len(symbols) < 2:
+        return {symbol: get_price(symbol) for symbol in symbols}
+    return dict(zip(symbols, _price_executor.map(get_price, symbols)))
 
 
 # TODO: need to add a cancel all orders function
@@ -32,6 +53,14 @@ class ExchangeInterface(ABCExchangeInterface, abc.ABC):
         # Reload user preferences here
         self.user_preferences = utils.load_user_preferences(preferences_path)
 
+        # Products, filters & fees are shared with every other interface on this exchange & account
+        self.metadata_cache = get_metadata_cache(exchange_name, self.user_preferences['settings']['metadata_cache'],
+                                                 authenticated_api)
+        # Candles downloaded by history() while running live
+        self.history_cache = HistoryCache(exchange_name, **self.user_preferences['settings']['history_cache'])
+        # Concurrent identical reads share one request when enabled
+        self.request_coalescer = RequestCoalescer(**self.user_preferences['settings']['request_coalescing'])
+
         self.exchange_properties = None
         # Some exchanges like binance will not return a value of 0.00 if there is no balance
         self.available_currencies = {}
@@ -173,6 +202,13 @@ class ExchangeInterface(ABCExchangeInterface, abc.ABC):
     def get_exchange_type(self):
         return self.exchange_name
 
+    @coalesced_read('prices')
+    def get_prices(self, symbols: list) -> dict:
+        """
+        Overridden by interfaces that can quote many symbols in one request
+        """
+        return get_prices_concurrently(self.get_price, symbols)
+
     @property
     def account(self):
         return utils.AttributeDict(self.get_account())
@@ -258,10 +294,31 @@ class ExchangeInterface(ABCExchangeInterface, abc.ABC):
     def should_auto_trunc(self):
         return self.user_preferences['settings'].get('auto_truncate', False)
 
-    @lru_cache(None)
+    def get_product(self, symbol: str):
+        """
+        Find a single product from the cached catalogue
+
+        Args:
+            symbol: The product symbol, such as BTC-USD
+
+        Returns:
+            The product dictionary in the get_products() format or None if the exchange doesn't list it
+        """
+        return self.metadata_cache.lookup('products', 'symbol', symbol, self.get_products)
+
+    def invalidate_metadata(self, namespace: str = None, symbol: str = None):
+        """
+        Force products, order filters or fees to be downloaded again on their next use
+
+        Args:
+            namespace (Optional): 'products', 'order_filter' or 'fees'. Everything is invalidated if not given.
+            symbol (Optional): Only invalidate the values for this symbol
+        """
+        self.metadata_cache.invalidate(namespace, symbol)
+
     def get_asset_precision(self, asset):
+        product = self.get_product(asset)
         try:
-            product = next(p for p in self.get_products() if p['symbol'] == asset)
             return utils.increment_to_precision(product['base_increment'])
-        except (KeyError, StopIteration):
+        except (KeyError, TypeError):
             return 8  # reasonable default for symbols that don't exist
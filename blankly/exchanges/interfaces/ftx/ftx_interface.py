@@ -19,6 +19,8 @@
 import pandas as pd
 import time
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.interfaces.ftx.ftx_api import FTXAPI
@@ -28,6 +30,7 @@ from typing import List
 
 from blankly.exchanges.orders.stop_loss import StopLossOrder
 from blankly.exchanges.orders.take_profit import TakeProfitOrder
+from blankly.utils.exceptions import APIException
 
 
 class FTXInterface(ExchangeInterface):
@@ -93,6 +96,7 @@ class FTXInterface(ExchangeInterface):
     """
 
     # only includes markets of type "spot" (i.e. excludes futures)
+    @cached_metadata('products')
     def get_products(self) -> list:
 
         needed = self.needed['get_products']
@@ -120,6 +124,7 @@ class FTXInterface(ExchangeInterface):
         return end_products
 
     @utils.enforce_base_asset
+    @coalesced_read('account')
     def get_account(self, symbol: str = None) -> utils.AttributeDict:
         """
         Get all assets in an account, or sort by symbol/account_id
@@ -198,6 +203,7 @@ class FTXInterface(ExchangeInterface):
     """
 
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol: str, side: str, size: float) -> MarketOrder:
         """
         Used for buying or selling market orders
@@ -259,6 +265,7 @@ class FTXInterface(ExchangeInterface):
     """
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self,
                     symbol: str,
                     side: str,
@@ -292,6 +299,7 @@ class FTXInterface(ExchangeInterface):
         return response
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self,
                         symbol: str,
                         price: float,
@@ -315,6 +323,7 @@ class FTXInterface(ExchangeInterface):
         return StopLossOrder(order, response, self)
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self,
                           symbol: str,
                           price: float,
@@ -337,6 +346,7 @@ class FTXInterface(ExchangeInterface):
 
         return TakeProfitOrder(order, response, self)
 
+    @invalidates_reads
     def cancel_order(self, symbol: str, order_id: str) -> dict:
         """
         Cancel an order on a particular symbol & order id
@@ -380,6 +390,7 @@ class FTXInterface(ExchangeInterface):
     ]
     """
 
+    @coalesced_read('open_orders')
     def get_open_orders(self, symbol: str = None) -> list:
         """
         List open orders.
@@ -449,6 +460,7 @@ class FTXInterface(ExchangeInterface):
         response = utils.isolate_specific(needed, response)
         return response
 
+    @cached_metadata('fees')
     def get_fees(self, symbol) -> dict:
         """
         Get market fees
@@ -536,6 +548,7 @@ class FTXInterface(ExchangeInterface):
 
         return df
 
+    @cached_metadata('order_filter')
     def get_order_filter(self, symbol: str):
         """
         Find order limits for the exchange
@@ -612,6 +625,7 @@ class FTXInterface(ExchangeInterface):
             "exchange_specific": exchange_specific_keys
         }
 
+    @coalesced_read('prices')
     def get_price(self, symbol: str) -> float:
         """
         Returns just the price of a symbol.
@@ -619,3 +633,16 @@ class FTXInterface(ExchangeInterface):
             symbol: The asset such as (BTC-USD, or MSFT)
         """
         return float(self.get_calls().get_market(symbol)['price'])
+
+    @coalesced_read('prices')
+    def get_prices(self, symbols: list) -> dict:
+        """
+        Returns the prices of many symbols from a single listing of every market
+        Args:
+            symbols: The assets such as (BTC-USD, ETH-USD)
+        """
+        prices = {market['name']: market['price'] for market in self.get_calls().list_markets()}
+        try:
+            return {symbol: float(prices[symbol.replace('-', '/')]) for symbol in symbols}
+        except KeyError as e:
+            raise APIException(f"No price found for {e}")
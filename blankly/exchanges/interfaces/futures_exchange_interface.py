@@ -23,6 +23,8 @@ from typing import Union, Optional, List
 import blankly.utils.utils as utils
 from blankly.enums import MarginType, HedgeMode, PositionMode, OrderType, Side, TimeInForce, ContractType
 from blankly.exchanges.interfaces.abc_base_exchange_interface import ABCBaseExchangeInterface
+from blankly.exchanges.interfaces.exchange_interface import get_prices_concurrently
+from blankly.exchanges.interfaces.history_cache import HistoryCache
 from blankly.exchanges.orders.futures.futures_order import FuturesOrder
 
 
@@ -37,6 +39,8 @@ class FuturesExchangeInterface(ABCBaseExchangeInterface, abc.ABC):
         self.calls = authenticated_api
 
         self.user_preferences = utils.load_user_preferences(preferences_path)
+        # Candles downloaded by history() while running live
+        self.history_cache = HistoryCache(exchange_name, **self.user_preferences['settings']['history_cache'])
 
         self.exchange_properties = None
         self.available_currencies = {}
@@ -163,6 +167,10 @@ class FuturesExchangeInterface(ABCBaseExchangeInterface, abc.ABC):
         """Returns the current price of an asset"""
         pass
 
+    def get_prices(self, symbols: List[str]) -> dict:
+        """Returns the current prices of many assets, overridden by exchanges that can quote in bulk"""
+        return get_prices_concurrently(self.get_price, symbols)
+
     @property
     def account(self) -> dict:
         """Account information"""
@@ -0,0 +1,196 @@
+"""
+    Incremental in-memory cache for live interface.history() calls
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import threading
+
+import pandas as pd
+
+
+class HistoryCache:
+    def __init__(self, exchange_name: str, enabled: bool = True, max_bars: int = 10000,
+                 seed_from_price_caches: bool = False, price_cache_location: str = './price_caches'):
+        """
+        Hold the candles downloaded by interface.history() for each symbol & resolution so that repeated calls only
+        download the candles that closed since the last call.
+
+        Args:
+            exchange_name: The exchange type, used to find its files in the backtest price cache
+            enabled: Set to False to always download the full window
+            max_bars: Most recent candles kept per symbol & resolution
+            seed_from_price_caches: Load candles already downloaded by backtests before the first download
+            price_cache_location: The backtest "cache_location" folder
+        """
+        self.exchange_name = exchange_name
+        self.enabled = enabled
+        self.max_bars = max_bars
+        self.seed_from_price_caches = seed_from_price_caches
+        self.price_cache_location = price_cache_location
+
+        # (symbol, resolution) -> candles sorted by time
+        self.__frames = {}
+        # (symbol, resolution) -> [first, last] candle time that the cached candles are complete between
+        self.__coverage = {}
+        self.__seeded = set()
+
+        self.__locks = {}
+        self.__locks_lock = threading.Lock()
+
+        # Number of candles requested from the exchange, useful for seeing how much the cache saves
+        self.requested_bars = 0
+
+    def __lock(self, key) -> threading.Lock:
+        with self.__locks_lock:
+            lock = self.__locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self.__locks[key] = lock
+            return lock
+
+    def history(self, symbol: str, epoch_start: int, epoch_stop: int, resolution: int, to, present: bool,
+                loader: callable) -> pd.DataFrame:
+        """
+        Serve a history window from the cache, downloading only what is missing
+
+        Args:
+            symbol: The symbol of the candles
+            epoch_start: First candle time of the window
+            epoch_stop: Last candle time of the window
+            resolution: Resolution in seconds
+            to: The number of candles (int) or the time interval (str) that the window was built from, or None
+            present: The window ends at the most recent closed candle. The exchange may not have published that
+                candle yet, so the cache is only considered complete up to the candles that were returned.
+            loader: Function of (epoch_start, epoch_stop, to) that downloads candles
+        """
+        key = (symbol, resolution)
+        with self.__lock(key):
+            if self.seed_from_price_caches and key not in self.__seeded:
+                self.__seeded.add(key)
+                self.__seed(symbol, resolution)
+
+            coverage = self.__coverage.get(key)
+            if coverage is None or epoch_stop + resolution < coverage[0] or \
+                    epoch_start > coverage[1] + resolution or self.__needs_head(key, epoch_start, epoch_stop, to):
+                # Nothing usable is cached, download the whole window like an uncached call
+                self.__download(key, epoch_start, epoch_stop, to, present, loader)
+            elif epoch_stop > coverage[1]:
+                # Only download the candles that closed since the last call
+                count = max(int((epoch_stop - coverage[1]) // resolution), 1)
+                self.__download(key, coverage[1] + resolution, epoch_stop, count, present, loader)
+
+            return self.__window(key, epoch_start, epoch_stop, to)
+
+    def __needs_head(self, key, epoch_start: int, epoch_stop: int, to) -> bool:
+        coverage = self.__coverage[key]
+        if epoch_start >= coverage[0]:
+            return False
+        if isinstance(to, int):
+            # Stock exchanges skip closed hours, so a count can already be satisfied by candles before the window
+            frame = self.__frames[key]
+            return int((frame['time'] <= epoch_stop).sum()) < to
+        return True
+
+    def __download(self, key, epoch_start: int, epoch_stop: int, to, present: bool, loader: callable):
+        resolution = key[1]
+        downloaded = loader(epoch_start, epoch_stop, to)
+        self.requested_bars += int((epoch_stop - epoch_start) // resolution) + 1
+        if downloaded is None or len(downloaded) == 0:
+            return
+
+        # Candles past the window may still be forming
+        downloaded = downloaded[downloaded['time'] <= epoch_stop]
+        if len(downloaded) == 0:
+            return
+
+        first = min(epoch_start, downloaded['time'].iloc[0])
+        last = downloaded['time'].iloc[-1] if present else epoch_stop
+
+        coverage = self.__coverage.get(key)
+        frame = self.__frames.get(key)
+        if coverage is not None and first <= coverage[1] + resolution and last + resolution >= coverage[0]:
+            frame = pd.concat([frame, downloaded], ignore_index=True)
+            frame = frame.drop_duplicates(subset='time', keep='last').sort_values('time', ignore_index=True)
+            coverage = [min(first, coverage[0]), max(last, coverage[1])]
+        else:
+            frame = downloaded.sort_values('time', ignore_index=True)
+            coverage = [first, last]
+
+        if len(frame) > self.max_bars:
+            frame = frame.iloc[-self.max_bars:].reset_index(drop=True)
+            coverage[0] = frame['time'].iloc[0]
+
+        self.__frames[key] = frame
+        self.__coverage[key] = coverage
+
+    def __window(self, key, epoch_start: int, epoch_stop: int, to) -> pd.DataFrame:
+        frame = self.__frames.get(key)
+        if frame is None:
+            return pd.DataFrame(columns=['time', 'low', 'high', 'open', 'close', 'volume'])
+        times = frame['time']
+        if isinstance(to, int):
+            window = frame[times <= epoch_stop].iloc[-to:]
+        else:
+            window = frame[(times >= epoch_start) & (times <= epoch_stop)]
+        # Copy so the caller can't modify the cache
+        return window.reset_index(drop=True)
+
+    def __seed(self, symbol: str, resolution: int):
+        try:
+            files = os.listdir(self.price_cache_location)
+        except FileNotFoundError:
+            return
+
+        # Backtest cache files are named 'exchange,sandbox,symbol,start,stop,resolution.csv'
+        frames = []
+        for file in files:
+            identifier = file[:-4].split(',')
+            try:
+                if identifier[0] != self.exchange_name or identifier[2] != symbol or \
+                        int(float(identifier[5])) != resolution:
+                    continue
+            except (IndexError, ValueError):
+                continue
+            frames.append(pd.read_csv(os.path.join(self.price_cache_location, file)))
+
+        if not frames:
+            return
+        frame = pd.concat(frames, ignore_index=True)
+        frame = frame.drop_duplicates(subset='time', keep='last').sort_values('time', ignore_index=True)
+
+        # The cached files don't need to touch, only trust the most recent unbroken run of candles
+        gaps = (frame['time'].diff() > resolution).to_numpy().nonzero()[0]
+        if len(gaps):
+            frame = frame.iloc[gaps[-1]:].reset_index(drop=True)
+        frame = frame.iloc[-self.max_bars:].reset_index(drop=True)
+
+        self.__frames[(symbol, resolution)] = frame
+        self.__coverage[(symbol, resolution)] = [frame['time'].iloc[0], frame['time'].iloc[-1]]
+
+    def invalidate(self, symbol: str = None, resolution: int = None):
+        """
+        Drop cached candles so the next call downloads the full window
+
+        Args:
+            symbol: Only drop this symbol. None drops everything.
+            resolution: Only drop this resolution of the symbol
+        """
+        for key in list(self.__frames.keys()):
+            if (symbol is None or key[0] == symbol) and (resolution is None or key[1] == resolution):
+                with self.__lock(key):
+                    self.__frames.pop(key, None)
+                    self.__coverage.pop(key, None)
@@ -23,6 +23,8 @@ import pandas as pd
 import blankly.utils.time_builder
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
 from blankly.exchanges.orders.stop_loss import StopLossOrder
@@ -73,6 +75,7 @@ class KucoinInterface(ExchangeInterface):
         else:
             return response
 
+    @cached_metadata('products')
     def get_products(self):
         needed = self.needed['get_products']
         """
@@ -107,6 +110,7 @@ class KucoinInterface(ExchangeInterface):
             products[i] = utils.isolate_specific(needed, products[i])
         return products
 
+    @coalesced_read('account')
     def get_account(self, symbol=None) -> utils.AttributeDict:
         """
             Get all currencies in an account, or sort by symbol
@@ -171,6 +175,7 @@ class KucoinInterface(ExchangeInterface):
         return parsed_dictionary
 
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol, side, size) -> MarketOrder:
         """
             Used for buying or selling market orders
@@ -194,6 +199,7 @@ class KucoinInterface(ExchangeInterface):
         return MarketOrder(order, response_details, self)
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self, symbol, side, price, size) -> LimitOrder:
         """
             Used for buying or selling limit orders
@@ -226,6 +232,7 @@ class KucoinInterface(ExchangeInterface):
         return response_details
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self, symbol, price, size) -> StopLossOrder:
         """
             Used for take profit order
@@ -243,6 +250,7 @@ class KucoinInterface(ExchangeInterface):
         return StopLossOrder(order, response_details, self)
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self, symbol, price, size) -> TakeProfitOrder:
         """
             Used for take profit order
@@ -259,6 +267,7 @@ class KucoinInterface(ExchangeInterface):
         response_details = self._fetch_response_details(needed, response)
         return TakeProfitOrder(order, response_details, self)
 
+    @invalidates_reads
     def cancel_order(self, symbol, order_id) -> dict:
         """
         Returns:
@@ -267,6 +276,7 @@ class KucoinInterface(ExchangeInterface):
         """
         return {"order_id": self.__correct_api_call(self._trade.cancel_order(order_id)['cancelledOrderIds'][0])}
 
+    @coalesced_read('open_orders')
     def get_open_orders(self, symbol=None):
         """
         List open orders.
@@ -400,6 +410,7 @@ class KucoinInterface(ExchangeInterface):
 
         return utils.isolate_specific(needed, response)
 
+    @cached_metadata('fees')
     def get_fees(self, symbol) -> dict:
         needed = self.needed['get_fees']
         """
@@ -522,6 +533,7 @@ class KucoinInterface(ExchangeInterface):
 
         return df.reindex(columns=['time', 'low', 'high', 'open', 'close', 'volume'])
 
+    @cached_metadata('order_filter')
     def get_order_filter(self, symbol: str):
         """
         Returns:
@@ -597,6 +609,7 @@ class KucoinInterface(ExchangeInterface):
             "exchange_specific": {**products}
         }
 
+    @coalesced_read('prices')
     def get_price(self, symbol) -> float:
         """
         Returns the best bid price and size,
@@ -622,3 +635,17 @@ class KucoinInterface(ExchangeInterface):
                 raise APIException("Unknown API error")
             raise APIException("Error: " + response['msg'])
         return float(response['price'])
+
+    @coalesced_read('prices')
+    def get_prices(self, symbols: list) -> dict:
+        """
+        Returns the last traded price of many symbols from a single snapshot of every ticker
+        """
+        response = self.__correct_api_call(self._market.get_all_tickers())
+        if response is None:
+            raise APIException("Unknown API error")
+        prices = {ticker['symbol']: ticker['last'] for ticker in response['ticker']}
+        try:
+            return {symbol: float(prices[symbol]) for symbol in symbols}
+        except KeyError as e:
+            raise APIException(f"No price found for {e}")
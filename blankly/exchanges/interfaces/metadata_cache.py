@@ -0,0 +1,251 @@
+"""
+    TTL cache for exchange metadata such as products, order filters and fees
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import concurrent.futures
+import copy
+import functools
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+# One cache per exchange & account shared between every interface using that account
+__caches = {}
+__caches_lock = threading.Lock()
+
+
+class MetadataCache:
+    def __init__(self, exchange_name: str, products_ttl: float = 3600, order_filter_ttl: float = 3600,
+                 fees_ttl: float = 600, persist: bool = False, cache_location: str = './metadata_cache',
+                 account: str = None):
+        """
+        Hold exchange metadata for a limited time so that lookups don't re-download the catalogue
+
+        Args:
+            exchange_name: The exchange this cache holds metadata for
+            products_ttl: Seconds the product catalogue stays valid
+            order_filter_ttl: Seconds an order filter stays valid
+            fees_ttl: Seconds the fees stay valid
+            persist: Write the cache to disk so a restart begins warm
+            cache_location: Folder to persist into
+            account: Fingerprint of the credentials & endpoint the metadata was downloaded with
+        """
+        self.exchange_name = exchange_name
+        self.account = account
+        self.ttls = {
+            'products': products_ttl,
+            'order_filter': order_filter_ttl,
+            'fees': fees_ttl
+        }
+        self.__lock = threading.RLock()
+        # (namespace, key) -> (time stored, value)
+        self.__entries = {}
+        # (namespace, field) -> (time of the source entry, {field value: item})
+        self.__indexes = {}
+        # (namespace, key) -> (future, loading thread) of the download in flight so concurrent misses share it
+        self.__loading = {}
+        # Bumped by invalidate() so a download that started before it isn't stored
+        self.__generation = 0
+
+        self.__file_path = None
+        if persist:
+            file_name = exchange_name if account is None else f'{exchange_name}-{account}'
+            self.__file_path = os.path.join(cache_location, f'{file_name}.p')
+            self.__load()
+
+    def __ttl(self, namespace: str) -> float:
+        # Anything without its own TTL is catalogue data
+        return self.ttls.get(namespace, self.ttls['products'])
+
+    def __fresh(self, namespace: str, key):
+        entry = self.__entries.get((namespace, key))
+        if entry is not None and time.time() - entry[0] < self.__ttl(namespace):
+            return entry
+        return None
+
+    def __get_entry(self, namespace: str, key, loader: callable):
+        with self.__lock:
+            entry = self.__fresh(namespace, key)
+            if entry is not None:
+                return entry
+            loading = self.__loading.get((namespace, key))
+            owner = loading is None
+            if owner:
+                future = concurrent.futures.Future()
+                self.__loading[(namespace, key)] = (future, threading.get_ident())
+                generation = self.__generation
+
+        if not owner:
+            future, thread = loading
+            if thread == threading.get_ident():
+                # The loader reads its own key, such as lookup() with a cached get_products(). The outer call stores it.
+                return time.time(), loader()
+            return future.result()
+
+        # Download without holding the lock so other keys & fresh reads aren't held up
+        try:
+            entry = (time.time(), loader())
+        except Exception as exception:
+            with self.__lock:
+                del self.__loading[(namespace, key)]
+            future.set_exception(exception)
+            raise
+
+        with self.__lock:
+            del self.__loading[(namespace, key)]
+            if generation == self.__generation:
+                self.__entries[(namespace, key)] = entry
+                self.__save()
+        future.set_result(entry)
+        return entry
+
+    def get(self, namespace: str, key, loader: callable):
+        """
+        Read a value, calling the loader when it's missing or expired. Concurrent misses on the same key share one
+        call to the loader. A copy is returned so callers are free to modify it.
+
+        Args:
+            namespace: The type of metadata such as 'products', 'order_filter' or 'fees'
+            key: Distinguishes values in the namespace, such as the symbol. Use None for a single value.
+            loader: Function that downloads the value
+        """
+        return copy.deepcopy(self.__get_entry(namespace, key, loader)[1])
+
+    def lookup(self, namespace: str, field: str, value, loader: callable):
+        """
+        Find a single item in a cached list by one of its fields. The list is indexed into a dictionary once each time
+        it is downloaded, so this is a constant time lookup.
+
+        Args:
+            namespace: Namespace of the cached list
+            field: The field to index on, such as 'symbol'
+            value: The value to find
+            loader: Function that downloads the list
+
+        Returns:
+            A copy of the matching item or None if nothing matches
+        """
+        entry = self.__get_entry(namespace, None, loader)
+        with self.__lock:
+            index = self.__indexes.get((namespace, field))
+            if index is None or index[0] != entry[0]:
+                index = (entry[0], {item[field]: item for item in entry[1] if field in item})
+                self.__indexes[(namespace, field)] = index
+
+            item = index[1].get(value)
+            return copy.deepcopy(item) if item is not None else None
+
+    def invalidate(self, namespace: str = None, key=None):
+        """
+        Drop cached values so the next read downloads them again
+
+        Args:
+            namespace: Only drop this namespace. None drops everything.
+            key: Only drop this key in the namespace. None drops the whole namespace.
+        """
+        with self.__lock:
+            self.__generation += 1
+            for entry_key in list(self.__entries.keys()):
+                if namespace is None or (entry_key[0] == namespace and (key is None or entry_key[1] == key)):
+                    del self.__entries[entry_key]
+            for index_key in list(self.__indexes.keys()):
+                if namespace is None or index_key[0] == namespace:
+                    del self.__indexes[index_key]
+            self.__save()
+
+    def __load(self):
+        try:
+            with open(self.__file_path, 'rb') as file:
+                self.__entries = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.__entries = {}
+
+    def __save(self):
+        if self.__file_path is None:
+            return
+        os.makedirs(os.path.dirname(self.__file_path) or '.', exist_ok=True)
+        # Write then swap so a crash never leaves a partial file
+        temp_path = self.__file_path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            pickle.dump(self.__entries, file)
+        os.replace(temp_path, self.__file_path)
+
+
+def account_fingerprint(authenticated_api) -> str:
+    """
+    Identify the account & endpoint behind an authenticated API so that accounts, sandbox & live never share fees or
+    catalogues. The credentials are hashed rather than stored.
+
+    Args:
+        authenticated_api: The calls object given to the interface. Paper trade gives the interface it wraps.
+    """
+    parent = getattr(authenticated_api, 'metadata_cache', None)
+    if isinstance(parent, MetadataCache):
+        # Paper trade reports its own fees & can read a keyless catalogue, so it never shares with the live interface
+        return f'paper_trade-{parent.account}'
+
+    # Some exchanges such as kucoin & okx give a dictionary of clients
+    clients = authenticated_api.values() if isinstance(authenticated_api, dict) else [authenticated_api]
+    identity = []
+    for client in clients:
+        for name, value in sorted(getattr(client, '__dict__', {}).items()):
+            # Keys, secrets & urls are strings, sessions and other state are skipped
+            if isinstance(value, (str, bool)):
+                identity.append(f'{type(client).__name__}.{name}={value}')
+    return hashlib.sha256('\n'.join(identity).encode()).hexdigest()[:16]
+
+
+def get_metadata_cache(exchange_name: str, settings: dict = None, authenticated_api=None) -> MetadataCache:
+    """
+    Get the cache shared by every interface using the same exchange & account, creating it from the settings on first
+    use
+
+    Args:
+        exchange_name: The exchange type, such as 'coinbase_pro'
+        settings: The "metadata_cache" block of settings.json
+        authenticated_api: The calls object of the interface, used to keep accounts & sandbox/live apart
+    """
+    account = account_fingerprint(authenticated_api)
+    with __caches_lock:
+        if (exchange_name, account) not in __caches:
+            __caches[(exchange_name, account)] = MetadataCache(exchange_name, account=account, **(settings or {}))
+        return __caches[(exchange_name, account)]
+
+
+def cached_metadata(namespace: str):
+    """
+    Decorator for interface functions that return metadata for a symbol (or for the whole exchange when they take no
+    symbol). The result is served from the interface's metadata cache until the namespace's TTL expires.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if kwargs:
+                key = (args, tuple(sorted(kwargs.items())))
+            elif len(args) == 1:
+                # Most of these take only the symbol, which makes it easy to invalidate
+                key = args[0]
+            else:
+                key = args or None
+            return self.metadata_cache.get(namespace, key, lambda: func(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -38,6 +38,8 @@ class OandaAPI:
     # documentation here: http://developer.oanda.com/rest-live-v20/account-ep/
     API_URL = 'https://api-fxtrade.oanda.com'
     API_PRACTICE_URL = 'https://api-fxpractice.oanda.com'
+    STREAM_URL = 'https://stream-fxtrade.oanda.com'
+    STREAM_PRACTICE_URL = 'https://stream-fxpractice.oanda.com'
 
     def __init__(self, personal_access_token: str, account_id: str, sandbox: bool = False):
         self.__api_key = personal_access_token
@@ -23,6 +23,8 @@ from typing import Union
 import pandas as pd
 
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.interfaces.oanda.oanda_api import OandaAPI
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
@@ -75,6 +77,7 @@ class OandaInterface(ExchangeInterface):
 
         self.unique_assets = filtered_assets
 
+    @cached_metadata('products')
     def get_products(self) -> list:
         """
         Insturments response:
@@ -141,6 +144,7 @@ class OandaInterface(ExchangeInterface):
         return instruments
 
     @utils.enforce_base_asset
+    @coalesced_read('account')
     def get_account(self, symbol=None) -> utils.AttributeDict:
         if symbol is not None:
             symbol = self.__convert_blankly_to_oanda(symbol)
@@ -208,6 +212,7 @@ class OandaInterface(ExchangeInterface):
 
     # funds is the base asset (EUR_CAD the base asset is CAD)
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol: str, side: str, size: float) -> MarketOrder:
         symbol = self.__convert_blankly_to_oanda(symbol)
 
@@ -238,6 +243,7 @@ class OandaInterface(ExchangeInterface):
         return MarketOrder(order, resp, self)
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self, symbol: str, price: float, size: float) -> StopLossOrder:
         symbol = self.__convert_blankly_to_oanda(symbol)
         side = 'sell'
@@ -251,6 +257,7 @@ class OandaInterface(ExchangeInterface):
         return StopLossOrder(order, resp, self)
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self, symbol: str, price: float, size: float) -> TakeProfitOrder:
         symbol = self.__convert_blankly_to_oanda(symbol)
         side = 'sell'
@@ -264,6 +271,7 @@ class OandaInterface(ExchangeInterface):
         return TakeProfitOrder(order, resp, self)
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self, symbol: str, side: str, price: float, size: float) -> LimitOrder:
         symbol = self.__convert_blankly_to_oanda(symbol)
         if side == "buy":
@@ -301,11 +309,13 @@ class OandaInterface(ExchangeInterface):
         resp = utils.isolate_specific(needed, resp)
         return resp
 
+    @invalidates_reads
     def cancel_order(self, symbol, order_id) -> dict:
         # Either the Order’s OANDA-assigned OrderID or the Order’s client-provided ClientID prefixed by the “@” symbol
         self.calls.cancel_order(order_id)
         return {'order_id': order_id}
 
+    @coalesced_read('open_orders')
     def get_open_orders(self, symbol=None):
         if symbol is None:
             resp = self.calls.get_all_open_orders()
@@ -425,6 +435,7 @@ class OandaInterface(ExchangeInterface):
         resp = utils.isolate_specific(needed, resp)
         return resp
 
+    @coalesced_read('prices')
     def get_price(self, symbol: str) -> float:
         symbol = self.__convert_blankly_to_oanda(symbol)
         resp = self.calls.get_order_book(symbol)
@@ -0,0 +1,269 @@
+"""
+    Oanda ticker class built on the chunked HTTP pricing stream.
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import threading
+import time
+import traceback
+
+import requests
+
+import blankly.exchanges.interfaces.oanda.oanda_websocket_utils as websocket_utils
+from blankly.exchanges.auth.utils import load_auth
+from blankly.exchanges.interfaces.oanda.oanda_api import OandaAPI
+from blankly.exchanges.interfaces.websocket import Websocket
+from blankly.utils.exceptions import APIException
+from blankly.utils.utils import info_print
+
+
+class PricingStream:
+    def __init__(self, url: str, personal_access_token: str, account_id: str, heartbeat_timeout: float = 10,
+                 reconnect_delay: float = 1):
+        """
+        A single persistent connection to the Oanda pricing stream carrying every instrument that is subscribed to
+        it. Oanda takes the instruments when the stream is opened, so subscribing to a new instrument reopens the
+        stream the next time a message or heartbeat arrives.
+
+        Args:
+            url: Root of the streaming API, such as https://stream-fxtrade.oanda.com
+            personal_access_token: Oanda token used to authenticate
+            account_id: Account the prices are streamed for
+            heartbeat_timeout: Seconds without any data before the connection is considered lost and reopened. Oanda
+                sends a heartbeat every 5 seconds.
+            reconnect_delay: Seconds to wait before reconnecting after an error
+        """
+        self.url = url
+        self.account_id = account_id
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_delay = reconnect_delay
+
+        self.session = requests.session()
+        self.session.headers.update({"Accept-Datetime-Format": "UNIX",
+                                     'Authorization': 'Bearer {}'.format(personal_access_token)})
+
+        self.__listeners = {}
+        self.__lock = threading.Lock()
+        self.__resubscribe = False
+        self.__thread = None
+
+        self.connected = False
+        self.connections = 0
+        self.last_heartbeat = None
+
+    def subscribe(self, instrument: str, listener: callable):
+        """
+        Start receiving an instrument's prices, starting the stream if it isn't running
+
+        Args:
+            instrument: Oanda instrument such as EUR_USD
+            listener: Called with the raw line & the parsed message for each price of the instrument
+        """
+        with self.__lock:
+            listeners = self.__listeners.setdefault(instrument, [])
+            if not listeners:
+                self.__resubscribe = True
+            listeners.append(listener)
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+
+    def unsubscribe(self, instrument: str, listener: callable):
+        """
+        Stop sending an instrument's prices to a listener. The stream stops once nothing is subscribed.
+        """
+        with self.__lock:
+            listeners = self.__listeners.get(instrument, [])
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners and instrument in self.__listeners:
+                del self.__listeners[instrument]
+                self.__resubscribe = True
+
+    def get_instruments(self) -> list:
+        with self.__lock:
+            return sorted(self.__listeners)
+
+    def is_running(self) -> bool:
+        with self.__lock:
+            return self.__thread is not None
+
+    def __run(self):
+        while True:
+            with self.__lock:
+                instruments = sorted(self.__listeners)
+                self.__resubscribe = False
+                if not instruments:
+                    self.__thread = None
+                    return
+
+            resubscribed = False
+            try:
+                # The read timeout is what detects a lost heartbeat
+                response = self.session.get(f'{self.url}/v3/accounts/{self.account_id}/pricing/stream',
+                                            params={'instruments': ','.join(instruments)}, stream=True,
+                                            timeout=(self.heartbeat_timeout, self.heartbeat_timeout))
+                with response:
+                    if response.status_code != 200:
+                        raise APIException(response.text)
+                    self.connected = True
+                    self.connections += 1
+                    for line in response.iter_lines():
+                        if line:
+                            self.__dispatch(line)
+                        if self.__resubscribe:
+                            resubscribed = True
+                            break
+            except (requests.exceptions.RequestException, APIException) as e:
+                info_print(f"Oanda pricing stream for {','.join(instruments)} disconnected: {e}")
+            finally:
+                self.connected = False
+
+            if not resubscribed:
+                # Give a delay so a failing stream doesn't spin
+                time.sleep(self.reconnect_delay)
+
+    def __dispatch(self, line: bytes):
+        message = json.loads(line)
+        if message.get('type') == 'HEARTBEAT':
+            self.last_heartbeat = time.time()
+            return
+
+        with self.__lock:
+            listeners = list(self.__listeners.get(message.get('instrument'), []))
+        for listener in listeners:
+            try:
+                listener(line, message)
+            except Exception:
+                traceback.print_exc()
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_pricing_stream(url: str, personal_access_token: str, account_id: str,
+                       heartbeat_timeout: float = 10) -> PricingStream:
+    """
+    Find the stream already open for an account or create it, so that every ticker shares one connection
+    """
+    with _streams_lock:
+        key = (url, account_id)
+        if key not in _streams:
+            _streams[key] = PricingStream(url, personal_access_token, account_id, heartbeat_timeout)
+        return _streams[key]
+
+
+class Tickers(Websocket):
+    def __init__(self, symbol, stream="pricing", log=None, initially_stopped=False, stream_url=None,
+                 sandbox=None, personal_access_token=None, account_id=None, heartbeat_timeout=None, **kwargs):
+        """
+        Create and initialize the ticker
+        Args:
+            symbol: Currency pair to initialize on such as "EUR-USD"
+            stream: Stream to use, only "pricing" is supported
+            log: Fill this with a path to a log file that should be created
+            stream_url: Override the root of the streaming API
+            sandbox: Stream from the practice environment, defaults to the sandbox setting in the keys file
+            personal_access_token: Defaults to the first oanda portfolio in the keys file
+            account_id: Defaults to the first oanda portfolio in the keys file
+            heartbeat_timeout: Seconds without data before reconnecting, defaults to the stream_heartbeat_timeout
+                setting
+        """
+        self.__logging_callback, self.__interface_callback, log_message = websocket_utils.switch_type(stream)
+
+        if personal_access_token is None or account_id is None:
+            _, auth = load_auth('oanda')
+            personal_access_token = auth['PERSONAL_ACCESS_TOKEN']
+            account_id = auth['ACCOUNT_ID']
+            if sandbox is None:
+                sandbox = auth.get('sandbox', False)
+
+        if stream_url is None:
+            stream_url = OandaAPI.STREAM_PRACTICE_URL if sandbox else OandaAPI.STREAM_URL
+
+        super().__init__(symbol, stream, log, log_message, stream_url, None, kwargs)
+
+        if heartbeat_timeout is None:
+            heartbeat_timeout = self.preferences['settings']['oanda']['stream_heartbeat_timeout']
+        self.instrument = symbol.replace('-', '_')
+        self.pricing_stream = get_pricing_stream(stream_url, personal_access_token, account_id, heartbeat_timeout)
+        self.__subscribed = False
+
+        # Start the stream
+        if not initially_stopped:
+            self.start_websocket()
+
+    def start_websocket(self, *args):
+        """
+        Subscribe to the shared pricing stream if this ticker was asked to stop
+        """
+        if self.__subscribed:
+            info_print("Already running...")
+            return
+        self.pricing_stream.subscribe(self.instrument, self.__on_stream_message)
+        self.__subscribed = True
+
+    def __on_stream_message(self, line: bytes, message: dict):
+        for listener in self.raw_listeners:
+            listener(line)
+        self.__on_price(message)
+
+    def on_message(self, ws, message):
+        """
+        Exchange specific actions to perform when receiving a message
+        """
+        self.__on_price(json.loads(message))
+
+    def __on_price(self, message: dict):
+        if message.get('type') != 'PRICE':
+            return
+        self.message_count += 1
+
+        self.log_response(self.__logging_callback, message)
+
+        interface_message = self.__interface_callback(message)
+        self.most_recent_time = interface_message['time']
+        self.time_feed.append(self.most_recent_time)
+        self.ticker_feed.append(interface_message)
+        self.most_recent_tick = interface_message
+        for i in self.callbacks:
+            i(interface_message, **self.kwargs)
+
+    def on_error(self, ws, error):
+        info_print(error)
+
+    def on_close(self, ws):
+        pass
+
+    def on_open(self, ws):
+        pass
+
+    def is_websocket_open(self):
+        return self.__subscribed and self.pricing_stream.is_running()
+
+    def close_websocket(self):
+        self.flush_log()
+        if self.__subscribed:
+            self.pricing_stream.unsubscribe(self.instrument, self.__on_stream_message)
+            self.__subscribed = False
+        else:
+            print("Pricing stream for " + self.symbol + " is already closed")
+
+    def restart_ticker(self):
+        self.start_websocket()
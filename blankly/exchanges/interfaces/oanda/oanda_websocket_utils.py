@@ -0,0 +1,84 @@
+"""
+    Parsing for the messages that come over the Oanda pricing stream.
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import time
+
+
+def switch_type(stream):
+    if stream == "pricing":
+        return price, \
+               price_interface, \
+               "time,system_time,instrument,bid,ask,closeout_bid,closeout_ask,tradeable\n"
+    else:
+        return no_callback, no_callback, ""
+
+
+def no_callback(message):
+    return message
+
+
+def price(message):
+    return ','.join([
+        str(message['time']),
+        str(time.time()),
+        message['instrument'],
+        message['bids'][0]['price'] if message['bids'] else '',
+        message['asks'][0]['price'] if message['asks'] else '',
+        str(message.get('closeoutBid', '')),
+        str(message.get('closeoutAsk', '')),
+        str(message.get('tradeable', ''))
+    ]) + '\n'
+
+
+def price_interface(message):
+    """
+    Homogenizing a quote with the trade ticks of the other exchanges. Oanda streams the book rather than trades so the
+    price is the mid and the size is zero.
+
+    Response from the pricing stream (with the UNIX datetime format)
+    {
+        "type": "PRICE",
+        "instrument": "EUR_USD",
+        "time": "1650000000.123456789",
+        "bids": [{"price": "1.08100", "liquidity": 1000000}, ...],
+        "asks": [{"price": "1.08112", "liquidity": 1000000}, ...],
+        "closeoutBid": "1.08100",
+        "closeoutAsk": "1.08112",
+        "tradeable": true
+    }
+
+    Homogenized
+    {
+        'symbol': 'EUR-USD',
+        'price': 1.08106,
+        'bid': 1.081,
+        'ask': 1.08112,
+        'time': 1650000000.1234567,
+        'size': 0.0
+    }
+    """
+    bid = float(message['bids'][0]['price']) if message['bids'] else float(message['closeoutBid'])
+    ask = float(message['asks'][0]['price']) if message['asks'] else float(message['closeoutAsk'])
+    return {
+        'symbol': message['instrument'].replace('_', '-'),
+        'price': (bid + ask) / 2,
+        'bid': bid,
+        'ask': ask,
+        'time': float(message['time']),
+        'size': 0.0
+    }
@@ -3,6 +3,8 @@ import pandas as pd
 import blankly.utils.time_builder
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
+from blankly.exchanges.interfaces.metadata_cache import cached_metadata
+from blankly.exchanges.interfaces.request_coalescer import coalesced_read, invalidates_reads
 from blankly.exchanges.interfaces.okx.okx_api import MarketAPI, AccountAPI, TradeAPI, ConvertAPI, FundingAPI, PublicAPI
 from blankly.exchanges.orders.limit_order import LimitOrder
 from blankly.exchanges.orders.market_order import MarketOrder
@@ -33,6 +35,7 @@ class OkxInterface(ExchangeInterface):
         except KeyError:
             pass
 
+    @cached_metadata('products')
     def get_products(self):
         instrument_type = "SPOT"
         needed = self.needed['get_products']
@@ -48,6 +51,7 @@ class OkxInterface(ExchangeInterface):
             products['data'][i] = utils.isolate_specific(needed, products['data'][i])
         return products['data']
 
+    @coalesced_read('account')
     def get_account(self, symbol=None) -> utils.AttributeDict:
         """
            Get all currencies in an account, or sort by symbol
@@ -83,6 +87,7 @@ class OkxInterface(ExchangeInterface):
         return parsed_dictionary
 
     @utils.order_protection
+    @invalidates_reads
     def market_order(self, symbol, side, size) -> MarketOrder:
         """
             Used for buying or selling market orders
@@ -111,6 +116,7 @@ class OkxInterface(ExchangeInterface):
         return MarketOrder(order, response_details, self)
 
     @utils.order_protection
+    @invalidates_reads
     def stop_loss_order(self, symbol, price, size) -> TakeProfitOrder:
         """
            Used for stop-loss orders
@@ -147,6 +153,7 @@ class OkxInterface(ExchangeInterface):
         return response_details
 
     @utils.order_protection
+    @invalidates_reads
     def take_profit_order(self, symbol, price, size) -> TakeProfitOrder:
         """
            Used for take-profit orders
@@ -166,6 +173,7 @@ class OkxInterface(ExchangeInterface):
         return TakeProfitOrder(order, response_details, self)
 
     @utils.order_protection
+    @invalidates_reads
     def limit_order(self, symbol, side, price, size) -> LimitOrder:
         """
            Used for buying or selling limit orders
@@ -186,6 +194,7 @@ class OkxInterface(ExchangeInterface):
         response_details = self._fetch_response_details(needed, response, symbol)
         return LimitOrder(order, response_details, self)
 
+    @invalidates_reads
     def cancel_order(self, symbol: str, order_id: str) -> dict:
         """
         Returns:
@@ -195,6 +204,7 @@ class OkxInterface(ExchangeInterface):
         response = self._trade.cancel_order(symbol, ordId=order_id)
         return {"order_id": response['data'][0]['ordId']}
 
+    @coalesced_read('open_orders')
     def get_open_orders(self,
                         symbol: str = None) -> list:
         """
@@ -277,6 +287,7 @@ class OkxInterface(ExchangeInterface):
         response["time_in_force"] = 'GTC'
         return utils.isolate_specific(needed, response)
 
+    @cached_metadata('fees')
     def get_fees(self, symbol) -> dict:
         needed = self.needed['get_fees']
         """
@@ -419,6 +430,7 @@ class OkxInterface(ExchangeInterface):
             "exchange_specific": {**products}
         }
 
+    @coalesced_read('prices')
     def get_price(self, symbol) -> float:
         """
         Returns just the price of a currency pair.
@@ -427,3 +439,19 @@ class OkxInterface(ExchangeInterface):
         if len(response['msg']) != 0:
             raise APIException("Error: " + response['msg'])
         return float(response['data'][0]['idxPx'])
+
+    @coalesced_read('prices')
+    def get_prices(self, symbols: list) -> dict:
+        """
+        Returns the index price of many currency pairs with one request per quote currency
+        """
+        prices = {}
+        for quote in dict.fromkeys(symbol.split('-')[-1] for symbol in symbols):
+            response = self._market.get_index_ticker(quoteCcy=quote)
+            if len(response['msg']) != 0:
+                raise APIException("Error: " + response['msg'])
+            prices.update({ticker['instId']: float(ticker['idxPx']) for ticker in response['data']})
+        try:
+            return {symbol: prices[symbol] for symbol in symbols}
+        except KeyError as e:
+            raise APIException(f"No price found for {e}")
@@ -18,6 +18,7 @@
 import abc
 import typing
 from blankly.data.data_reader import PriceReader, JsonEventReader, TickReader, DataReader
+from blankly.data.orderbook_reader import OrderbookReader
 
 
 class ABCBacktestController(abc.ABC):
@@ -47,6 +48,10 @@ class ABCBacktestController(abc.ABC):
     def add_tick_events(self, tick_reader: TickReader):
         pass
 
+    @abc.abstractmethod
+    def add_orderbook_events(self, orderbook_reader: OrderbookReader):
+        pass
+
     @abc.abstractmethod
     def value_account(self):
         """
@@ -16,58 +16,32 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import json
 import uuid
 
 
-def __dict_from_df_dict(dict_of_df: dict) -> dict:
+def __account_value_series(history, account_value_name: str) -> list:
     """
-    This creates a serializable dictionary from a dictionary with pandas df:
-    {
-        'AAPL': df.DataFrame
-        'MSFT': df.DataFrame
-    }
-    ->
-    {
-        'AAPL': df.DataFrame.to_dict()
-        'MSFT': df.DataFrame.to_dict()
-    }
-    The function does not check for nested dataframes
+    Build the account value list straight from the history columns. Duplicate times keep the position of their first
+    occurrence and the value of their last, the same as keying a dictionary by time.
 
-    :arg dict_of_df: A dictionary with dataframes as values of the internal keys
-    :return: dict
+    :param history: The backtest history dataframe
+    :param account_value_name: The column holding the account value
+    :return: list of {'time': time, 'value': value}
     """
-    output_dict = {}
-    for i in list(dict_of_df.keys()):
-        output_dict[i] = dict_of_df[i].to_dict()
-
-    return output_dict
+    if len(history) == 0:
+        return []
 
+    compressed = dict(zip(history['time'].tolist(), history[account_value_name].tolist()))
+    return [{'time': time, 'value': value} for time, value in compressed.items()]
 
-def __compress_dict_series(values_column: dict, time_dictionary: dict):
-    """
-    Remove duplicate keys from the account value or anything that is associated with a time series
 
-    :param values_column: A dictionary with index as key and any sort of value
-    :param time_dictionary: A dictionary with index also as key but a time that corresponds to the same index in the
-        values column
-    :return: None
-    """
-    values_keys = list(values_column.keys())
-    time_keys = list(time_dictionary.keys())
-
-    # Check to see if the dictionaries are longer than 0
-    if len(values_keys) == 0:
-        return {}
-
-    last_value = values_column[values_keys[0]]
-    output_dict = {
-        time_dictionary[time_keys[0]]: last_value
-    }
-    for i in range(len(values_column)):
-        # This used to compress by saving the last value, but now it does not
-        output_dict[time_dictionary[time_keys[i]]] = values_column[values_keys[i]]
-
-    return output_dict
+def __index_by_id(orders: list) -> dict:
+    # The first entry for an id wins, same as a linear scan would find
+    index = {}
+    for order in orders:
+        index.setdefault(order['id'], order)
+    return index
 
 
 def __parse_backtest_trades(trades: list, limit_executed: list, limit_canceled: list, market_executed: list):
@@ -80,31 +54,29 @@ def __parse_backtest_trades(trades: list, limit_executed: list, limit_canceled:
     :param market_executed: The list of executed market orders
     :return: None
     """
+    # Index each lifecycle list once so every trade is a constant time lookup
+    executed_index = __index_by_id(limit_executed)
+    canceled_index = __index_by_id(limit_canceled)
+    market_index = __index_by_id(market_executed)
 
     # Now just parse if there should be an executed time or a canceled time
-    for i in range(len(trades)):
-        try:
-            trades[i]['time'] = trades[i].pop('created_at')
-        except KeyError:
-            pass
-        if trades[i]['type'] == 'limit':
-            # TODO this wastes a few CPU cycles at the moment so it could be cleaned up
-            for j in limit_executed:
-                if trades[i]['id'] == j['id']:
-                    trades[i]['executed_time'] = j['executed_time']
-                    break
-
-            for j in limit_canceled:
-                if trades[i]['id'] == j['id']:
-                    trades[i]['canceled_time'] = j['canceled_time']
-                    break
-        elif trades[i]['type'] == 'market':
+    for trade in trades:
+        if 'created_at' in trade:
+            trade['time'] = trade.pop('created_at')
+        if trade['type'] == 'limit':
+            executed = executed_index.get(trade['id'])
+            if executed is not None:
+                trade['executed_time'] = executed['executed_time']
+
+            canceled = canceled_index.get(trade['id'])
+            if canceled is not None:
+                trade['canceled_time'] = canceled['canceled_time']
+        elif trade['type'] == 'market':
             # This adds in the execution price for the market orders
-            trades[i]['type'] = 'spot-market'
-            for j in market_executed:
-                if trades[i]['id'] == j['id']:
-                    trades[i]['price'] = j['executed_price']
-                    break
+            trade['type'] = 'spot-market'
+            executed = market_index.get(trade['id'])
+            if executed is not None:
+                trade['price'] = executed['executed_price']
 
     return trades
 
@@ -124,41 +96,17 @@ def format_platform_result(backtest_result):
     Args:
         backtest_result: A BacktestResult object to export
     """
-    # We're given a dictionary of dataframes and that has to be transformed to a dictionary of dictionaries
-    history_and_returns = __dict_from_df_dict(backtest_result.history_and_returns)
-
     # Grab a list of the traded assets
     # The paper trade interface format may change in the future to be more optimized
-    traded_symbols = []
-    for i in backtest_result.trades['created']:
-        if i['symbol'] not in traded_symbols:
-            traded_symbols.append(i['symbol'])
-
-    # Set the account values to None
-    # Now grab the account value dictionary itself
-    # Now just replicate the format of the resampled version
+    traded_symbols = list(dict.fromkeys(i['symbol'] for i in backtest_result.trades['created']))
+
+    # Build the account values from the raw history columns
     # This was the annoying backtest glitch that almost cost us an investor meeting so its important
-    history = history_and_returns['history']
     account_value_name = 'Account Value (' + backtest_result.quote_currency + ')'
-    raw_or_resampled_account_values = {
-        'value': history[account_value_name],
-        'time': history['time']
-    }
-
-    # Now grab the raw account values
-    compressed_asset_column = __compress_dict_series(raw_or_resampled_account_values['value'],
-                                                     raw_or_resampled_account_values['time'])
+    account_values = __account_value_series(backtest_result.history_and_returns['history'], account_value_name)
 
-    compressed_array_conversion = []
-    for i in compressed_asset_column:
-        compressed_array_conversion.append({
-            'time': i,
-            'value': compressed_asset_column[i]
-        })
-
-    compressed_asset_keys = list(compressed_asset_column.keys())
-    first_account_value = compressed_asset_column[compressed_asset_keys[0]]
-    last_account_value = compressed_asset_column[compressed_asset_keys[-1]]
+    first_account_value = account_values[0]['value']
+    last_account_value = account_values[-1]['value']
 
     trades = __parse_backtest_trades(backtest_result.trades['created'],
                                      backtest_result.trades['limits_executed'],
@@ -192,7 +140,7 @@ def format_platform_result(backtest_result):
         'quote_asset': backtest_result.quote_currency,
         'start_time': backtest_result.start_time,
         'stop_time': backtest_result.stop_time,
-        'account_values': compressed_array_conversion,
+        'account_values': account_values,
         'trades': trades,
         'metrics': refined_metrics,
         'indicators': {},  # Add to this array when we support
@@ -203,3 +151,34 @@ def format_platform_result(backtest_result):
         'backtest_id': str(uuid.uuid4())
         # Everything above here is put into the firebase root
     }
+
+
+def write_platform_result(platform_result: dict, file, chunk_size: int = 10000):
+    """
+    Stream a platform result to a file as JSON. The large lists (trades & account values) are encoded in chunks so
+    the whole document is never held as a single string.
+
+    Args:
+        platform_result: The dictionary from format_platform_result()
+        file: A path or a writable text file object
+        chunk_size: Number of list entries encoded per write
+    """
+    if isinstance(file, str):
+        with open(file, 'w') as f:
+            return write_platform_result(platform_result, f, chunk_size)
+
+    file.write('{')
+    for key_index, (key, value) in enumerate(platform_result.items()):
+        if key_index > 0:
+            file.write(',')
+        file.write(json.dumps(key) + ':')
+        if isinstance(value, list):
+            file.write('[')
+            for start in range(0, len(value), chunk_size):
+                if start > 0:
+                    file.write(',')
+                file.write(','.join(json.dumps(i, default=str) for i in value[start:start + chunk_size]))
+            file.write(']')
+        else:
+            file.write(json.dumps(value, default=str))
+    file.write('}')
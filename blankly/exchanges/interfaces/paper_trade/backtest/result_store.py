@@ -0,0 +1,206 @@
+"""
+    Compact columnar storage for finished backtest results
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import weakref
+from collections.abc import Mapping
+
+import numpy as np
+from pandas import DataFrame
+
+
+def _compact_column(values: np.ndarray):
+    """
+    Find the smallest storage for a column. Floats are stored as float32 unless they are whole numbers (like epoch
+    times) in which case they become int64. Object columns that only hold numbers and None are stored as float32 and
+    the None values are put back when the frame is rebuilt.
+
+    Returns:
+        (stored array, original dtype, whether NaN should be restored to None)
+    """
+    original_dtype = values.dtype
+    restore_none = False
+
+    if original_dtype == object:
+        try:
+            values = np.array([np.nan if i is None else i for i in values], dtype=np.float64)
+            restore_none = True
+        except (TypeError, ValueError):
+            # Not numeric, keep the python objects
+            return values, original_dtype, False
+
+    if values.dtype.kind == 'f':
+        finite = values[np.isfinite(values)]
+        if len(finite) == len(values) and np.array_equal(finite, np.round(finite)) and \
+                (len(finite) == 0 or np.abs(finite).max() < 2 ** 62):
+            return values.astype(np.int64), original_dtype if not restore_none else np.float64, restore_none
+        return values.astype(np.float32), original_dtype if not restore_none else np.float64, restore_none
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64), original_dtype, False
+    return values, original_dtype, False
+
+
+class CompactFrame:
+    def __init__(self, columns: dict, kind: str = 'frame'):
+        """
+        Columnar copy of a DataFrame or numpy record array that can be spilled to a memory mapped file.
+
+        Args:
+            columns: Ordered dictionary of column name to numpy array
+            kind: 'frame' to rebuild a DataFrame or 'records' to rebuild a numpy record array
+        """
+        self.kind = kind
+        self.length = 0
+        self.__columns = {}
+        for name, values in columns.items():
+            values = np.asarray(values)
+            self.length = len(values)
+            self.__columns[name] = _compact_column(values)
+        self.__file_path = None
+
+    @classmethod
+    def from_frame(cls, frame: DataFrame) -> 'CompactFrame':
+        return cls({name: frame[name].to_numpy() for name in frame.columns}, kind='frame')
+
+    @classmethod
+    def from_records(cls, records: np.ndarray) -> 'CompactFrame':
+        return cls({name: records[name] for name in records.dtype.names}, kind='records')
+
+    @property
+    def nbytes(self) -> int:
+        return sum(stored.nbytes for stored, _, _ in self.__columns.values() if stored.dtype != object)
+
+    @property
+    def spilled(self) -> bool:
+        return self.__file_path is not None
+
+    def spill(self, directory: str = None):
+        """
+        Move the numeric columns into a memory mapped file so they are paged in by the OS only when read
+
+        Args:
+            directory: Folder for the file, defaults to the system temp directory
+        """
+        if self.spilled:
+            return
+
+        descriptor, file_path = tempfile.mkstemp(prefix='blankly_result_', suffix='.bin', dir=directory)
+        offsets = {}
+        with os.fdopen(descriptor, 'wb') as file:
+            offset = 0
+            for name, (stored, _, _) in self.__columns.items():
+                if stored.dtype == object:
+                    continue
+                # Align each column to its item size
+                padding = -offset % stored.dtype.itemsize
+                file.write(b'\x00' * padding)
+                offset += padding
+                offsets[name] = offset
+                file.write(np.ascontiguousarray(stored).tobytes())
+                offset += stored.nbytes
+
+        for name, offset in offsets.items():
+            stored, original_dtype, restore_none = self.__columns[name]
+            if len(stored) == 0:
+                continue
+            mapped = np.memmap(file_path, dtype=stored.dtype, mode='r', offset=offset, shape=stored.shape)
+            self.__columns[name] = (mapped, original_dtype, restore_none)
+
+        self.__file_path = file_path
+        try:
+            # The maps keep the data alive, so the name can go right away where the OS allows it
+            os.remove(file_path)
+        except OSError:
+            weakref.finalize(self, _remove_quietly, file_path)
+
+    def to_frame(self) -> DataFrame:
+        """
+        Rebuild a DataFrame at the original dtypes
+        """
+        return DataFrame({name: self.__restore(name) for name in self.__columns})
+
+    def to_records(self) -> np.ndarray:
+        """
+        Rebuild the numpy record array at the original dtypes
+        """
+        names = list(self.__columns.keys())
+        return np.rec.fromarrays([self.__restore(name) for name in names], names=names)
+
+    def materialize(self):
+        return self.to_frame() if self.kind == 'frame' else self.to_records()
+
+    def __restore(self, name):
+        stored, original_dtype, restore_none = self.__columns[name]
+        if stored.dtype == object:
+            return stored.copy()
+        values = np.asarray(stored).astype(original_dtype)
+        if restore_none:
+            values = values.astype(object)
+            values[np.isnan(stored)] = None
+        return values
+
+
+def _remove_quietly(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+class LazyFrames(Mapping):
+    def __init__(self, items: dict, spill_threshold: int = None, spill_directory: str = None):
+        """
+        A read only dictionary of DataFrames or record arrays held as CompactFrames. Each access builds a fresh copy,
+        so nothing full size is kept alive between accesses.
+
+        Args:
+            items: Dictionary of key to DataFrame or numpy record array. Anything else is kept as is.
+            spill_threshold: Spill every compacted item to disk once their total size passes this many bytes. None
+                never spills.
+            spill_directory: Folder to spill into, defaults to the system temp directory
+        """
+        self.__items = {}
+        for key, value in items.items():
+            if isinstance(value, DataFrame):
+                self.__items[key] = CompactFrame.from_frame(value)
+            elif isinstance(value, np.ndarray) and value.dtype.names is not None:
+                self.__items[key] = CompactFrame.from_records(value)
+            else:
+                self.__items[key] = value
+
+        if spill_threshold is not None and self.nbytes > spill_threshold:
+            for value in self.__items.values():
+                if isinstance(value, CompactFrame):
+                    value.spill(spill_directory)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(value.nbytes for value in self.__items.values() if isinstance(value, CompactFrame))
+
+    def __getitem__(self, key):
+        value = self.__items[key]
+        if isinstance(value, CompactFrame):
+            return value.materialize()
+        return value
+
+    def __iter__(self):
+        return iter(self.__items)
+
+    def __len__(self):
+        return len(self.__items)
@@ -24,6 +24,7 @@ import typing
 from datetime import datetime as dt
 import copy
 import enum
+import heapq
 import blankly
 
 import numpy as np
@@ -38,15 +39,19 @@ import blankly.exchanges.interfaces.paper_trade.metrics as metrics
 from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
 from blankly.exchanges.interfaces.paper_trade.futures.futures_paper_trade_interface import FuturesPaperTradeInterface
 from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from blankly.exchanges.interfaces.paper_trade.portfolio_valuation import PortfolioValuation
 from blankly.utils.time_builder import time_interval_to_seconds
 from blankly.utils.utils import load_backtest_preferences, write_backtest_preferences, info_print, update_progress, \
-    get_base_asset, get_quote_asset, aggregate_prices_by_resolution
+    get_base_asset, get_quote_asset, aggregate_prices_by_resolution, resample_candles, trim_df_time_column, \
+    resample_matches_exchange
 from blankly.exchanges.interfaces.paper_trade.backtest.format_platform_result import \
-    format_platform_result
+    format_platform_result, write_platform_result
 
 from blankly.exchanges.interfaces.paper_trade.abc_backtest_controller import ABCBacktestController
 from blankly.exchanges.exchange import ABCExchange
 from blankly.data.data_reader import PriceReader, TickReader, DataReader, FundingRateEventReader
+from blankly.data.orderbook_reader import OrderbookReader
+from blankly.exchanges.managers.orderbook import Orderbook
 
 
 def to_string_key(separated_list):
@@ -174,6 +179,9 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         # Open, high, low, close or volume
         self.use_price = None
 
+        # Columns of the account history
+        self.column_keys = []
+
         # Should we write to the preferences?
         self.queue_backtest_write = False
 
@@ -187,6 +195,12 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         # Some initial account value to store globally
         self.initial_account = None
 
+        # Values spot accounts incrementally, None when the interface isn't supported
+        self.valuation = None
+        # Symbols whose price moved since the account was last valued
+        self.__changed_prices = set()
+        self.__last_valued_time = None
+
         # Create our own traded assets' dictionary because we customize it a bit
         self.__traded_assets = []
 
@@ -212,6 +226,14 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         self.__price_readers = []
         self.__event_readers = []
         self.__tick_readers = []
+        self.__orderbook_readers = []
+        # Symbols that funding rate events were already added for
+        self.__funding_symbols = set()
+
+        # Books rebuilt from the orderbook readers, keyed by symbol
+        self.orderbooks = {}
+        # Next message of each orderbook reader as (time, reader index, message, iterator)
+        self.__orderbook_heads = []
 
     class PriceIdentifiers(enum.Enum):
         exchange: str = 0
@@ -303,6 +325,9 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
             identifiers_ = []
             for file in range(len(files)):
+                # Folders such as the funding rate cache aren't price data
+                if os.path.isdir(os.path.join(cache_folder, files[file])):
+                    continue
                 # example file name: 'coinbase_pro.sandbox.BTC-USD.1622400000.1622510793.60.csv'
                 # Remove the .csv from each of the files: BTC-USD.1622400000.1622510793.60
                 identifier = files[file][:-4].split(",")
@@ -375,9 +400,11 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         final_prices: dict = {}
         prices_by_resolution: dict = {}
-        for i in range(len(self.__user_added_times)):
-            if self.__user_added_times[i] is None:
-                continue
+        # Prices assembled for each request this run, used to build coarser resolutions without downloading
+        synced = {}
+        requests = [i for i in range(len(self.__user_added_times)) if self.__user_added_times[i] is not None]
+        # Sync the finest resolutions first so coarser ones of the same symbol can be resampled from them
+        for i in sorted(requests, key=lambda i_: self.__user_added_times[i_][self.PriceIdentifiers.resolution]):
             symbol = self.__user_added_times[i][self.PriceIdentifiers.symbol]
             resolution = self.__user_added_times[i][self.PriceIdentifiers.resolution]
             start_time = self.__user_added_times[i][self.PriceIdentifiers.epoch_start]
@@ -406,6 +433,25 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
             used_ranges, negative_ranges = split([start_time, end_time], downloaded_ranges)
 
+            resampled = None
+            if negative_ranges and self.preferences['settings']['resample_from_finer_prices'] and \
+                    resample_matches_exchange(exchange, resolution):
+                resampled = self.__resample_from_finer(local_history_blocks, synced, cache_folder, symbol,
+                                                       start_time, end_time, resolution)
+
+            frames = []
+            if resampled is not None:
+                frames.append(resampled)
+                prices_by_resolution = aggregate_prices_by_resolution(prices_by_resolution, symbol, resolution,
+                                                                      resampled)
+                if self.preferences['settings']['cache_resampled_prices'] and not resampled.empty:
+                    resampled.to_csv(os.path.join(cache_folder, to_string_key([exchange, True, symbol,
+                                                                               int(start_time),
+                                                                               int(end_time) + resolution,
+                                                                               resolution]) + ".csv"),
+                                     index=False)
+                used_ranges, negative_ranges = [], []
+
             relevant_data = []
             for j in used_ranges:
                 relevant_data.append(pd.read_csv(os.path.join(cache_folder, to_string_key([exchange,
@@ -416,7 +462,7 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
                                                                                            resolution]) + ".csv")))
 
             if len(relevant_data) > 0:
-                final_prices[symbol] = pd.concat(relevant_data)
+                frames += relevant_data
                 for dataset in relevant_data:
                     prices_by_resolution = aggregate_prices_by_resolution(prices_by_resolution, symbol, resolution,
                                                                           dataset)
@@ -446,18 +492,20 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
                 prices_by_resolution = aggregate_prices_by_resolution(prices_by_resolution, symbol, resolution,
                                                                       download)
                 # Write these into the data array
-                if symbol not in final_prices:
-                    final_prices[symbol] = download
-                else:
-                    final_prices[symbol] = pd.concat([final_prices[symbol], download])
+                frames.append(download)
 
             # After all the negative ranges are appended, we need to sort & trim
-            final_prices[symbol] = final_prices[symbol].sort_values(by=['time'], ignore_index=True)
+            frame = pd.concat(frames).sort_values(by=['time'], ignore_index=True)
 
             # Now make sure to just trim our times to hit the start and end times
-            final_prices[symbol] = final_prices[symbol][final_prices[symbol]['time'] >= start_time]
-            final_prices[symbol] = final_prices[symbol][
-                final_prices[symbol]['time'] <= end_time + resolution]  # Add back
+            frame = frame[frame['time'] >= start_time]
+            frame = frame[frame['time'] <= end_time + resolution]  # Add back
+            synced[i] = (symbol, resolution, start_time, end_time, frame)
+
+        # When a symbol was added at several resolutions the last one added drives the price loop
+        for i in requests:
+            symbol, _, _, _, frame = synced[i]
+            final_prices[symbol] = frame
 
         # Now add any custom prices
         for price_reader in self.__price_readers:
@@ -490,6 +538,44 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         return final_prices
 
+    def __resample_from_finer(self, local_history_blocks: dict, synced: dict, cache_folder: str, symbol: str,
+                              start_time: float, end_time: float, resolution: int) -> typing.Optional[pd.DataFrame]:
+        """
+        Build the candles of a resolution from a finer resolution that divides it, if one covers the whole range
+        either in the price cache or from earlier in this sync. Returns None when no finer data covers the range.
+        """
+        # The last coarse candle is built from the fine candles up to the end of its window
+        window = [start_time, end_time + resolution]
+
+        # Prefer the coarsest usable resolution, it's the least data to read
+        for synced_symbol, fine_resolution, fine_start, fine_end, frame in sorted(synced.values(), key=lambda x: -x[1]):
+            if synced_symbol == symbol and fine_resolution < resolution and resolution % fine_resolution == 0 and \
+                    fine_start <= window[0] and fine_end + fine_resolution >= window[1]:
+                return resample_candles(trim_df_time_column(frame, start_time, end_time + resolution -
+                                                            fine_resolution), resolution)
+
+        exchange = self.interface.get_exchange_type()
+        try:
+            cached = local_history_blocks[exchange][True][symbol]
+        except KeyError:
+            return None
+        for fine_resolution in sorted(cached, reverse=True):
+            if fine_resolution >= resolution or resolution % fine_resolution != 0:
+                continue
+            ranges = [[block[self.PriceIdentifiers.epoch_start], block[self.PriceIdentifiers.epoch_stop]]
+                      for block in cached[fine_resolution]]
+            used_ranges, negative_ranges = split(window, ranges)
+            if negative_ranges:
+                continue
+            frame = pd.concat([pd.read_csv(os.path.join(cache_folder,
+                                                        to_string_key([exchange, True, symbol, j[0], j[1],
+                                                                       fine_resolution]) + ".csv"))
+                               for j in used_ranges])
+            frame = frame.drop_duplicates(subset='time').sort_values(by=['time'], ignore_index=True)
+            return resample_candles(trim_df_time_column(frame, start_time, end_time + resolution - fine_resolution),
+                                    resolution)
+        return None
+
     def add_prices(self,
                    symbol: str,
                    resolution: [str, int, float],
@@ -541,6 +627,45 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
     def add_tick_events(self, tick_reader: TickReader):
         self.__tick_readers.append(tick_reader)
 
+    def add_orderbook_events(self, orderbook_reader: OrderbookReader):
+        self.__orderbook_readers.append(orderbook_reader)
+
+    @property
+    def has_orderbook_events(self) -> bool:
+        return len(self.__orderbook_readers) > 0
+
+    def __start_orderbook_replay(self):
+        # The readers stream from disk, only the next message of each one is held
+        self.orderbooks = {}
+        self.__orderbook_heads = []
+        for index, reader in enumerate(self.__orderbook_readers):
+            iterator = iter(reader)
+            message = next(iterator, None)
+            if message is not None:
+                heapq.heappush(self.__orderbook_heads, (message.time, index, message, iterator))
+
+    def __replay_orderbook_message(self):
+        _, index, message, iterator = heapq.heappop(self.__orderbook_heads)
+
+        book = self.orderbooks.get(message.symbol)
+        if book is None:
+            book = Orderbook()
+            self.orderbooks[message.symbol] = book
+        if message.snapshot:
+            book.set_snapshot(message.bids, message.asks)
+        else:
+            book.apply(message.bids, message.asks)
+
+        self.time = message.time
+        self.interface.receive_time(message.time)
+        # Resting paper orders fill against the replayed book before the strategy sees it
+        self.interface.evaluate_orderbook(message.symbol, book)
+        self.model.orderbook_update(message.symbol, book)
+
+        message = next(iterator, None)
+        if message is not None:
+            heapq.heappush(self.__orderbook_heads, (message.time, index, message, iterator))
+
     def __add_prices(self, symbol, start_time, end_time, resolution, save=False):
         # If it's not loaded then write it to the file
         # Add it as a new price
@@ -634,29 +759,36 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         except KeyError:
             pass
 
+        currency_pairs = {}
         for i in list(true_account.keys()):
             # Funds on hold are still added
             true_available[i] = true_account[i]['available'] + true_account[i]['hold']
             no_trade_available[i] = self.initial_account[i]['available'] + self.initial_account[i]['hold']
             currency_pair = i
 
-            # Convert to quote (this could be optimized a bit)
+            # Convert to quote
             is_stonks = interface.get_exchange_type() == 'alpaca'
             is_future = currency_pair.endswith('PERP')
             if not (is_stonks or is_future):
                 currency_pair += '-'
                 currency_pair += self.quote_currency
+            currency_pairs[i] = currency_pair
 
-            # Get price at time
-            try:
-                price = interface.get_price(currency_pair)
-            except KeyError:
-                # Must be a currency we have no data for
-                # This used to return zero but I believe all the cases where no data was avaiable have been elimated.
-                raise KeyError(f"Failed to quote {currency_pair} because no downloaded data for that pair is available. "
-                               f"Make sure to set \"quote_account_value_in\" in \"backtest.json\" to match the prices "
-                               f"you are using. For example if you are trading \"USD-JPY\", set your quote value "
-                               f"to \"JPY\". Currently it is set to {self.quote_currency}")
+        # Get prices at time, all at once
+        try:
+            prices = interface.get_prices(list(currency_pairs.values()))
+        except KeyError:
+            # Must be a currency we have no data for, find which one it was
+            # This used to return zero but I believe all the cases where no data was avaiable have been elimated.
+            missing = [pair for pair in currency_pairs.values() if not self.__can_quote(interface, pair)]
+            raise KeyError(f"Failed to quote {', '.join(missing)} because no downloaded data for that pair is "
+                           f"available. Make sure to set \"quote_account_value_in\" in \"backtest.json\" to match "
+                           f"the prices you are using. For example if you are trading \"USD-JPY\", set your quote "
+                           f"value to \"JPY\". Currently it is set to {self.quote_currency}")
+
+        for i, currency_pair in currency_pairs.items():
+            price = prices[currency_pair]
+            is_future = currency_pair.endswith('PERP')
 
             # This is needed for futures apparently
             if is_future:
@@ -683,6 +815,14 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         return true_available, no_trade_available
 
+    @staticmethod
+    def __can_quote(interface: PaperTradeInterface, currency_pair: str) -> bool:
+        try:
+            interface.get_price(currency_pair)
+            return True
+        except KeyError:
+            return False
+
     def __account_was_used(self, column) -> bool:
         show_zero_delta = self.preferences['settings']['show_tickers_with_zero_delta']
 
@@ -711,28 +851,33 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         def run_events():
             # Ensure that we don't index error here
             events_length = len(self.events)
-            # Make sure we don't crash at first
-            if self.event_index >= events_length:
-                return
 
             # Store the time because we need accurate time for the async stuff
             time_backup = self.time
-            while self.events[self.event_index]['time'] < time_backup:
-                # Set time to something different here
-                event = self.events[self.event_index]
-                self.time = event['time']
-                if event['type'][0:11] != '__blankly__':
-                    self.model.event(event['type'], event['data'])
+            while True:
+                # Fire whichever is earlier of the next event and the next orderbook message
+                event_time = self.events[self.event_index]['time'] if self.event_index < events_length else None
+                book_time = self.__orderbook_heads[0][0] if self.__orderbook_heads else None
+
+                if book_time is not None and book_time < time_backup and \
+                        (event_time is None or book_time < event_time):
+                    self.__replay_orderbook_message()
+                elif event_time is not None and event_time < time_backup:
+                    # Set time to something different here
+                    event = self.events[self.event_index]
+                    self.time = event['time']
+                    if event['type'][0:11] != '__blankly__':
+                        self.model.event(event['type'], event['data'])
+                    else:
+                        handle_blankly_tick(event['type'][11:], event['data'])
+                    # Fired some event, go to the next one
+                    self.event_index += 1
                 else:
-                    handle_blankly_tick(event['type'][11:], event['data'])
-                # Fired some event, go to the next one
-                self.event_index += 1
-
-                # Just check after doing that if we went outside the index
-                if self.event_index >= events_length:
-                    return
+                    break
 
-            self.time = time_backup
+            if self.time != time_backup:
+                self.time = time_backup
+                self.interface.receive_time(self.time)
 
         # Now update the time to match
         self.interface.receive_time(self.time)
@@ -743,6 +888,7 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
             # This just incrementing the price indexes until it's less than time and ensuring that
             #  it's less than the length of the price
             price_length = len(self.prices[symbol]) - 2
+            price_index = self.price_indexes[symbol]
             while self.prices[symbol][self.price_indexes[symbol]]['time'] < self.time:
                 if price_length >= self.price_indexes[symbol]:
                     self.price_indexes[symbol] += 1
@@ -753,6 +899,8 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
             # Write this new price into the interface
             self.interface.receive_price(symbol, new_price=self.prices[symbol][
                 self.price_indexes[symbol]][self.use_price])
+            if self.price_indexes[symbol] != price_index:
+                self.__changed_prices.add(symbol)
 
         # Check has_data here also
         if self.time > self.user_stop:
@@ -785,21 +933,41 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         if not self.backtesting:
             return
 
-        available_dict, no_trade_dict = self.format_account_data(self.interface, self.time)
+        interval = self.preferences['settings']['value_account_interval']
+        if interval and self.__last_valued_time is not None and self.time - self.__last_valued_time < interval:
+            return
+        self.__record_valuation(self.time)
+
+    def __record_valuation(self, local_time) -> None:
+        self.__last_valued_time = local_time
+
+        if self.valuation is not None:
+            self.valuation.update(self.__changed_prices)
+            self.__changed_prices = set()
+            available_dict, no_trade_dict = self.valuation.record(local_time)
+        else:
+            available_dict, no_trade_dict = self.format_account_data(self.interface, local_time)
 
         self.traded_account_values.append(available_dict)
         self.no_trade_account_values.append(no_trade_dict)
 
-    # TODO this class should be constructed with a BacktestConfiguration object
-    def run(self,
-            args,
-            exchange: ABCExchange,
-            initial_account_values,
-            backtest_settings_path: str = None,
-            **kwargs) -> BacktestResult:
+    def prepare(self,
+                exchange: ABCExchange,
+                initial_account_values,
+                backtest_settings_path: str = None,
+                **kwargs):
         """
-        Setup
+        Load the backtest settings & prices, then put the paper trade interface into its initial backtest state.
+
+        Args:
+            exchange: The paper trade exchange to backtest on
+            initial_account_values: Dictionary of starting account sizes or None to keep the current account
+            backtest_settings_path: Path to the backtest.json file
+            **kwargs: Overrides for the backtest.json settings
         """
+        # Make sure nothing is kept from a previous run with the same controller
+        self.traded_account_values = []
+        self.no_trade_account_values = []
         self.backtesting = True
         self.preferences = load_backtest_preferences(backtest_settings_path)
         # Write any dynamic arguments back into the backtest preferences
@@ -820,10 +988,16 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         self.prices = self.sync_prices()
         # add funding rate events for futures trading
         if isinstance(self.interface, FuturesPaperTradeInterface):
+            # Funding history is kept next to the prices so later runs don't download it again
+            self.interface.funding_rates.cache_location = self.preferences['settings']['cache_location']
             for symbol in self.prices:
-                self.add_custom_events(FundingRateEventReader(symbol, self.user_start, self.user_stop, self.interface))
+                if symbol not in self.__funding_symbols:
+                    self.__funding_symbols.add(symbol)
+                    self.add_custom_events(FundingRateEventReader(symbol, self.user_start, self.user_stop,
+                                                                  self.interface))
         # Now ensure all events are processed
         self.parse_events()
+        self.__start_orderbook_replay()
         for symbol in self.prices:
             base = get_base_asset(symbol)
             quote = get_quote_asset(symbol)
@@ -921,17 +1095,34 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
             column_keys.append(self.quote_currency)
         # If they start a price event on something they don't own, this should also be included
         column_keys.append('time')
+        self.column_keys = column_keys
 
-        cycle_status = pd.DataFrame(columns=column_keys)
-
-        no_trade_cycle_status = pd.DataFrame(columns=column_keys)
+        self.__changed_prices = set()
+        self.__last_valued_time = None
+        # Futures accounts are valued by format_account_data()
+        if isinstance(self.interface, PaperTradeInterface):
+            self.valuation = PortfolioValuation(self.interface, self.quote_currency, self.initial_account)
+        else:
+            self.valuation = None
 
         # Add an initial account row here
         if self.preferences['settings']['save_initial_account_value']:
-            available_dict, no_trade_dict = self.format_account_data(self.interface, self.user_start)
+            if self.valuation is not None:
+                available_dict, no_trade_dict = self.valuation.record(self.user_start)
+            else:
+                available_dict, no_trade_dict = self.format_account_data(self.interface, self.user_start)
             self.traded_account_values.append(available_dict)
             self.no_trade_account_values.append(no_trade_dict)
 
+    # TODO this class should be constructed with a BacktestConfiguration object
+    def run(self,
+            args,
+            exchange: ABCExchange,
+            initial_account_values,
+            backtest_settings_path: str = None,
+            **kwargs) -> BacktestResult:
+        self.prepare(exchange, initial_account_values, backtest_settings_path, **kwargs)
+
         print("\nBacktesting...")
 
         # Start the model here
@@ -945,17 +1136,57 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         finally:
             self.model.teardown()
 
+        # The interval can skip the last few valuations, so always end on the final state of the account
+        final_time = min(self.time, self.user_stop)
+        if not self.traded_account_values or self.traded_account_values[-1]['time'] < final_time:
+            self.__record_valuation(final_time)
+
         # Reset time to indicate we are no longer in a backtest
         self.time = None
 
+        return self.build_result()
+
+    def build_result(self, account_values: pd.DataFrame = None, no_trade_account_values: pd.DataFrame = None,
+                     trades: dict = None) -> BacktestResult:
+        """
+        Resample the account values, compute the metrics & create the BacktestResult
+
+        Args:
+            account_values: Account history with a column per asset, 'time' and 'Account Value (<quote>)'. Defaults
+                to the values recorded by value_account()
+            no_trade_account_values: Account history if nothing had been traded. Defaults to the values recorded by
+                value_account()
+            trades: Dictionary of created, limits_executed, limits_canceled & executed_market_orders. Defaults to the
+                orders on the paper trade interface.
+        """
+        if account_values is None:
+            account_values = pd.DataFrame(self.traded_account_values)
+        if no_trade_account_values is None:
+            no_trade_account_values = pd.DataFrame(self.no_trade_account_values)
+        if trades is None:
+            trades = {
+                # Exported as plain dictionaries so they can be annotated & serialized
+                'created': [dict(order) for order in self.interface.paper_trade_orders],
+                'limits_executed': self.interface.executed_orders,
+                'limits_canceled': self.interface.canceled_orders,
+                'executed_market_orders': self.interface.market_order_execution_details
+            }
+
+        benchmark_symbol = self.preferences["settings"]["benchmark_symbol"]
+        use_price = self.use_price
+
+        cycle_status = pd.DataFrame(columns=self.column_keys)
+
+        no_trade_cycle_status = pd.DataFrame(columns=self.column_keys)
+
         # Push the accounts to the dataframe
-        cycle_status = pd.concat([cycle_status, pd.DataFrame(self.traded_account_values)],
+        cycle_status = pd.concat([cycle_status, account_values],
                                  ignore_index=True).sort_values(by=['time'])
 
         if len(cycle_status) == 0:
             raise RuntimeError("Empty result - no valid backtesting events occurred. Was there an error?.")
 
-        no_trade_cycle_status = pd.concat([no_trade_cycle_status, pd.DataFrame(self.no_trade_account_values)],
+        no_trade_cycle_status = pd.concat([no_trade_cycle_status, no_trade_account_values],
                                           ignore_index=True).sort_values(by=['time'])
 
         def is_number(s):
@@ -972,12 +1203,8 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         metrics_indicators = {}
         user_callbacks = {}
 
-        result_object = BacktestResult(history_and_returns, {
-            'created': self.interface.paper_trade_orders,
-            'limits_executed': self.interface.executed_orders,
-            'limits_canceled': self.interface.canceled_orders,
-            'executed_market_orders': self.interface.market_order_execution_details
-        }, self.prices, self.initial_time, self.interface.time(), self.quote_currency, [])
+        result_object = BacktestResult(history_and_returns, trades, self.prices, self.initial_time,
+                                       self.interface.time(), self.quote_currency, [])
 
         # If they set resampling we use resampling for everything
         resample_setting = self.preferences['settings']['resample_account_value_for_metrics']
@@ -1003,48 +1230,6 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
         # Now write it to our dictionary
         history_and_returns['returns'] = returns
 
-        # -----=====*****=====-----
-        metrics_indicators['Compound Annual Growth Rate (%)'] = metrics.cagr(history_and_returns)
-        try:
-            metrics_indicators['Cumulative Returns (%)'] = metrics.cum_returns(history_and_returns)
-        except ZeroDivisionError as e_:
-            metrics_indicators['Cumulative Returns (%)'] = f'failed: {e_}'
-
-        def attempt(math_callable: typing.Callable, dict_of_dataframes: dict, kwargs_: dict = None):
-            try:
-                if kwargs_ is None:
-                    kwargs_ = {}
-                result = math_callable(dict_of_dataframes, **kwargs_)
-                if result == np.NAN:
-                    result = None
-                return result
-            except (ZeroDivisionError, Exception) as e__:
-                return f'failed: {e__}'
-
-        risk_free_return_rate = self.preferences['settings']["risk_free_return_rate"]
-        metrics_indicators['Max Drawdown (%)'] = attempt(metrics.max_drawdown, history_and_returns)
-        metrics_indicators['Variance (%)'] = attempt(metrics.variance, history_and_returns,
-                                                     {'trading_period': interval_value})
-        metrics_indicators['Sortino Ratio'] = attempt(metrics.sortino, history_and_returns,
-                                                      {'risk_free_rate': risk_free_return_rate,
-                                                       'trading_period': interval_value})
-        metrics_indicators['Sharpe Ratio'] = attempt(metrics.sharpe, history_and_returns,
-                                                     {'risk_free_rate': risk_free_return_rate,
-                                                      'trading_period': interval_value})
-        metrics_indicators['Calmar Ratio'] = attempt(metrics.calmar, history_and_returns,
-                                                     {'trading_period': interval_value})
-        metrics_indicators['Volatility'] = attempt(metrics.volatility, history_and_returns,
-                                                   {'trading_period': interval_value})
-        metrics_indicators['Value-at-Risk'] = attempt(metrics.var, history_and_returns)
-        metrics_indicators['Conditional Value-at-Risk'] = attempt(metrics.cvar, history_and_returns)
-
-        # Add risk-free-return rate to dictionary
-        metrics_indicators['Risk Free Return Rate'] = risk_free_return_rate
-        # metrics_indicators['beta'] = attempt(metrics.beta, dataframes)
-        # Add the interval value to dictionary
-        metrics_indicators['Resampled Time'] = interval_value
-        # -----=====*****=====-----
-
         # If a benchmark was requested, add it to the pd_prices frame
         if benchmark_symbol is not None:
             # Resample the benchmark results
@@ -1059,9 +1244,22 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
             history_and_returns['benchmark_returns']['value'] = history_and_returns['benchmark_returns'][
                 'value'].pct_change()
 
-            # Calculate beta
-            metrics_indicators['Beta'] = attempt(metrics.beta, history_and_returns,
-                                                 {"trading_period": interval_value})
+        # -----=====*****=====-----
+        risk_free_return_rate = self.preferences['settings']["risk_free_return_rate"]
+        try:
+            # Every metric (and beta when there is a benchmark) comes from one pass over the returns
+            metrics_indicators.update(metrics.compute_all(history_and_returns,
+                                                          trading_period=interval_value,
+                                                          risk_free_rate=risk_free_return_rate))
+        except Exception as e_:
+            for name in metrics.METRIC_NAMES:
+                metrics_indicators[name] = f'failed: {e_}'
+
+        # Add risk-free-return rate to dictionary
+        metrics_indicators['Risk Free Return Rate'] = risk_free_return_rate
+        # Add the interval value to dictionary
+        metrics_indicators['Resampled Time'] = interval_value
+        # -----=====*****=====-----
 
         # Remove NaN values here
         history_and_returns['resampled_account_value'] = history_and_returns['resampled_account_value']. \
@@ -1224,5 +1422,11 @@ class BackTestController(ABCBacktestController):  # circular import to type mode
 
         # Export to the platform here
         blankly.reporter.export_backtest_result(platform_result)
+        if self.preferences['settings']['platform_result_path'] is not None:
+            write_platform_result(platform_result, self.preferences['settings']['platform_result_path'])
+
+        # Everything that needed full precision has run, shrink the result before handing it back
+        if self.preferences['settings']['compact_backtest_result']:
+            result_object.compact(spill_threshold=self.preferences['settings']['backtest_result_spill_bytes'])
 
         return result_object
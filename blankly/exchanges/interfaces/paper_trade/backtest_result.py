@@ -17,6 +17,7 @@
 """
 import pandas as pd
 from pandas import DataFrame, to_datetime, Timestamp
+from blankly.exchanges.interfaces.paper_trade.backtest.result_store import LazyFrames
 from blankly.utils import time_interval_to_seconds as _time_interval_to_seconds, info_print
 
 
@@ -38,6 +39,26 @@ class BacktestResult:
 
         self.figures = figures
 
+    def compact(self, spill_threshold: int = None, spill_directory: str = None):
+        """
+        Shrink the account history, returns and price history into columnar float32/int64 arrays. The DataFrames are
+        rebuilt only when they're accessed, which keeps many results alive at once (such as in a parameter sweep)
+        cheap. Float values lose precision past ~7 significant digits once compacted.
+
+        Args:
+            spill_threshold: Move the arrays into a memory mapped file once they're larger than this many bytes.
+                None keeps them in memory.
+            spill_directory: Folder for the memory mapped file, defaults to the system temp directory
+        """
+        if not isinstance(self.history_and_returns, LazyFrames):
+            self.history_and_returns = LazyFrames(self.history_and_returns, spill_threshold, spill_directory)
+        if not isinstance(self.history, LazyFrames):
+            self.history = LazyFrames(self.history, spill_threshold, spill_directory)
+
+    @property
+    def compacted(self) -> bool:
+        return isinstance(self.history_and_returns, LazyFrames)
+
     def get_account_history(self) -> DataFrame:
         return self.history_and_returns['history']
 
@@ -100,12 +121,14 @@ class BacktestResult:
 
         if use_asset_history:
             # Find the necessary values to assemble the resamples
-            time_array = self.history[symbol]['time'].tolist()
-            price_array = self.history[symbol][use_price].tolist()
+            asset_history = self.history[symbol]
+            time_array = asset_history['time'].tolist()
+            price_array = asset_history[use_price].tolist()
         else:
             # Find the necessary values to assemble the resamples
-            time_array = self.history_and_returns['history']['time'].tolist()
-            price_array = self.history_and_returns['history'][symbol].tolist()
+            account_history = self.history_and_returns['history']
+            time_array = account_history['time'].tolist()
+            price_array = account_history[symbol].tolist()
 
         # Add the epoch
         epoch_start = time_array[0]
@@ -0,0 +1,174 @@
+"""
+    Disk backed funding rate history for futures backtests
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import time
+import typing
+
+import numpy as np
+import pandas as pd
+
+# Folder inside the backtest "cache_location" that the funding rates are written to
+FUNDING_RATE_FOLDER = 'funding_rates'
+
+
+class FundingRateCache:
+    def __init__(self, exchange_name: str, interface, cache_location: str = None):
+        """
+        Funding rate history stored as sorted time & rate arrays. Each symbol is downloaded once and kept in the
+        backtest price cache folder, so later backtests over the same period don't touch the exchange and rates are
+        found with a binary search.
+
+        Args:
+            exchange_name: The exchange type, used to name the cache files
+            interface: The futures interface that the history is downloaded from
+            cache_location: The backtest "cache_location" folder. None keeps the history in memory only.
+        """
+        self.exchange_name = exchange_name
+        self.interface = interface
+        self.cache_location = cache_location
+
+        # symbol -> (times, rates, [start, stop] that the arrays are complete between)
+        self.__series = {}
+
+    def __folder(self) -> typing.Optional[str]:
+        if self.cache_location is None:
+            return None
+        return os.path.join(self.cache_location, FUNDING_RATE_FOLDER)
+
+    def __load(self, symbol: str):
+        if symbol in self.__series:
+            return
+        self.__series[symbol] = (np.zeros(0), np.zeros(0), None)
+
+        folder = self.__folder()
+        if folder is None or not os.path.isdir(folder):
+            return
+        # Files are named 'exchange,symbol,start,stop.csv'
+        for file in os.listdir(folder):
+            identifier = file[:-4].split(',')
+            if len(identifier) != 4 or identifier[0] != self.exchange_name or identifier[1] != symbol:
+                continue
+            frame = pd.read_csv(os.path.join(folder, file), float_precision='round_trip')
+            self.__series[symbol] = (frame['time'].to_numpy(dtype=np.float64),
+                                     frame['rate'].to_numpy(dtype=np.float64),
+                                     [float(identifier[2]), float(identifier[3])])
+            return
+
+    def __download(self, symbol: str, epoch_start: float, epoch_stop: float) -> typing.Tuple[np.ndarray, np.ndarray]:
+        history = self.interface.get_funding_rate_history(symbol, int(epoch_start), int(epoch_stop))
+        times = np.array([event['time'] for event in history], dtype=np.float64)
+        rates = np.array([event['rate'] for event in history], dtype=np.float64)
+        return times, rates
+
+    def __save(self, symbol: str, previous_coverage: typing.Optional[list]):
+        folder = self.__folder()
+        if folder is None:
+            return
+        os.makedirs(folder, exist_ok=True)
+        if previous_coverage is not None:
+            try:
+                os.remove(os.path.join(folder, self.__file_name(symbol, previous_coverage)))
+            except FileNotFoundError:
+                pass
+        times, rates, coverage = self.__series[symbol]
+        pd.DataFrame({'time': times, 'rate': rates}).to_csv(os.path.join(folder, self.__file_name(symbol, coverage)),
+                                                             index=False)
+
+    def __file_name(self, symbol: str, coverage: list) -> str:
+        return f'{self.exchange_name},{symbol},{int(coverage[0])},{int(coverage[1])}.csv'
+
+    def ensure(self, symbol: str, epoch_start: float, epoch_stop: float):
+        """
+        Download whatever part of the window isn't cached yet
+
+        Args:
+            symbol: The symbol to cache
+            epoch_start: Start of the window
+            epoch_stop: End of the window. Funding that hasn't happened yet can't be cached, so the window is cut off at
+                the current time.
+        """
+        self.__load(symbol)
+        epoch_stop = min(epoch_stop, time.time())
+        times, rates, coverage = self.__series[symbol]
+        if coverage is not None and coverage[0] <= epoch_start and epoch_stop <= coverage[1]:
+            return
+
+        if coverage is None:
+            missing = [(epoch_start, epoch_stop)]
+            new_coverage = [epoch_start, epoch_stop]
+        else:
+            # Only extend from the cached window so the arrays never have a hole in them
+            missing = []
+            if epoch_start < coverage[0]:
+                missing.append((epoch_start, coverage[0]))
+            if epoch_stop > coverage[1]:
+                missing.append((coverage[1], epoch_stop))
+            new_coverage = [min(epoch_start, coverage[0]), max(epoch_stop, coverage[1])]
+
+        all_times = [times]
+        all_rates = [rates]
+        for start, stop in missing:
+            downloaded_times, downloaded_rates = self.__download(symbol, start, stop)
+            all_times.append(downloaded_times)
+            all_rates.append(downloaded_rates)
+
+        times = np.concatenate(all_times)
+        rates = np.concatenate(all_rates)
+        # Windows share their edges so the same funding can come back twice
+        times, unique = np.unique(times, return_index=True)
+        rates = rates[unique]
+
+        self.__series[symbol] = (times, rates, new_coverage)
+        self.__save(symbol, coverage)
+
+    def history(self, symbol: str, epoch_start: float, epoch_stop: float) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the funding times & rates between two times
+
+        Args:
+            symbol: The symbol to get the funding of
+            epoch_start: Start time, inclusive
+            epoch_stop: Stop time, inclusive
+        """
+        self.ensure(symbol, epoch_start, epoch_stop)
+        times, rates, _ = self.__series[symbol]
+        start = np.searchsorted(times, epoch_start, side='left')
+        stop = np.searchsorted(times, epoch_stop, side='right')
+        return times[start:stop], rates[start:stop]
+
+    def rate_at(self, symbol: str, epoch: float, resolution: int) -> typing.Optional[typing.Tuple[float, float]]:
+        """
+        Find the last funding rate before a time and when the next funding happens
+
+        Args:
+            symbol: The symbol to get the funding of
+            epoch: The time to look up
+            resolution: The time between fundings, used to guess the next one past the end of the history
+
+        Returns:
+            (rate, next funding time) or None if there was no funding before this time
+        """
+        self.ensure(symbol, epoch - resolution, epoch + resolution)
+        times, rates, _ = self.__series[symbol]
+        index = int(np.searchsorted(times, epoch, side='left')) - 1
+        if index < 0:
+            return None
+        if index + 1 < len(times):
+            return float(rates[index]), float(times[index + 1])
+        return float(rates[index]), float(times[index]) + resolution
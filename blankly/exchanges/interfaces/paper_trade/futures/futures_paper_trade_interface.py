@@ -7,6 +7,8 @@ from typing import List, Optional
 from blankly.enums import MarginType, HedgeMode, PositionMode, Side, TimeInForce, ContractType, OrderStatus, OrderType
 from blankly.exchanges.interfaces.futures_exchange_interface import FuturesExchangeInterface
 from blankly.exchanges.interfaces.paper_trade.backtesting_wrapper import BacktestingWrapper
+from blankly.exchanges.interfaces.paper_trade.futures.funding_rate_cache import FundingRateCache
+from blankly.exchanges.interfaces.paper_trade.futures.position_book import PositionBook, LimitBook
 from blankly.exchanges.orders.futures.futures_order import FuturesOrder
 from blankly.utils import utils as utils
 from copy import deepcopy
@@ -17,10 +19,10 @@ from blankly.utils.exceptions import InvalidOrder, BacktestingException
 class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
     interface: FuturesExchangeInterface
     paper_account: dict
-    paper_positions: dict
+    paper_positions: PositionBook
     next_fund: int
 
-    _funding_rate_cache: list
+    funding_rates: FundingRateCache
 
     # mapping of contract names -> quote currency used
     # BTC-PERP -> USDT/USD
@@ -28,6 +30,8 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
 
     # orders
     _placed_orders: dict
+    # symbol -> resting limit orders sorted by price
+    _limit_books: dict
     _executed_orders: dict
     _canceled_orders: dict
     _funds_held: dict
@@ -76,15 +80,16 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
         self.next_fund = 0
 
         self._placed_orders = {}
+        self._limit_books = {}
         self._executed_orders = {}
         self._canceled_orders = {}
         self._funds_held = {}
         self._quote_map = {}
-        self._funding_rate_cache = []
+        self.funding_rates = FundingRateCache(exchange_name, interface)
 
         # same functionality as 'real' FuturesExchangeInterface's
         self.paper_account = defaultdict(lambda: {'available': 0, 'hold': 0})
-        self.paper_positions = {}
+        self.paper_positions = PositionBook()
         self.traded_assets = []
 
         self.margin_type = {}
@@ -118,7 +123,7 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
     def get_position(self, symbol: str = None) -> Optional[dict]:
         if symbol:
             return self.paper_positions.get(symbol, None)
-        return self.paper_positions
+        return dict(self.paper_positions)
 
     def market_order(self, symbol: str, side: Side, size: float, position: PositionMode = PositionMode.BOTH,
                      reduce_only: bool = False) -> FuturesOrder:
@@ -184,12 +189,15 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
             order = self._placed_orders[order_id][1]
             del self._placed_orders[order_id]
             assert order.symbol == symbol
+            if order.type == OrderType.LIMIT:
+                self._limit_books[symbol].remove(order_id, order.limit_price, order.side == Side.BUY)
             return dataclasses.replace(order, status=OrderStatus.CANCELED)
         except KeyError:
             raise BacktestingException('order not found')
 
     def get_open_orders(self, symbol: str = None) -> List[FuturesOrder]:
-        return [dataclasses.replace(o) for o in self._placed_orders]
+        return [dataclasses.replace(order) for _, order in self._placed_orders.values()
+                if symbol is None or order.symbol == symbol]
 
     def get_order(self, symbol: str, order_id: int) -> FuturesOrder:
         try:
@@ -206,18 +214,13 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
             return self.interface.get_funding_rate(symbol)
 
     def get_backtesting_funding_rate(self, symbol: str):
-        # check if cache needs to be refreshed
-        # TODO this all need to be moved into events framework once that's done
         time = self.time()
-        if not self._funding_rate_cache or self._funding_rate_cache[-1]['time'] < time:
-            self._funding_rate_cache = self.get_funding_rate_history(symbol, time, None)
-        for i, o in self._funding_rate_cache[:-1].enumerate():
-            if o['time'] < time:
-                last = o['rate']
-                next = self._funding_rate_cache[i + 1]['time']
-                return last, next
+        resolution = self.get_funding_rate_resolution()
+        found = self.funding_rates.rate_at(symbol, time, resolution)
+        if found is not None:
+            return found
         print(f'failed to download funding rate at time {time}')
-        return 0.0001, time + (time % self.get_funding_rate_resolution())
+        return 0.0001, time - (time % resolution) + resolution
 
     def get_price(self, symbol: str) -> float:
         if symbol.endswith('-PERP'):
@@ -228,8 +231,19 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
         else:
             return self.interface.get_price(symbol)
 
+    def get_prices(self, symbols: list) -> dict:
+        if self.backtesting:
+            return {symbol: self.get_price(symbol) for symbol in symbols}
+        # Quote the underlying symbols in one go and map them back to what was asked for
+        underlying = {symbol: symbol.split('-')[0] + '-' + self._quote_map[symbol] if symbol.endswith('-PERP')
+                      else symbol for symbol in symbols}
+        prices = self.interface.get_prices(list(underlying.values()))
+        return {symbol: prices[underlying[symbol]] for symbol in symbols}
+
     def get_funding_rate_history(self, symbol: str, epoch_start: int, epoch_stop: int) -> list:
-        return self.interface.get_funding_rate_history(symbol, epoch_start, epoch_stop)
+        # Past funding never changes so it's always served from the cache
+        times, rates = self.funding_rates.history(symbol, epoch_start, epoch_stop)
+        return [{'rate': rate, 'time': time} for time, rate in zip(times.tolist(), rates.tolist())]
 
     def get_funding_rate_resolution(self) -> int:
         return self.interface.get_funding_rate_resolution()
@@ -254,7 +268,7 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
         # negative rate = shorts pay for longs
         if symbol not in self.paper_positions:
             return
-        position = self.paper_positions[symbol]['size']
+        position = self.paper_positions.size(symbol)
         if (rate > 0) == (position > 0):
             # we lose money :(
             # either funding rate is positive and we are long
@@ -262,89 +276,95 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
             m = -1
         else:
             m = 1
-        self.paper_positions[symbol]['size'] *= 1 + (abs(rate) * m)
+        self.paper_positions.scale(symbol, 1 + (abs(rate) * m))
+
+    def receive_price(self, asset_id, new_price):
+        super().receive_price(asset_id, new_price)
+        self.paper_positions.receive_price(asset_id, new_price)
 
     def calculate_position_value(self, symbol):
-        position = self.paper_positions.get(symbol, None)
-        if not position:
+        if symbol not in self.paper_positions:
             return 0
-        entry_price = position['exchange_specific']['entry_price']
-        current_price = self.get_price(symbol) * abs(position['size'])
-        return entry_price + (current_price - entry_price) * self.get_leverage(symbol)
+        self.paper_positions.receive_price(symbol, self.get_price(symbol))
+        return self.paper_positions.value(symbol)
 
     def evaluate_limits(self):
         self.check_margin_call()
         self.execute_orders()
 
-    def execute_orders(self):
-        # TODO reduce_only on limit order "technically" broken
-        for id, order_data in list(self._placed_orders.items()):
-            is_closing, order = order_data
-            order: FuturesOrder
+    def execute_orders(self, symbol: str = None):
+        """
+        Fill the resting limit orders that the current prices trigger
 
-            if not self.should_run_order(order):
+        Args:
+            symbol: Only check the orders of this symbol
+        """
+        # TODO reduce_only on limit order "technically" broken
+        books = self._limit_books.items() if symbol is None else [(symbol, self._limit_books.get(symbol))]
+        for book_symbol, book in list(books):
+            if not book:
                 continue
+            for order_id in book.pop_triggered(self.get_price(book_symbol)):
+                self.__fill(order_id)
+
+    def __fill(self, order_id):
+        is_closing, order = self._placed_orders[order_id]
+        order: FuturesOrder
+
+        product = self.get_products(order.symbol)
+        base, quote = order.symbol.split('-')
+
+        asset_price = order.limit_price or self.get_price(order.symbol)
+        # if we held funds for the order, use those orelse just default to current price * ordersize
+        held_curr, notional = self._funds_held.pop(order_id, (quote, asset_price * order.size))
+
+        assert held_curr == quote
+
+        # copy order to _executed_orders
+        del self._placed_orders[order_id]
+        self._executed_orders[order_id] = dataclasses.replace(order, status=OrderStatus.FILLED, price=notional)
 
-            product = self.get_products(order.symbol)
-            base, quote = order.symbol.split('-')
-
-            asset_price = order.limit_price or self.get_price(order.symbol)
-            # if we held funds for the order, use those orelse just default to current price * ordersize
-            held_curr, notional = self._funds_held.pop(id, (quote, asset_price * order.size))
-
-            assert held_curr == quote
-
-            # copy order to _executed_orders
-            del self._placed_orders[id]
-            self._executed_orders[id] = dataclasses.replace(order, status=OrderStatus.FILLED, price=notional)
-
-            position_size = (self.get_position(order.symbol) or {'size': 0})['size']
-            size_diff = order.size * (1 if order.side == Side.BUY else -1)
-
-            position = self.paper_positions.get(order.symbol, None)
-            entry_price = position['exchange_specific']['entry_price'] if position else 0
-            entry_price += notional
-            # we sold off our position
-            if is_closing:
-                value = self.calculate_position_value(order.symbol)
-                self.paper_account[quote]['available'] += value
-            else:
-                self.paper_account[quote]['hold'] -= notional
-
-            # this overwrites but it's fine, we don't need to update
-            new_position = position_size + size_diff
-
-            # minimum possible position size you can buy, times two
-            # TODO improve this to just take minimum position size from exchange
-            if abs(new_position) >= 2 * utils.precision_to_increment(product['size_precision']):
-                self.paper_positions[order.symbol] = {
-                    'symbol': order.symbol,
-                    'base_asset': base,
-                    'quote_asset': quote,
-                    'size': new_position,
-                    'position': PositionMode.BOTH,
-                    'leverage': self.get_leverage(order.symbol),
-                    'margin_type': self.get_margin_type(order.symbol),
-                    'contract_type': ContractType.PERPETUAL,
-                    'exchange_specific': {
-                        'entry_price': entry_price
-                    }
-                }
-            else:
-                del self.paper_positions[order.symbol]
-            self.paper_account[base + '-PERP']['available'] = new_position
+        position_size = self.paper_positions.size(order.symbol)
+        size_diff = order.size * (1 if order.side == Side.BUY else -1)
+
+        entry_price = self.paper_positions.entry(order.symbol)
+        entry_price += notional
+        # we sold off our position
+        if is_closing:
+            value = self.calculate_position_value(order.symbol)
+            self.paper_account[quote]['available'] += value
+        else:
+            self.paper_account[quote]['hold'] -= notional
+
+        # this overwrites but it's fine, we don't need to update
+        new_position = position_size + size_diff
+
+        # minimum possible position size you can buy, times two
+        # TODO improve this to just take minimum position size from exchange
+        if abs(new_position) >= 2 * utils.precision_to_increment(product['size_precision']):
+            self.paper_positions.set(order.symbol, new_position, entry_price, self.get_leverage(order.symbol),
+                                     self.get_price(order.symbol), base, quote, self.get_margin_type(order.symbol))
+        else:
+            self.paper_positions.remove(order.symbol)
+        self.paper_account[base + '-PERP']['available'] = new_position
 
     def check_margin_call(self):
-        called = []
-        for symbol, position in self.paper_positions.items():
-            value = self.calculate_position_value(symbol)
-            if self.cash + value < 0:
-                # placing orders in here fucks with the dictionary
-                called.append((symbol, position))
+        if not len(self.paper_positions):
+            return
+        if not self.backtesting:
+            # Backtest prices are pushed in as they arrive, live prices have to be asked for
+            for symbol in self.paper_positions.open_symbols():
+                self.paper_positions.receive_price(symbol, self.get_price(symbol))
+
+        # Read the cash directly, self.cash copies the whole account. The paper exchange name has no settings block
+        # so the cash currency comes from the exchange being simulated.
+        cash_currency = self.user_preferences['settings'][self.interface.get_exchange_type()]['cash']
+        cash = self.paper_account[cash_currency]['available']
 
-        for symbol, position in called:
-            self.market_order(symbol, Side.BUY if position['size'] < 0 else Side.SELL, abs(position['size']),
-                              reduce_only=True)
+        # placing orders in here changes the book, so find every called position first
+        for symbol in self.paper_positions.margin_called(cash):
+            size = self.paper_positions.size(symbol)
+            self.market_order(symbol, Side.BUY if size < 0 else Side.SELL, abs(size), reduce_only=True)
 
     def _place_order(self, type: OrderType, symbol: str, side: Side, size: float, limit_price: float = 0,
                      position_mode: PositionMode = PositionMode.BOTH, reduce_only: bool = False,
@@ -367,6 +387,9 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
         if limit_price < 0 or (limit_price == 0 and type != OrderType.MARKET):
             raise ValueError('invalid limit price')
 
+        if type not in (OrderType.MARKET, OrderType.LIMIT):
+            raise InvalidOrder()
+
         # place funds on hold
         if type == OrderType.MARKET:
             price = self.get_price(symbol)
@@ -420,7 +443,13 @@ class FuturesPaperTradeInterface(FuturesExchangeInterface, BacktestingWrapper):
                              price=0, time_in_force=TimeInForce.GTC, response={}, interface=self.interface)
         self._placed_orders[order_id] = (is_closing, order)
 
-        self.execute_orders()
+        if type == OrderType.MARKET:
+            self.__fill(order_id)
+        else:
+            if symbol not in self._limit_books:
+                self._limit_books[symbol] = LimitBook()
+            self._limit_books[symbol].add(order_id, limit_price, side == Side.BUY)
+            self.execute_orders(symbol)
 
         return order
 
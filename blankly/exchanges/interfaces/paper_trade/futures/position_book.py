@@ -0,0 +1,210 @@
+"""
+    Array backed positions & price indexed limit orders for futures paper trading
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import typing
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Mapping
+
+import numpy as np
+
+from blankly.enums import PositionMode, ContractType
+
+
+class PositionBook(Mapping):
+    def __init__(self):
+        """
+        Open futures positions stored in arrays aligned by symbol. Every symbol that has ever held a position keeps
+        its slot, so sizes, entry notionals, leverage & the latest price can be valued for every position at once.
+
+        This reads like the old dictionary of positions: book[symbol] builds the position dictionary and len(book) is
+        the number of open positions.
+        """
+        self.symbols = []
+        self.__indexes = {}
+        self.sizes = np.zeros(0)
+        self.entries = np.zeros(0)
+        self.leverages = np.zeros(0)
+        self.prices = np.zeros(0)
+        self.active = np.zeros(0, dtype=bool)
+        # Details that aren't used in any math
+        self.__details = []
+
+    def __slot(self, symbol: str) -> int:
+        index = self.__indexes.get(symbol)
+        if index is None:
+            index = len(self.symbols)
+            self.symbols.append(symbol)
+            self.__indexes[symbol] = index
+            self.sizes = np.append(self.sizes, 0.0)
+            self.entries = np.append(self.entries, 0.0)
+            self.leverages = np.append(self.leverages, 1.0)
+            self.prices = np.append(self.prices, np.nan)
+            self.active = np.append(self.active, False)
+            self.__details.append(None)
+        return index
+
+    def set(self, symbol: str, size: float, entry: float, leverage: float, price: float, base_asset: str,
+            quote_asset: str, margin_type):
+        """
+        Open or replace the position of a symbol
+
+        Args:
+            symbol: The symbol of the position
+            size: Signed position size, negative when short
+            entry: Notional spent entering the position
+            leverage: Leverage of the position
+            price: Current price of the symbol
+            base_asset: Base asset of the symbol
+            quote_asset: Quote asset of the symbol
+            margin_type: The MarginType of the position
+        """
+        index = self.__slot(symbol)
+        self.sizes[index] = size
+        self.entries[index] = entry
+        self.leverages[index] = leverage
+        self.prices[index] = price
+        self.active[index] = True
+        self.__details[index] = (base_asset, quote_asset, margin_type)
+
+    def remove(self, symbol: str):
+        index = self.__indexes.get(symbol)
+        if index is not None:
+            self.active[index] = False
+            self.sizes[index] = 0
+            self.entries[index] = 0
+
+    def scale(self, symbol: str, factor: float):
+        """
+        Multiply the size of an open position, used for funding
+        """
+        index = self.__indexes.get(symbol)
+        if index is not None and self.active[index]:
+            self.sizes[index] *= factor
+
+    def receive_price(self, symbol: str, price: float):
+        index = self.__indexes.get(symbol)
+        if index is not None:
+            self.prices[index] = price
+
+    def size(self, symbol: str) -> float:
+        index = self.__indexes.get(symbol)
+        if index is None or not self.active[index]:
+            return 0
+        return float(self.sizes[index])
+
+    def entry(self, symbol: str) -> float:
+        index = self.__indexes.get(symbol)
+        if index is None or not self.active[index]:
+            return 0
+        return float(self.entries[index])
+
+    def values(self) -> np.ndarray:
+        """
+        The value of every slot at the latest prices, zero for symbols without a position
+        """
+        values = self.entries + (self.prices * np.abs(self.sizes) - self.entries) * self.leverages
+        return np.where(self.active, values, 0.0)
+
+    def value(self, symbol: str) -> float:
+        index = self.__indexes.get(symbol)
+        if index is None or not self.active[index]:
+            return 0
+        entry = self.entries[index]
+        return float(entry + (self.prices[index] * abs(self.sizes[index]) - entry) * self.leverages[index])
+
+    def margin_called(self, cash: float) -> typing.List[str]:
+        """
+        Symbols whose position would take the account below zero if it were closed now
+        """
+        called = np.flatnonzero(self.active & (cash + self.values() < 0))
+        return [self.symbols[index] for index in called]
+
+    def open_symbols(self) -> typing.List[str]:
+        return [self.symbols[index] for index in np.flatnonzero(self.active)]
+
+    def __getitem__(self, symbol: str) -> dict:
+        index = self.__indexes.get(symbol)
+        if index is None or not self.active[index]:
+            raise KeyError(symbol)
+        base, quote, margin_type = self.__details[index]
+        return {
+            'symbol': symbol,
+            'base_asset': base,
+            'quote_asset': quote,
+            'size': float(self.sizes[index]),
+            'position': PositionMode.BOTH,
+            'leverage': float(self.leverages[index]),
+            'margin_type': margin_type,
+            'contract_type': ContractType.PERPETUAL,
+            'exchange_specific': {
+                'entry_price': float(self.entries[index])
+            }
+        }
+
+    def __iter__(self):
+        return iter(self.open_symbols())
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def __contains__(self, symbol):
+        index = self.__indexes.get(symbol)
+        return index is not None and bool(self.active[index])
+
+
+class LimitBook:
+    def __init__(self):
+        """
+        Resting limit orders of one symbol sorted by limit price, so the orders that a price triggers are found with a
+        binary search instead of checking every order.
+        """
+        # Buys fill when the price falls to their limit, sells when it rises to it. Both are (limit, sequence, id).
+        self.buys = []
+        self.sells = []
+        self.__sequence = 0
+
+    def add(self, order_id, limit_price: float, buy: bool):
+        self.__sequence += 1
+        insort(self.buys if buy else self.sells, (limit_price, self.__sequence, order_id))
+
+    def remove(self, order_id, limit_price: float, buy: bool):
+        levels = self.buys if buy else self.sells
+        index = bisect_left(levels, (limit_price,))
+        while index < len(levels) and levels[index][0] == limit_price:
+            if levels[index][2] == order_id:
+                del levels[index]
+                return
+            index += 1
+
+    def pop_triggered(self, price: float) -> list:
+        """
+        Remove and return the ids of every order that fills at this price, in the order they were placed
+        """
+        # Buys with a limit at or above the price
+        buy_start = bisect_left(self.buys, (price,))
+        triggered = self.buys[buy_start:]
+        del self.buys[buy_start:]
+        # Sells with a limit at or below the price
+        sell_stop = bisect_right(self.sells, (price, float('inf')))
+        triggered += self.sells[:sell_stop]
+        del self.sells[:sell_stop]
+        triggered.sort(key=lambda level: level[1])
+        return [level[2] for level in triggered]
+
+    def __len__(self):
+        return len(self.buys) + len(self.sells)
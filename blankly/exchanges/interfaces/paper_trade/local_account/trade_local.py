@@ -33,12 +33,23 @@ class LocalAccount:
         # This is used for shorting. It largely corresponds with margin
         self.__granted_value = {}
         self.local_account = utils.AttributeDict(currencies)
+        # Assets modified since the last call to pop_changes()
+        self.__changed = set(currencies.keys())
 
     def override_local_account(self, currencies: dict) -> None:
         """
         After initialization, this is a setter for overriding the internal values
         """
         self.local_account = currencies
+        self.__changed.update(currencies.keys())
+
+    def pop_changes(self) -> set:
+        """
+        Get the assets modified since this was last called
+        """
+        changed = self.__changed
+        self.__changed = set()
+        return changed
 
     def trade_local(self, symbol, side, base_delta, quote_delta, quote_resolution, base_resolution) -> None:
         """
@@ -58,6 +69,8 @@ class LocalAccount:
         # Extract the base and quote pairs of the currency
         base = utils.get_base_asset(symbol)
         quote = utils.get_quote_asset(symbol)
+        self.__changed.add(base)
+        self.__changed.add(quote)
 
         # Push these abstracted deltas to the local account
         try:
@@ -222,6 +235,8 @@ class LocalAccount:
 
     def update_available(self, asset_id, new_value):
         self.local_account[asset_id]['available'] = new_value
+        self.__changed.add(asset_id)
 
     def update_hold(self, asset_id, new_value):
         self.local_account[asset_id]['hold'] = new_value
+        self.__changed.add(asset_id)
@@ -19,6 +19,11 @@
 import blankly.metrics as metrics
 from blankly.utils.time_builder import build_year
 
+# Display names of the metrics computed by compute_all()
+METRIC_NAMES = ('Compound Annual Growth Rate (%)', 'Cumulative Returns (%)', 'Max Drawdown (%)', 'Variance (%)',
+                'Sortino Ratio', 'Sharpe Ratio', 'Calmar Ratio', 'Volatility', 'Value-at-Risk',
+                'Conditional Value-at-Risk')
+
 
 def periods_per_year(period: int) -> float:
     """
@@ -102,3 +107,45 @@ def cvar(backtest_data):
 def max_drawdown(backtest_data):
     values = backtest_data['returns']['value']
     return abs(round(metrics.max_drawdown(values), 2)) * 100
+
+
+def compute_all(backtest_data, trading_period=86400, risk_free_rate=0) -> dict:
+    """
+    Compute every backtest metric in a single vectorized pass instead of calling each metric above separately. The
+    keys and rounding match the individual functions.
+
+    Args:
+        backtest_data: Dictionary containing resampled_account_value, returns and optionally benchmark_returns
+        trading_period: The number of seconds in each resampled period
+        risk_free_rate: Annual risk free rate
+    """
+    account_values = backtest_data['resampled_account_value']
+    times = account_values['time'].values
+    years = (times[-1] - times[0]) / build_year() if len(times) > 0 else None
+
+    benchmark_returns = None
+    if 'benchmark_returns' in backtest_data:
+        benchmark_returns = backtest_data['benchmark_returns']['value'].values
+
+    computed = metrics.compute_metrics(account_values['value'].values,
+                                       returns=backtest_data['returns']['value'].values,
+                                       n=periods_per_year(trading_period),
+                                       risk_free_rate=risk_free_rate,
+                                       years=years,
+                                       benchmark_returns=benchmark_returns)
+
+    result = {
+        'Compound Annual Growth Rate (%)': round(computed['cagr'], 2) * 100,
+        'Cumulative Returns (%)': round(computed['cum_returns'], 2) * 100,
+        'Max Drawdown (%)': abs(round(computed['max_drawdown'], 2)) * 100,
+        'Variance (%)': round(100.0 * computed['variance'], 2),
+        'Sortino Ratio': round(computed['sortino'], 2),
+        'Sharpe Ratio': round(computed['sharpe'], 2),
+        'Calmar Ratio': round(computed['calmar'], 2),
+        'Volatility': round(computed['volatility'], 2),
+        'Value-at-Risk': round(computed['var'], 2),
+        'Conditional Value-at-Risk': round(computed['cvar'], 2)
+    }
+    if benchmark_returns is not None:
+        result['Beta'] = round(100.0 * computed['beta'], 2)
+    return result
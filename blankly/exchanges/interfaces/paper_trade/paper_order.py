@@ -0,0 +1,115 @@
+"""
+    Compact order records for paper trading
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from collections.abc import MutableMapping
+
+# Keys in the order the old dictionary responses had them. Fields that are None are left out, such as the price of a
+# market order.
+_KEYS = ('symbol', 'id', 'created_at', 'price', 'size', 'status', 'time_in_force', 'type', 'side',
+         'exchange_specific', 'exchange', 'settled')
+# Keys that can be deleted
+_OPTIONAL_KEYS = ('price', 'time_in_force', 'exchange', 'settled')
+
+_FIELDS = frozenset(_KEYS)
+
+
+class PaperOrder(MutableMapping):
+    __slots__ = ('symbol', 'id', 'created_at', 'price', 'size', 'status', 'time_in_force', 'type', 'side',
+                 'exchange', 'settled', '_exchange_specific', '_extra')
+
+    def __init__(self, symbol: str, id_: str, created_at: float, size: float, status: str, type_: str, side: str,
+                 price: float = None, time_in_force: str = None, exchange: str = None):
+        """
+        A paper trade order. This reads like the dictionary responses that orders used to be (order['status']) but
+        stores numeric fields as numbers in slots, which keeps millions of backtest orders cheap to create and hold.
+
+        Market orders have no price or time_in_force. 'exchange' and 'settled' only appear once they are set.
+        """
+        self.symbol = symbol
+        self.id = id_
+        self.created_at = created_at
+        self.price = price
+        self.size = size
+        self.status = status
+        self.time_in_force = time_in_force
+        self.type = type_
+        self.side = side
+        self.exchange = exchange
+        self.settled = None
+        self._exchange_specific = None
+        self._extra = None
+
+    @property
+    def exchange_specific(self) -> dict:
+        # Almost never used, so only created when asked for
+        if self._exchange_specific is None:
+            self._exchange_specific = {}
+        return self._exchange_specific
+
+    def keys(self):
+        keys = [key for key in _KEYS if key == 'exchange_specific' or getattr(self, key) is not None]
+        if self._extra:
+            keys.extend(self._extra)
+        return keys
+
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'exchange_specific':
+            self._exchange_specific = value
+        elif key in _FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _OPTIONAL_KEYS and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key):
+        if key in _FIELDS:
+            return key == 'exchange_specific' or getattr(self, key) is not None
+        return self._extra is not None and key in self._extra
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self) -> dict:
+        """
+        A plain dictionary copy, used when the orders are exported
+        """
+        return {key: self[key] for key in self.keys()}
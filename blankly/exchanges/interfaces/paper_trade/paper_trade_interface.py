@@ -24,6 +24,7 @@ import warnings
 import blankly.exchanges.interfaces.paper_trade.utils as paper_trade
 import blankly.utils.utils as utils
 from blankly.exchanges.interfaces.paper_trade.local_account.trade_local import LocalAccount
+from blankly.exchanges.interfaces.paper_trade.paper_order import PaperOrder
 from blankly.exchanges.interfaces.abc_exchange_interface import ABCExchangeInterface
 from blankly.exchanges.interfaces.exchange_interface import ExchangeInterface
 from blankly.exchanges.interfaces.paper_trade.backtesting_wrapper import BacktestingWrapper
@@ -36,8 +37,11 @@ from blankly.utils.exceptions import APIException, InvalidOrder
 
 class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
     def __init__(self, derived_interface: ABCExchangeInterface, initial_account_values: dict = None):
-        # This paper trade orders keeps a live track of the orders
-        self.paper_trade_orders = []
+        # Every order that hasn't been canceled by id, in the order they were created
+        self.__orders = {}
+        # Only the pending limit & stop orders, these are all that need to be checked for fills
+        self.__open_orders = {}
+        self.__generate_id = paper_trade.OrderIdGenerator()
         # These two keep track of which limit orders and when the order finishes
         self.canceled_orders = []
         self.executed_orders = []
@@ -53,6 +57,20 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
 
         self.__thread = None
 
+        # Limit orders are filled from ticker websockets when running live, these are the symbols being watched and
+        # the last time each one received a tick
+        self.__ticker_manager = None
+        self.__fill_tickers = {}
+        self.__fill_callbacks = {}
+        self.__last_fill_tick = {}
+        # Tickers opened for fills, as opposed to ones shared with the price source, which are the only ones closed
+        self.__owned_fill_tickers = {}
+        # Fills can come from websocket threads, the watchdog and cancels at the same time
+        self.__orders_lock = threading.RLock()
+        # Rounding used when a resting order fills. Kept per symbol so a fill never has to reload the order filter,
+        # which on binance requotes the price.
+        self.__fill_decimals = {}
+
         # Set the type of the paper trade exchange to be the same as whichever interface its derived from
         ExchangeInterface.__init__(self, derived_interface.get_exchange_type(), derived_interface)
         BacktestingWrapper.__init__(self)
@@ -71,12 +89,18 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         # This logically overrides any __enable_shorting
         self.__force_shorting = self.user_preferences['settings']['global_shorting']
 
+        self.__fill_source = self.user_preferences['settings']['paper']['limit_fill_source']
+
         if self.user_preferences['settings']['paper']['price_source'] == 'websocket':
-            from blankly.exchanges.managers.ticker_manager import TickerManager
             warnings.warn("Experimental websocket prices enabled.")
-            self.__ticker_manager = TickerManager(self.get_exchange_type(), default_symbol='')
             self._websocket_update = lambda *args: None
 
+    def __get_ticker_manager(self):
+        if self.__ticker_manager is None:
+            from blankly.exchanges.managers.ticker_manager import TickerManager
+            self.__ticker_manager = TickerManager(self.get_exchange_type(), default_symbol='')
+        return self.__ticker_manager
+
     @property
     def local_account(self):
         if self.__local_account_cache is None:
@@ -170,14 +194,81 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
 
     def __paper_trade_watchdog(self):
         """
-        Internal order watching system
+        Internal order watching system. When the limit orders are filled from the ticker websockets this only polls
+        the symbols whose websocket has gone quiet.
         """
-        utils.info_print('Evaluating paper limit orders every 10 seconds...')
+        if self.__fill_source == 'websocket':
+            utils.info_print('Evaluating paper limit orders on each tick, polling every 10 seconds as a fallback...')
+        else:
+            utils.info_print('Evaluating paper limit orders every 10 seconds...')
         while True:
             time.sleep(10)
             if not self.__run_watchdog:
                 break
             self.evaluate_limits()
+            self.__close_idle_fill_tickers()
+
+    def __watch_symbol(self, symbol: str):
+        """
+        Subscribe to the ticker for a symbol with resting orders so they can be evaluated as soon as the price moves
+        """
+        if self.backtesting or self.__fill_source != 'websocket' or symbol in self.__fill_tickers:
+            return
+
+        def on_tick(tick, **kwargs):
+            self.__last_fill_tick[symbol] = time.time()
+            self.evaluate_limits(prices={symbol: tick['price']})
+
+        exchange = self.get_exchange_type()
+        try:
+            tickers = self.__get_ticker_manager().get_all_tickers()
+            if exchange in tickers and symbol in tickers[exchange]:
+                # Share the websocket the price source may have already opened
+                ticker = tickers[exchange][symbol]
+                if self.__owned_fill_tickers.get(symbol) is ticker and not ticker.is_websocket_open():
+                    # This was closed when its orders were done
+                    ticker.restart_ticker()
+                ticker.append_callback(on_tick)
+            else:
+                ticker = self.__get_ticker_manager().create_ticker(on_tick, override_symbol=symbol,
+                                                                   override_exchange=exchange)
+                self.__owned_fill_tickers[symbol] = ticker
+        except Exception as e:
+            utils.info_print(f"Unable to stream {symbol} for paper limit orders, falling back to polling: {e}")
+            ticker = None
+        # None is stored too so the symbol isn't retried on every order
+        self.__fill_tickers[symbol] = ticker
+        self.__fill_callbacks[symbol] = on_tick
+
+    @property
+    def paper_trade_orders(self) -> list:
+        """
+        Every order that hasn't been canceled, in the order they were created
+        """
+        return list(self.__orders.values())
+
+    def __has_live_ticker(self, symbol: str) -> bool:
+        ticker = self.__fill_tickers.get(symbol)
+        if ticker is None:
+            return False
+        # A websocket that hasn't ticked in a while is treated as down
+        return ticker.is_websocket_open() and time.time() - self.__last_fill_tick.get(symbol, 0) < 30
+
+    def __close_idle_fill_tickers(self):
+        with self.__orders_lock:
+            resting = {i['symbol'] for i in self.__open_orders.values()}
+        for symbol in list(self.__fill_tickers.keys()):
+            if symbol not in resting:
+                ticker = self.__fill_tickers.pop(symbol)
+                on_tick = self.__fill_callbacks.pop(symbol)
+                self.__last_fill_tick.pop(symbol, None)
+                if ticker is None:
+                    continue
+                ticker.remove_callback(on_tick)
+                # Only close a websocket opened for fills that the price source isn't reading from
+                if self.__owned_fill_tickers.get(symbol) is ticker and \
+                        self.user_preferences['settings']['paper']['price_source'] != 'websocket':
+                    ticker.close_websocket()
 
     @staticmethod
     def __get_decimals(number) -> int:
@@ -205,31 +296,73 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
                 })
         self.local_account.override_local_account(current_account)
 
-    def evaluate_limits(self):
+    def evaluate_limits(self, prices: dict = None):
         """
         When this is run it checks the local paper trade orders to see if any need to go through
+
+        Args:
+            prices (Optional): Dictionary of symbol to price, only orders on these symbols are evaluated. A price can
+                also be a (bid, ask) tuple so buys fill against the ask and sells against the bid. If not given every
+                symbol with orders is priced, skipping symbols that are already streaming ticks.
         """
-        used_currencies = []
-        for i in self.paper_trade_orders:
-            if i["symbol"] not in used_currencies:
-                used_currencies.append(i['symbol'])
-        prices = {}
+        if prices is None:
+            used_currencies = []
+            for i in list(self.__open_orders.values()):
+                if i["symbol"] not in used_currencies:
+                    used_currencies.append(i['symbol'])
+
+            prices = {}
+            for i in used_currencies:
+                if not self.backtesting and self.__has_live_ticker(i):
+                    continue
+                prices[i] = self.get_price(i)
+                if not self.backtesting:
+                    time.sleep(.2)
+
+        # Looked up before taking the lock, this is only a dictionary read once an order was placed on the symbol
+        decimals_dict = {i: self.__get_fill_decimals(i) for i in prices}
+        with self.__orders_lock:
+            self.__evaluate_limits(prices, decimals_dict)
+
+    def evaluate_orderbook(self, symbol: str, book):
+        """
+        Fill resting orders on a symbol against the top of an orderbook. An empty side never fills anything.
+
+        Args:
+            symbol: The symbol of the book
+            book: An Orderbook
+        """
+        for order in list(self.__open_orders.values()):
+            if order.symbol == symbol:
+                break
+        else:
+            # Most book updates happen without resting orders, skip loading the order filter
+            return
+
+        best_bid = book.best_bid
+        best_ask = book.best_ask
+        # NaN compares false to everything so a missing side can't cross
+        self.evaluate_limits({symbol: (float('nan') if best_bid is None else best_bid,
+                                       float('nan') if best_ask is None else best_ask)})
+
+    def __get_fill_decimals(self, symbol: str) -> dict:
+        decimals = self.__fill_decimals.get(symbol)
+        if decimals is None:
+            # Only the increments are needed, so the binance price limits aren't evaluated
+            if symbol not in self.get_order_filter_cache:
+                self.get_order_filter_cache[symbol] = self.calls.get_order_filter(symbol)
+            market_limits = self.get_order_filter_cache[symbol]
+            decimals = {
+                'quantity_decimals': self.__get_decimals(market_limits['limit_order']['base_increment']),
+                'quote_decimals': self.__get_decimals(market_limits['market_order']['quote_increment'])
+            }
+            self.__fill_decimals[symbol] = decimals
+        return decimals
 
-        decimals_dict = {}
-        # get the market limits so that we can get accurate rounding
-        for i in used_currencies:
-            market_limits = self.get_order_filter(i)
-            decimals_dict[i] = {}
-            decimals_dict[i]['quantity_decimals'] = self.__get_decimals(market_limits['limit_order']['base_increment'])
-            decimals_dict[i]['quote_decimals'] = self.__get_decimals(market_limits['market_order']['quote_increment'])
-
-        for i in used_currencies:
-            prices[i] = self.get_price(i)
-            if not self.backtesting:
-                time.sleep(.2)
-
-        for i in range(len(self.paper_trade_orders)):
-            index = self.paper_trade_orders[i]
+    def __evaluate_limits(self, prices: dict, decimals_dict: dict):
+        for index in list(self.__open_orders.values()):
+            if index['symbol'] not in prices:
+                continue
             """
             Coinbase pro example
             {
@@ -252,10 +385,14 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
             """
             if index['type'] in ('limit', 'stop_loss') and index['status'] == 'pending':
                 current_price = prices[index['symbol']]
+                if isinstance(current_price, tuple):
+                    bid_price, ask_price = current_price
+                else:
+                    bid_price = ask_price = current_price
                 limit_price = index['price']
 
                 if index['side'] == 'buy':
-                    if index['price'] > current_price:
+                    if index['price'] > ask_price:
                         # Take everything off hold
                         asset_id = index['symbol']
                         quote = utils.get_quote_asset(asset_id)
@@ -287,10 +424,10 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
                             'executed_time': self.time(),
                         })
 
-                        self.paper_trade_orders[i] = order
+                        del self.__open_orders[order.id]
                 elif index['side'] == 'sell':
-                    if limit_price < current_price and index['type'] == 'limit' \
-                            or current_price <= limit_price and index['type'] == 'stop_loss':
+                    if limit_price < bid_price and index['type'] == 'limit' \
+                            or bid_price <= limit_price and index['type'] == 'stop_loss':
                         # Take everything off hold
 
                         asset_id = index['symbol']
@@ -324,7 +461,7 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
                             'executed_time': self.time(),
                         })
 
-                        self.paper_trade_orders[i] = order
+                        del self.__open_orders[order.id]
 
     def evaluate_paper_trade(self, order, current_price):
         """
@@ -368,7 +505,6 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
     def market_order(self, symbol, side, size) -> MarketOrder:
         if not self.backtesting:
             print("Paper Trading...")
-        needed = self.needed['market_order']
         creation_time = self.time()
         price = self.get_price(symbol)
         funds = price*size
@@ -417,38 +553,12 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
                                       quantity_decimals,
                                       (shortable and self.__enable_shorting) or self.__force_shorting,
                                       calculate_margin=self.__calculate_margin)
-        # Create coinbase pro-like id
-        coinbase_pro_id = paper_trade.generate_coinbase_pro_id()
-        # TODO the force typing here isn't strictly necessary because its run int the isolate_specific anyway
-        response = {
-            'symbol': str(symbol),
-            'id': str(coinbase_pro_id),
-            'created_at': str(creation_time),
-            # 'funds': str(utils.trunc(size - size * float((self.__exchange_properties["taker_fee_rate"])),
-            #                          base_decimals)),
-            'size': str(size),
-            'status': 'done',
-            'type': 'market',
-            'side': str(side),
-            # 'specified_funds': str(funds),
-            # 'post_only': 'false',
-            # 'done_at': str(self.time()),
-            # 'done_reason': 'filled',
-            # 'fill_fees': str(utils.trunc(funds * float((self.__exchange_properties["maker_fee_rate"])),
-            #                              quote_decimals)),
-            # 'filled_size': str(utils.trunc(funds - funds *
-            #                                float((self.__exchange_properties["maker_fee_rate"])) / price,
-            #                                quantity_decimals)),
-            # 'executed_value': str(utils.trunc(funds - funds * float((self.__exchange_properties["maker_fee_rate"])),
-            #                                   quote_decimals)),
-            # 'settled': 'true'
-            'exchange_specific': {}
-        }
-        response = utils.isolate_specific(needed, response)
-        self.paper_trade_orders.append(response)
-        # Identify the trade also by exchange
-        if self.backtesting:
-            self.paper_trade_orders[-1]['exchange'] = self.get_exchange_type()
+        response = PaperOrder(symbol, self.__generate_id(), float(creation_time), float(size), 'done', 'market',
+                              side,
+                              # Identify the trade also by exchange
+                              exchange=self.get_exchange_type() if self.backtesting else None)
+        with self.__orders_lock:
+            self.__orders[response.id] = response
 
         if side == "buy":
             self.local_account.trade_local(symbol=symbol,
@@ -477,7 +587,7 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         self.__check_trading_assets(symbol)
 
         self.market_order_execution_details.append({
-            'id': response['id'],
+            'id': response.id,
             'executed_price': price
         })
         return MarketOrder(order, response, self)
@@ -491,7 +601,6 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
             price: price to set limit order
             size: amount of currency (like BTC) for the limit to be valued
         """
-        needed = self.needed['limit_order']
         """
         {
             "id": "d0c5340b-6d6c-49d9-b567-48c4bfca13d2",
@@ -572,33 +681,16 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         self.local_account.test_trade(symbol, side, size, price, quote_resolution=price_increment_decimals,
                                       base_resolution=base_decimals, shortable=False)
 
-        # Create coinbase pro-like id
-        coinbase_pro_id = paper_trade.generate_coinbase_pro_id()
-        # TODO the response fills in the exchange specific tags into the base dictionary. This is
-        #  useful but really shouldn't be included. We actually really need executed value as a
-        #  universally included key.
-        response = {
-            'symbol': str(symbol),
-            'id': str(coinbase_pro_id),
-            'created_at': str(creation_time),
-            'price': str(price),
-            'size': str(size),
-            'status': 'pending',
-            "time_in_force": "GTC",
-            'type': 'stop_loss' if stop_loss else 'limit',
-            'side': str(side),
-            # 'stp': 'dc',
-            # 'post_only': 'false',
-            # "fill_fees": "0.0000000000000000",
-            # "filled_size": "0.00000000",
-            # "executed_value": "0.0000000000000000",
-            # 'settled': 'false'
-            'exchange_specific': {}
-        }
-        response = utils.isolate_specific(needed, response)
-        self.paper_trade_orders.append(response)
-        # Identify the trade also by exchange
-        self.paper_trade_orders[-1]['exchange'] = self.get_exchange_type()
+        response = PaperOrder(symbol, self.__generate_id(), float(creation_time), float(size), 'pending',
+                              'stop_loss' if stop_loss else 'limit', side, price=float(price), time_in_force='GTC',
+                              # Identify the trade also by exchange
+                              exchange=self.get_exchange_type())
+        # Load the fill rounding here so the ticks that fill this order don't have to
+        self.__get_fill_decimals(symbol)
+        with self.__orders_lock:
+            self.__orders[response.id] = response
+            self.__open_orders[response.id] = response
+        self.__watch_symbol(symbol)
 
         base = utils.get_base_asset(symbol)
         quote = utils.get_quote_asset(symbol)
@@ -629,65 +721,54 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         This block could potentially work for both exchanges
         """
         del symbol
-        order_index = None
-        for i in range(len(self.paper_trade_orders)):
-            index = self.paper_trade_orders[i]
-            if index['status'] == 'pending' and index['id'] == order_id:
-                order_index = i
-                break
+        with self.__orders_lock:
+            return self.__cancel_order(order_id)
 
-        if order_index is not None:
-            # Now that we found it make sure that we move the funds back on available
-            order = self.paper_trade_orders[order_index]
-            side = order['side']
-            size = order['size']
-            symbol = order['symbol']
-            price = order['price']
-            base_asset = utils.get_base_asset(symbol)
-            quote_asset = utils.get_quote_asset(symbol)
-
-            if side == 'buy':
-                # When you cancel on the buy side you get those funds back in available
-                available = self.local_account.get_account(quote_asset)['available']
-                self.local_account.update_available(quote_asset, available + (size * price))
-
-                # And loose them on hold
-                hold = self.local_account.get_account(quote_asset)['hold']
-                self.local_account.update_hold(quote_asset, hold - (size * price))
-            elif side == 'sell':
-                # Canceling a sell you gain the size back into available
-                available = self.local_account.get_account(base_asset)['available']
-                self.local_account.update_available(base_asset, available + size)
-
-                # And you loose it in the hold
-                hold = self.local_account.get_account(base_asset)['hold']
-                self.local_account.update_hold(base_asset, hold - size)
-
-            # This saves the order
-            order_id = order['id']
-            # Make sure to save this as a canceled order just before closing it
-            # Make sure to write in the time also
-            self.canceled_orders.append({
-                'id': self.paper_trade_orders[order_index]['id'],
-                'canceled_time': self.time()
-            })
-
-            del self.paper_trade_orders[order_index]
-            return {"order_id": order_id}
-        else:
+    def __cancel_order(self, order_id) -> dict:
+        order = self.__open_orders.pop(order_id, None)
+        if order is None:
             raise APIException("Order ID not found.")
 
+        # Now that we found it make sure that we move the funds back on available
+        side = order['side']
+        size = order['size']
+        symbol = order['symbol']
+        price = order['price']
+        base_asset = utils.get_base_asset(symbol)
+        quote_asset = utils.get_quote_asset(symbol)
+
+        if side == 'buy':
+            # When you cancel on the buy side you get those funds back in available
+            available = self.local_account.get_account(quote_asset)['available']
+            self.local_account.update_available(quote_asset, available + (size * price))
+
+            # And loose them on hold
+            hold = self.local_account.get_account(quote_asset)['hold']
+            self.local_account.update_hold(quote_asset, hold - (size * price))
+        elif side == 'sell':
+            # Canceling a sell you gain the size back into available
+            available = self.local_account.get_account(base_asset)['available']
+            self.local_account.update_available(base_asset, available + size)
+
+            # And you loose it in the hold
+            hold = self.local_account.get_account(base_asset)['hold']
+            self.local_account.update_hold(base_asset, hold - size)
+
+        # Make sure to save this as a canceled order just before closing it
+        # Make sure to write in the time also
+        self.canceled_orders.append({
+            'id': order_id,
+            'canceled_time': self.time()
+        })
+
+        del self.__orders[order_id]
+        return {"order_id": order_id}
+
     def get_open_orders(self, symbol=None):
-        open_orders = []
-        for i in self.paper_trade_orders:
-            if i["status"] == "pending":
-                open_orders.append(i)
-        return open_orders
+        return list(self.__open_orders.values())
 
     def get_order(self, symbol, order_id) -> dict:
-        for i in self.paper_trade_orders:
-            if i["id"] == order_id:
-                return i
+        return self.__orders.get(order_id)
 
     def get_products(self):
         def get_keyless_products():
@@ -751,26 +832,49 @@ class PaperTradeInterface(ExchangeInterface, BacktestingWrapper):
         if self.backtesting:
             return self.get_backtesting_price(symbol)
         else:
-            def idle(tick):
-                pass
-            # Only get crazy websocket prices if asked
-            if self.user_preferences['settings']['paper']['price_source'] == 'websocket':
-                tickers = self.__ticker_manager.get_all_tickers()
-                if self.get_exchange_type() in tickers and symbol in tickers[self.get_exchange_type()]:
-                    most_recent_tick = tickers[self.get_exchange_type()][symbol].get_most_recent_tick()
-
-                    if most_recent_tick is None:
-                        utils.info_print("No data found on ticker yet - using API...")
-                        return self.calls.get_price(symbol)
-                    else:
-                        return most_recent_tick['price']
-                else:
-                    utils.info_print(f"Creating ticker on symbol {symbol} for exchange {self.get_exchange_type()}...")
-                    self.__ticker_manager.create_ticker(callback=self._websocket_update, override_symbol=symbol,
-                                                        override_exchange=self.get_exchange_type())
-                    return self.calls.get_price(symbol)
-            else:
+            price = self.__websocket_price(symbol)
+            if price is None:
                 return self.calls.get_price(symbol)
+            return price
+
+    def get_prices(self, symbols: list) -> dict:
+        if self.backtesting:
+            return {symbol: self.get_backtesting_price(symbol) for symbol in symbols}
+
+        prices = {}
+        for symbol in symbols:
+            price = self.__websocket_price(symbol)
+            if price is not None:
+                prices[symbol] = price
+
+        # Anything the websockets couldn't price is quoted in bulk
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            prices.update(self.calls.get_prices(missing))
+        return {symbol: prices[symbol] for symbol in symbols}
+
+    def __websocket_price(self, symbol) -> [float, None]:
+        """
+        The price from the most recent websocket tick, or None if the API should be used instead
+        """
+        # Only get crazy websocket prices if asked
+        if self.user_preferences['settings']['paper']['price_source'] != 'websocket':
+            return None
+
+        tickers = self.__get_ticker_manager().get_all_tickers()
+        if self.get_exchange_type() in tickers and symbol in tickers[self.get_exchange_type()]:
+            most_recent_tick = tickers[self.get_exchange_type()][symbol].get_most_recent_tick()
+
+            if most_recent_tick is None:
+                utils.info_print("No data found on ticker yet - using API...")
+                return None
+            else:
+                return most_recent_tick['price']
+        else:
+            utils.info_print(f"Creating ticker on symbol {symbol} for exchange {self.get_exchange_type()}...")
+            self.__get_ticker_manager().create_ticker(callback=self._websocket_update, override_symbol=symbol,
+                                                override_exchange=self.get_exchange_type())
+            return None
 
     @staticmethod
     def __evaluate_binance_limits(price: (int, float), order_filter):
@@ -0,0 +1,162 @@
+"""
+    Incremental account valuation for backtests
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import typing
+
+import numpy as np
+
+
+class PortfolioValuation:
+    def __init__(self, interface, quote_currency: str, initial_account: dict, resync_interval: int = 1000):
+        """
+        Keep the value of a paper trade account up to date as fills and prices change. Holdings & prices are stored in
+        arrays and only the entries that changed are touched, so valuing an account with many assets is as cheap as
+        valuing one.
+
+        Args:
+            interface: The spot PaperTradeInterface being backtested
+            quote_currency: The currency the account is valued in
+            initial_account: The account at the start of the backtest, used for the no trade values
+            resync_interval: Number of updates before the running totals are recomputed from scratch, which stops
+                floating point error from building up
+        """
+        self.interface = interface
+        self.quote_currency = quote_currency
+        self.initial_account = initial_account
+        self.resync_interval = resync_interval
+
+        # Every traded asset other than the quote, in the order they were traded
+        self.assets = []
+        self.__indexes = {}
+        # Symbol that prices each asset -> index of the asset
+        self.__symbol_indexes = {}
+        self.holdings = np.zeros(0)
+        self.initial_holdings = np.zeros(0)
+        self.prices = np.zeros(0)
+
+        self.quote_holding = 0
+        self.initial_quote_holding = 0
+        self.__asset_value = 0
+        self.__no_trade_asset_value = 0
+
+        self.__traded_count = -1
+        self.__updates = 0
+        self.sync()
+
+    def __total(self, asset: str) -> float:
+        # Read the account directly, get_account() would copy it
+        account = self.interface.local_account.local_account[asset]
+        return account['available'] + account['hold']
+
+    def __price_symbol(self, asset: str) -> str:
+        if self.interface.get_exchange_type() == 'alpaca' or asset.endswith('PERP'):
+            return asset
+        return asset + '-' + self.quote_currency
+
+    def __price(self, symbol: str) -> float:
+        try:
+            return self.interface.get_price(symbol)
+        except KeyError:
+            raise KeyError(f"Failed to quote {symbol} because no downloaded data for that pair is available. "
+                           f"Make sure to set \"quote_account_value_in\" in \"backtest.json\" to match the prices "
+                           f"you are using. For example if you are trading \"USD-JPY\", set your quote value "
+                           f"to \"JPY\". Currently it is set to {self.quote_currency}")
+
+    def sync(self):
+        """
+        Rebuild every holding, price & total from the interface
+        """
+        traded_assets = self.interface.traded_assets
+        try:
+            self.quote_holding = self.__total(self.quote_currency)
+        except KeyError as e:
+            raise KeyError(f"Failed looking up {e}. Try changing your quote_account_value_in in backtest.json to be "
+                           f"{e}, or try a tether coin in backtest.json like USDT depending on exchange.")
+        self.initial_quote_holding = self.initial_account[self.quote_currency]['available'] + \
+            self.initial_account[self.quote_currency]['hold']
+
+        self.assets = [asset for asset in traded_assets if asset != self.quote_currency]
+        self.__indexes = {asset: index for index, asset in enumerate(self.assets)}
+        self.__symbol_indexes = {self.__price_symbol(asset): index for index, asset in enumerate(self.assets)}
+        self.holdings = np.array([self.__total(asset) for asset in self.assets], dtype=np.float64)
+        self.initial_holdings = np.array([self.initial_account[asset]['available'] +
+                                          self.initial_account[asset]['hold'] for asset in self.assets],
+                                         dtype=np.float64)
+        self.prices = np.array([self.__price(symbol) for symbol in self.__symbol_indexes], dtype=np.float64)
+
+        self.__asset_value = float(np.dot(self.holdings, self.prices))
+        self.__no_trade_asset_value = float(np.dot(self.initial_holdings, self.prices))
+
+        # Anything changed before now is already included
+        self.interface.local_account.pop_changes()
+        self.__traded_count = len(traded_assets)
+        self.__updates = 0
+
+    def update(self, changed_symbols: typing.Iterable[str] = ()):
+        """
+        Apply the fills recorded by the local account and the given price changes
+
+        Args:
+            changed_symbols: Symbols whose price moved since the last update
+        """
+        if len(self.interface.traded_assets) != self.__traded_count or self.__updates >= self.resync_interval:
+            self.sync()
+            return
+        self.__updates += 1
+
+        for asset in self.interface.local_account.pop_changes():
+            if asset == self.quote_currency:
+                self.quote_holding = self.__total(asset)
+                continue
+            index = self.__indexes.get(asset)
+            if index is None:
+                continue
+            holding = self.__total(asset)
+            self.__asset_value += (holding - self.holdings[index]) * self.prices[index]
+            self.holdings[index] = holding
+
+        for symbol in changed_symbols:
+            index = self.__symbol_indexes.get(symbol)
+            if index is None:
+                continue
+            price = self.interface.get_price(symbol)
+            change = price - self.prices[index]
+            self.__asset_value += change * self.holdings[index]
+            self.__no_trade_asset_value += change * self.initial_holdings[index]
+            self.prices[index] = price
+
+    @property
+    def value(self) -> float:
+        return self.__asset_value + self.quote_holding
+
+    @property
+    def no_trade_value(self) -> float:
+        return self.__no_trade_asset_value + self.initial_quote_holding
+
+    def record(self, local_time) -> typing.Tuple[dict, dict]:
+        """
+        Build the account history rows in the same layout as BackTestController.format_account_data
+        """
+        available = dict(zip(self.assets, self.holdings.tolist()))
+        no_trade = dict(zip(self.assets, self.initial_holdings.tolist()))
+        available['time'] = local_time
+        no_trade['time'] = local_time
+        available[self.quote_currency] = self.quote_holding
+        available['Account Value (' + self.quote_currency + ')'] = self.value
+        no_trade['Account Value (No Trades)'] = self.no_trade_value
+        return available, no_trade
@@ -0,0 +1,285 @@
+"""
+    Vectorized backtesting for strategies that reduce to precomputed positions or signals
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.exchange import ABCExchange
+from blankly.exchanges.interfaces.paper_trade import utils as paper_trade
+from blankly.exchanges.interfaces.paper_trade.backtest_controller import BackTestController
+from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+from blankly.exchanges.interfaces.paper_trade.futures.futures_paper_trade_interface import FuturesPaperTradeInterface
+from blankly.utils.utils import trunc, count_decimals, get_base_asset, get_quote_asset
+
+
+class VectorizedBacktestController(BackTestController):
+    def __init__(self, exchange: ABCExchange, backtest_settings_path: str = None):
+        """
+        Backtest precomputed position or signal arrays without running a strategy bar by bar. Prices, account settings,
+        fees & order filters are the same as the event driven BackTestController, so promising candidates can be moved
+        to a full backtest without surprises.
+
+        The prices are synced once and reused, so calling run() many times on different arrays is cheap.
+
+        Args:
+            exchange: A paper trade exchange
+            backtest_settings_path: Path to the backtest.json file
+        """
+        super().__init__(model=None)
+        self.exchange = exchange
+        self.backtest_settings_path = backtest_settings_path
+        self.__synced_prices = None
+
+        # Orders that the paper trade interface would have refused, such as a buy without the funds
+        self.rejected_orders = 0
+
+    def sync_prices(self) -> dict:
+        if self.__synced_prices is None:
+            self.__synced_prices = super().sync_prices()
+        return self.__synced_prices
+
+    def get_prices(self, symbol: str) -> pd.DataFrame:
+        """
+        The prices the arrays passed to run() should be aligned to, useful for computing signals. The backtest
+        settings are loaded from backtest_settings_path.
+
+        Args:
+            symbol: A symbol added with add_prices()
+        """
+        if self.__synced_prices is None:
+            self.prepare(self.exchange, None, self.backtest_settings_path)
+        return pd.DataFrame(self.prices[symbol])
+
+    def run(self,
+            positions: dict = None,
+            signals: dict = None,
+            initial_account_values: dict = None,
+            signal_allocation: float = 1.0,
+            **kwargs) -> BacktestResult:
+        """
+        Simulate market orders that move the account to the given positions or that follow the given signals.
+
+        Every array has one value per price row of its symbol (see get_prices()). Instead of an array, a function that
+        takes the price DataFrame and returns the array can be given.
+
+        Args:
+            positions: Dictionary of symbol to the target base asset size at each bar. Orders are only placed on bars
+                where the target changes. NaN leaves the position alone.
+            signals: Dictionary of symbol to signals at each bar. Positive buys with signal_allocation of the
+                available quote, negative sells the whole position and zero does nothing.
+            initial_account_values: Dictionary of initial value sizes (i.e { 'BTC': 3, 'USD': 5650})
+            signal_allocation: Fraction of the available quote spent by each buy signal
+            **kwargs: Overrides for the backtest.json settings
+        """
+        if (positions is None) == (signals is None):
+            raise ValueError("Pass exactly one of positions or signals.")
+        targets = positions if positions is not None else signals
+        use_positions = positions is not None
+
+        self.prepare(self.exchange, initial_account_values, self.backtest_settings_path, **kwargs)
+        if isinstance(self.interface, FuturesPaperTradeInterface):
+            raise NotImplementedError("Vectorized backtests only support spot exchanges.")
+
+        initial_account = self.interface.get_account()
+        holdings = {asset: initial_account[asset]['available'] + initial_account[asset]['hold']
+                    for asset in self.column_keys if asset != 'time'}
+        initial_holdings = dict(holdings)
+
+        # Every asset other than the quote needs a price to be valued in
+        asset_symbols = {}
+        for symbol in self.prices:
+            if get_quote_asset(symbol) != self.quote_currency:
+                raise ValueError(f"{symbol} is not quoted in {self.quote_currency}. Set \"quote_account_value_in\" in "
+                                 f"backtest.json to match the prices you are using.")
+            asset_symbols[get_base_asset(symbol)] = symbol
+        for asset in holdings:
+            if asset != self.quote_currency and asset not in asset_symbols:
+                raise KeyError(f"Failed to quote {asset} because no downloaded data for that asset is available.")
+
+        times = {symbol: np.asarray(self.prices[symbol]['time'], dtype=np.float64) for symbol in self.prices}
+        closes = {symbol: np.asarray(self.prices[symbol][self.use_price], dtype=np.float64) for symbol in self.prices}
+
+        symbols = list(targets.keys())
+        arrays = []
+        for symbol in symbols:
+            if symbol not in self.prices:
+                raise KeyError(f"No prices were added for {symbol}.")
+            target = targets[symbol]
+            if callable(target):
+                target = target(pd.DataFrame(self.prices[symbol]))
+            target = np.asarray(target, dtype=np.float64)
+            if len(target) != len(times[symbol]):
+                raise ValueError(f"Expected {len(times[symbol])} values for {symbol}, got {len(target)}.")
+            arrays.append(target)
+
+        # Find the bars that place orders as rows of (time, symbol index, bar index), sorted by time so the shared
+        # quote is spent in order
+        orders = []
+        for symbol_index, (symbol, target) in enumerate(zip(symbols, arrays)):
+            if use_positions:
+                previous = np.concatenate(([holdings[get_base_asset(symbol)]], target[:-1]))
+                changed = np.flatnonzero(~np.isnan(target) & (target != previous))
+            else:
+                changed = np.flatnonzero(~np.isnan(target) & (target != 0))
+            orders.append(np.stack((times[symbol][changed], np.full(len(changed), symbol_index), changed), axis=1))
+        orders = np.concatenate(orders) if orders else np.empty((0, 3))
+        orders = orders[np.lexsort((orders[:, 1], orders[:, 0]))]
+
+        # Everything is valued on the union of the bar times
+        timeline = np.unique(np.concatenate(list(times.values())))
+        deltas = {asset: np.zeros(len(timeline)) for asset in holdings}
+
+        created = []
+        executed = []
+        self.rejected_orders = 0
+        exchange_type = self.interface.get_exchange_type()
+        filters = {}
+
+        for order_time, symbol_index, bar in orders:
+            symbol = symbols[int(symbol_index)]
+            bar = int(bar)
+            base = get_base_asset(symbol)
+            price = closes[symbol][bar]
+
+            if symbol not in filters:
+                filters[symbol] = self.__order_rules(symbol)
+            rules = filters[symbol]
+
+            if use_positions:
+                delta = arrays[int(symbol_index)][bar] - holdings[base]
+                side = 'buy' if delta > 0 else 'sell'
+                size = trunc(abs(delta), rules['base_decimals'])
+            elif arrays[int(symbol_index)][bar] > 0:
+                side = 'buy'
+                size = trunc(holdings[self.quote_currency] * signal_allocation / price, rules['base_decimals'])
+            else:
+                side = 'sell'
+                size = trunc(holdings[base], rules['base_decimals'])
+
+            if size == 0:
+                continue
+
+            base_delta, quote_delta = self.__fill(side, size, price, holdings[base],
+                                                  holdings[self.quote_currency], rules)
+            if base_delta is None:
+                self.rejected_orders += 1
+                continue
+
+            holdings[base] += base_delta
+            holdings[self.quote_currency] += quote_delta
+            index = np.searchsorted(timeline, order_time)
+            deltas[base][index] += base_delta
+            deltas[self.quote_currency][index] += quote_delta
+
+            order_id = paper_trade.generate_coinbase_pro_id()
+            created.append({
+                'symbol': symbol,
+                'id': order_id,
+                'created_at': float(order_time),
+                'size': size,
+                'status': 'done',
+                'type': 'market',
+                'side': side,
+                'exchange_specific': {},
+                'exchange': exchange_type
+            })
+            executed.append({
+                'id': order_id,
+                'executed_price': float(price)
+            })
+
+        # Price of every asset at each point of the timeline
+        asset_prices = {}
+        for asset, symbol in asset_symbols.items():
+            indexes = np.clip(np.searchsorted(times[symbol], timeline, side='right') - 1, 0, None)
+            asset_prices[asset] = closes[symbol][indexes]
+
+        value_name = 'Account Value (' + self.quote_currency + ')'
+        account_values = {'time': timeline}
+        no_trade_values = {'time': timeline}
+        account_value = np.zeros(len(timeline))
+        no_trade_value = np.zeros(len(timeline))
+        for asset, initial in initial_holdings.items():
+            history = initial + np.cumsum(deltas[asset])
+            account_values[asset] = history
+            no_trade_values[asset] = np.full(len(timeline), initial)
+            if asset == self.quote_currency:
+                account_value += history
+                no_trade_value += initial
+            else:
+                account_value += history * asset_prices[asset]
+                no_trade_value += initial * asset_prices[asset]
+        account_values[value_name] = account_value
+        no_trade_values['Account Value (No Trades)'] = no_trade_value
+
+        account_values = pd.DataFrame(account_values)
+        no_trade_values = pd.DataFrame(no_trade_values)
+
+        if self.preferences['settings']['save_initial_account_value']:
+            # The first row is the account before anything was traded
+            account_values = pd.concat([pd.DataFrame(self.traded_account_values), account_values], ignore_index=True)
+            no_trade_values = pd.concat([pd.DataFrame(self.no_trade_account_values), no_trade_values],
+                                        ignore_index=True)
+
+        self.interface.receive_time(timeline[-1])
+        self.time = None
+
+        return self.build_result(account_values, no_trade_values, trades={
+            'created': created,
+            'limits_executed': [],
+            'limits_canceled': [],
+            'executed_market_orders': executed
+        })
+
+    def __order_rules(self, symbol: str) -> dict:
+        market_limits = self.interface.get_order_filter(symbol)
+        if self.interface.get_exchange_type() == 'alpaca':
+            quantity_decimals = 10
+        else:
+            quantity_decimals = count_decimals(market_limits['limit_order']['base_increment'])
+        return {
+            'min_size': market_limits['market_order']['base_min_size'],
+            'max_size': market_limits['market_order']['base_max_size'],
+            'base_decimals': count_decimals(market_limits['market_order']['base_increment']),
+            'quote_decimals': count_decimals(market_limits['market_order']['quote_increment']),
+            'quantity_decimals': quantity_decimals,
+            'fee': float(self.interface.get_fees(symbol)['taker_fee_rate'])
+        }
+
+    @staticmethod
+    def __fill(side: str, size: float, price: float, base_available: float, quote_available: float, rules: dict):
+        """
+        Apply the same checks, fees & truncation as PaperTradeInterface.market_order
+
+        Returns:
+            (base delta, quote delta) or (None, None) if the paper trade interface would refuse the order
+        """
+        if size < rules['min_size'] or size > rules['max_size']:
+            return None, None
+
+        funds = price * size
+        if side == 'buy':
+            if quote_available < trunc(funds, rules['quote_decimals']):
+                return None, None
+            return trunc(size - size * rules['fee'], rules['quantity_decimals']), \
+                trunc(funds * -1, rules['base_decimals'])
+        else:
+            if trunc(base_available, rules['quantity_decimals']) < size:
+                return None, None
+            return trunc(size * -1, rules['quantity_decimals']), \
+                trunc(funds - funds * rules['fee'], rules['base_decimals'])
@@ -0,0 +1,175 @@
+"""
+    Single-flight coalescing & short lived caching for hot REST reads
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import collections
+import concurrent.futures
+import copy
+import functools
+import threading
+import time
+
+# Reads that change when we place or cancel an order
+ORDER_SENSITIVE_NAMESPACES = ('account', 'open_orders')
+
+
+class RequestCoalescer:
+    def __init__(self, enabled: bool = False, prices_ttl: float = 0.25, account_ttl: float = 0.5,
+                 open_orders_ttl: float = 0.5):
+        """
+        Share REST reads between the threads & strategies of an interface. Identical reads that happen at the same time
+        wait on a single request, and the result is reused until it is older than the namespace's staleness window.
+
+        Args:
+            enabled: Coalescing is opt-in, when disabled every read goes straight to the exchange
+            prices_ttl: Seconds a price can be reused
+            account_ttl: Seconds account balances can be reused
+            open_orders_ttl: Seconds the open orders can be reused
+        """
+        self.enabled = enabled
+        self.ttls = {
+            'prices': prices_ttl,
+            'account': account_ttl,
+            'open_orders': open_orders_ttl
+        }
+        self.__lock = threading.Lock()
+        # (namespace, key) -> (time requested, value)
+        self.__entries = {}
+        # (namespace, key) -> future of the request in flight
+        self.__in_flight = {}
+        # Bumped on invalidation so a request that started earlier doesn't store its stale result
+        self.__generations = collections.Counter()
+        self.counters = collections.Counter()
+
+    def get(self, namespace: str, key, loader: callable):
+        """
+        Read a value, joining a request that is already in flight or starting one if the cached value is too old.
+        A copy is returned so callers are free to modify it.
+
+        Args:
+            namespace: The type of read such as 'prices', 'account' or 'open_orders'
+            key: Distinguishes reads in the namespace, such as the symbol
+            loader: Function that makes the request
+        """
+        if not self.enabled:
+            return loader()
+
+        with self.__lock:
+            entry = self.__entries.get((namespace, key))
+            if entry is not None and time.time() - entry[0] < self.ttls.get(namespace, 0):
+                self.counters['cached'] += 1
+                return copy.deepcopy(entry[1])
+
+            future = self.__in_flight.get((namespace, key))
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self.__in_flight[(namespace, key)] = future
+                generation = self.__generations[namespace]
+                self.counters['requests'] += 1
+            else:
+                self.counters['coalesced'] += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        requested_at = time.time()
+        try:
+            value = loader()
+        except BaseException as e:
+            # Errors are shared with the waiting readers but never cached
+            with self.__lock:
+                self.__finish(namespace, key, future)
+            future.set_exception(e)
+            raise
+
+        with self.__lock:
+            self.__finish(namespace, key, future)
+            if self.__generations[namespace] == generation:
+                self.__entries[(namespace, key)] = (requested_at, value)
+        future.set_result(value)
+        return copy.deepcopy(value)
+
+    def __finish(self, namespace: str, key, future: concurrent.futures.Future):
+        # An invalidation may have already replaced this request with a newer one
+        if self.__in_flight.get((namespace, key)) is future:
+            del self.__in_flight[(namespace, key)]
+
+    def invalidate(self, namespace: str = None, key=None):
+        """
+        Drop cached reads so the next one goes to the exchange
+
+        Args:
+            namespace: Only drop this namespace. None drops everything.
+            key: Only drop this key in the namespace. None drops the whole namespace.
+        """
+        with self.__lock:
+            for entry_key in list(self.__entries.keys()):
+                if namespace is None or (entry_key[0] == namespace and (key is None or entry_key[1] == key)):
+                    del self.__entries[entry_key]
+            # Requests already in flight may predate the change, later readers make a new one
+            for flight_key in list(self.__in_flight.keys()):
+                if namespace is None or (flight_key[0] == namespace and (key is None or flight_key[1] == key)):
+                    del self.__in_flight[flight_key]
+            for name in (self.ttls if namespace is None else [namespace]):
+                self.__generations[name] += 1
+
+
+def _read_key(args: tuple, kwargs: dict):
+    if kwargs:
+        return args, tuple(sorted(kwargs.items()))
+    if len(args) == 1:
+        return args[0] if not isinstance(args[0], list) else tuple(args[0])
+    return args or None
+
+
+def coalesced_read(namespace: str):
+    """
+    Decorator for interface reads that are safe to share between callers for the namespace's staleness window. This
+    does nothing unless request coalescing is enabled in the settings.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            coalescer = getattr(self, 'request_coalescer', None)
+            if coalescer is None or not coalescer.enabled:
+                return func(self, *args, **kwargs)
+            return coalescer.get(namespace, _read_key(args, kwargs), lambda: func(self, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates_reads(func):
+    """
+    Decorator for functions that place or cancel orders. Cached balances & open orders are dropped once the exchange
+    has been called, whether or not it succeeded.
+    """
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            coalescer = getattr(self, 'request_coalescer', None)
+            if coalescer is not None:
+                for namespace in ORDER_SENSITIVE_NAMESPACES:
+                    coalescer.invalidate(namespace)
+
+    return wrapper
@@ -22,6 +22,7 @@ import threading
 import websocket
 
 import blankly.utils.utils
+from blankly.data.recorder import BufferedFileWriter
 from blankly.exchanges.abc_exchange_websocket import ABCExchangeWebsocket
 from blankly.utils.utils import info_print
 
@@ -32,15 +33,11 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
         self.stream = stream
         self.kwargs = kwargs
 
-        # Initialize log file
+        # Initialize log file, lines are handed to a background writer so the feed never waits on the disk
         if log is not None:
             self.log = True
             self.file_path = log
-            try:
-                self.__file = open(log, 'x+')
-                self.__file.write(log_message)
-            except FileExistsError:
-                self.__file = open(log, 'a')
+            self.__file = BufferedFileWriter(log, header=log_message)
         else:
             self.log = False
 
@@ -53,6 +50,8 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
         self.most_recent_tick = None
         self.most_recent_time = None
         self.callbacks = []
+        # Listeners that receive each message exactly as it came off the socket, such as recorders
+        self.raw_listeners = []
         self.pre_event_callback = pre_event_callback
 
         # Reload preferences
@@ -69,9 +68,14 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
         Restart websocket if it was asked to stop.
         """
         if self.ws is None:
+            def on_raw_message(ws, message):
+                for listener in self.raw_listeners:
+                    listener(message)
+                on_message(ws, message)
+
             self.ws = websocket.WebSocketApp(self.url,
                                              on_open=on_open,
-                                             on_message=on_message,
+                                             on_message=on_raw_message,
                                              on_error=on_error,
                                              on_close=on_close)
             self.thread = threading.Thread(target=target)
@@ -87,11 +91,34 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
     def log_response(self, logging_callback: callable, message: dict):
         # Run callbacks on message
         if self.log:
-            if self.message_count % 100 == 0:
-                self.__file.close()
-                self.__file = open(self.file_path, 'a')
-            line = logging_callback(message)
-            self.__file.write(line)
+            self.__file.write(logging_callback(message))
+
+    def append_raw_listener(self, listener: callable):
+        """
+        Add a function that is called with every message before it is parsed, such as a recorder
+        """
+        self.raw_listeners.append(listener)
+
+    def inject(self, message, normalized: bool = False):
+        """
+        Push a message into the websocket as if it was received live. This is used to replay recordings.
+
+        Args:
+            message: A raw exchange message or a normalized message
+            normalized: If normalized the parsing is skipped and the message goes directly to the callbacks
+        """
+        if not normalized:
+            self.on_message(None, message)
+            return
+
+        self.message_count += 1
+        self.ticker_feed.append(message)
+        self.most_recent_tick = message
+        if isinstance(message, dict) and 'time' in message:
+            self.most_recent_time = message['time']
+            self.time_feed.append(self.most_recent_time)
+        for i in self.callbacks:
+            i(message, **self.kwargs)
     """
     The are access functions
     """
@@ -111,6 +138,13 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
     def append_callback(self, obj):
         self.callbacks.append(obj)
 
+    def remove_callback(self, obj):
+        """
+        Stop calling a callback that was appended, leaving the websocket open for any others
+        """
+        # Swapped rather than modified because the websocket thread may be looping over the list
+        self.callbacks = [i for i in self.callbacks if i != obj]
+
     """ Define a variable each time so there is no array manipulation """
     """ Required in manager """
 
@@ -140,7 +174,12 @@ class Websocket(ABCExchangeWebsocket, abc.ABC):
 
     """ Required in manager """
 
+    def flush_log(self):
+        if self.log:
+            self.__file.flush()
+
     def close_websocket(self):
+        self.flush_log()
         if self.thread is not None and self.thread.is_alive():
             self.ws.close()
         else:
@@ -0,0 +1,188 @@
+"""
+    Bounded queues that deliver websocket messages to slow callbacks off the feed thread
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import collections
+import threading
+import time
+import traceback
+
+# inline calls on the feed thread like before, block makes the feed wait for space in the queue, drop_oldest discards
+# the oldest queued message and conflate only keeps the newest message. inline and block never lose a message,
+# drop_oldest and conflate skip messages whenever the callback falls behind.
+DISPATCH_POLICIES = ('inline', 'block', 'drop_oldest', 'conflate')
+
+
+class CallbackDispatcher:
+    def __init__(self, callback: callable, kwargs: dict = None, policy: str = 'inline', queue_size: int = 10000,
+                 prepare: callable = None):
+        """
+        Deliver messages to a callback from its own worker thread so that a slow callback can't hold up the thread
+        reading the websocket.
+
+        Args:
+            callback: Called with each message & the kwargs
+            kwargs: Passed into the callback along with the message
+            policy: What to do when the callback falls behind, one of DISPATCH_POLICIES. Only inline and block slow
+                the feed down, block only once queue_size messages are waiting. drop_oldest and conflate lose messages
+                instead.
+            queue_size: Most messages that can wait for the callback
+            prepare: Called on the worker thread with each message before it is delivered, such as taking a snapshot
+                of a book that the feed thread keeps changing. Not used inline.
+        """
+        if policy not in DISPATCH_POLICIES:
+            raise ValueError(f"The dispatch policy must be one of {DISPATCH_POLICIES}")
+        self.callback = callback
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.policy = policy
+        self.queue_size = 1 if policy == 'conflate' else max(int(queue_size), 1)
+        self.prepare = prepare
+
+        # (time queued, message)
+        self.__queue = collections.deque()
+        self.__condition = threading.Condition()
+        self.__thread = None
+        self.__running = False
+        # Set while the callback is running so callers can wait for the queue to be drained
+        self.__delivering = False
+
+        self.counters = collections.Counter()
+        self.max_depth = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        """
+        Start delivering messages
+        """
+        with self.__condition:
+            if self.__running:
+                return
+            self.__running = True
+            if self.policy != 'inline':
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+
+    def stop(self):
+        """
+        Stop delivering. Messages that are still queued are discarded.
+        """
+        with self.__condition:
+            self.__running = False
+            self.counters['discarded'] += len(self.__queue)
+            self.__queue.clear()
+            self.__condition.notify_all()
+            thread, self.__thread = self.__thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def put(self, message):
+        """
+        Hand a message to the callback, this is called from the feed thread
+        """
+        if self.policy == 'inline':
+            if self.__running:
+                self.__deliver(time.time(), message)
+            return
+
+        with self.__condition:
+            if not self.__running:
+                return
+            self.counters['received'] += 1
+            if len(self.__queue) >= self.queue_size:
+                if self.policy == 'block':
+                    self.counters['blocked'] += 1
+                    self.__condition.wait_for(lambda: not self.__running or len(self.__queue) < self.queue_size)
+                    if not self.__running:
+                        return
+                elif self.policy == 'conflate':
+                    # Keep the time the pending message was queued so lag shows how stale the callback is
+                    queued_at = self.__queue.popleft()[0]
+                    self.__queue.append((queued_at, message))
+                    self.counters['conflated'] += 1
+                    return
+                else:
+                    self.__queue.popleft()
+                    self.counters['dropped'] += 1
+
+            self.__queue.append((time.time(), message))
+            self.max_depth = max(self.max_depth, len(self.__queue))
+            self.__condition.notify_all()
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: not self.__running or self.__queue)
+                if not self.__running:
+                    return
+                queued_at, message = self.__queue.popleft()
+                self.__delivering = True
+                # Wake a feed thread that is blocked on a full queue
+                self.__condition.notify_all()
+
+            if self.prepare is not None:
+                try:
+                    message = self.prepare(message)
+                except Exception:
+                    traceback.print_exc()
+            self.__deliver(queued_at, message)
+
+            with self.__condition:
+                self.__delivering = False
+                self.__condition.notify_all()
+
+    def __deliver(self, queued_at: float, message):
+        self.lag = time.time() - queued_at
+        self.max_lag = max(self.max_lag, self.lag)
+        try:
+            self.callback(message, **self.kwargs)
+        except Exception:
+            traceback.print_exc()
+        self.counters['delivered'] += 1
+
+    @property
+    def depth(self) -> int:
+        return len(self.__queue)
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        Wait until everything queued has been delivered
+
+        Args:
+            timeout: Most seconds to wait, None waits until the queue is empty
+
+        Returns:
+            True if the queue was drained before the timeout
+        """
+        with self.__condition:
+            return self.__condition.wait_for(lambda: not self.__running or (not self.__queue and
+                                                                             not self.__delivering), timeout)
+
+    def metrics(self) -> dict:
+        """
+        Queue depth, seconds between a message being queued & delivered and counts of what happened to the messages
+        """
+        with self.__condition:
+            metrics = dict(self.counters)
+            metrics.update({
+                'policy': self.policy,
+                'depth': len(self.__queue),
+                'max_depth': self.max_depth,
+                'lag': self.lag,
+                'max_lag': self.max_lag
+            })
+        return metrics
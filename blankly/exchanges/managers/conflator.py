@@ -0,0 +1,137 @@
+"""
+    Rate limiting of orderbook callbacks so that only the latest book is delivered
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+import traceback
+
+
+class Conflator:
+    def __init__(self, callback: callable, interval: float = None, updates: int = None, prepare: callable = None):
+        """
+        Stand in front of a callback so that it runs at most once per interval or once every few updates, whichever
+        comes first, and is always given the latest message. With an interval, an update that arrives inside it is
+        delivered when the interval ends so the last state is never held back.
+
+        The callback runs without the conflator's lock held, so a slow callback never blocks put() on the feed thread.
+
+        Args:
+            callback: Called with the latest message & its kwargs
+            interval: Fewest seconds between calls
+            updates: Call after this many updates even if the interval hasn't passed
+            prepare: Called with the message just before it is delivered, such as taking a snapshot of a book that
+                the feed thread keeps changing
+        """
+        if interval is None and updates is None:
+            raise ValueError("Give a conflation interval, a number of updates or both")
+        self.callback = callback
+        self.interval = interval
+        self.updates = updates
+        self.prepare = prepare
+
+        self.__lock = threading.Lock()
+        self.__pending = None
+        self.__pending_updates = 0
+        self.__last_call = 0.0
+        self.__timer = None
+        self.__stopped = False
+        # Only one thread runs the callback at a time, others leave the latest message for it
+        self.__delivering = False
+
+        self.received = 0
+        self.calls = 0
+
+    def put(self, message, **kwargs):
+        """
+        Record an update, calling the callback if it is due
+        """
+        with self.__lock:
+            if self.__stopped:
+                return
+            self.received += 1
+            self.__pending = (message, kwargs)
+            self.__pending_updates += 1
+            due = self.__due()
+        if due:
+            self.flush()
+
+    def __due(self) -> bool:
+        # Called with the lock held, starts the timer for an update that has to wait out the interval
+        if self.updates is not None and self.__pending_updates >= self.updates:
+            return True
+        if self.interval is not None:
+            wait = self.__last_call + self.interval - time.time()
+            if wait <= 0:
+                return True
+            if self.__timer is None:
+                self.__timer = threading.Timer(wait, self.flush)
+                self.__timer.daemon = True
+                self.__timer.start()
+        return False
+
+    def flush(self):
+        """
+        Deliver the pending update now
+        """
+        while True:
+            with self.__lock:
+                if self.__timer is threading.current_thread():
+                    # The timer has fired, so a later update can start another
+                    self.__timer = None
+                if self.__pending is None or self.__stopped or self.__delivering:
+                    return
+                if self.__timer is not None:
+                    self.__timer.cancel()
+                    self.__timer = None
+                message, kwargs = self.__pending
+                self.__pending = None
+                self.__pending_updates = 0
+                self.__last_call = time.time()
+                self.calls += 1
+                self.__delivering = True
+
+            try:
+                if self.prepare is not None:
+                    message = self.prepare(message)
+                self.callback(message, **kwargs)
+            except Exception:
+                traceback.print_exc()
+
+            with self.__lock:
+                self.__delivering = False
+                # Deliver what became due during the callback, otherwise it waits for the timer or more updates
+                if self.__pending is None or self.__stopped or not self.__due():
+                    return
+
+    def start(self):
+        """
+        Resume calling the callback after stop()
+        """
+        with self.__lock:
+            self.__stopped = False
+
+    def stop(self):
+        """
+        Drop any pending update and stop calling the callback
+        """
+        with self.__lock:
+            self.__stopped = True
+            self.__pending = None
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
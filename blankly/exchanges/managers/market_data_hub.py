@@ -0,0 +1,439 @@
+"""
+    Process-wide hub that shares websocket subscriptions & orderbooks between strategies
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+
+from blankly.exchanges.managers.callback_dispatcher import CallbackDispatcher
+from blankly.exchanges.managers.conflator import Conflator
+from blankly.exchanges.managers.orderbook import Orderbook
+from blankly.exchanges.managers.orderbook_manager import OrderbookManager
+from blankly.exchanges.managers.ticker_manager import TickerManager
+from blankly.utils.utils import load_user_preferences
+
+TICKER = 'ticker'
+ORDERBOOK = 'orderbook'
+
+
+class Subscription:
+    def __init__(self, hub, key: tuple, dispatcher: CallbackDispatcher, conflator: Conflator = None):
+        """
+        One subscriber's interest in a shared feed. This can stand in for a ticker object, restart_ticker() and
+        close_websocket() only start & stop this subscriber's callbacks. The connection itself is opened for the first
+        subscriber that starts and closed after the last one stops.
+        """
+        self.__hub = hub
+        self.key = key
+        # Messages reach the callback through this so a slow subscriber doesn't hold up the feed
+        self.dispatcher = dispatcher
+        # Optionally limits how often the dispatcher is handed the latest message
+        self.conflator = conflator
+
+        self.active = False
+        self.closed = False
+
+    @property
+    def stream(self) -> str:
+        return self.key[0]
+
+    @property
+    def exchange(self) -> str:
+        return self.key[1]
+
+    @property
+    def symbol(self) -> str:
+        return self.key[2]
+
+    def start(self):
+        self.__hub._start(self)
+
+    def put(self, message):
+        if self.conflator is not None:
+            self.conflator.put(message)
+        else:
+            self.dispatcher.put(message)
+
+    def close(self):
+        self.__hub._close(self)
+
+    def restart_ticker(self):
+        self.start()
+
+    def close_websocket(self):
+        self.close()
+
+    def is_websocket_open(self) -> bool:
+        return self.active and self.__hub.is_feed_open(*self.key)
+
+    def get_most_recent_tick(self):
+        websocket = self.__hub.get_websocket(self.exchange, self.symbol)
+        # The feed is dropped once everyone has closed
+        return websocket.get_most_recent_tick() if websocket is not None else None
+
+    def get_most_recent_orderbook(self):
+        return self.__hub.get_orderbook_manager(self.exchange).get_most_recent_orderbook(self.symbol, self.exchange)
+
+
+class _Feed:
+    def __init__(self, key: tuple, websocket=None):
+        self.key = key
+        # Only tickers keep the websocket here, orderbooks are reached through their manager
+        self.websocket = websocket
+        self.subscriptions = []
+        # Swapped rather than modified so messages can be published without taking the lock
+        self.active = ()
+        self.messages = 0
+        self.open = False
+
+    def publish(self, message):
+        self.messages += 1
+        for subscription in self.active:
+            subscription.put(message)
+
+
+class MarketDataHub:
+    def __init__(self):
+        """
+        Owns the websocket subscriptions & orderbooks of the process. Every strategy, model or screener that follows
+        the same stream of the same symbol on the same exchange shares one connection, one parse of each message and
+        one book. Subscriptions are reference counted so the connection closes after its last subscriber leaves.
+        """
+        self.__lock = threading.RLock()
+        # (stream, exchange, symbol) -> _Feed
+        self.__feeds = {}
+        self.__ticker_managers = {}
+        self.__orderbook_managers = {}
+
+    def get_ticker_manager(self, exchange: str) -> TickerManager:
+        """
+        The TickerManager that owns the shared tickers of an exchange
+        """
+        with self.__lock:
+            if exchange not in self.__ticker_managers:
+                self.__ticker_managers[exchange] = TickerManager(exchange, '')
+            return self.__ticker_managers[exchange]
+
+    def get_orderbook_manager(self, exchange: str) -> OrderbookManager:
+        """
+        The OrderbookManager that owns the shared books of an exchange
+        """
+        with self.__lock:
+            if exchange not in self.__orderbook_managers:
+                self.__orderbook_managers[exchange] = OrderbookManager(exchange, '')
+            return self.__orderbook_managers[exchange]
+
+    def subscribe_ticker(self, exchange: str, symbol: str, callback: callable, initially_stopped: bool = False,
+                         dispatch_policy: str = None, queue_size: int = None, **kwargs) -> Subscription:
+        """
+        Receive the ticks of a symbol
+
+        Args:
+            exchange: Exchange type such as 'coinbase_pro'
+            symbol: Symbol such as 'BTC-USD'
+            callback: Called with each tick & the kwargs
+            initially_stopped: Don't receive anything until start() is called on the subscription
+            dispatch_policy: What to do when the callback falls behind the feed, defaults to the ticker_policy setting
+                which is inline. drop_oldest and conflate skip ticks that the callback didn't keep up with.
+            queue_size: Ticks that can wait for the callback, defaults to the queue_size setting
+            kwargs: Passed into the callback along with the tick
+        """
+        return self.__subscribe((TICKER, exchange, symbol), callback, initially_stopped, dispatch_policy, queue_size,
+                                kwargs)
+
+    def subscribe_orderbook(self, exchange: str, symbol: str, callback: callable, initially_stopped: bool = False,
+                            dispatch_policy: str = None, queue_size: int = None, conflation_interval: float = None,
+                            conflation_updates: int = None, **kwargs) -> Subscription:
+        """
+        Receive the sorted orderbook of a symbol each time it changes. The inline policy is given the shared book on the
+        feed thread, so treat it as read only. Every other policy runs the callback on its own thread and is given a
+        snapshot taken under the book's lock, so it never sees the book change underneath it.
+
+        Args:
+            exchange: Exchange type such as 'coinbase_pro'
+            symbol: Symbol such as 'BTC-USD'
+            callback: Called with the book & the kwargs
+            initially_stopped: Don't receive anything until start() is called on the subscription
+            dispatch_policy: What to do when the callback falls behind the feed, defaults to the orderbook_policy
+                setting which is inline. drop_oldest and conflate skip books that the callback didn't keep up with.
+            queue_size: Books that can wait for the callback, defaults to the queue_size setting
+            conflation_interval: Hand over the latest book at most once every this many seconds. The shared book still
+                applies every update.
+            conflation_updates: Hand over the latest book once this many updates have been applied, even if the
+                interval hasn't passed
+            kwargs: Passed into the callback along with the book
+        """
+        return self.__subscribe((ORDERBOOK, exchange, symbol), callback, initially_stopped, dispatch_policy,
+                                queue_size, kwargs, conflation_interval, conflation_updates)
+
+    def __subscribe(self, key: tuple, callback: callable, initially_stopped: bool, dispatch_policy: str,
+                    queue_size: int, kwargs: dict, conflation_interval: float = None,
+                    conflation_updates: int = None) -> Subscription:
+        settings = load_user_preferences()['settings']['callback_dispatch']
+        if dispatch_policy is None:
+            dispatch_policy = settings[f'{key[0]}_policy']
+        if queue_size is None:
+            queue_size = settings['queue_size']
+
+        # The feed thread keeps changing the shared book while a worker or timer thread delivers it. A conflated book
+        # is copied by the conflator so the dispatcher is handed the copy.
+        prepare = Orderbook.snapshot if key[0] == ORDERBOOK else None
+        conflated = conflation_interval is not None or conflation_updates is not None
+        dispatcher = CallbackDispatcher(callback, kwargs, dispatch_policy, queue_size,
+                                        None if conflated else prepare)
+        conflator = None
+        if conflated:
+            conflator = Conflator(dispatcher.put, conflation_interval, conflation_updates, prepare)
+        subscription = Subscription(self, key, dispatcher, conflator)
+        with self.__lock:
+            self.__get_feed(key).subscriptions.append(subscription)
+        if not initially_stopped:
+            subscription.start()
+        return subscription
+
+    def __get_feed(self, key: tuple) -> _Feed:
+        feed = self.__feeds.get(key)
+        if feed is None:
+            stream, exchange, symbol = key
+            feed = _Feed(key)
+            # The websocket is created stopped and only opened once a subscriber starts
+            if stream == TICKER:
+                feed.websocket = self.get_ticker_manager(exchange).create_ticker(feed.publish, initially_stopped=True,
+                                                                                 override_symbol=symbol)
+            else:
+                self.get_orderbook_manager(exchange).create_orderbook(feed.publish, initially_stopped=True,
+                                                                      override_symbol=symbol)
+            self.__feeds[key] = feed
+        return feed
+
+    def _start(self, subscription: Subscription):
+        with self.__lock:
+            if subscription.active:
+                return
+            if subscription.closed:
+                # Rejoin the feed, which may have been dropped once everyone left
+                subscription.closed = False
+                self.__get_feed(subscription.key).subscriptions.append(subscription)
+
+            feed = self.__feeds[subscription.key]
+            subscription.active = True
+            subscription.dispatcher.start()
+            if subscription.conflator is not None:
+                subscription.conflator.start()
+            feed.active = feed.active + (subscription,)
+            if not feed.open:
+                self.__open(feed)
+
+    def _close(self, subscription: Subscription):
+        if subscription.conflator is not None:
+            subscription.conflator.stop()
+        # Outside of the lock because this waits for a callback that may be using the hub
+        subscription.dispatcher.stop()
+        with self.__lock:
+            if subscription.closed:
+                return
+            feed = self.__feeds[subscription.key]
+            subscription.active = False
+            subscription.closed = True
+            feed.active = tuple(i for i in feed.active if i is not subscription)
+            feed.subscriptions.remove(subscription)
+
+            if not feed.active and feed.open:
+                self.__close(feed)
+            if not feed.subscriptions:
+                self.__drop(feed)
+
+    def __open(self, feed: _Feed):
+        stream, exchange, symbol = feed.key
+        if stream == TICKER:
+            if feed.websocket is not None:
+                feed.websocket.restart_ticker()
+        else:
+            self.get_orderbook_manager(exchange).restart_ticker(symbol, exchange)
+        feed.open = True
+
+    def __close(self, feed: _Feed):
+        stream, exchange, symbol = feed.key
+        if stream == TICKER:
+            if feed.websocket is not None:
+                feed.websocket.close_websocket()
+        else:
+            self.get_orderbook_manager(exchange).close_websocket(symbol, exchange)
+        feed.open = False
+
+    def __drop(self, feed: _Feed):
+        # Unhook the feed so a feed created later for the same symbol is the only one publishing
+        stream, exchange, symbol = feed.key
+        if stream == TICKER:
+            if feed.websocket is not None:
+                feed.websocket.remove_callback(feed.publish)
+        else:
+            self.get_orderbook_manager(exchange).remove_orderbook_callback(feed.publish, symbol, exchange)
+        del self.__feeds[feed.key]
+
+    def is_feed_open(self, stream: str, exchange: str, symbol: str) -> bool:
+        """
+        Check if the shared connection of a feed is started and still connected
+        """
+        with self.__lock:
+            feed = self.__feeds.get((stream, exchange, symbol))
+            if feed is None or not feed.open:
+                return False
+        if stream == TICKER:
+            return feed.websocket is not None and feed.websocket.is_websocket_open()
+        return self.get_orderbook_manager(exchange).is_websocket_open(symbol, exchange)
+
+    def get_websocket(self, exchange: str, symbol: str):
+        """
+        The shared ticker object of a symbol, or None if nothing subscribes to it
+        """
+        with self.__lock:
+            feed = self.__feeds.get((TICKER, exchange, symbol))
+            return feed.websocket if feed is not None else None
+
+    def get_feeds(self) -> dict:
+        """
+        Summarize the feeds the hub is maintaining
+
+        Returns:
+            A dictionary keyed by (stream, exchange, symbol) with the number of subscribers, how many are started, if
+            the connection is open, how many messages have been fanned out and the dispatch metrics of each subscriber
+        """
+        with self.__lock:
+            return {key: {'subscribers': len(feed.subscriptions),
+                          'active': len(feed.active),
+                          'open': feed.open,
+                          'messages': feed.messages,
+                          'dispatch': [i.dispatcher.metrics() for i in feed.subscriptions]}
+                    for key, feed in self.__feeds.items()}
+
+
+class SharedTickerManager:
+    def __init__(self, hub: MarketDataHub, default_exchange: str):
+        """
+        A strategy's view of the hub with the TickerManager calls that strategies make. Tickers created here are
+        subscriptions to the hub's shared feeds.
+
+        Args:
+            hub: The hub that owns the feeds
+            default_exchange: Exchange used when one isn't given
+        """
+        self.hub = hub
+        self.default_exchange = default_exchange
+        # (exchange, symbol) -> list of subscriptions made through this manager
+        self.subscriptions = {}
+
+    def _add(self, subscription: Subscription) -> Subscription:
+        self.subscriptions.setdefault((subscription.exchange, subscription.symbol), []).append(subscription)
+        return subscription
+
+    def __evaluate_overrides(self, override_symbol, override_exchange) -> list:
+        exchange = override_exchange if override_exchange is not None else self.default_exchange
+        return self.subscriptions.get((exchange, override_symbol), [])
+
+    def create_ticker(self, callback, override_symbol: str = None, override_exchange: str = None,
+                      initially_stopped: bool = False, **kwargs) -> Subscription:
+        """
+        Subscribe to the shared ticker of a symbol
+        Args:
+            callback: Callback object for the function. Should be something like self.price_event
+            override_symbol: The currency to create a ticker for.
+            override_exchange: Override the default exchange.
+            initially_stopped: Wait for restart_ticker() before receiving ticks
+            kwargs: Any keyword arguments to be passed into the callback besides the first positional message argument
+        """
+        exchange = override_exchange if override_exchange is not None else self.default_exchange
+        return self._add(self.hub.subscribe_ticker(exchange, override_symbol, callback,
+                                                   initially_stopped=initially_stopped, **kwargs))
+
+    def restart_ticker(self, override_symbol=None, override_exchange=None):
+        """
+        Start receiving from the subscriptions made for a symbol
+        """
+        for subscription in self.__evaluate_overrides(override_symbol, override_exchange):
+            subscription.start()
+
+    def close_websocket(self, override_symbol=None, override_exchange=None):
+        """
+        Stop the subscriptions made for a symbol, the connection closes when no one else is subscribed
+        """
+        for subscription in self.__evaluate_overrides(override_symbol, override_exchange):
+            subscription.close()
+
+    def close_all_websockets(self):
+        for subscriptions in self.subscriptions.values():
+            for subscription in subscriptions:
+                subscription.close()
+
+    def is_websocket_open(self, override_symbol=None, override_exchange=None) -> bool:
+        return any(i.is_websocket_open() for i in self.__evaluate_overrides(override_symbol, override_exchange))
+
+    def get_most_recent_tick(self, override_symbol=None, override_exchange=None):
+        exchange = override_exchange if override_exchange is not None else self.default_exchange
+        websocket = self.hub.get_websocket(exchange, override_symbol)
+        return websocket.get_most_recent_tick() if websocket is not None else None
+
+    def get_all_tickers(self) -> dict:
+        """
+        The shared websockets, for example to replay a recording into them
+        """
+        return self.hub.get_ticker_manager(self.default_exchange).get_all_tickers()
+
+
+class SharedOrderbookManager(SharedTickerManager):
+    def create_orderbook(self, callback, override_symbol: str = None, override_exchange: str = None,
+                         initially_stopped: bool = False, conflation_interval: float = None,
+                         conflation_updates: int = None, **kwargs) -> Subscription:
+        """
+        Subscribe to the shared orderbook of a symbol
+        Args:
+            callback: Callback object for the function. Should be something like self.price_event
+            override_symbol: Override the default currency id
+            override_exchange: Override the default exchange
+            initially_stopped: Wait for restart_ticker() before receiving books
+            conflation_interval: Call the callback with the latest book at most once every this many seconds
+            conflation_updates: Call the callback once this many updates have been applied, even if the interval
+                hasn't passed
+            kwargs: Add any other parameters that should be passed into a callback function to identify
+                it or modify behavior
+        """
+        exchange = override_exchange if override_exchange is not None else self.default_exchange
+        return self._add(self.hub.subscribe_orderbook(exchange, override_symbol, callback,
+                                                      initially_stopped=initially_stopped,
+                                                      conflation_interval=conflation_interval,
+                                                      conflation_updates=conflation_updates, **kwargs))
+
+    def get_most_recent_orderbook(self, override_symbol=None, override_exchange=None):
+        exchange = override_exchange if override_exchange is not None else self.default_exchange
+        return self.hub.get_orderbook_manager(exchange).get_most_recent_orderbook(override_symbol, exchange)
+
+    def get_all_tickers(self) -> dict:
+        return self.hub.get_orderbook_manager(self.default_exchange).get_all_tickers()
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_market_data_hub() -> MarketDataHub:
+    """
+    The hub shared by everything in this process
+    """
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = MarketDataHub()
+        return _hub
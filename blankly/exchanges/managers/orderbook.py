@@ -0,0 +1,344 @@
+"""
+    Level 2 orderbook maintenance shared by live websockets and backtest replays
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+
+
+class Orderbook(dict):
+    def __init__(self, bids: list = None, asks: list = None):
+        """
+        A level 2 orderbook. This is a dictionary of 'bids' and 'asks', each a list of (price, size) tuples sorted from
+        the lowest price to the highest, so the best bid is book['bids'][-1] and the best ask is book['asks'][0].
+
+        Updates use a binary search on a parallel list of prices, so applying a delta doesn't re-sort the side.
+
+        Each side also keeps cumulative size & notional anchored at the far end of the book. A delta only marks the
+        levels between it and the best price as stale and those are brought up to date when an analytic is read, so
+        depth, imbalance & VWAP are a binary search instead of a walk through the book. Most deltas land near the top
+        of the book where there is little to refresh.
+
+        Args:
+            bids: Initial (price, size) bids in any order
+            asks: Initial (price, size) asks in any order
+        """
+        super().__init__(bids=[], asks=[])
+        self.__prices = {'bids': [], 'asks': []}
+        # Bids hold prefix sums from the lowest bid up, asks hold suffix sums from the highest ask down
+        self.__sizes = {'bids': [], 'asks': []}
+        self.__notionals = {'bids': [], 'asks': []}
+        # Bids are up to date below this index, asks are up to date from this index on
+        self.__fresh = {'bids': 0, 'asks': 0}
+        # The analytics can be read from a different thread than the one applying updates
+        self.__lock = threading.Lock()
+        if bids is not None or asks is not None:
+            self.set_snapshot(bids or [], asks or [])
+
+    def set_snapshot(self, bids: list, asks: list):
+        """
+        Replace both sides of the book. Later duplicates of a price replace earlier ones and zero sizes are dropped.
+        """
+        with self.__lock:
+            for side, levels in (('bids', bids), ('asks', asks)):
+                merged = {}
+                for price, size in levels:
+                    merged[float(price)] = float(size)
+                book = sorted((price, size) for price, size in merged.items() if size != 0)
+                self[side][:] = book
+                self.__prices[side][:] = [level[0] for level in book]
+                self.__sizes[side][:] = [0.0] * len(book)
+                self.__notionals[side][:] = [0.0] * len(book)
+                self.__fresh[side] = 0 if side == 'bids' else len(book)
+
+    def set_level(self, side: str, price: float, size: float):
+        """
+        Set the size at a price, a size of zero removes the level
+
+        Args:
+            side: 'bids' or 'asks'
+            price: Price of the level
+            size: New total size at that price
+        """
+        with self.__lock:
+            self.__set_level(side, price, size)
+
+    def __set_level(self, side: str, price: float, size: float):
+        prices = self.__prices[side]
+        book = self[side]
+        index = bisect_left(prices, price)
+        if index < len(prices) and prices[index] == price:
+            if size == 0:
+                del prices[index]
+                del book[index]
+                del self.__sizes[side][index]
+                del self.__notionals[side][index]
+                self.__mark_stale(side, index, -1)
+            else:
+                book[index] = (price, size)
+                self.__mark_stale(side, index, 0)
+        elif size != 0:
+            prices.insert(index, price)
+            book.insert(index, (price, size))
+            self.__sizes[side].insert(index, 0.0)
+            self.__notionals[side].insert(index, 0.0)
+            self.__mark_stale(side, index, 1)
+
+    def __mark_stale(self, side: str, index: int, shift: int):
+        if side == 'bids':
+            self.__fresh['bids'] = min(self.__fresh['bids'], index)
+        else:
+            # Up to date asks above the change moved with the insert or delete
+            fresh = self.__fresh['asks']
+            self.__fresh['asks'] = max(fresh + shift if fresh > index else fresh, index + 1 if shift >= 0 else index)
+
+    def apply(self, bids: list, asks: list):
+        """
+        Apply a batch of (price, size) changes to each side
+        """
+        with self.__lock:
+            for price, size in bids:
+                self.__set_level('bids', float(price), float(size))
+            for price, size in asks:
+                self.__set_level('asks', float(price), float(size))
+
+    def snapshot(self) -> 'Orderbook':
+        """
+        A copy of the book taken under its lock, for reading on another thread while this one keeps changing
+        """
+        copy = Orderbook()
+        with self.__lock:
+            for side in ('bids', 'asks'):
+                copy[side][:] = self[side]
+                copy.__prices[side][:] = self.__prices[side]
+                copy.__sizes[side][:] = self.__sizes[side]
+                copy.__notionals[side][:] = self.__notionals[side]
+                copy.__fresh[side] = self.__fresh[side]
+        return copy
+
+    def __refresh(self, side: str):
+        book = self[side]
+        sizes = self.__sizes[side]
+        notionals = self.__notionals[side]
+        if side == 'bids':
+            size_total, notional_total = (sizes[self.__fresh['bids'] - 1], notionals[self.__fresh['bids'] - 1]) \
+                if self.__fresh['bids'] else (0.0, 0.0)
+            for i in range(self.__fresh['bids'], len(book)):
+                price, size = book[i]
+                size_total += size
+                notional_total += price * size
+                sizes[i] = size_total
+                notionals[i] = notional_total
+            self.__fresh['bids'] = len(book)
+        else:
+            fresh = self.__fresh['asks']
+            size_total, notional_total = (sizes[fresh], notionals[fresh]) if fresh < len(book) else (0.0, 0.0)
+            for i in range(fresh - 1, -1, -1):
+                price, size = book[i]
+                size_total += size
+                notional_total += price * size
+                sizes[i] = size_total
+                notionals[i] = notional_total
+            self.__fresh['asks'] = 0
+
+    def __cumulative(self, side: str, levels: int):
+        """
+        Size & notional of the best few levels of a side
+        """
+        if levels <= 0:
+            return 0.0, 0.0
+        sizes = self.__sizes[side]
+        notionals = self.__notionals[side]
+        if side == 'bids':
+            last = len(sizes) - 1
+            below = last - levels
+            if below < 0:
+                return sizes[last], notionals[last]
+            return sizes[last] - sizes[below], notionals[last] - notionals[below]
+        if levels >= len(sizes):
+            return sizes[0], notionals[0]
+        return sizes[0] - sizes[levels], notionals[0] - notionals[levels]
+
+    @property
+    def best_bid(self):
+        bids = self['bids']
+        return bids[-1][0] if bids else None
+
+    @property
+    def best_ask(self):
+        asks = self['asks']
+        return asks[0][0] if asks else None
+
+    @property
+    def mid(self):
+        """
+        Halfway between the best bid & ask, None if a side is empty
+        """
+        bid, ask = self.best_bid, self.best_ask
+        return None if bid is None or ask is None else (bid + ask) / 2
+
+    @property
+    def spread(self):
+        """
+        Best ask minus the best bid, None if a side is empty
+        """
+        bid, ask = self.best_bid, self.best_ask
+        return None if bid is None or ask is None else ask - bid
+
+    def depth(self, side: str, bps: float = None) -> float:
+        """
+        Total size resting on a side of the book
+
+        Args:
+            side: 'bids' or 'asks'
+            bps: Only count levels within this many basis points of the mid price. None counts the whole side.
+        """
+        with self.__lock:
+            self.__refresh(side)
+            return self.__cumulative(side, self.__levels_within(side, bps))[0]
+
+    def __levels_within(self, side: str, bps: float) -> int:
+        prices = self.__prices[side]
+        mid = self.mid
+        if bps is None or mid is None:
+            return len(prices)
+        if side == 'bids':
+            return len(prices) - bisect_left(prices, mid * (1 - bps / 10000))
+        return bisect_right(prices, mid * (1 + bps / 10000))
+
+    def imbalance(self, bps: float = None):
+        """
+        (bid size - ask size) / (bid size + ask size), from -1 when only asks are resting to 1 when only bids are
+
+        Args:
+            bps: Compare the size within this many basis points of the mid price. None compares the best levels.
+        """
+        with self.__lock:
+            if bps is None:
+                bids = self['bids'][-1][1] if self['bids'] else 0.0
+                asks = self['asks'][0][1] if self['asks'] else 0.0
+            else:
+                self.__refresh('bids')
+                self.__refresh('asks')
+                bids = self.__cumulative('bids', self.__levels_within('bids', bps))[0]
+                asks = self.__cumulative('asks', self.__levels_within('asks', bps))[0]
+        total = bids + asks
+        return None if total == 0 else (bids - asks) / total
+
+    def vwap(self, side: str, size: float):
+        """
+        Average price of filling a size against the book
+
+        Args:
+            side: 'buy' walks up the asks and 'sell' walks down the bids
+            size: Quantity to fill
+
+        Returns:
+            The volume weighted price, None if the book doesn't have enough size
+        """
+        book_side = 'asks' if side == 'buy' else 'bids'
+        with self.__lock:
+            self.__refresh(book_side)
+            book = self[book_side]
+            if size <= 0 or not book or self.__cumulative(book_side, len(book))[0] < size:
+                return None
+
+            # Find the fewest best levels that hold the size
+            low, high = 1, len(book)
+            while low < high:
+                middle = (low + high) // 2
+                if self.__cumulative(book_side, middle)[0] >= size:
+                    high = middle
+                else:
+                    low = middle + 1
+
+            filled, notional = self.__cumulative(book_side, low - 1)
+            last_price = book[-low][0] if book_side == 'bids' else book[low - 1][0]
+            return (notional + (size - filled) * last_price) / size
+
+
+"""
+Exchange message parsing
+
+Each parser turns the message that the OrderbookManager receives from a websocket (or the snapshot passed to its
+pre-event callback) into (symbol, bids, asks) where bids & asks are lists of (price, size). These are used by both the
+live manager and the backtest replay so that a recorded native feed builds exactly the same book.
+"""
+
+
+def _levels(entries) -> list:
+    # Exchanges append extra fields such as sequence numbers or order counts after the price & size
+    return [(float(entry[0]), float(entry[1])) for entry in entries]
+
+
+def parse_coinbase_pro_snapshot(message: dict):
+    return message['product_id'], _levels(message['bids']), _levels(message['asks'])
+
+
+def parse_coinbase_pro_update(message: dict):
+    bids = []
+    asks = []
+    for side, price, size in message['changes']:
+        (bids if side == 'buy' else asks).append((float(price), float(size)))
+    return message['product_id'], bids, asks
+
+
+def parse_ftx_snapshot(message: dict):
+    return message['market'], _levels(message['data']['bids']), _levels(message['data']['asks'])
+
+
+def parse_ftx_update(message: dict):
+    return message['symbol'], _levels(message['bids']), _levels(message['asks'])
+
+
+def parse_okx_snapshot(message: dict):
+    return message['arg']['instId'], _levels(message['data'][0]['bids']), _levels(message['data'][0]['asks'])
+
+
+parse_okx_update = parse_okx_snapshot
+
+
+def parse_kucoin_snapshot(message: dict):
+    changes = message['data']['changes']
+    return message['data']['symbol'], _levels(changes['bids']), _levels(changes['asks'])
+
+
+parse_kucoin_update = parse_kucoin_snapshot
+
+
+def parse_binance_snapshot(message: dict):
+    # The binance snapshot comes from the REST depth endpoint, the symbol is added when it's recorded
+    return message['symbol'], _levels(message['bids']), _levels(message['asks'])
+
+
+def parse_binance_update(message: dict):
+    return message['s'], _levels(message['b']), _levels(message['a'])
+
+
+def parse_alpaca_snapshot(message: dict):
+    # Alpaca only has the top of the book, so every quote is a snapshot
+    return message['S'], [(float(message['bp']), float(message['bs']))], [(float(message['ap']), float(message['as']))]
+
+
+parsers = {
+    'coinbase_pro': (parse_coinbase_pro_snapshot, parse_coinbase_pro_update),
+    'ftx': (parse_ftx_snapshot, parse_ftx_update),
+    'okx': (parse_okx_snapshot, parse_okx_update),
+    'kucoin': (parse_kucoin_snapshot, parse_kucoin_update),
+    'binance': (parse_binance_snapshot, parse_binance_update),
+    'alpaca': (parse_alpaca_snapshot, parse_alpaca_snapshot)
+}
@@ -30,7 +30,11 @@ from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket import Tic
 from blankly.exchanges.interfaces.kucoin.kucoin_websocket import Tickers as Kucoin_Orderbook
 from blankly.exchanges.interfaces.ftx.ftx_websocket import Tickers as Ftx_Orderbook
 from blankly.exchanges.interfaces.okx.okx_websocket import Tickers as Okx_Orderbook
+from blankly.exchanges.managers import orderbook
+from blankly.exchanges.managers.conflator import Conflator
+from blankly.exchanges.managers.orderbook import Orderbook
 from blankly.exchanges.managers.websocket_manager import WebsocketManager
+from blankly.exchanges.simulated_urls import websocket_url, warn_unsimulated_feed, SUPPORTED_ORDERBOOKS
 
 
 def sort_list_tuples(list_with_tuples: list) -> List[tuple]:
@@ -100,6 +104,8 @@ class OrderbookManager(WebsocketManager):
                          override_symbol=None,
                          override_exchange=None,
                          initially_stopped=False,
+                         conflation_interval: float = None,
+                         conflation_updates: int = None,
                          **kwargs):
         """
         Create an orderbook for a given exchange
@@ -108,11 +114,19 @@ class OrderbookManager(WebsocketManager):
             override_symbol: Override the default currency id
             override_exchange: Override the default exchange
             initially_stopped: Keep the websocket stopped when created
+            conflation_interval: Call the callback with the latest book at most once every this many seconds. Every
+                update is still applied to the book.
+            conflation_updates: Call the callback once this many updates have been applied, even if the interval
+                hasn't passed
             kwargs: Add any other parameters that should be passed into a callback function to identify
                 it or modify behavior
         """
+        if conflation_interval is not None or conflation_updates is not None:
+            # The timer delivers from its own thread, so it is given a snapshot rather than the book being updated
+            callback = Conflator(callback, conflation_interval, conflation_updates, Orderbook.snapshot).put
 
         use_sandbox = self.preferences['settings']['use_sandbox_websockets']
+        simulated_url = self.preferences['settings']['simulated_exchange_url']
 
         exchange_name = self.__default_exchange
         # Ensure the ticker dict has this overridden exchange
@@ -127,12 +141,18 @@ class OrderbookManager(WebsocketManager):
         # Ensure that we always have a key the relevant orderbook
         if exchange_name not in self.__orderbooks:
             self.__orderbooks[exchange_name] = {}
+        warn_unsimulated_feed(simulated_url, exchange_name, 'orderbook', SUPPORTED_ORDERBOOKS)
 
         if exchange_name == "coinbase_pro":
             if override_symbol is None:
                 override_symbol = self.__default_currency
 
-            if use_sandbox:
+            if simulated_url:
+                websocket = Coinbase_Pro_Orderbook(override_symbol, "level2",
+                                                   pre_event_callback=self.coinbase_snapshot_update,
+                                                   initially_stopped=initially_stopped,
+                                                   websocket_url=websocket_url(simulated_url, 'coinbase_pro'))
+            elif use_sandbox:
                 websocket = Coinbase_Pro_Orderbook(override_symbol, "level2",
                                                    pre_event_callback=self.coinbase_snapshot_update,
                                                    initially_stopped=initially_stopped,
@@ -149,10 +169,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets['coinbase_pro'][override_symbol] = websocket
             self.__websockets_callbacks['coinbase_pro'][override_symbol] = [callback]
             self.__websockets_kwargs['coinbase_pro'][override_symbol] = kwargs
-            self.__orderbooks['coinbase_pro'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['coinbase_pro'][override_symbol] = Orderbook()
             return websocket
         elif exchange_name == "ftx":
             if override_symbol is None:
@@ -174,10 +191,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets['ftx'][override_symbol] = websocket
             self.__websockets_callbacks['ftx'][override_symbol] = [callback]
             self.__websockets_kwargs['ftx'][override_symbol] = kwargs
-            self.__orderbooks['ftx'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['ftx'][override_symbol] = Orderbook()
             return websocket
         elif exchange_name == "kucoin":
             if override_symbol is None:
@@ -208,10 +222,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets['kucoin'][override_symbol] = websocket
             self.__websockets_callbacks['kucoin'][override_symbol] = [callback]
             self.__websockets_kwargs['kucoin'][override_symbol] = kwargs
-            self.__orderbooks['kucoin'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['kucoin'][override_symbol] = Orderbook()
 
         elif exchange_name == "okx":
             if override_symbol is None:
@@ -232,10 +243,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets['okx'][override_symbol] = websocket
             self.__websockets_callbacks['okx'][override_symbol] = [callback]
             self.__websockets_kwargs['okx'][override_symbol] = kwargs
-            self.__orderbooks['okx'][override_symbol] = {
-                "bids": [],
-                "asks": []
-            }
+            self.__orderbooks['okx'][override_symbol] = Orderbook()
             return websocket
 
         elif exchange_name == "binance":
@@ -260,10 +268,7 @@ class OrderbookManager(WebsocketManager):
             self.__websockets_kwargs['binance'][specific_currency_id] = kwargs
 
             buys, sells = binance_snapshot(specific_currency_id, 1000)
-            self.__orderbooks['binance'][specific_currency_id] = {
-                "bids": buys,
-                "asks": sells
-            }
+            self.__orderbooks['binance'][specific_currency_id] = Orderbook(buys, sells)
 
         elif exchange_name == "alpaca":
             warning_string = "Alpaca only allows the viewing of the bid/ask spread, not a total orderbook."
@@ -288,319 +293,63 @@ class OrderbookManager(WebsocketManager):
             self.__websockets_callbacks['alpaca'][override_symbol] = [callback]
             self.__websockets_kwargs['alpaca'][override_symbol] = kwargs
 
-            self.__orderbooks['alpaca'][override_symbol] = {
-                "bids": [],
-                "asks": [],
-            }
+            self.__orderbooks['alpaca'][override_symbol] = Orderbook()
 
         else:
             print(exchange_name + " ticker not supported, skipping creation")
 
-    def ftx_update(self, update):
-        symbol = update['symbol']
-
-        book_buys = self.__orderbooks['ftx'][symbol]['bids']
-        book_sells = self.__orderbooks['ftx'][symbol]['asks']  # type: list
-
-        new_buys = update['bids'][::-1]  # type: list
-        for i in new_buys:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_buys = remove_price(book_buys, i[0])
-            else:
-                book_buys.append((i[0], i[1]))
-
-        new_sells = update['asks']  # type: list
-        for i in new_sells:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_sells = remove_price(book_sells, i[0])
-            else:
-                book_sells.append((i[0], i[1]))
-
-        # Now sort them
-        book_buys = sort_list_tuples(book_buys)
-        book_sells = sort_list_tuples(book_sells)
-
-        self.__orderbooks['ftx'][symbol]['bids'] = book_buys
-        self.__orderbooks['ftx'][symbol]['asks'] = book_sells
+    def __apply_update(self, exchange: str, symbol: str, bids: list, asks: list):
+        book = self.__orderbooks[exchange][symbol]  # type: Orderbook
+        book.apply(bids, asks)
 
         # Pass in this new updated orderbook
-        callbacks = self.__websockets_callbacks['ftx'][symbol]
+        callbacks = self.__websockets_callbacks[exchange][symbol]
         for i in callbacks:
-            i(self.__orderbooks['ftx'][symbol],
-              **self.__websockets_kwargs['ftx'][symbol])
-
-    def ftx_snapshot_update(self, update):
-        market = update['market'].replace('/', '-')
-        print("Orderbook snapshot acquired for: " + market)
-        book = {
-            "bids": [],
-            "asks": []
-        }
-        buys = update['data']['bids']
-
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
+            i(book, **self.__websockets_kwargs[exchange][symbol])
 
-        sells = update['data']['asks']
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
+    def __apply_snapshot(self, exchange: str, symbol: str, bids: list, asks: list):
+        print("Orderbook snapshot acquired for: " + symbol)
+        # Keep the same object so anything holding the book sees the snapshot
+        book = self.__orderbooks[exchange].get(symbol)
+        if book is None:
+            book = Orderbook()
+            self.__orderbooks[exchange][symbol] = book
+        book.set_snapshot(bids, asks)
 
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
+    def ftx_update(self, update):
+        self.__apply_update('ftx', *orderbook.parse_ftx_update(update))
 
-        self.__orderbooks['ftx'][update['market']] = book
+    def ftx_snapshot_update(self, update):
+        self.__apply_snapshot('ftx', *orderbook.parse_ftx_snapshot(update))
 
     def coinbase_snapshot_update(self, update):
-        print("Orderbook snapshot acquired for: " + update['product_id'])
-        # Clear whatever book we had
-        book = {
-            "bids": [],
-            "asks": []
-        }
-        # Get all bids
-        buys = update['bids']
-        # Convert these to float and write to our order dictionaries
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
-
-        sells = update['asks']
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
-
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
-
-        self.__orderbooks['coinbase_pro'][update['product_id']] = book
+        self.__apply_snapshot('coinbase_pro', *orderbook.parse_coinbase_pro_snapshot(update))
 
     def coinbase_update(self, update):
-        # Side is first in list
-        side = update['changes'][0][0]
-
-        # Have to convert coinbase to use this
-        if side == 'buy':
-            side = 'bids'
-        elif side == 'sell':
-            side = 'asks'
-
-        # Price is second
-        price = float(update['changes'][0][1])
-        qty = float(update['changes'][0][2])
-        book = self.__orderbooks['coinbase_pro'][update['product_id']][side]  # type: list
-
-        # Quantity at that point is third
-        if qty == 0:
-            book = remove_price(book, price)
-        else:
-            book.append((price, qty))
-
-        book = sort_list_tuples(book)
-        self.__orderbooks['coinbase_pro'][update['product_id']][side] = book
-
-        # Iterate through the callback list
-        callbacks = self.__websockets_callbacks['coinbase_pro'][update['product_id']]
-        for i in callbacks:
-            i(self.__orderbooks['coinbase_pro'][update['product_id']],
-              **self.__websockets_kwargs['coinbase_pro'][update['product_id']])
+        self.__apply_update('coinbase_pro', *orderbook.parse_coinbase_pro_update(update))
 
     def okx_update(self, update):
-
-        symbol = update['arg']['instId']
-
-        book_buys = self.__orderbooks['okx'][symbol]['bids']  # type: list
-        book_sells = self.__orderbooks['okx'][symbol]['asks']  # type: list
-
-        # Buys are b, count from low to high with reverse (which is the ::-1 thing)
-        new_buys = update['data'][0]['bids'][::-1]  # type: list
-        for i in new_buys:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_buys = remove_price(book_buys, i[0])
-            else:
-                book_buys.append((i[0], i[1]))
-
-        # Asks are sells, these are also counted from low to high
-        new_sells = update['data'][0]['asks']  # type: list
-        for i in new_sells:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_sells = remove_price(book_sells, i[0])
-            else:
-                book_sells.append((i[0], i[1]))
-
-        # Now sort them
-        book_buys = sort_list_tuples(book_buys)
-        book_sells = sort_list_tuples(book_sells)
-
-        self.__orderbooks['okx'][symbol]['bids'] = book_buys
-        self.__orderbooks['okx'][symbol]['asks'] = book_sells
-
-        # Pass in this new updated orderbook
-        callbacks = self.__websockets_callbacks['okx'][symbol]
-        for i in callbacks:
-            i(self.__orderbooks['okx'][symbol],
-              **self.__websockets_kwargs['okx'][symbol])
+        self.__apply_update('okx', *orderbook.parse_okx_update(update))
 
     def okx_snapshot_update(self, update):
-        print("Orderbook snapshot acquired for: " + update['arg']['instId'])
-
-        book = {
-            "bids": [],
-            "asks": []
-        }
-
-        buys = update['data'][0]['bids']  # [0][:-1]
-        buys[0] = buys[0][:-1]
-        # Convert these to float and write to our order dictionaries
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
-
-        sells = update['data'][0]['asks']  # [0][:-1]
-        sells[0] = sells[0][:-1]
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
-
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
-
-        self.__orderbooks['okx'][update['arg']['instId']] = book
+        self.__apply_snapshot('okx', *orderbook.parse_okx_snapshot(update))
 
     def kucoin_update(self, update):
-        symbol = update['data']['symbol']
-
-        # Get symbol for orderbook
-        book_buys = self.__orderbooks['kucoin'][symbol]['bids']
-        book_sells = self.__orderbooks['kucoin'][symbol]['asks']  # type: list
-
-        new_buys = update['data']['changes']['bids'][::-1]  # type: list
-        if len(new_buys) == 0:
-            pass
-        else:
-            new_buys[0] = new_buys[0][:-1]
-
-        for i in new_buys:
-            i[0] = float(i[0])  # price
-            i[1] = float(i[1])  # size
-            if i[1] == 0:
-                book_buys = remove_price(book_buys, i[1])
-            else:
-                book_buys.append((i[0], i[1]))
-
-        # Asks are sells, these are also counted from low to high
-        new_sells = update['data']['changes']['asks']  # type: list
-        if len(new_sells) == 0:
-            pass
-        else:
-            new_sells[0] = new_sells[0][:-1]
-
-        for i in new_sells:
-            i[0] = float(i[0])
-            i[1] = float(i[1])
-            if i[1] == 0:
-                book_sells = remove_price(book_sells, i[1])
-            else:
-                book_sells.append((i[0], i[1]))
-
-        # Now sort them
-        book_buys = sort_list_tuples(book_buys)
-        book_sells = sort_list_tuples(book_sells)
-
-        self.__orderbooks['kucoin'][symbol]['bids'] = book_buys
-        self.__orderbooks['kucoin'][symbol]['asks'] = book_sells
-
-        # Pass in this new updated orderbook
-        callbacks = self.__websockets_callbacks['kucoin'][symbol]
-        for i in callbacks:
-            i(self.__orderbooks['kucoin'][symbol],
-              **self.__websockets_kwargs['kucoin'][symbol])
+        self.__apply_update('kucoin', *orderbook.parse_kucoin_update(update))
 
     def kucoin_snapshot_update(self, update):
-        print("Orderbook snapshot acquired for: " + update['data']['symbol'])
-        # Clear whatever book we had
-        book = {
-            "bids": [],
-            "asks": []
-        }
-        # Get all bids
-        buys = update['data']['changes']['bids']  # [0][:-1]
-        buys[0] = buys[0][:-1]
-        # Convert these to float and write to our order dictionaries
-        for i in range(len(buys)):
-            buy = buys[i]
-            book['bids'].append((float(buy[0]), float(buy[1])))
-
-        sells = update['data']['changes']['asks']  # [0][:-1]
-        sells[0] = sells[0][:-1]
-        for i in range(len(sells)):
-            sell = sells[i]
-            book['asks'].append((float(sell[0]), float(sell[1])))
-
-        book["bids"] = sort_list_tuples(book["bids"])
-        book["asks"] = sort_list_tuples(book["asks"])
-
-        self.__orderbooks['kucoin'][update['data']['symbol']] = book
+        self.__apply_snapshot('kucoin', *orderbook.parse_kucoin_snapshot(update))
 
     def binance_update(self, update):
         try:
-            # TODO this needs a snapshot to work correctly, which needs arun's rest code
-            # Get symbol first
-            symbol = update['s']
-
-            # Get symbol for orderbook
-            book_buys = self.__orderbooks['binance'][symbol]['bids']  # type: list
-            book_sells = self.__orderbooks['binance'][symbol]['asks']  # type: list
-
-            # Buys are b, count from low to high with reverse (which is the ::-1 thing)
-            new_buys = update['b'][::-1]  # type: list
-            for i in new_buys:
-                i[0] = float(i[0])
-                i[1] = float(i[1])
-                if i[1] == 0:
-                    book_buys = remove_price(book_buys, i[0])
-                else:
-                    book_buys.append((i[0], i[1]))
-
-            # Asks are sells, these are also counted from low to high
-            new_sells = update['a']  # type: list
-            for i in new_sells:
-                i[0] = float(i[0])
-                i[1] = float(i[1])
-                if i[1] == 0:
-                    book_sells = remove_price(book_sells, i[0])
-                else:
-                    book_sells.append((i[0], i[1]))
-
-            # Now sort them
-            book_buys = sort_list_tuples(book_buys)
-            book_sells = sort_list_tuples(book_sells)
-
-            self.__orderbooks['binance'][symbol]['bids'] = book_buys
-            self.__orderbooks['binance'][symbol]['asks'] = book_sells
-
-            # Pass in this new updated orderbook
-            callbacks = self.__websockets_callbacks['binance'][symbol]
-            for i in callbacks:
-                i(self.__orderbooks['binance'][symbol],
-                  **self.__websockets_kwargs['binance'][symbol])
+            self.__apply_update('binance', *orderbook.parse_binance_update(update))
         except Exception:
             traceback.print_exc()
 
     def alpaca_update(self, update: dict):
         # Alpaca only gives the spread, no orderbook depth (alpaca is very bad)
-        symbol = update['S']
-        self.__orderbooks['alpaca'][symbol]['bids'] = [(update['bp'], update['bs'])]
-        self.__orderbooks['alpaca'][symbol]['asks'] = [(update['ap'], update['as'])]
+        symbol, bids, asks = orderbook.parse_alpaca_snapshot(update)
+        self.__orderbooks['alpaca'][symbol].set_snapshot(bids, asks)
 
         callbacks = self.__websockets_callbacks['alpaca'][symbol]
         for i in callbacks:
@@ -623,8 +372,29 @@ class OrderbookManager(WebsocketManager):
         if override_exchange is None:
             override_exchange = self.__default_exchange
 
+        override_symbol = self.__book_symbol(override_symbol, override_exchange)
         self.__websockets_callbacks[override_exchange][override_symbol].append(callback_object)
 
+    def remove_orderbook_callback(self, callback_object, override_symbol=None, override_exchange=None):
+        """
+        Stop calling a function that was given to create_orderbook() or append_orderbook_callback()
+        Args:
+            callback_object: The same reference that was added
+            override_symbol: Ticker id, such as "BTC-USD" or exchange equivalents.
+            override_exchange: Forces the manager to use a different supported exchange.
+        """
+        if override_symbol is None:
+            override_symbol = self.__default_currency
+
+        if override_exchange is None:
+            override_exchange = self.__default_exchange
+
+        override_symbol = self.__book_symbol(override_symbol, override_exchange)
+        callbacks = self.__websockets_callbacks.get(override_exchange, {})
+        if override_symbol in callbacks:
+            # Swapped rather than modified because the websocket thread may be looping over the list
+            callbacks[override_symbol] = [i for i in callbacks[override_symbol] if i != callback_object]
+
     def get_most_recent_orderbook(self, override_symbol=None, override_exchange=None):
         """
         Get the most recent orderbook under a currency and exchange.
@@ -639,4 +409,14 @@ class OrderbookManager(WebsocketManager):
         if override_exchange is None:
             override_exchange = self.__default_exchange
 
+        override_symbol = self.__book_symbol(override_symbol, override_exchange)
         return self.__orderbooks[override_exchange][override_symbol]
+
+    @staticmethod
+    def __book_symbol(symbol: str, exchange: str) -> str:
+        # The books & callbacks are stored under the symbol that create_orderbook() subscribed with
+        if exchange == 'binance':
+            return blankly.utils.to_exchange_symbol(symbol, 'binance').upper()
+        if exchange == 'ftx' or exchange == 'alpaca':
+            return blankly.utils.to_exchange_symbol(symbol, exchange)
+        return symbol
@@ -25,8 +25,10 @@ from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket import Tic
 from blankly.exchanges.interfaces.kucoin.kucoin_websocket import Tickers as Kucoin_Ticker
 from blankly.exchanges.interfaces.ftx.ftx_websocket import Tickers as FTX_Ticker
 from blankly.exchanges.interfaces.okx.okx_websocket import Tickers as Okx_Ticker
+from blankly.exchanges.interfaces.oanda.oanda_websocket import Tickers as Oanda_Ticker
 
 from blankly.exchanges.managers.websocket_manager import WebsocketManager
+from blankly.exchanges.simulated_urls import websocket_url, warn_unsimulated_feed
 
 
 class TickerManager(WebsocketManager):
@@ -79,6 +81,7 @@ class TickerManager(WebsocketManager):
             pass
 
         sandbox_mode = self.preferences['settings']['use_sandbox_websockets']
+        simulated_url = self.preferences['settings']['simulated_exchange_url']
 
         exchange_name = self.__default_exchange
         # Ensure the ticker dict has this overridden exchange
@@ -87,12 +90,16 @@ class TickerManager(WebsocketManager):
                 self.__tickers[override_exchange] = {}
             # Write this value so it can be used later
             exchange_name = override_exchange
+        warn_unsimulated_feed(simulated_url, exchange_name, 'ticker')
 
         if exchange_name == "coinbase_pro":
             if override_symbol is None:
                 override_symbol = self.__default_symbol
 
-            if sandbox_mode:
+            if simulated_url:
+                ticker = Coinbase_Pro_Ticker(override_symbol, "ticker", log=log,
+                                             websocket_url=websocket_url(simulated_url, 'coinbase_pro'), **kwargs)
+            elif sandbox_mode:
                 ticker = Coinbase_Pro_Ticker(override_symbol, "ticker", log=log,
                                              websocket_url="wss://ws-feed-public.sandbox.pro.coinbase.com", **kwargs)
             else:
@@ -107,7 +114,12 @@ class TickerManager(WebsocketManager):
                 override_symbol = self.__default_symbol
 
             override_symbol = blankly.utils.to_exchange_symbol(override_symbol, "binance").lower()
-            if sandbox_mode:
+            if simulated_url:
+                ticker = Binance_Ticker(override_symbol,
+                                        "aggTrade",
+                                        log=log,
+                                        websocket_url=websocket_url(simulated_url, 'binance'), **kwargs)
+            elif sandbox_mode:
                 ticker = Binance_Ticker(override_symbol,
                                         "aggTrade",
                                         log=log,
@@ -144,6 +156,7 @@ class TickerManager(WebsocketManager):
                                                      f"{random.randint(1, 100000000) * 100000000}]", **kwargs)
             ticker.append_callback(callback)
             self.__tickers['kucoin'][override_symbol] = ticker
+            return ticker
         elif exchange_name == 'okx':
             if override_symbol is None:
                 override_symbol = self.__default_symbol
@@ -197,5 +210,18 @@ class TickerManager(WebsocketManager):
             self.__tickers['ftx'][override_symbol] = ticker
             return ticker
 
+        elif exchange_name == "oanda":
+            if override_symbol is None:
+                override_symbol = self.__default_symbol
+
+            # Every oanda ticker shares one pricing stream, the keys file decides sandbox unless the setting forces it
+            ticker = Oanda_Ticker(override_symbol, "pricing", log=log, sandbox=True if sandbox_mode else None,
+                                  **kwargs)
+
+            ticker.append_callback(callback)
+            # Store this object
+            self.__tickers['oanda'][override_symbol] = ticker
+            return ticker
+
         else:
             print(exchange_name + " ticker not supported, skipping creation")
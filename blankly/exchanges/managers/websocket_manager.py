@@ -61,6 +61,22 @@ class WebsocketManager(ABCExchangeWebsocket):
             currency_id = blankly.utils.to_exchange_symbol(currency_id, "ftx")
         return self.websockets[exchange][currency_id]
 
+    def attach_recorder(self, recorder, normalized: bool = False, override_symbol=None, override_exchange=None):
+        """
+        Record the messages received on a websocket owned by this manager
+        Args:
+            recorder: A blankly.data.WebsocketRecorder
+            normalized: Record the parsed messages instead of the raw exchange messages
+            override_symbol: Ticker id, such as "BTC-USD" or exchange equivalents.
+            override_exchange: Forces the manager to use a different supported exchange.
+        """
+        websocket = self.__evaluate_overrides(override_symbol, override_exchange)
+
+        if override_exchange is None:
+            override_exchange = self.__default_exchange
+
+        recorder.attach(websocket, override_exchange, normalized=normalized)
+
     def get_ticker(self, symbol, override_exchange=None):
         """
         Retrieve the ticker attached to a currency
@@ -0,0 +1,21 @@
+"""
+    Simulated exchange server & load testing imports
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from blankly.exchanges.simulated.simulated_exchange import SimulatedExchange, MarketFeed
+from blankly.exchanges.simulated_urls import rest_url, websocket_url, binance_client
+from blankly.exchanges.simulated.load_test import LoadTest
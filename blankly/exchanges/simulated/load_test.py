@@ -0,0 +1,197 @@
+"""
+    Load test harness that drives the live exchange classes against a simulated exchange
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+import threading
+import time
+import typing
+
+import numpy as np
+
+from blankly.exchanges.simulated.simulated_exchange import SimulatedExchange
+from blankly.exchanges.simulated_urls import binance_client
+from blankly.utils.utils import to_exchange_symbol, load_user_preferences
+
+DEFAULT_SYMBOLS = {
+    'coinbase_pro': ['BTC-USD'],
+    'binance': ['BTC-USDT']
+}
+
+
+def summarize(samples: typing.Sequence[float]) -> dict:
+    """
+    Count, mean & percentiles of latency samples, converted from seconds to milliseconds
+    """
+    if len(samples) == 0:
+        return {'count': 0, 'mean': None, 'p50': None, 'p90': None, 'p99': None, 'max': None}
+    samples = np.asarray(samples) * 1000
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {'count': len(samples), 'mean': float(samples.mean()), 'p50': float(p50), 'p90': float(p90),
+            'p99': float(p99), 'max': float(samples.max())}
+
+
+class LoadTest:
+    def __init__(self, exchange: str = 'coinbase_pro', symbols: typing.Sequence[str] = None,
+                 message_rate: float = 100, duration: float = 10, order_rate: float = 1, order_size: float = 0.001,
+                 connections: int = 1, warmup: float = 1, server: SimulatedExchange = None, **server_kwargs):
+        """
+        Measure the live path end to end: the exchange's websocket class parsing ticks into callbacks and the
+        exchange interface placing orders through its REST wrapper, both against a local SimulatedExchange.
+
+        Args:
+            exchange: coinbase_pro or binance
+            symbols: Symbols to stream, defaults to BTC-USD on coinbase_pro & BTC-USDT on binance
+            message_rate: Trades the server publishes per symbol per second
+            duration: Seconds to measure for
+            order_rate: Market orders placed per second, alternating buys & sells. 0 places no orders.
+            order_size: Base size of each order
+            connections: Websockets opened for each symbol
+            warmup: Seconds to let the websockets connect before measuring
+            server: A SimulatedExchange that is already running, otherwise one is started for the run
+            server_kwargs: Passed to the SimulatedExchange that is started
+        """
+        if exchange not in DEFAULT_SYMBOLS:
+            raise ValueError(f"Load testing is not supported for {exchange}")
+        self.exchange = exchange
+        self.symbols = list(symbols) if symbols is not None else DEFAULT_SYMBOLS[exchange]
+        self.message_rate = message_rate
+        self.duration = duration
+        self.order_rate = order_rate
+        self.order_size = order_size
+        self.connections = connections
+        self.warmup = warmup
+        self.server = server
+        self.__server_kwargs = server_kwargs
+
+        self.__lock = threading.Lock()
+        self.__tick_latencies = []
+        self.__measuring = False
+
+    def create_interface(self):
+        """
+        The real exchange interface with its API calls pointed at the server
+        """
+        if self.exchange == 'coinbase_pro':
+            from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_api import API as CoinbaseProAPI
+            from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_interface import CoinbaseProInterface
+
+            # Requests are still signed so the secret has to be valid base64
+            calls = CoinbaseProAPI('simulated', base64.b64encode(b'simulated').decode('ascii'), 'simulated',
+                                   api_url=self.server.rest_url('coinbase_pro'))
+            return CoinbaseProInterface('coinbase_pro', calls)
+
+        from blankly.exchanges.interfaces.binance.binance_interface import BinanceInterface
+        tld = load_user_preferences()['settings']['binance']['binance_tld']
+        return BinanceInterface('binance', binance_client(self.server.url, tld=tld))
+
+    def create_ticker(self, symbol: str):
+        """
+        The exchange's websocket class subscribed to the server's trade stream
+        """
+        if self.exchange == 'coinbase_pro':
+            from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket import Tickers
+            ticker = Tickers(symbol, 'ticker', websocket_url=self.server.websocket_url('coinbase_pro'))
+        else:
+            from blankly.exchanges.interfaces.binance.binance_websocket import Tickers
+            ticker = Tickers(to_exchange_symbol(symbol, 'binance').lower(), 'aggTrade',
+                             websocket_url=self.server.websocket_url('binance'))
+        ticker.append_callback(self.__on_tick)
+        return ticker
+
+    def __on_tick(self, tick: dict):
+        latency = time.time() - tick['time']
+        if self.__measuring:
+            with self.__lock:
+                self.__tick_latencies.append(latency)
+
+    def run(self) -> dict:
+        """
+        Run the load test
+
+        Returns:
+            A report with tick-to-callback & order placement latency summaries in milliseconds along with the
+            server's counters
+        """
+        started_server = self.server is None
+        if started_server:
+            self.server = SimulatedExchange(symbols=self.symbols, message_rate=self.message_rate,
+                                            **self.__server_kwargs).start()
+
+        tickers = []
+        try:
+            interface = self.create_interface()
+            for symbol in self.symbols:
+                for _ in range(self.connections):
+                    tickers.append(self.create_ticker(symbol))
+            time.sleep(self.warmup)
+
+            with self.__lock:
+                self.__tick_latencies = []
+            self.__measuring = True
+            order_latencies, order_errors = self.__place_orders(interface)
+            self.__measuring = False
+
+            with self.__lock:
+                tick_latencies = list(self.__tick_latencies)
+            return {
+                'exchange': self.exchange,
+                'symbols': self.symbols,
+                'duration': self.duration,
+                'message_rate': self.message_rate,
+                'connections': len(tickers),
+                'ticks_per_second': len(tick_latencies) / self.duration,
+                'tick_to_callback': summarize(tick_latencies),
+                'order_placement': summarize(order_latencies),
+                'order_errors': order_errors,
+                'server': self.server.stats()
+            }
+        finally:
+            self.__measuring = False
+            for ticker in tickers:
+                ticker.close_websocket()
+            for ticker in tickers:
+                ticker.thread.join(timeout=5)
+            if started_server:
+                self.server.stop()
+                self.server = None
+
+    def __place_orders(self, interface) -> typing.Tuple[list, int]:
+        latencies = []
+        errors = 0
+        stop = time.perf_counter() + self.duration
+        if not self.order_rate:
+            time.sleep(self.duration)
+            return latencies, errors
+
+        interval = 1 / self.order_rate
+        next_order = time.perf_counter()
+        count = 0
+        while next_order < stop:
+            time.sleep(max(next_order - time.perf_counter(), 0))
+            symbol = self.symbols[count % len(self.symbols)]
+            side = 'buy' if (count // len(self.symbols)) % 2 == 0 else 'sell'
+            placed = time.perf_counter()
+            try:
+                interface.market_order(symbol, side, self.order_size)
+                latencies.append(time.perf_counter() - placed)
+            except Exception:
+                errors += 1
+            count += 1
+            next_order += interval
+        time.sleep(max(stop - time.perf_counter(), 0))
+        return latencies, errors
@@ -0,0 +1,1030 @@
+"""
+    Local stand-in exchange that speaks enough of the Coinbase Pro & Binance protocols to load test the live path
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import collections
+import json
+import math
+import queue
+import random
+import socket
+import threading
+import time
+import typing
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from blankly.data.recorder import RecordingReader
+from blankly.exchanges.simulated_urls import SUPPORTED_EXCHANGES, rest_url, websocket_url
+from blankly.exchanges.simulated.websocket_frames import accept_key, encode_frame, read_message, OP_CLOSE, OP_PING, \
+    OP_PONG, OP_TEXT
+from blankly.utils.utils import iso8601_from_epoch, epoch_from_iso8601, to_exchange_symbol
+
+DEFAULT_BALANCE = 1000000
+_BINANCE_INTERVALS = {'1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '2h': 7200,
+                      '4h': 14400, '6h': 21600, '8h': 28800, '12h': 43200, '1d': 86400, '3d': 259200,
+                      '1w': 604800}
+
+
+def _trade_from_message(message) -> typing.Optional[typing.Tuple[float, float]]:
+    if isinstance(message, (str, bytes)):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return None
+    if not isinstance(message, dict):
+        return None
+    price = message.get('price', message.get('p'))
+    size = message.get('size', message.get('last_size', message.get('q')))
+    if price is None or size is None:
+        return None
+    return float(price), float(size)
+
+
+class MarketFeed:
+    def __init__(self, symbol: str, price: float = 100.0, volatility: float = 0.0005, size: float = 0.01,
+                 trades: typing.Sequence[typing.Tuple[float, float]] = None, seed: int = None):
+        """
+        The trades of one symbol on the simulated exchange. This is a random walk unless recorded trades are given,
+        in which case they are replayed in a loop.
+
+        Args:
+            symbol: Blankly symbol such as BTC-USD
+            price: Starting price of the random walk
+            volatility: Standard deviation of the log return between two trades
+            size: Average trade size
+            trades: (price, size) pairs to replay instead of the random walk
+            seed: Seed for the random walk so that runs can be repeated
+        """
+        self.symbol = symbol
+        self.volatility = volatility
+        self.average_size = size
+        self.trade_id = 0
+        self.__trades = list(trades) if trades else None
+        self.__index = 0
+        self.__random = random.Random(seed)
+        self.price = float(self.__trades[0][0] if self.__trades else price)
+
+    @classmethod
+    def from_recording(cls, file_path: str, symbol: str, **kwargs) -> 'MarketFeed':
+        """
+        Replay the trades of a symbol from a recording made by the WebsocketRecorder
+
+        Args:
+            file_path: Path of the recording
+            symbol: Blankly symbol such as BTC-USD. The recording can hold it in any exchange's format.
+            kwargs: Any other MarketFeed arguments
+        """
+        wanted = symbol.replace('-', '').upper()
+        trades = []
+        for record in RecordingReader(file_path):
+            if record.symbol.replace('-', '').upper() != wanted:
+                continue
+            trade = _trade_from_message(record.message)
+            if trade is not None:
+                trades.append(trade)
+        if not trades:
+            raise LookupError(f"No trades for {symbol} were found in {file_path}")
+        return cls(symbol, trades=trades, **kwargs)
+
+    @property
+    def tick_size(self) -> float:
+        return max(round(self.price * 0.0001, 2), 0.01)
+
+    def next(self) -> typing.Tuple[float, float]:
+        """
+        Advance the feed by one trade
+
+        Returns:
+            (price, size) of the trade
+        """
+        self.trade_id += 1
+        if self.__trades is not None:
+            self.price, size = self.__trades[self.__index % len(self.__trades)]
+            self.__index += 1
+            return self.price, size
+        self.price = max(round(self.price * math.exp(self.__random.gauss(0, self.volatility)), 2), 0.01)
+        return self.price, round(self.__random.expovariate(1 / self.average_size), 8)
+
+    def book(self, depth: int = 10) -> typing.Tuple[list, list]:
+        """
+        Bids & asks around the current price, best first
+        """
+        step = self.tick_size
+        bids = [(round(self.price - step * (i + 1), 2), round(self.average_size * (i + 1), 8)) for i in range(depth)]
+        asks = [(round(self.price + step * (i + 1), 2), round(self.average_size * (i + 1), 8)) for i in range(depth)]
+        return bids, asks
+
+    def candles(self, start: float, stop: float, granularity: int) -> list:
+        """
+        Synthetic candles that walk backwards from the current price, oldest first
+
+        Returns:
+            (time, open, high, low, close, volume) tuples
+        """
+        granularity = int(granularity)
+        start = int(start) - int(start) % granularity
+        times = list(range(start, int(stop), granularity))
+        walk = random.Random(f'{self.symbol},{start},{granularity}')
+        spread = self.volatility * 10
+        close = self.price
+        candles = []
+        for candle_time in reversed(times):
+            open_ = close * math.exp(walk.gauss(0, spread))
+            high = max(open_, close) * (1 + abs(walk.gauss(0, spread)))
+            low = min(open_, close) * (1 - abs(walk.gauss(0, spread)))
+            volume = walk.expovariate(1 / (self.average_size * 100))
+            candles.append((candle_time, round(open_, 2), round(high, 2), round(low, 2), round(close, 2),
+                            round(volume, 8)))
+            close = open_
+        candles.reverse()
+        return candles
+
+
+class _Order:
+    __slots__ = ('id', 'number', 'symbol', 'side', 'type', 'price', 'size', 'status', 'created_at', 'done_at',
+                 'executed_value', 'fees')
+
+    def __init__(self, number: int, symbol: str, side: str, type_: str, size: float, price: float = None):
+        self.id = str(uuid.uuid4())
+        self.number = number
+        self.symbol = symbol
+        self.side = side
+        self.type = type_
+        self.price = price
+        self.size = size
+        self.status = 'open'
+        self.created_at = time.time()
+        self.done_at = None
+        self.executed_value = 0.0
+        self.fees = 0.0
+
+    def coinbase_pro(self) -> dict:
+        response = {
+            'id': self.id,
+            'product_id': self.symbol,
+            'side': self.side,
+            'type': self.type,
+            'size': f'{self.size:.8f}',
+            'stp': 'dc',
+            'post_only': False,
+            'created_at': iso8601_from_epoch(self.created_at),
+            'fill_fees': f'{self.fees:.16f}',
+            'filled_size': f'{self.size if self.status == "done" else 0:.8f}',
+            'executed_value': f'{self.executed_value:.16f}',
+            'status': self.status,
+            'settled': self.status == 'done'
+        }
+        if self.type == 'limit':
+            response['price'] = f'{self.price:.8f}'
+            response['time_in_force'] = 'GTC'
+        if self.done_at is not None:
+            response['done_at'] = iso8601_from_epoch(self.done_at)
+            response['done_reason'] = 'filled' if self.status == 'done' else 'canceled'
+        return response
+
+    def binance(self, query: bool = False) -> dict:
+        """
+        Args:
+            query: Format as a queried order, which has its times under different keys than a new order
+        """
+        filled = self.status == 'done'
+        status = {'open': 'NEW', 'done': 'FILLED', 'canceled': 'CANCELED'}[self.status]
+        response = {
+            'symbol': to_exchange_symbol(self.symbol, 'binance'),
+            'orderId': self.number,
+            'orderListId': -1,
+            'clientOrderId': self.id,
+            'transactTime': int(self.created_at * 1000),
+            'price': f'{self.price or 0:.8f}',
+            'origQty': f'{self.size:.8f}',
+            'executedQty': f'{self.size if filled else 0:.8f}',
+            'cummulativeQuoteQty': f'{self.executed_value:.8f}',
+            'status': status,
+            'timeInForce': 'GTC',
+            'type': self.type.upper(),
+            'side': self.side.upper()
+        }
+        if query:
+            response['time'] = response.pop('transactTime')
+            response['updateTime'] = int((self.done_at or self.created_at) * 1000)
+        elif filled:
+            response['fills'] = [{
+                'price': f'{self.executed_value / self.size:.8f}',
+                'qty': f'{self.size:.8f}',
+                'commission': f'{self.fees:.8f}',
+                'commissionAsset': self.symbol.split('-')[1],
+                'tradeId': self.number
+            }]
+        return response
+
+
+class _Connection:
+    def __init__(self, exchange: str, sock: socket.socket, writer, queue_size: int, on_sent: callable):
+        """
+        One websocket client. Market data is queued and written by its own thread so that a slow client drops
+        messages instead of slowing down the feed for everybody else.
+        """
+        self.exchange = exchange
+        self.channels = set()
+        self.__socket = sock
+        self.__writer = writer
+        self.__lock = threading.Lock()
+        self.__queue = queue.Queue(queue_size)
+        self.__on_sent = on_sent
+        self.closed = False
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def enqueue(self, frame: bytes) -> bool:
+        """
+        Queue a frame to send, returns False if the client is too far behind and the frame was dropped
+        """
+        try:
+            self.__queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            return False
+
+    def write(self, frame: bytes):
+        with self.__lock:
+            self.__writer.write(frame)
+
+    def __run(self):
+        while True:
+            frame = self.__queue.get()
+            if frame is None:
+                return
+            try:
+                self.write(frame)
+            except OSError:
+                self.close()
+                return
+            self.__on_sent()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.__queue.put_nowait(None)
+        except queue.Full:
+            pass
+        try:
+            self.__socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.__dispatch('GET')
+
+    def do_POST(self):
+        self.__dispatch('POST')
+
+    def do_DELETE(self):
+        self.__dispatch('DELETE')
+
+    def log_message(self, format, *args):
+        pass
+
+    def __dispatch(self, method: str):
+        exchange = self.server.exchange
+        split = urlsplit(self.path)
+        path = [part for part in split.path.split('/') if part]
+        params = dict(parse_qsl(split.query))
+
+        if self.headers.get('Upgrade', '').lower() == 'websocket':
+            self.__upgrade(path)
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, response = exchange.handle_rest(method, path, params, body)
+
+        data = json.dumps(response).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def __upgrade(self, path: list):
+        if not path or path[0] not in SUPPORTED_EXCHANGES:
+            self.send_error(404)
+            return
+
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept_key(self.headers['Sec-WebSocket-Key']))
+        self.end_headers()
+        self.close_connection = True
+
+        # Binance can also name the stream in the path such as /ws/btcusdt@aggTrade
+        streams = path[2:] if path[0] == 'binance' else []
+        self.server.exchange.serve_websocket(path[0], self.connection, self.rfile, self.wfile, streams)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, exchange: 'SimulatedExchange'):
+        self.exchange = exchange
+        super().__init__(address, _RequestHandler)
+
+
+class SimulatedExchange:
+    def __init__(self, symbols: typing.Sequence[str] = ('BTC-USD', 'BTC-USDT'), host: str = '127.0.0.1',
+                 port: int = 0, message_rate: float = 10, rest_latency: float = 0.0, order_latency: float = 0.0,
+                 feeds: typing.Sequence[MarketFeed] = None, balances: dict = None, fee_rate: float = 0.0,
+                 queue_size: int = 10000, seed: int = None):
+        """
+        A local exchange process for load testing the live path. It serves the Coinbase Pro & Binance REST calls that
+        the interfaces use and their ticker & orderbook websockets, publishing a trade for every symbol at the
+        message rate. Market orders fill immediately at the last trade and limit orders fill when the feed crosses
+        them.
+
+        Args:
+            symbols: Blankly symbols to list, each gets a random walk unless a feed is given for it
+            host: Interface to listen on
+            port: Port to listen on, 0 picks a free port
+            message_rate: Trades published per symbol per second, 0 publishes nothing
+            rest_latency: Seconds added to every REST response
+            order_latency: Seconds added to order placement & cancellation acks on top of the rest latency
+            feeds: MarketFeed objects to use instead of the default random walks
+            balances: Starting available balance by asset, quote assets default to a large balance
+            fee_rate: Fee charged on the quote side of every fill
+            queue_size: Messages that can be waiting for a websocket client before new ones are dropped
+            seed: Seed for the default random walks
+        """
+        self.host = host
+        self.port = port
+        self.message_rate = message_rate
+        self.rest_latency = rest_latency
+        self.order_latency = order_latency
+        self.fee_rate = fee_rate
+        self.queue_size = queue_size
+
+        self.feeds = {}
+        for symbol in symbols:
+            self.feeds[symbol] = MarketFeed(symbol, seed=seed)
+        for feed in (feeds or []):
+            self.feeds[feed.symbol] = feed
+        self.__binance_symbols = {to_exchange_symbol(symbol, 'binance'): symbol for symbol in self.feeds}
+
+        self.__balances = collections.defaultdict(lambda: [0.0, 0.0])
+        for symbol in self.feeds:
+            self.__balances[symbol.split('-')[1]][0] = DEFAULT_BALANCE
+        for asset, balance in (balances or {}).items():
+            self.__balances[asset][0] = float(balance)
+
+        self.__lock = threading.RLock()
+        self.__orders = {}
+        self.__order_numbers = {}
+        self.__open_orders = {symbol: {} for symbol in self.feeds}
+        self.__sequence = 0
+        # (exchange, stream, symbol) -> connections subscribed to it
+        self.__subscribers = collections.defaultdict(set)
+        self.__connections = set()
+        self.counters = collections.Counter()
+
+        self.__server = None
+        self.__threads = []
+        self.__stopped = threading.Event()
+        self.__started_at = None
+
+    """
+    Lifecycle
+    """
+
+    def start(self) -> 'SimulatedExchange':
+        self.__server = _Server((self.host, self.port), self)
+        self.port = self.__server.server_address[1]
+        self.__stopped.clear()
+        self.__started_at = time.time()
+        self.__threads = [threading.Thread(target=self.__server.serve_forever, daemon=True)]
+        if self.message_rate:
+            self.__threads.append(threading.Thread(target=self.__publish, daemon=True))
+        for thread in self.__threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self.__stopped.set()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+        with self.__lock:
+            connections = list(self.__connections)
+        for connection in connections:
+            connection.close()
+        for thread in self.__threads:
+            thread.join()
+        self.__server = None
+
+    def __enter__(self) -> 'SimulatedExchange':
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def rest_url(self, exchange: str) -> str:
+        return rest_url(self.url, exchange)
+
+    def websocket_url(self, exchange: str) -> str:
+        return websocket_url(self.url, exchange)
+
+    def stats(self) -> dict:
+        """
+        Counters of everything the server did, also served as JSON on /stats
+        """
+        with self.__lock:
+            stats = dict(self.counters)
+            stats['open_connections'] = len(self.__connections)
+            stats['open_orders'] = sum(len(orders) for orders in self.__open_orders.values())
+        stats['uptime'] = time.time() - self.__started_at if self.__started_at else 0
+        return stats
+
+    def __count(self, key: str, amount: int = 1):
+        with self.__lock:
+            self.counters[key] += amount
+
+    """
+    Market data
+    """
+
+    def __publish(self):
+        interval = 1 / self.message_rate
+        next_time = time.perf_counter()
+        while not self.__stopped.wait(max(next_time - time.perf_counter(), 0)):
+            now = time.perf_counter()
+            # Don't try to catch up on more than a second of messages after a stall
+            if now - next_time > 1:
+                next_time = now
+            next_time += interval
+            self.tick()
+
+    def tick(self):
+        """
+        Publish one trade for every symbol
+        """
+        for symbol, feed in self.feeds.items():
+            with self.__lock:
+                price, size = feed.next()
+                self.__fill_limits(symbol, price)
+                self.__sequence += 1
+                channels = [(channel, list(connections)) for channel, connections in self.__subscribers.items()
+                            if channel[2] == symbol and connections]
+            self.__count('trades')
+
+            now = time.time()
+            for (exchange, stream, _), connections in channels:
+                frame = encode_frame(json.dumps(self.__market_message(exchange, stream, feed, size, now)))
+                for connection in connections:
+                    if not connection.enqueue(frame):
+                        self.__count('messages_dropped')
+
+    def __market_message(self, exchange: str, stream: str, feed: MarketFeed, size: float, now: float) -> dict:
+        price = feed.price
+        step = feed.tick_size
+        if exchange == 'coinbase_pro':
+            if stream == 'level2':
+                return {
+                    'type': 'l2update',
+                    'product_id': feed.symbol,
+                    'changes': [['buy', f'{price - step:.2f}', f'{size:.8f}'],
+                                ['sell', f'{price + step:.2f}', f'{size:.8f}']],
+                    'time': iso8601_from_epoch(now)
+                }
+            return {
+                'type': 'ticker',
+                'sequence': self.__sequence,
+                'product_id': feed.symbol,
+                'price': f'{price:.2f}',
+                'open_24h': f'{price:.2f}',
+                'volume_24h': '0',
+                'low_24h': f'{price:.2f}',
+                'high_24h': f'{price:.2f}',
+                'volume_30d': '0',
+                'best_bid': f'{price - step:.2f}',
+                'best_ask': f'{price + step:.2f}',
+                'side': 'buy',
+                'time': iso8601_from_epoch(now),
+                'trade_id': feed.trade_id,
+                'last_size': f'{size:.8f}'
+            }
+
+        milliseconds = int(now * 1000)
+        symbol = to_exchange_symbol(feed.symbol, 'binance')
+        if stream == 'depth':
+            return {
+                'e': 'depthUpdate',
+                'E': milliseconds,
+                's': symbol,
+                'U': self.__sequence,
+                'u': self.__sequence,
+                'b': [[f'{price - step:.2f}', f'{size:.8f}']],
+                'a': [[f'{price + step:.2f}', f'{size:.8f}']]
+            }
+        return {
+            'e': 'aggTrade',
+            'E': milliseconds,
+            's': symbol,
+            'a': feed.trade_id,
+            'p': f'{price:.2f}',
+            'q': f'{size:.8f}',
+            'f': feed.trade_id,
+            'l': feed.trade_id,
+            'T': milliseconds,
+            'm': False,
+            'M': True
+        }
+
+    """
+    Websockets
+    """
+
+    def serve_websocket(self, exchange: str, sock: socket.socket, reader, writer, streams: list):
+        """
+        Run a websocket client until it disconnects, called from the request thread after the handshake
+        """
+        connection = _Connection(exchange, sock, writer, self.queue_size, lambda: self.__count('messages_sent'))
+        with self.__lock:
+            self.__connections.add(connection)
+        self.__count('websocket_connections')
+
+        try:
+            if streams:
+                self.__subscribe_binance(connection, streams, None)
+            while not connection.closed:
+                opcode, payload = read_message(reader)
+                if opcode == OP_CLOSE:
+                    connection.write(encode_frame(payload[:2], OP_CLOSE))
+                    break
+                elif opcode == OP_PING:
+                    connection.write(encode_frame(payload, OP_PONG))
+                elif opcode == OP_TEXT:
+                    self.__client_message(connection, json.loads(payload))
+        except (EOFError, OSError, ValueError):
+            pass
+        finally:
+            with self.__lock:
+                for channel in connection.channels:
+                    self.__subscribers[channel].discard(connection)
+                self.__connections.discard(connection)
+            connection.close()
+
+    def __client_message(self, connection: _Connection, message: dict):
+        if connection.exchange == 'coinbase_pro':
+            self.__subscribe_coinbase_pro(connection, message)
+        elif message.get('method') in ('SUBSCRIBE', 'UNSUBSCRIBE'):
+            self.__subscribe_binance(connection, message.get('params', []), message.get('id'),
+                                     message['method'] == 'UNSUBSCRIBE')
+
+    def __subscribe_coinbase_pro(self, connection: _Connection, message: dict):
+        if message.get('type') not in ('subscribe', 'unsubscribe'):
+            connection.enqueue(encode_frame(json.dumps({'type': 'error', 'message': 'Failed to subscribe'})))
+            return
+
+        channels = []
+        for channel in message.get('channels', []):
+            if isinstance(channel, dict):
+                channels += [(channel['name'], symbol) for symbol in channel.get('product_ids', [])]
+            else:
+                channels += [(channel, symbol) for symbol in message.get('product_ids', [])]
+
+        with self.__lock:
+            for stream, symbol in channels:
+                if symbol not in self.feeds:
+                    continue
+                key = ('coinbase_pro', stream, symbol)
+                if message['type'] == 'unsubscribe':
+                    self.__subscribers[key].discard(connection)
+                    connection.channels.discard(key)
+                    continue
+
+                # The snapshot is queued before the subscription is live so no update can arrive ahead of it
+                if stream == 'level2':
+                    bids, asks = self.feeds[symbol].book()
+                    connection.enqueue(encode_frame(json.dumps({
+                        'type': 'snapshot',
+                        'product_id': symbol,
+                        'bids': [[f'{price:.2f}', f'{size:.8f}'] for price, size in bids],
+                        'asks': [[f'{price:.2f}', f'{size:.8f}'] for price, size in asks]
+                    })))
+                self.__subscribers[key].add(connection)
+                connection.channels.add(key)
+                self.counters['subscriptions'] += 1
+
+            subscribed = collections.defaultdict(list)
+            for _, stream, symbol in sorted(connection.channels):
+                subscribed[stream].append(symbol)
+        connection.enqueue(encode_frame(json.dumps({
+            'type': 'subscriptions',
+            'channels': [{'name': name, 'product_ids': symbols} for name, symbols in subscribed.items()]
+        })))
+
+    def __subscribe_binance(self, connection: _Connection, params: list, request_id, unsubscribe: bool = False):
+        keys = []
+        for param in params:
+            symbol, _, stream = param.partition('@')
+            symbol = self.__binance_symbols.get(symbol.upper())
+            if symbol is None or stream not in ('aggTrade', 'depth'):
+                if request_id is not None:
+                    connection.enqueue(encode_frame(json.dumps({
+                        'error': {'code': 2, 'msg': f'Invalid request: unknown stream {param}'},
+                        'id': request_id
+                    })))
+                return
+            keys.append(('binance', stream, symbol))
+
+        with self.__lock:
+            for key in keys:
+                if unsubscribe:
+                    self.__subscribers[key].discard(connection)
+                    connection.channels.discard(key)
+                else:
+                    self.__subscribers[key].add(connection)
+                    connection.channels.add(key)
+                    self.counters['subscriptions'] += 1
+        if request_id is not None:
+            connection.enqueue(encode_frame(json.dumps({'result': None, 'id': request_id})))
+
+    """
+    Orders & accounts
+    """
+
+    def place_order(self, symbol: str, side: str, type_: str, size: float = None, price: float = None,
+                    funds: float = None) -> typing.Tuple[typing.Optional[_Order], typing.Optional[str]]:
+        """
+        Place an order on the simulated book
+
+        Returns:
+            (order, None) when accepted or (None, reason) when rejected
+        """
+        feed = self.feeds.get(symbol)
+        if feed is None:
+            return None, 'Product not found'
+        if side not in ('buy', 'sell') or type_ not in ('market', 'limit'):
+            return None, 'Invalid order'
+        if type_ == 'limit' and (price is None or price <= 0):
+            return None, 'Invalid price'
+
+        base, quote = symbol.split('-')
+        with self.__lock:
+            if size is None and funds is not None:
+                size = round(funds / feed.price, 8)
+            if size is None or size <= 0:
+                return None, 'size is too small'
+
+            fill_price = feed.price if type_ == 'market' else price
+            value = fill_price * size
+            if side == 'buy':
+                required, asset = value * (1 + self.fee_rate), quote
+            else:
+                required, asset = size, base
+            balance = self.__balances[asset]
+            if balance[0] < required:
+                self.counters['orders_rejected'] += 1
+                return None, 'Insufficient funds'
+
+            balance[0] -= required
+            self.__sequence += 1
+            order = _Order(self.__sequence, symbol, side, type_, size, price)
+            self.__orders[order.id] = order
+            self.__order_numbers[order.number] = order
+            self.counters['orders_placed'] += 1
+            if type_ == 'market':
+                # Market orders are settled straight from the available balance
+                balance[1] += required
+                self.__settle(order, fill_price)
+            else:
+                balance[1] += required
+                self.__open_orders[symbol][order.id] = order
+            return order, None
+
+    def cancel_order(self, order_id) -> typing.Optional[_Order]:
+        with self.__lock:
+            order = self.find_order(order_id)
+            if order is None or order.status != 'open':
+                return None
+            del self.__open_orders[order.symbol][order.id]
+            base, quote = order.symbol.split('-')
+            if order.side == 'buy':
+                held, asset = order.price * order.size * (1 + self.fee_rate), quote
+            else:
+                held, asset = order.size, base
+            self.__balances[asset][1] -= held
+            self.__balances[asset][0] += held
+            order.status = 'canceled'
+            order.done_at = time.time()
+            self.counters['orders_canceled'] += 1
+            return order
+
+    def find_order(self, order_id) -> typing.Optional[_Order]:
+        with self.__lock:
+            order = self.__orders.get(order_id)
+            if order is None:
+                try:
+                    order = self.__order_numbers.get(int(order_id))
+                except (TypeError, ValueError):
+                    pass
+            return order
+
+    def open_orders(self, symbol: str = None) -> typing.List[_Order]:
+        with self.__lock:
+            if symbol is not None:
+                return list(self.__open_orders.get(symbol, {}).values())
+            return [order for orders in self.__open_orders.values() for order in orders.values()]
+
+    def balances(self) -> typing.Dict[str, typing.Tuple[float, float]]:
+        """
+        Available & held balance of every asset
+        """
+        with self.__lock:
+            return {asset: (balance[0], balance[1]) for asset, balance in self.__balances.items()}
+
+    def __fill_limits(self, symbol: str, price: float):
+        orders = self.__open_orders.get(symbol)
+        if not orders:
+            return
+        filled = [order for order in orders.values()
+                  if (order.side == 'buy' and price <= order.price) or (order.side == 'sell' and price >= order.price)]
+        for order in filled:
+            del orders[order.id]
+            self.__settle(order, order.price)
+
+    def __settle(self, order: _Order, price: float):
+        # The order's funds are in the held balance when this is called
+        base, quote = order.symbol.split('-')
+        value = price * order.size
+        fees = value * self.fee_rate
+        if order.side == 'buy':
+            self.__balances[quote][1] -= value + fees
+            self.__balances[base][0] += order.size
+        else:
+            self.__balances[base][1] -= order.size
+            self.__balances[quote][0] += value - fees
+        order.status = 'done'
+        order.executed_value = value
+        order.fees = fees
+        order.done_at = time.time()
+        self.counters['orders_filled'] += 1
+
+    """
+    REST
+    """
+
+    def handle_rest(self, method: str, path: list, params: dict, body: bytes) -> typing.Tuple[int, typing.Any]:
+        """
+        Answer one REST request
+
+        Returns:
+            (HTTP status, JSON body)
+        """
+        self.__count('rest_requests')
+        if self.rest_latency:
+            time.sleep(self.rest_latency)
+
+        if path == ['stats']:
+            return 200, self.stats()
+        if not path or path[0] not in SUPPORTED_EXCHANGES:
+            return 404, {'message': 'NotFound'}
+
+        if path[0] == 'coinbase_pro':
+            payload = json.loads(body) if body else {}
+            return self.__coinbase_pro(method, path[1:], params, payload)
+
+        # Binance puts parameters in the body of posts, drop the version from /api/v3/...
+        params.update(parse_qsl(body.decode('utf-8')))
+        return self.__binance(method, path[3:], params)
+
+    def __order_ack(self):
+        if self.order_latency:
+            time.sleep(self.order_latency)
+
+    def __coinbase_pro(self, method: str, path: list, params: dict, payload: dict) -> typing.Tuple[int, typing.Any]:
+        if path == ['products']:
+            return 200, [self.__coinbase_pro_product(symbol) for symbol in self.feeds]
+        if path == ['time']:
+            now = time.time()
+            return 200, {'iso': iso8601_from_epoch(now), 'epoch': now}
+        if path == ['fees']:
+            return 200, {'maker_fee_rate': f'{self.fee_rate:.4f}', 'taker_fee_rate': f'{self.fee_rate:.4f}',
+                         'usd_volume': '0'}
+        if path == ['accounts']:
+            return 200, [{
+                'id': asset,
+                'currency': asset,
+                'balance': f'{available + hold:.16f}',
+                'available': f'{available:.16f}',
+                'hold': f'{hold:.16f}',
+                'profile_id': 'simulated'
+            } for asset, (available, hold) in self.balances().items()]
+
+        if len(path) >= 2 and path[0] == 'products':
+            feed = self.feeds.get(path[1])
+            if feed is None:
+                return 404, {'message': 'NotFound'}
+            if len(path) == 2:
+                return 200, self.__coinbase_pro_product(feed.symbol)
+            if path[2] == 'ticker':
+                return 200, {'trade_id': feed.trade_id, 'price': f'{feed.price:.2f}', 'size': '0',
+                             'time': iso8601_from_epoch(time.time()), 'bid': f'{feed.price - feed.tick_size:.2f}',
+                             'ask': f'{feed.price + feed.tick_size:.2f}', 'volume': '0'}
+            if path[2] == 'book':
+                bids, asks = feed.book()
+                return 200, {'sequence': self.__sequence,
+                             'bids': [[f'{price:.2f}', f'{size:.8f}', 1] for price, size in bids],
+                             'asks': [[f'{price:.2f}', f'{size:.8f}', 1] for price, size in asks]}
+            if path[2] == 'candles':
+                granularity = int(params.get('granularity', 60))
+                stop = epoch_from_iso8601(params['end']) if 'end' in params else time.time()
+                start = epoch_from_iso8601(params['start']) if 'start' in params else stop - granularity * 300
+                candles = feed.candles(start, stop, granularity)
+                # Coinbase sends [time, low, high, open, close, volume] newest first
+                return 200, [[t, low, high, open_, close, volume]
+                             for t, open_, high, low, close, volume in reversed(candles)]
+
+        if path and path[0] == 'orders':
+            if method == 'POST' and len(path) == 1:
+                self.__order_ack()
+                size = payload.get('size')
+                price = payload.get('price')
+                funds = payload.get('funds')
+                order, error = self.place_order(payload.get('product_id'), payload.get('side'),
+                                                payload.get('type', 'limit'),
+                                                float(size) if size is not None else None,
+                                                float(price) if price is not None else None,
+                                                float(funds) if funds is not None else None)
+                if error is not None:
+                    return 400, {'message': error}
+                return 200, order.coinbase_pro()
+            if method == 'GET' and len(path) == 1:
+                return 200, [order.coinbase_pro() for order in self.open_orders(params.get('product_id'))]
+            if len(path) == 2:
+                if method == 'DELETE':
+                    self.__order_ack()
+                    order = self.cancel_order(path[1])
+                    if order is None:
+                        return 404, {'message': 'order not found'}
+                    return 200, order.id
+                order = self.find_order(path[1])
+                if order is None:
+                    return 404, {'message': 'NotFound'}
+                return 200, order.coinbase_pro()
+
+        return 404, {'message': 'NotFound'}
+
+    @staticmethod
+    def __coinbase_pro_product(symbol: str) -> dict:
+        base, quote = symbol.split('-')
+        return {
+            'id': symbol,
+            'display_name': f'{base}/{quote}',
+            'base_currency': base,
+            'quote_currency': quote,
+            'base_increment': '0.00000001',
+            'quote_increment': '0.01',
+            'base_min_size': '0.00000001',
+            'base_max_size': '1000000',
+            'min_market_funds': '1',
+            'max_market_funds': '1000000000',
+            'margin_enabled': False,
+            'post_only': False,
+            'limit_only': False,
+            'cancel_only': False,
+            'trading_disabled': False,
+            'status': 'online',
+            'status_message': ''
+        }
+
+    def __binance(self, method: str, path: list, params: dict) -> typing.Tuple[int, typing.Any]:
+        endpoint = '/'.join(path)
+        symbol = self.__binance_symbols.get(params.get('symbol', ''))
+
+        if endpoint == 'ping':
+            return 200, {}
+        if endpoint == 'time':
+            return 200, {'serverTime': int(time.time() * 1000)}
+        if endpoint == 'exchangeInfo':
+            return 200, {'timezone': 'UTC', 'serverTime': int(time.time() * 1000),
+                         'symbols': [self.__binance_product(symbol_) for symbol_ in self.feeds]}
+        if endpoint == 'account':
+            return 200, {'canTrade': True, 'canWithdraw': True, 'canDeposit': True, 'accountType': 'SPOT',
+                         'balances': [{'asset': asset, 'free': f'{available:.8f}', 'locked': f'{hold:.8f}'}
+                                      for asset, (available, hold) in self.balances().items()]}
+        if endpoint == 'ticker/price' and 'symbol' not in params:
+            return 200, [{'symbol': to_exchange_symbol(feed.symbol, 'binance'), 'price': f'{feed.price:.8f}'}
+                         for feed in self.feeds.values()]
+        if endpoint == 'openOrders':
+            return 200, [order.binance(query=True) for order in self.open_orders(symbol)]
+
+        if endpoint in ('ticker/price', 'avgPrice', 'depth', 'klines') or (endpoint == 'order' and method == 'POST'):
+            if symbol is None:
+                return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+            feed = self.feeds[symbol]
+            if endpoint == 'ticker/price':
+                return 200, {'symbol': params['symbol'], 'price': f'{feed.price:.8f}'}
+            if endpoint == 'avgPrice':
+                return 200, {'mins': 5, 'price': f'{feed.price:.8f}'}
+            if endpoint == 'depth':
+                bids, asks = feed.book(int(params.get('limit', 10)))
+                return 200, {'lastUpdateId': self.__sequence,
+                             'bids': [[f'{price:.8f}', f'{size:.8f}'] for price, size in bids],
+                             'asks': [[f'{price:.8f}', f'{size:.8f}'] for price, size in asks]}
+            if endpoint == 'klines':
+                granularity = _BINANCE_INTERVALS.get(params.get('interval'), 60)
+                stop = int(params['endTime']) / 1000 if 'endTime' in params else time.time()
+                start = int(params['startTime']) / 1000 if 'startTime' in params else stop - granularity * 500
+                candles = feed.candles(start, stop, granularity)[:int(params.get('limit', 500))]
+                return 200, [[t * 1000, f'{open_:.8f}', f'{high:.8f}', f'{low:.8f}', f'{close:.8f}',
+                              f'{volume:.8f}', (t + granularity) * 1000 - 1, f'{volume * close:.8f}', 1, '0', '0', '0']
+                             for t, open_, high, low, close, volume in candles]
+
+            self.__order_ack()
+            price = params.get('price')
+            quantity = params.get('quantity')
+            quote_quantity = params.get('quoteOrderQty')
+            order, error = self.place_order(symbol, params.get('side', '').lower(), params.get('type', '').lower(),
+                                            float(quantity) if quantity is not None else None,
+                                            float(price) if price is not None else None,
+                                            float(quote_quantity) if quote_quantity is not None else None)
+            if error is not None:
+                return 400, {'code': -2010, 'msg': error}
+            return 200, order.binance()
+
+        if endpoint == 'order':
+            if method == 'DELETE':
+                self.__order_ack()
+                order = self.cancel_order(params.get('orderId'))
+            else:
+                order = self.find_order(params.get('orderId'))
+            if order is None:
+                return 400, {'code': -2011 if method == 'DELETE' else -2013, 'msg': 'Unknown order sent.'}
+            return 200, order.binance(query=method == 'GET')
+
+        return 404, {'code': -1000, 'msg': f'Unknown endpoint {endpoint}'}
+
+    @staticmethod
+    def __binance_product(symbol: str) -> dict:
+        base, quote = symbol.split('-')
+        return {
+            'symbol': to_exchange_symbol(symbol, 'binance'),
+            'status': 'TRADING',
+            'baseAsset': base,
+            'baseAssetPrecision': 8,
+            'quoteAsset': quote,
+            'quotePrecision': 8,
+            'quoteAssetPrecision': 8,
+            'baseCommissionPrecision': 8,
+            'quoteCommissionPrecision': 8,
+            'orderTypes': ['LIMIT', 'LIMIT_MAKER', 'MARKET'],
+            'icebergAllowed': True,
+            'ocoAllowed': False,
+            'quoteOrderQtyMarketAllowed': True,
+            'isSpotTradingAllowed': True,
+            'isMarginTradingAllowed': False,
+            # In the order that the international exchange sends them
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'minPrice': '0.01000000', 'maxPrice': '1000000.00000000',
+                 'tickSize': '0.01000000'},
+                {'filterType': 'LOT_SIZE', 'minQty': '0.00000001', 'maxQty': '9000.00000000',
+                 'stepSize': '0.00000001'},
+                {'filterType': 'ICEBERG_PARTS', 'limit': 10},
+                {'filterType': 'MARKET_LOT_SIZE', 'minQty': '0.00000000', 'maxQty': '9000.00000000',
+                 'stepSize': '0.00000000'},
+                {'filterType': 'TRAILING_DELTA', 'minTrailingAboveDelta': 10, 'maxTrailingAboveDelta': 2000,
+                 'minTrailingBelowDelta': 10, 'maxTrailingBelowDelta': 2000},
+                {'filterType': 'PERCENT_PRICE_BY_SIDE', 'bidMultiplierUp': '5', 'bidMultiplierDown': '0.2',
+                 'askMultiplierUp': '5', 'askMultiplierDown': '0.2', 'avgPriceMins': 5},
+                {'filterType': 'NOTIONAL', 'minNotional': '1.00000000', 'applyMinToMarket': True,
+                 'maxNotional': '9000000.00000000', 'applyMaxToMarket': False, 'avgPriceMins': 5},
+                {'filterType': 'MAX_NUM_ORDERS', 'maxNumOrders': 200},
+                {'filterType': 'MAX_NUM_ALGO_ORDERS', 'maxNumAlgoOrders': 5}
+            ]
+        }
+
@@ -0,0 +1,114 @@
+"""
+    Minimal RFC 6455 framing for the simulated exchange server
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import base64
+import hashlib
+import struct
+import typing
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def accept_key(key: str) -> str:
+    """
+    The Sec-WebSocket-Accept value for the key a client sent in its handshake
+    """
+    return base64.b64encode(hashlib.sha1(key.encode('ascii') + _GUID).digest()).decode('ascii')
+
+
+def encode_frame(payload: [str, bytes], opcode: int = OP_TEXT) -> bytes:
+    """
+    Build a single unmasked frame, which is how a server always sends
+
+    Args:
+        payload: Text or bytes to send
+        opcode: The frame opcode, text by default
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _read_exact(file, count: int) -> bytes:
+    data = file.read(count)
+    if len(data) < count:
+        raise EOFError("Websocket closed while reading a frame")
+    return data
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    length = len(payload)
+    if length == 0:
+        return payload
+    repeated = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(length, 'big')
+
+
+def read_frame(file) -> typing.Tuple[bool, int, bytes]:
+    """
+    Read one frame from a buffered file
+
+    Returns:
+        (fin, opcode, payload) with the client mask already removed
+    """
+    first, second = _read_exact(file, 2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', _read_exact(file, 2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', _read_exact(file, 8))[0]
+    mask = _read_exact(file, 4) if second & 0x80 else None
+    payload = _read_exact(file, length)
+    if mask is not None:
+        payload = _unmask(payload, mask)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+def read_message(file) -> typing.Tuple[int, bytes]:
+    """
+    Read frames until a full message is assembled. Control frames can arrive between fragments and are returned as
+    soon as they are read.
+
+    Returns:
+        (opcode, payload) of the message
+    """
+    opcode = None
+    fragments = []
+    while True:
+        fin, frame_opcode, payload = read_frame(file)
+        if frame_opcode >= OP_CLOSE:
+            return frame_opcode, payload
+        if frame_opcode != OP_CONTINUATION:
+            opcode = frame_opcode
+        fragments.append(payload)
+        if fin:
+            return opcode, b''.join(fragments)
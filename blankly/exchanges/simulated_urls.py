@@ -0,0 +1,100 @@
+"""
+    Addresses of the simulated exchange, kept apart from the server so live exchanges can point at it cheaply
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import warnings
+
+SUPPORTED_EXCHANGES = ('coinbase_pro', 'binance')
+# Exchanges whose orderbook feed the simulated exchange serves
+SUPPORTED_ORDERBOOKS = ('coinbase_pro',)
+
+
+def rest_url(url: str, exchange: str) -> str:
+    """
+    The REST base url of an exchange on a simulated server, in the form that exchange's API class expects
+
+    Args:
+        url: Address of the server such as http://127.0.0.1:8765
+        exchange: coinbase_pro or binance
+    """
+    url = url.rstrip('/')
+    if exchange == 'coinbase_pro':
+        return f'{url}/coinbase_pro/'
+    elif exchange == 'binance':
+        return f'{url}/binance/api'
+    raise ValueError(f"The simulated exchange does not support {exchange}")
+
+
+def websocket_url(url: str, exchange: str) -> str:
+    """
+    The websocket feed url of an exchange on a simulated server
+
+    Args:
+        url: Address of the server such as http://127.0.0.1:8765
+        exchange: coinbase_pro or binance
+    """
+    url = 'ws' + url.rstrip('/')[len('http'):]
+    if exchange == 'coinbase_pro':
+        return f'{url}/coinbase_pro'
+    elif exchange == 'binance':
+        return f'{url}/binance/ws'
+    raise ValueError(f"The simulated exchange does not support {exchange}")
+
+
+def binance_client(url: str, api_key: str = 'simulated', api_secret: str = 'simulated', **kwargs):
+    """
+    Create a python-binance Client that sends every request to a simulated server
+
+    Args:
+        url: Address of the server such as http://127.0.0.1:8765
+        api_key: Any key, the server doesn't check signatures
+        api_secret: Any secret, the server doesn't check signatures
+        kwargs: Passed to the Client such as the tld
+    """
+    from binance.client import Client
+
+    # The url is a class attribute that the client formats with the tld, which leaves this one unchanged
+    client = type('SimulatedClient', (Client,), {'API_URL': rest_url(url, 'binance')})
+    return client(api_key=api_key, api_secret=api_secret, **kwargs)
+
+
+def check_simulated_exchange(simulated_url: str, exchange: str):
+    """
+    Refuse to create an exchange that would send orders to the real exchange while a simulated one is configured
+
+    Args:
+        simulated_url: The simulated_exchange_url setting
+        exchange: The exchange type being created
+    """
+    if simulated_url and exchange not in SUPPORTED_EXCHANGES:
+        raise ValueError(f"simulated_exchange_url is set but the simulated exchange does not support {exchange}. "
+                         f"Use one of {', '.join(SUPPORTED_EXCHANGES)} or clear the setting.")
+
+
+def warn_unsimulated_feed(simulated_url: str, exchange: str, feed: str, supported: tuple = SUPPORTED_EXCHANGES):
+    """
+    Warn that a market data feed is coming from the real exchange while a simulated one is configured
+
+    Args:
+        simulated_url: The simulated_exchange_url setting
+        exchange: The exchange the feed is on
+        feed: Name of the feed for the message, such as 'ticker' or 'orderbook'
+        supported: The exchanges the simulated exchange serves this feed for
+    """
+    if simulated_url and exchange not in supported:
+        warnings.warn(f"simulated_exchange_url is set but the simulated exchange does not serve the {exchange} {feed}, "
+                      f"connecting to the real exchange instead.")
@@ -169,6 +169,12 @@ class StrategyLogger(ABCExchangeInterface):
         """
         return self.interface.get_price(symbol)
 
+    def get_prices(self, symbols: list) -> dict:
+        """
+        No logging implemented
+        """
+        return self.interface.get_prices(symbols)
+
     """
     No logging implemented for these properties
     """
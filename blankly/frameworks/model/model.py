@@ -98,6 +98,12 @@ class Model(abc.ABC):
     def websocket_update(self, data):
         pass
 
+    def orderbook_update(self, symbol: str, book):
+        """
+        Override this to receive the orderbooks replayed during a backtest
+        """
+        pass
+
     @property
     def time(self):
         if not self.is_backtesting:
@@ -26,6 +26,7 @@ from blankly.exchanges.interfaces.abc_exchange_interface import ABCExchangeInter
 from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_api import API as CoinbaseProAPI
 from blankly.exchanges.managers.orderbook_manager import OrderbookManager
 from blankly.exchanges.managers.ticker_manager import TickerManager
+from blankly.frameworks.multiprocessing.shared_state import SharedState, RingBuffer
 from blankly.utils.utils import info_print
 
 
@@ -40,6 +41,8 @@ class BlanklyBot:
     interface: ABCExchangeInterface
     coinbase_pro_direct: CoinbaseProAPI
     binance_direct: Binance_API
+    # Bytes of shared memory reserved for the state dictionary
+    state_size: int = 65536
 
     def __init__(self):
         """
@@ -53,6 +56,7 @@ class BlanklyBot:
         self.user_preferences = {}
         self.symbol = ""
         self.direct_calls = None
+        self.queues = {}
         self.process = Process(target=self.setup_process)
 
     def setup(self, exchange_type, currency_pair, user_preferences, initial_state, interface):
@@ -65,9 +69,12 @@ class BlanklyBot:
             initial_state: Information about the account the model is defaulted to running on
             interface: Object for consistent trading on the supported exchanges
         """
-        # Shared variables with the processing a manager
+        # Shared variables with the process, in shared memory where it's available
         self.initial_state = initial_state
-        self.__state = Manager().dict({})
+        try:
+            self.__state = SharedState(self.state_size)
+        except ImportError:
+            self.__state = Manager().dict({})
         self.exchange_type = exchange_type
         self.user_preferences = user_preferences
         self.interface = copy.deepcopy(interface)
@@ -77,6 +84,17 @@ class BlanklyBot:
         self.coinbase_pro_direct = self.direct_calls
         self.binance_direct = self.direct_calls
 
+    def add_queue(self, name: str, capacity: int = 1048576) -> RingBuffer:
+        """
+        Create a shared memory queue for streaming ticks or signals between the bot process and the main process.
+        This must be called before the model is started. Only one process should put & only one should get.
+        Args:
+            name: Key for the queue in self.queues
+            capacity: Bytes available for queued messages
+        """
+        self.queues[name] = RingBuffer(capacity)
+        return self.queues[name]
+
     def is_running(self):
         """
         This function returns the status of the process. This ensures that two processes cannot be started on the same
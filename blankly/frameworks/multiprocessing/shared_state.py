@@ -0,0 +1,235 @@
+"""
+    Shared memory state & queues for multiprocessed bots
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing
+import os
+import pickle
+import queue
+import struct
+import time
+import weakref
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python 3.7
+    shared_memory = None
+
+# Sequence number & payload length
+_STATE_HEADER = struct.Struct('<QI')
+# Write position & read position, both count bytes forever and are wrapped on use
+_RING_HEADER = struct.Struct('<QQ')
+_RING_LENGTH = struct.Struct('<I')
+# Written when a record doesn't fit before the end of the buffer, the reader skips back to the start
+_RING_WRAP = 0xFFFFFFFF
+
+
+def _create_block(size: int):
+    if shared_memory is None:
+        raise ImportError("Shared memory state requires python 3.8 or newer.")
+    block = shared_memory.SharedMemory(create=True, size=size)
+    # Only the process that created the block removes it
+    weakref.finalize(block, _release_block, block, os.getpid())
+    return block
+
+
+def _release_block(block, creator_pid):
+    block.close()
+    if os.getpid() == creator_pid:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedState:
+    def __init__(self, size: int = 65536):
+        """
+        A dictionary stored in shared memory. Reads never take a lock, they use the sequence number to retry if a write
+        happened while copying (seqlock). Writes are serialized between processes with a lock.
+
+        Args:
+            size: Bytes reserved for the pickled dictionary
+        """
+        self.size = size
+        self.__block = _create_block(_STATE_HEADER.size + size)
+        self.__lock = multiprocessing.Lock()
+
+        # Cache of the last dictionary this process decoded & the sequence it came from
+        self.__cache_sequence = -1
+        self.__cache = {}
+
+        _STATE_HEADER.pack_into(self.__block.buf, 0, 0, 0)
+        self.__write({})
+
+    def __read(self) -> dict:
+        buffer = self.__block.buf
+        while True:
+            sequence, length = _STATE_HEADER.unpack_from(buffer, 0)
+            if sequence & 1:
+                # Mid write
+                continue
+            if sequence == self.__cache_sequence:
+                return self.__cache
+            payload = bytes(buffer[_STATE_HEADER.size:_STATE_HEADER.size + length])
+            if _STATE_HEADER.unpack_from(buffer, 0)[0] == sequence:
+                self.__cache = pickle.loads(payload)
+                self.__cache_sequence = sequence
+                return self.__cache
+
+    def __write(self, state: dict):
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.size:
+            raise ValueError(f"State is {len(payload)} bytes which is larger than the {self.size} bytes reserved. "
+                             f"Increase the state size of the bot.")
+        buffer = self.__block.buf
+        sequence = _STATE_HEADER.unpack_from(buffer, 0)[0]
+        # Odd while the payload is being written
+        _STATE_HEADER.pack_into(buffer, 0, sequence + 1, len(payload))
+        buffer[_STATE_HEADER.size:_STATE_HEADER.size + len(payload)] = payload
+        _STATE_HEADER.pack_into(buffer, 0, sequence + 2, len(payload))
+
+        self.__cache = state
+        self.__cache_sequence = sequence + 2
+
+    def copy(self) -> dict:
+        """
+        A consistent copy of the whole dictionary
+        """
+        return dict(self.__read())
+
+    def get(self, key, default=None):
+        return self.__read().get(key, default)
+
+    def __getitem__(self, key):
+        return self.__read()[key]
+
+    def __setitem__(self, key, value):
+        with self.__lock:
+            state = dict(self.__read())
+            state[key] = value
+            self.__write(state)
+
+    def pop(self, key):
+        with self.__lock:
+            state = dict(self.__read())
+            value = state.pop(key)
+            self.__write(state)
+            return value
+
+    def __contains__(self, key):
+        return key in self.__read()
+
+
+class RingBuffer:
+    def __init__(self, capacity: int = 1048576):
+        """
+        A single producer, single consumer queue in shared memory for streaming ticks or signals between a bot process
+        and its parent. Neither side takes a lock.
+
+        Args:
+            capacity: Bytes available for queued messages
+        """
+        self.capacity = capacity
+        self.__block = _create_block(_RING_HEADER.size + capacity)
+        _RING_HEADER.pack_into(self.__block.buf, 0, 0, 0)
+        self.dropped = 0
+
+    def __positions(self):
+        return _RING_HEADER.unpack_from(self.__block.buf, 0)
+
+    def put(self, message) -> bool:
+        """
+        Push a message without blocking
+
+        Returns:
+            False if the message was dropped because the consumer has fallen behind
+        """
+        payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        needed = _RING_LENGTH.size + len(payload)
+        if needed > self.capacity:
+            raise ValueError(f"Message of {len(payload)} bytes can't fit in a {self.capacity} byte buffer.")
+
+        head, tail = self.__positions()
+        offset = head % self.capacity
+        remaining = self.capacity - offset
+        # Records are kept contiguous, skip the tail end of the buffer if this one doesn't fit
+        skip = remaining if remaining < needed else 0
+        if head + skip + needed - tail > self.capacity:
+            self.dropped += 1
+            return False
+
+        buffer = self.__block.buf
+        base = _RING_HEADER.size
+        if skip:
+            if remaining >= _RING_LENGTH.size:
+                _RING_LENGTH.pack_into(buffer, base + offset, _RING_WRAP)
+            offset = 0
+        _RING_LENGTH.pack_into(buffer, base + offset, len(payload))
+        buffer[base + offset + _RING_LENGTH.size:base + offset + needed] = payload
+        # Publish only after the record is complete
+        struct.pack_into('<Q', buffer, 0, head + skip + needed)
+        return True
+
+    def get(self, block: bool = True, timeout: float = None):
+        """
+        Pop the oldest message
+
+        Args:
+            block: Wait for a message if the queue is empty
+            timeout: Maximum seconds to wait when blocking
+
+        Raises:
+            queue.Empty if nothing arrived
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            head, tail = self.__positions()
+            if head != tail:
+                break
+            if not block or (deadline is not None and time.time() > deadline):
+                raise queue.Empty
+            time.sleep(.0001)
+
+        buffer = self.__block.buf
+        base = _RING_HEADER.size
+        offset = tail % self.capacity
+        remaining = self.capacity - offset
+        if remaining < _RING_LENGTH.size or _RING_LENGTH.unpack_from(buffer, base + offset)[0] == _RING_WRAP:
+            tail += remaining
+            offset = 0
+        length = _RING_LENGTH.unpack_from(buffer, base + offset)[0]
+        message = pickle.loads(bytes(buffer[base + offset + _RING_LENGTH.size:
+                                            base + offset + _RING_LENGTH.size + length]))
+        struct.pack_into('<Q', buffer, 8, tail + _RING_LENGTH.size + length)
+        return message
+
+    def get_all(self) -> list:
+        """
+        Drain every queued message without blocking
+        """
+        messages = []
+        while True:
+            try:
+                messages.append(self.get(block=False))
+            except queue.Empty:
+                return messages
+
+    def empty(self) -> bool:
+        head, tail = self.__positions()
+        return head == tail
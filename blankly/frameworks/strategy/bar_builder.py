@@ -0,0 +1,194 @@
+"""
+    Build live OHLCV bars from the ticker websocket instead of polling for them
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import collections
+import threading
+import time
+
+from blankly.utils.utils import convert_epochs, get_ohlcv_from_list
+
+
+class BarBuilder:
+    def __init__(self, symbol: str, ticker=None, grace_period: float = 1.0, monitor_interval: float = 1.0):
+        """
+        Accumulate ticks for a symbol so that bars of any resolution can be closed locally the moment the bar boundary
+        passes.
+
+        Args:
+            symbol: The symbol the ticks belong to
+            ticker: The websocket feeding this builder. If it is given and closed, bars are not built locally.
+            grace_period: Seconds to wait at the end of a bar for a tick at or after the boundary, so ticks that are
+                still on their way make it into the bar
+            monitor_interval: Seconds between checks for the websocket disconnecting or the feed dropping ticks
+        """
+        self.symbol = symbol
+        self.ticker = ticker
+        self.grace_period = grace_period
+        self.monitor_interval = monitor_interval
+
+        # Set by the first tick after start(). Bars that started before this are partial, and need to come from the
+        # exchange.
+        self.started_at = None
+
+        self.__resolutions = set()
+        self.__ticks = collections.deque()
+        self.__last_close = {}
+        # Also notified for each tick so a closing bar can wait for the boundary to pass on the feed
+        self.__lock = threading.Condition()
+
+        # [start, end] of each time the websocket was down or ticks were dropped, end is None while it's still down
+        self.__gaps = []
+        self.__last_checked = None
+        self.__dropped = 0
+        self.__stopped = threading.Event()
+
+    def start(self):
+        """
+        Start the websocket and keep track of any time it goes down until stop() is called
+        """
+        if self.ticker is not None:
+            self.ticker.restart_ticker()
+        self.__last_checked = time.time()
+        self.__dropped = self.__count_dropped()
+        self.__stopped.clear()
+        threading.Thread(target=self.__monitor, daemon=True).start()
+
+    def stop(self):
+        """
+        Stop the websocket and the monitoring
+        """
+        self.__stopped.set()
+        if self.ticker is not None:
+            self.ticker.close_websocket()
+
+    def add_resolution(self, resolution: [int, float]):
+        """
+        Register a bar resolution that will be built from this symbol's ticks. Ticks are kept long enough to build
+        the largest registered resolution.
+        """
+        self.__resolutions.add(resolution)
+
+    def add_tick(self, tick: dict, **kwargs):
+        """
+        Ticker callback. This only appends, all bar work happens when a bar is closed.
+        """
+        with self.__lock:
+            if self.started_at is None:
+                self.started_at = time.time()
+            self.__ticks.append({
+                'time': convert_epochs(tick['time']),
+                'price': tick['price'],
+                'size': tick['size']
+            })
+            self.__lock.notify_all()
+
+    def is_live(self) -> bool:
+        """
+        Check that the websocket feeding the builder is still connected
+        """
+        return self.ticker is None or self.ticker.is_websocket_open()
+
+    def check(self):
+        """
+        Record a gap if the websocket is down or the feed dropped ticks since the last check. This runs every
+        monitor_interval after start() and before each bar is built.
+        """
+        now = time.time()
+        live = self.is_live()
+        dropped = self.__count_dropped()
+        with self.__lock:
+            last_checked = self.__last_checked if self.__last_checked is not None else self.started_at
+            down = len(self.__gaps) > 0 and self.__gaps[-1][1] is None
+            if not live and not down:
+                # It went down at some point since it was last seen connected
+                self.__gaps.append([last_checked, None])
+            elif live and down:
+                self.__gaps[-1][1] = now
+            if dropped > self.__dropped:
+                self.__gaps.append([last_checked, now])
+            self.__dropped = dropped
+            self.__last_checked = now
+
+    def __count_dropped(self) -> int:
+        # A ticker shared through the market data hub skips ticks if its dispatch policy drops or conflates them
+        dispatcher = getattr(self.ticker, 'dispatcher', None)
+        if dispatcher is None:
+            return 0
+        metrics = dispatcher.metrics()
+        return metrics.get('dropped', 0) + metrics.get('conflated', 0)
+
+    def __monitor(self):
+        while not self.__stopped.wait(self.monitor_interval):
+            self.check()
+
+    def build_bar(self, bar_time: [int, float], resolution: [int, float]) -> [dict, None]:
+        """
+        Close the bar that ends at bar_time
+
+        Args:
+            bar_time: The epoch at which the bar ends
+            resolution: The bar resolution in seconds
+
+        Returns:
+            A dictionary matching a row of interface.history() or None if the bar can't be built from the
+            websocket (the feed started during the bar, was disconnected or dropped ticks during it or has never
+            received a tick). None means the exchange should be queried instead.
+        """
+        bar_start = bar_time - resolution
+        if self.started_at is None or bar_start < self.started_at:
+            return None
+
+        if self.is_live():
+            deadline = time.time() + self.grace_period
+            with self.__lock:
+                while not self.__ticks or self.__ticks[-1]['time'] < bar_time:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self.__lock.wait(remaining)
+        self.check()
+
+        oldest_needed = bar_time - max(self.__resolutions, default=resolution)
+
+        with self.__lock:
+            # Still being down also means the end of this bar may be missing
+            if any(end is None or (start < bar_time and end > bar_start) for start, end in self.__gaps):
+                return None
+            self.__gaps = [gap for gap in self.__gaps if gap[1] is None or gap[1] > oldest_needed]
+
+            # Ticks are appended in the order they're received so everything old is on the left
+            while self.__ticks and self.__ticks[0]['time'] < oldest_needed:
+                self.__ticks.popleft()
+            ticks = [tick for tick in self.__ticks if bar_start <= tick['time'] < bar_time]
+
+        last_price = self.__last_close.get(resolution)
+        if last_price is None:
+            if len(ticks) == 0:
+                return None
+            last_price = ticks[0]['price']
+
+        bar = get_ohlcv_from_list(ticks, last_price)
+        bar['time'] = bar_start
+        self.__last_close[resolution] = bar['close']
+        return bar
+
+    def reconcile(self, bar: dict, resolution: [int, float]):
+        """
+        Push a bar downloaded from the exchange into the builder so later empty bars use its close
+        """
+        self.__last_close[resolution] = bar['close']
@@ -22,12 +22,15 @@ import typing
 import warnings
 
 import blankly
+from blankly.data.orderbook_reader import OrderbookReader
 from blankly.exchanges.abc_base_exchange import ABCBaseExchange
 from blankly.exchanges.exchange import Exchange
 from blankly.exchanges.interfaces.abc_exchange_interface import ABCExchangeInterface
 from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+from blankly.exchanges.interfaces.paper_trade.vectorized_backtest_controller import VectorizedBacktestController
 from blankly.exchanges.strategy_logger import StrategyLogger
 from blankly.frameworks.model.model import Model
+from blankly.frameworks.strategy.bar_builder import BarBuilder
 from blankly.frameworks.strategy.strategy_base import StrategyBase, EventType
 from blankly.frameworks.strategy import StrategyState
 from blankly.utils.utils import info_print
@@ -67,21 +70,30 @@ class StrategyStructure(Model):
         if type_ == EventType.bar_event:
             if not self.is_backtesting:
                 bar_time = event['bar_time']
-                while True:
+                bar_builder = event['bar_builder']  # type: BarBuilder
+
+                data = None
+                if bar_builder is not None:
+                    data = bar_builder.build_bar(bar_time, resolution)
+
+                # Only poll the exchange if the bar couldn't be built from the websocket
+                while data is None:
                     # Sometimes coinbase doesn't download recent data correctly
                     try:
                         # A few seconds should pass before querying alpaca because any solution is acceptable
                         if self.interface.get_exchange_type() == "alpaca":
                             time.sleep(2)
                             data = self.interface.history(symbol=symbol, to=1, resolution=resolution).iloc[-1].to_dict()
-                            break
                         else:
-                            data = self.interface.history(symbol=symbol, to=1, resolution=resolution).iloc[-1].to_dict()
-                            if data['time'] + resolution == bar_time:
-                                break
+                            polled = self.interface.history(symbol=symbol, to=1, resolution=resolution).iloc[-1].to_dict()
+                            if polled['time'] + resolution == bar_time:
+                                data = polled
                     except IndexError:
                         pass
-                    time.sleep(.5)
+                    if data is None:
+                        time.sleep(.5)
+                    elif bar_builder is not None:
+                        bar_builder.reconcile(data, resolution)
             else:
                 # If we are backtesting always just grab the last point and hope for the best of course
                 try:
@@ -97,28 +109,8 @@ class StrategyStructure(Model):
         elif type_ == EventType.scheduled_event:
             args = [state]
         elif type_ == EventType.arbitrage_event:
-            prices = {}
-            # If we're backtesting loop through the symbol and just grab the price
-            if self.is_backtesting:
-                for sym in symbol:
-                    prices[sym] = self.interface.get_price(sym)
-
-            # We have to be a bit more strategy if we're live
-            else:
-                def grab_price(threaded_symbol):
-                    prices[threaded_symbol] = self.interface.get_price(threaded_symbol)
-
-                threadpool = []
-                for sym in symbol:
-                    threadpool.append(threading.Thread(target=grab_price, args=(sym,)))
-
-                # Start the threads
-                for thread in threadpool:
-                    thread.start()
-
-                # Join each of the threads because they've writen to the symbol
-                for thread in threadpool:
-                    thread.join()
+            # Quote every symbol at once, this is a single request on exchanges that support bulk prices
+            prices = self.interface.get_prices(symbol)
             args = [prices, symbol, state]
         else:
             return
@@ -128,6 +120,15 @@ class StrategyStructure(Model):
         except Exception:
             traceback.print_exc()
 
+    def orderbook_update(self, symbol: str, book):
+        for i in self.orderbook_websockets:
+            if i[0] == symbol:
+                try:
+                    # Index 5 is the user callback, called just like the live orderbook websocket would
+                    i[5](book, symbol, i[3])
+                except Exception:
+                    traceback.print_exc()
+
     def run_price_events(self, events: list):
         # run all events once at start
         for event in events:
@@ -166,6 +167,11 @@ class StrategyStructure(Model):
             kwargs['state'].strategy.interface = self.interface
         self.__run_init()
 
+        for i in self.orderbook_websockets:
+            # Orderbook events only run in a backtest when recorded books are replayed into them
+            if i[2] is not None:
+                i[2](i[0], i[3])
+
         events = []
         for scheduler in self.schedulers:
             events.append(scheduler.get_kwargs())
@@ -190,6 +196,10 @@ class StrategyStructure(Model):
     def run_live(self):
         self.__run_init()
 
+        # Start the bar builder websockets after init so time spent downloading history isn't counted as streamed
+        for bar_builder in self.__bar_builders():
+            bar_builder.start()
+
         for scheduler in self.schedulers:
             scheduler.start()
 
@@ -224,8 +234,20 @@ class StrategyStructure(Model):
 
         for i in self.ticker_websockets:
             self.ticker_manager.close_websocket(override_symbol=i[0], override_exchange=i[1])
+
+        for bar_builder in self.__bar_builders():
+            bar_builder.stop()
         self.lock.release()
 
+    def __bar_builders(self) -> typing.List[BarBuilder]:
+        # Multiple bar events on the same symbol share a single builder
+        bar_builders = []
+        for scheduler in self.schedulers:
+            bar_builder = scheduler.get_kwargs().get('bar_builder')
+            if bar_builder is not None and bar_builder not in bar_builders:
+                bar_builders.append(bar_builder)
+        return bar_builders
+
 
 class Strategy(StrategyBase):
     __exchange: Exchange
@@ -310,18 +332,82 @@ class Strategy(StrategyBase):
 
                 risk_free_return_rate: float = 0.0
                     Set this to be the theoretical rate of return with no risk
+
+                compact_backtest_result: bool = False
+                    Store the finished result as float32/int64 columns and only rebuild the DataFrames when they're
+                        accessed. Useful when keeping many results alive, such as in a parameter sweep.
+
+                backtest_result_spill_bytes: int = None
+                    When compacting, move results larger than this many bytes into a memory mapped file.
+
+                value_account_interval: float = None
+                    Minimum number of seconds between recorded account values. None records the account after every
+                        event, a larger interval keeps long high resolution backtests small.
+
+                resample_from_finer_prices: bool = True
+                    Build a resolution that isn't cached from cached prices at a finer resolution that divides it, such
+                        as 1h candles from 1m candles, instead of downloading it. This is only done where the
+                        exchange aligns its candles to UTC: hourly and finer everywhere, up to 1d on crypto exchanges.
+
+                cache_resampled_prices: bool = False
+                    Write the resampled prices into the price cache as if they were downloaded.
+
+                platform_result_path: str = None
+                    Stream the formatted platform result to this path as JSON. The trade and account value lists are
+                        written in chunks so the document is never built as one string.
         """
         self.setup_model()
-        if len(self.orderbook_websockets) != 0 or len(self.ticker_websockets) != 0:
+        if len(self.ticker_websockets) != 0 or \
+                (len(self.orderbook_websockets) != 0 and not self.model.backtester.has_orderbook_events):
             info_print("Found websocket events added to this strategy. These are not yet backtestable without "
-                       "event based data")
+                       "event based data. Orderbook events can be backtested with add_orderbook_replay().")
 
         self.__add_prices(to, start_date, end_date)
         res = self.model.backtest(args={}, initial_values=initial_values, settings_path=settings_path, kwargs=kwargs)
         self.model.teardown()
         return res
 
-    def __add_prices(self, to, start_date, end_date):
+    def backtest_vectorized(self,
+                            positions: dict = None,
+                            signals: dict = None,
+                            to: str = None,
+                            initial_values: dict = None,
+                            start_date: typing.Union[str, float, int] = None,
+                            end_date: typing.Union[str, float, int] = None,
+                            settings_path: str = None,
+                            **kwargs
+                            ) -> typing.Union[BacktestResult, VectorizedBacktestController]:
+        """
+        Create a vectorized backtest over the prices of this strategy's price events. This is much faster than
+        backtest() for strategies that reduce to market orders on precomputed positions or signals, which makes it
+        useful for screening many candidates before running the best ones through backtest().
+
+        Args:
+            positions (dict): Dictionary of symbol to target base asset sizes at each bar, or a function of the price
+                DataFrame that returns them
+            signals (dict): Dictionary of symbol to signals at each bar (positive buys, negative sells), or a function
+                of the price DataFrame that returns them
+            to (str): Declare an amount of time before now to backtest from: ex: '5y' or '10h'
+            initial_values (dict): Dictionary of initial value sizes (i.e { 'BTC': 3, 'USD': 5650}).
+            start_date (str): Override argument "to" by specifying a start date such as "03/06/2018"
+            end_date (str): End the backtest at a date such as "03/06/2018"
+            settings_path (str): Path to the backtest.json file.
+            **kwargs: Overrides for the backtest.json settings, see backtest()
+
+        Returns:
+            The BacktestResult if positions or signals are given, otherwise the VectorizedBacktestController so that
+            run() can be called for each candidate without syncing the prices again.
+        """
+        backtester = VectorizedBacktestController(self._paper_trade_exchange, settings_path)
+        self.__add_prices(to, start_date, end_date, backtester=backtester)
+        if positions is None and signals is None:
+            return backtester
+        return backtester.run(positions=positions, signals=signals, initial_account_values=initial_values, **kwargs)
+
+    def __add_prices(self, to, start_date, end_date, backtester=None):
+        if backtester is None:
+            backtester = self.model.backtester
+
         for scheduler in self.schedulers:
             event_element = scheduler.get_kwargs()
 
@@ -332,17 +418,17 @@ class Strategy(StrategyBase):
             # Loop through the symbols if it is a list
             if isinstance(event_element['symbol'], list):
                 for symbol in event_element['symbol']:
-                    self.model.backtester.add_prices(to=to,
-                                                     start_date=start_date,
-                                                     stop_date=end_date,
-                                                     symbol=symbol,
-                                                     resolution=event_element['resolution'])
+                    backtester.add_prices(to=to,
+                                          start_date=start_date,
+                                          stop_date=end_date,
+                                          symbol=symbol,
+                                          resolution=event_element['resolution'])
             else:
-                self.model.backtester.add_prices(to=to,
-                                                 start_date=start_date,
-                                                 stop_date=end_date,
-                                                 symbol=event_element['symbol'],
-                                                 resolution=event_element['resolution'])
+                backtester.add_prices(to=to,
+                                      start_date=start_date,
+                                      stop_date=end_date,
+                                      symbol=event_element['symbol'],
+                                      resolution=event_element['resolution'])
 
             self.__prices_added = True
 
@@ -359,6 +445,16 @@ class Strategy(StrategyBase):
         self.model.backtester.add_prices(symbol, resolution, to, start_date, stop_date)
         self.__prices_added = True
 
+    def add_orderbook_replay(self, orderbook_reader: OrderbookReader):
+        """
+        Replay a recorded orderbook into the orderbook events during backtests. Paper limit orders fill against the
+        top of the replayed book.
+
+        Args:
+            orderbook_reader: An OrderbookReader over the recording
+        """
+        self.model.backtester.add_orderbook_events(orderbook_reader)
+
     def setup_model(self):
         self.model.construct_strategy(self.schedulers, self.orderbook_websockets,
                                       self.ticker_websockets, self.orderbook_manager,
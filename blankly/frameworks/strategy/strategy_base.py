@@ -25,6 +25,9 @@ import blankly
 from blankly.exchanges.abc_base_exchange import ABCBaseExchange
 from blankly.exchanges.interfaces.abc_base_exchange_interface import ABCBaseExchangeInterface
 from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+from blankly.exchanges.managers.market_data_hub import get_market_data_hub, SharedTickerManager, \
+    SharedOrderbookManager
+from blankly.frameworks.strategy.bar_builder import BarBuilder
 from blankly.frameworks.strategy.strategy_state import StrategyState
 from blankly.utils.time_builder import time_interval_to_seconds
 from blankly.utils.utils import AttributeDict
@@ -60,8 +63,10 @@ class StrategyBase:
         self.__exchange = exchange
         self.interface = interface
 
-        self.ticker_manager = blankly.TickerManager(self.__exchange.get_type(), '')
-        self.orderbook_manager = blankly.OrderbookManager(self.__exchange.get_type(), '')
+        # Strategies subscribe through the process-wide hub so they share connections & books on the same symbols
+        hub = get_market_data_hub()
+        self.ticker_manager = SharedTickerManager(hub, self.__exchange.get_type())
+        self.orderbook_manager = SharedOrderbookManager(hub, self.__exchange.get_type())
 
         # Attempt to report the strategy
         blankly.reporter.export_strategy(self)
@@ -80,6 +85,9 @@ class StrategyBase:
         self.ticker_websockets = []
         self.model = model
 
+        # Bar builders keyed by symbol, these share one ticker for all resolutions of a symbol
+        self.__bar_builders = {}
+
     def add_price_event(self, callback: typing.Callable, symbol: str, resolution: typing.Union[str, float],
                         init: typing.Callable = None, teardown: typing.Callable = None, synced: bool = False,
                         variables: dict = None):
@@ -138,7 +146,8 @@ class StrategyBase:
                                   teardown=teardown, variables=variables, type_=EventType.arbitrage_event)
 
     def add_bar_event(self, callback: typing.Callable, symbol: str, resolution: typing.Union[str, float],
-                      init: typing.Callable = None, teardown: typing.Callable = None, variables: dict = None):
+                      init: typing.Callable = None, teardown: typing.Callable = None, variables: dict = None,
+                      build_bars: bool = False):
         """
         The bar event sends a dictionary of {open, high, low, close, volume} which has occurred in the interval.
         Args:
@@ -150,9 +159,31 @@ class StrategyBase:
             teardown: A function to run when the strategy is stopped or interrupted. Example usages include liquidating
                 positions, writing or cleaning up data or anything else useful
             variables: A dictionary to initialize the state's internal values
+            build_bars: When running live, build the bars from the ticker websocket so the callback runs right at the
+                bar boundary instead of waiting for the exchange to publish the bar. The exchange is only queried
+                when the websocket can't provide a complete bar.
         """
+        bar_builder = None
+        if build_bars:
+            bar_builder = self.__get_bar_builder(symbol)
+            if bar_builder is not None:
+                bar_builder.add_resolution(time_interval_to_seconds(resolution))
+
         self.__custom_price_event(type_=EventType.bar_event, synced=True, callback=callback, symbol=symbol,
-                                  resolution=resolution, init=init, teardown=teardown, variables=variables)
+                                  resolution=resolution, init=init, teardown=teardown, variables=variables,
+                                  bar_builder=bar_builder)
+
+    def __get_bar_builder(self, symbol: str) -> typing.Optional[BarBuilder]:
+        if symbol not in self.__bar_builders:
+            bar_builder = BarBuilder(symbol)
+            ticker = self.ticker_manager.create_ticker(bar_builder.add_tick, initially_stopped=True,
+                                                       override_symbol=symbol)
+            if ticker is None:
+                # This exchange has no ticker, the bars will be queried instead
+                return None
+            bar_builder.ticker = ticker
+            self.__bar_builders[symbol] = bar_builder
+        return self.__bar_builders[symbol]
 
     def __custom_price_event(self,
                              type_: EventType,
@@ -161,7 +192,8 @@ class StrategyBase:
                              resolution: typing.Union[str, float] = None,
                              init: typing.Callable = None,
                              synced: bool = False,
-                             teardown: typing.Callable = None, variables: dict = None):
+                             teardown: typing.Callable = None, variables: dict = None,
+                             bar_builder: BarBuilder = None):
         """
         Add Price Event
         Args:
@@ -175,6 +207,7 @@ class StrategyBase:
                 positions, writing or cleaning up data or anything else useful
             synced: Sync the function to
             variables: Initial dictionary to write into the state variable
+            bar_builder: Builder for bar events that constructs the bars from the ticker websocket
         """
         # Make sure variables is always an empty dictionary if None
         if variables is None:
@@ -196,7 +229,8 @@ class StrategyBase:
                               type=type_,
                               init=init,
                               teardown=teardown,
-                              symbol=symbol)
+                              symbol=symbol,
+                              bar_builder=bar_builder)
         )
 
         # Export a new symbol to the backend
@@ -246,7 +280,8 @@ class StrategyBase:
         self.ticker_websockets.append([symbol, self.__exchange.get_type(), init, state, teardown])
 
     def add_orderbook_event(self, callback: callable, symbol: str, init: typing.Callable = None,
-                            teardown: typing.Callable = None, variables: dict = None):
+                            teardown: typing.Callable = None, variables: dict = None,
+                            conflation_interval: typing.Union[str, float] = None, conflation_updates: int = None):
         """
         Add Orderbook Event - This will call the given callback everytime the exchange provides a change in the
          orderbook
@@ -258,6 +293,10 @@ class StrategyBase:
             teardown: A function to run when the strategy is stopped or interrupted. Example usages include liquidating
                 positions, writing or cleaning up data or anything else useful:
             variables: A dictionary to initialize the state's internal values
+            conflation_interval: Receive the latest orderbook at most once per interval, such as '1s' or 0.25
+                seconds, instead of after every change. Every change is still applied to the book.
+            conflation_updates: Receive the latest orderbook once this many changes have been applied, even if the
+                interval hasn't passed
         """
         # Make sure variables is always an empty dictionary if None
         if variables is None:
@@ -266,16 +305,22 @@ class StrategyBase:
         state = StrategyState(self, AttributeDict(variables), symbol=symbol)
 
         # since it's less than 10 sec, we will just use the websocket feed - exchanges don't like fast calls
+        if isinstance(conflation_interval, str):
+            conflation_interval = time_interval_to_seconds(conflation_interval)
+
         self.orderbook_manager.create_orderbook(self.__websocket_callback, initially_stopped=True,
                                                 # This is the one that actually sets the symbol
                                                 override_symbol=symbol,
+                                                conflation_interval=conflation_interval,
+                                                conflation_updates=conflation_updates,
                                                 # This is passed as a kwarg
                                                 user_symbol=symbol,
                                                 user_callback=callback,
                                                 variables=variables,
                                                 state=state)
 
-        self.orderbook_websockets.append([symbol, self.__exchange.get_type(), init, state, teardown])
+        # The callback is kept so that backtests can replay recorded books into it
+        self.orderbook_websockets.append([symbol, self.__exchange.get_type(), init, state, teardown, callback])
 
     def start(self):
         """
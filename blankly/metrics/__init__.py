@@ -1 +1,2 @@
 from blankly.metrics.portfolio import *
+from blankly.metrics.engine import compute_metrics, drawdown_series, rolling_sharpe, rolling_volatility
@@ -0,0 +1,186 @@
+"""
+    Single pass vectorized metrics for account values & returns
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import numpy as np
+
+
+def as_array(values) -> np.ndarray:
+    """
+    Convert a list, series or array into a float64 numpy array with the NaN values removed. Series are not copied
+    unless they need to be.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    nan_mask = np.isnan(values)
+    if nan_mask.any():
+        values = values[~nan_mask]
+    return values
+
+
+def drawdown_series(returns) -> np.ndarray:
+    """
+    The drawdown at every point of a returns series, as a negative fraction of the running peak
+
+    Args:
+        returns: Period returns as fractions
+    """
+    returns = as_array(returns)
+    cumulative = np.cumprod(returns + 1)
+    return cumulative / np.maximum.accumulate(cumulative) - 1
+
+
+def _rolling_sums(returns: np.ndarray, window: int):
+    # Windowed sums from cumulative sums, this is O(n) no matter the window size
+    if window < 2:
+        raise ValueError("The rolling window needs at least two periods.")
+    if len(returns) < window:
+        return np.array([]), np.array([])
+    cumulative = np.concatenate(([0.0], np.cumsum(returns)))
+    cumulative_sq = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    sums = cumulative[window:] - cumulative[:-window]
+    sums_sq = cumulative_sq[window:] - cumulative_sq[:-window]
+    return sums, sums_sq
+
+
+def rolling_volatility(returns, window: int, n=None) -> np.ndarray:
+    """
+    Sample standard deviation of the returns over each trailing window
+
+    Args:
+        returns: Period returns as fractions
+        window: Number of periods in each window
+        n: Periods per year used to annualize, None leaves it unscaled
+
+    Returns:
+        An array with one value per complete window (len(returns) - window + 1 values)
+    """
+    returns = as_array(returns)
+    sums, sums_sq = _rolling_sums(returns, window)
+    # Clip the tiny negative values the subtraction can leave
+    std = np.sqrt(np.maximum(sums_sq - sums * sums / window, 0) / (window - 1))
+    return std * np.sqrt(n) if n else std
+
+
+def rolling_sharpe(returns, window: int, n=252, risk_free_rate=None) -> np.ndarray:
+    """
+    Sharpe ratio over each trailing window. Windows with no variance are 0.
+
+    Args:
+        returns: Period returns as fractions
+        window: Number of periods in each window
+        n: Periods per year used to annualize
+        risk_free_rate: Annual risk free rate
+
+    Returns:
+        An array with one value per complete window (len(returns) - window + 1 values)
+    """
+    returns = as_array(returns)
+    sums, sums_sq = _rolling_sums(returns, window)
+    mean = sums / window * n
+    if risk_free_rate:
+        mean = mean - risk_free_rate
+    std = np.sqrt(np.maximum(sums_sq - sums * sums / window, 0) / (window - 1)) * np.sqrt(n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std == 0, 0.0, mean / std)
+
+
+def compute_metrics(values, returns=None, n=252, risk_free_rate=None, alpha: float = 0.95,
+                    years: float = None, benchmark_returns=None) -> dict:
+    """
+    Compute every standard portfolio metric at once. The returns are converted a single time and the shared
+    intermediates (moments, cumulative products, running peak & partitioned tail) are reused between metrics, so this
+    is practical on un-resampled high frequency account values.
+
+    The definitions match the functions in blankly.metrics.portfolio.
+
+    Args:
+        values: Account values ordered in time
+        returns: Period returns. If not given these are the percent change of the values.
+        n: Periods per year used to annualize
+        risk_free_rate: Annual risk free rate
+        alpha: Quantile for value-at-risk & conditional value-at-risk
+        years: Length of the run in years, used for cagr. If not given cagr is not computed.
+        benchmark_returns: Returns of a benchmark over the same periods, used for beta
+
+    Returns:
+        A dictionary of metric name to float. Anything that can't be computed on the given data is NaN.
+    """
+    values = as_array(values)
+    if returns is None:
+        returns = np.diff(values) / values[:-1] if len(values) > 1 else np.array([])
+    returns = as_array(returns)
+
+    nan = float('nan')
+    out = dict.fromkeys(['cagr', 'cum_returns', 'sharpe', 'sortino', 'calmar', 'volatility', 'variance',
+                         'max_drawdown', 'var', 'cvar', 'beta'], nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if len(values) > 0:
+            start_value, end_value = values[0], values[-1]
+            out['cum_returns'] = (end_value - start_value) / start_value
+            if years is not None:
+                out['cagr'] = 0.0 if years == 0 else (end_value / start_value) ** (1 / years) - 1
+
+        count = len(returns)
+        if count == 0:
+            return out
+
+        # Shared moments
+        mean = returns.mean()
+        deviations = returns - mean
+        sum_sq = np.dot(deviations, deviations)
+        population_var = sum_sq / count
+        sample_std = np.sqrt(sum_sq / (count - 1)) if count > 1 else nan
+
+        annual_mean = mean * n
+        excess_mean = annual_mean - risk_free_rate if risk_free_rate else annual_mean
+
+        std = sample_std * np.sqrt(n)
+        out['sharpe'] = 0.0 if std == 0.0 else excess_mean / std
+
+        negative = returns[returns < 0]
+        if len(negative) > 1:
+            out['sortino'] = excess_mean / (negative.std(ddof=1) * np.sqrt(n))
+
+        out['volatility'] = np.sqrt(population_var) * np.sqrt(n) if n else np.sqrt(population_var)
+        if count > 1:
+            out['variance'] = population_var * n if n else population_var
+        else:
+            out['variance'] = 0.0
+
+        # Drawdown from the running peak of the cumulative product
+        cumulative = np.cumprod(returns + 1)
+        max_draw = (cumulative / np.maximum.accumulate(cumulative) - 1).min()
+        out['max_drawdown'] = max_draw
+        out['calmar'] = 0.0 if max_draw == 0 else annual_mean / abs(max_draw)
+
+        # Only the tail below the alpha index needs to be ordered
+        index = int(alpha * count)
+        if index < count:
+            partitioned = np.partition(returns, index)
+            out['var'] = values[0] * abs(partitioned[index])
+            if index > 0:
+                out['cvar'] = values[0] * abs(partitioned[:index].sum() / index)
+
+        if benchmark_returns is not None:
+            benchmark_returns = as_array(benchmark_returns)
+            if len(benchmark_returns) == count and count > 1:
+                covariance = np.dot(deviations, benchmark_returns - benchmark_returns.mean()) / (count - 1)
+                benchmark_var = benchmark_returns.var()
+                out['beta'] = covariance / (benchmark_var * n if n else benchmark_var)
+
+    return {key: float(value) for key, value in out.items()}
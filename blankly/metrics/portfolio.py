@@ -21,6 +21,7 @@
 import numpy as np
 import pandas as pd
 
+from blankly.metrics.engine import drawdown_series
 from blankly.utils.utils import info_print
 
 
@@ -75,28 +76,21 @@ def variance(returns, n=None):
 
 
 def beta(returns, market_base_returns, n=None):
-    m = np.matrix([returns, market_base_returns])
-    return np.cov(m)[0][1] / variance(market_base_returns, n)
+    return np.cov(returns, market_base_returns)[0][1] / variance(market_base_returns, n)
 
 
 def var(initial_value, returns, alpha: float):
-    returns_sorted = np.sort(returns)
-    index = int(alpha * len(returns_sorted))
-    return initial_value * abs(returns_sorted[index])
+    returns = np.asarray(returns, dtype=np.float64)
+    index = int(alpha * len(returns))
+    # Only the element at the index needs to be in its sorted position
+    return initial_value * abs(np.partition(returns, index)[index])
 
 
 def cvar(initial_value, returns, alpha):
-    returns_sorted = np.sort(returns)
-    index = int(alpha * len(returns_sorted))
-    sum_var = returns_sorted[0]
-    for i in range(1, index):
-        sum_var += returns_sorted[i]
-    return initial_value * abs(sum_var / index)
+    returns = np.asarray(returns, dtype=np.float64)
+    index = int(alpha * len(returns))
+    return initial_value * abs(np.partition(returns, index)[:index].sum() / index)
 
 
 def max_drawdown(returns):
-    returns = pd.Series(returns)
-    cumulative = (returns + 1).cumprod()
-    peak = cumulative.expanding(min_periods=1).max()
-    dd = (cumulative / peak) - 1
-    return dd.min()
+    return drawdown_series(returns).min()
@@ -34,9 +34,42 @@ default_general_settings = {
         "use_sandbox_websockets": False,
         "websocket_buffer_size": 10000,
         "test_connectivity_on_auth": True,
+        "simulated_exchange_url": None,
         "auto_truncate": False,
         "global_shorting": False,
         "simulate_margin": True,
+        "metadata_cache": {
+            "products_ttl": 3600,
+            "order_filter_ttl": 3600,
+            "fees_ttl": 600,
+            "persist": False,
+            "cache_location": "./metadata_cache"
+        },
+        "history_cache": {
+            "enabled": True,
+            "max_bars": 10000,
+            "seed_from_price_caches": False,
+            "price_cache_location": "./price_caches"
+        },
+        "reporting": {
+            "asynchronous": True,
+            "max_queued_events": 10000,
+            "batch_size": 100,
+            "flush_interval": 1.0,
+            "overflow_policy": "drop_oldest",
+            "local_sink": None
+        },
+        "request_coalescing": {
+            "enabled": False,
+            "prices_ttl": 0.25,
+            "account_ttl": 0.5,
+            "open_orders_ttl": 0.5
+        },
+        "callback_dispatch": {
+            "ticker_policy": "inline",
+            "orderbook_policy": "inline",
+            "queue_size": 10000
+        },
 
         "coinbase_pro": {
             "cash": "USD"
@@ -56,7 +89,8 @@ default_general_settings = {
             "use_yfinance": False
         },
         "oanda": {
-            "cash": "USD"
+            "cash": "USD",
+            "stream_heartbeat_timeout": 10
         },
         "okx": {
             "cash": "USDT"
@@ -76,7 +110,8 @@ default_general_settings = {
             "ftx_tld": "com"
         },
         "paper": {
-              "price_source": "api"
+              "price_source": "api",
+              "limit_fill_source": "websocket"
         }
     }
 }
@@ -98,7 +133,13 @@ default_backtest_settings = {
         "quote_account_value_in": "USD",
         "ignore_user_exceptions": True,
         "risk_free_return_rate": 0.0,
-        "benchmark_symbol": None
+        "benchmark_symbol": None,
+        "compact_backtest_result": False,
+        "backtest_result_spill_bytes": None,
+        "value_account_interval": None,
+        "resample_from_finer_prices": True,
+        "cache_resampled_prices": False,
+        "platform_result_path": None
     }
 }
 
@@ -580,27 +621,79 @@ def split_df(df, n):
     return df.groupby(np.arange(len(df)) // n)
 
 
+def reduce_ohlcv(candles: pd.DataFrame, starts, times=None) -> pd.DataFrame:
+    """
+    Combine consecutive runs of candles into single candles with one numpy reduction per column
+
+    Args:
+        candles: Candles sorted by time with open, high, low, close & volume columns
+        starts: Ascending row index of the first candle of each run
+        times: Time of each combined candle. Defaults to the time of the first candle of each run.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    if len(starts) == 0:
+        return pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close', 'volume'])
+    # Each run closes with the candle before the next run starts
+    ends = np.append(starts[1:], len(candles)) - 1
+    if times is None:
+        times = candles['time'].to_numpy()[starts]
+    return pd.DataFrame({
+        'time': np.asarray(times).astype('int64'),
+        'open': candles['open'].to_numpy()[starts],
+        'high': np.maximum.reduceat(candles['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(candles['low'].to_numpy(dtype=np.float64), starts),
+        'close': candles['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(candles['volume'].to_numpy(dtype=np.float64), starts)
+    })
+
+
+def resample_candles(candles: pd.DataFrame, resolution: int) -> pd.DataFrame:
+    """
+    Build coarser candles from finer ones (such as 1h candles from 1m candles). Candles are grouped into windows that
+    start on multiples of the resolution since the epoch, check resample_matches_exchange() before using this in place
+    of an exchange's candles.
+
+    Args:
+        candles: Candles sorted by time with a finer resolution that divides the new one
+        resolution: The new resolution in seconds
+    """
+    if len(candles) == 0:
+        return pd.DataFrame(columns=['time', 'open', 'high', 'low', 'close', 'volume'])
+    buckets = candles['time'].to_numpy(dtype=np.float64) // resolution
+    starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+    return reduce_ohlcv(candles, starts, buckets[starts] * resolution)
+
+
+# Crypto exchanges start their candles on UTC days
+UTC_ALIGNED_EXCHANGES = ('coinbase_pro', 'binance', 'kucoin', 'ftx', 'okx')
+
+
+def resample_matches_exchange(exchange: str, resolution: int) -> bool:
+    """
+    Check if resample_candles() builds the same windows as the exchange's own candles of a resolution. Hourly and finer
+    candles line up everywhere. Coarser candles only line up on the crypto exchanges up to a day, Alpaca & Oanda days
+    start in New York time and Binance weeks start on a Monday while the epoch is a Thursday.
+
+    Args:
+        exchange: Exchange type such as 'coinbase_pro'
+        resolution: The resolution in seconds
+    """
+    if 3600 % resolution == 0:
+        return True
+    return exchange in UTC_ALIGNED_EXCHANGES and 86400 % resolution == 0
+
+
 def get_ohlcv(candles, n, from_zero: bool):
     if len(candles) < n:
         raise ValueError("Not enough candles provided, required at least {} candles, "
                          "but only received {}".format(n, len(candles)))
-    new_candles = pd.DataFrame()
-    df = split_df(candles, n)
-    new_candles['high'] = df['high'].max().reset_index(drop=True)
-    new_candles['low'] = df['low'].min().reset_index(drop=True)
-    new_candles['volume'] = df['volume'].sum().reset_index(drop=True)
-    new_candles['volume'] = new_candles['volume'].apply(lambda x: float(x))
+    starts = np.arange(0, len(candles), n)
     if from_zero:
-        new_candles['close'] = candles['close'].iloc[0::n].reset_index(drop=True)
-        new_candles['open'] = candles['open'].iloc[0::n].reset_index(drop=True)
-        new_candles['time'] = candles['time'].iloc[0::n].reset_index(drop=True).astype('int64')
-        new_candles['time'] = new_candles['time'].apply(lambda x: np.int64(x))
-    else:
-        new_candles['close'] = candles['close'].iloc[::n].reset_index(drop=True)
-        new_candles['open'] = candles['open'].iloc[::n].reset_index(drop=True)
-        new_candles['time'] = candles.index.to_series().iloc[::n].reset_index(drop=True)
-        new_candles['time'] = new_candles['time'].apply(lambda x: np.int64(x.timestamp()))
-    return new_candles
+        return reduce_ohlcv(candles, starts)
+    # Alpaca bars are indexed by their timestamp
+    times = (candles.index[starts].asi8 // 10 ** 9) if isinstance(candles.index, pd.DatetimeIndex) else \
+        np.array([x.timestamp() for x in candles.index[starts]])
+    return reduce_ohlcv(candles, starts, times)
 
 
 def aggregate_candles(history: pd.DataFrame, aggregation_size: int):
@@ -611,24 +704,7 @@ def aggregate_candles(history: pd.DataFrame, aggregation_size: int):
         aggregation_size: How many rows of history to aggregate - ex: aggregation_size=15 on 1m data produces
          15m intervals
     """
-    aggregated = pd.DataFrame()
-    splits = split_df(history, aggregation_size)
-    for i in splits:
-        # Build candles from the split dataframes
-        frame: dict = i[1].to_dict()
-        try:
-            tick = {
-                'time': list(frame['time'].values())[0],
-                'open': list(frame['open'].values())[0],
-                'high': max(frame['high'].values()),
-                'low': min(frame['low'].values()),
-                'close': list(frame['close'].values())[-1],
-                'volume': sum(frame['volume'].values()),
-            }
-        except IndexError:
-            continue
-        aggregated = aggregated.append(tick, ignore_index=True)
-    return aggregated
+    return reduce_ohlcv(history.reset_index(drop=True), np.arange(0, len(history), aggregation_size))
 
 
 def get_ohlcv_from_list(tick_list: list, last_price: float):
@@ -647,7 +723,8 @@ def get_ohlcv_from_list(tick_list: list, last_price: float):
         'volume': 0
     }
     if len(tick_list) > 0:
-        out['open'] = tick_list[0]['price']
+        # The range only comes from the ticks, the last price is only used for a bar without any
+        out['open'] = out['high'] = out['low'] = tick_list[0]['price']
         out['close'] = tick_list[-1]['price']
 
     for i in tick_list:
@@ -41,8 +41,8 @@ class Bot(blankly.BlanklyBot):
         """
         # Example of updating the price state for the GUI
         self.update_state("Price", str(tick["price"]))
-        # Show these new ticks to the console
-        print("New price tick at: " + str(tick["price"]))
+        # Stream the tick to the main process
+        self.queues['ticks'].put(tick)
 
 
 if __name__ == "__main__":
@@ -56,6 +56,8 @@ if __name__ == "__main__":
 
     # Create the bot and add it to run as a coinbase_pro bitcoin model.
     bot = Bot()
+    # A shared memory queue for the bot to stream ticks back to this process
+    ticks = bot.add_queue('ticks')
     portfolio.append_model(model=bot, symbol="BTC-USD", args=[])
 
     # This starts the main() function of the model and puts it on a different process (computer core)
@@ -67,4 +69,6 @@ if __name__ == "__main__":
         # Print the state from the model we just started every second
         state = portfolio.get_full_state("BTC-USD")
         blankly.utils.pretty_print_json(state)
+        for tick in ticks.get_all():
+            print("New price tick at: " + str(tick["price"]))
         time.sleep(1)
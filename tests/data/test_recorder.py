@@ -0,0 +1,171 @@
+"""
+    Tests for the websocket recorder & replay
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import msgpack
+
+from blankly.data.recorder import WebsocketRecorder, RecordingReader
+from blankly.exchanges.interfaces.alpaca.alpaca_websocket import Tickers as AlpacaTickers
+
+
+class FakeWebsocket:
+    def __init__(self, symbol, stream):
+        self.symbol = symbol
+        self.stream = stream
+        self.raw_listeners = []
+        self.callbacks = []
+        self.received = []
+
+    def get_currency_id(self):
+        return self.symbol
+
+    def append_callback(self, obj):
+        self.callbacks.append(obj)
+
+    def append_raw_listener(self, listener):
+        self.raw_listeners.append(listener)
+
+    def inject(self, message, normalized=False):
+        self.received.append((message, normalized))
+
+
+class FakeConnection:
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    @property
+    def connected(self):
+        return bool(self.messages)
+
+    def recv(self):
+        return self.messages.pop(0)
+
+
+class FakeManager:
+    def __init__(self, websockets):
+        self.websockets = websockets
+
+    def get_all_tickers(self):
+        return self.websockets
+
+
+class Recorder(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'feed.blkrec')
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        recorder = WebsocketRecorder(self.path, batch_size=3)
+        for i in range(10):
+            recorder.record('coinbase_pro', 'ticker', 'BTC-USD', json.dumps({'price': i}), receive_time=i)
+        recorder.record('binance', 'aggTrade', 'btcusdt', {'price': 1.5, 'size': 2}, normalized=True,
+                        receive_time=11)
+        recorder.record('binance', 'depth', 'btcusdt', b'\x00\x01', receive_time=12)
+        recorder.close()
+
+        records = list(RecordingReader(self.path))
+        self.assertEqual(12, len(records))
+        self.assertEqual([float(i) for i in range(10)], [r.time for r in records[:10]])
+        self.assertEqual({'price': 9}, json.loads(records[9].message))
+        self.assertEqual(('binance', 'aggTrade', 'btcusdt'), records[10][1:4])
+        self.assertTrue(records[10].normalized)
+        self.assertEqual({'price': 1.5, 'size': 2}, records[10].message)
+        self.assertEqual(b'\x00\x01', records[11].message)
+
+    def test_append_and_flush(self):
+        recorder = WebsocketRecorder(self.path, compress=False, flush_interval=60)
+        recorder.record('ftx', 'trades', 'BTC/USD', 'first')
+        recorder.flush()
+        self.assertEqual(1, len(list(RecordingReader(self.path))))
+        recorder.close()
+
+        recorder = WebsocketRecorder(self.path)
+        recorder.record('ftx', 'trades', 'ETH/USD', 'second')
+        recorder.close()
+
+        records = list(RecordingReader(self.path))
+        self.assertEqual(['first', 'second'], [r.message for r in records])
+        self.assertEqual(['BTC/USD', 'ETH/USD'], [r.symbol for r in records])
+
+    def test_attach_and_replay(self):
+        live = FakeWebsocket('BTC-USD', 'ticker')
+        recorder = WebsocketRecorder(self.path)
+        recorder.attach(live, 'coinbase_pro')
+        recorder.attach(live, 'coinbase_pro', normalized=True)
+        live.raw_listeners[0]('{"type": "ticker"}')
+        live.callbacks[0]({'price': 3.0}, user_symbol='BTC-USD')
+        recorder.close()
+
+        replayed = FakeWebsocket('BTC-USD', 'ticker')
+        other = FakeWebsocket('ETH-USD', 'ticker')
+        manager = FakeManager({'coinbase_pro': {'BTC-USD': replayed, 'ETH-USD': other}})
+        count = RecordingReader(self.path).replay(manager, speed=0)
+
+        self.assertEqual(2, count)
+        self.assertEqual([('{"type": "ticker"}', False), ({'price': 3.0}, True)], replayed.received)
+        self.assertEqual([], other.received)
+
+    def test_alpaca_raw_recording(self):
+        cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.addCleanup(os.chdir, cwd)
+
+        quote = {'T': 'q', 'S': 'AAPL', 'bp': 150.1, 'bs': 2, 'ap': 150.2, 'as': 3}
+        live = AlpacaTickers('AAPL', 'quotes', initially_stopped=True)
+        live.ws = FakeConnection([msgpack.packb([quote])])
+        recorder = WebsocketRecorder(self.path)
+        recorder.attach(live, 'alpaca')
+        live.read_websocket()
+        recorder.close()
+
+        replayed = AlpacaTickers('AAPL', 'quotes', initially_stopped=True)
+        books = []
+        replayed.append_callback(books.append)
+        count = RecordingReader(self.path).replay(FakeManager({'alpaca': {'AAPL': replayed}}), speed=0)
+
+        self.assertEqual(1, count)
+        self.assertEqual([quote], books)
+        self.assertEqual(quote, replayed.get_most_recent_tick())
+
+    def test_alpaca_log_is_buffered(self):
+        cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.addCleanup(os.chdir, cwd)
+
+        quote = {'T': 'q', 'S': 'AAPL', 'ax': 'V', 'ap': 150.2, 'as': 3, 'bx': 'V', 'bp': 150.1, 'bs': 2,
+                 'c': ['R'], 't': msgpack.Timestamp(1650000000, 500000000), 'z': 'C'}
+        log = os.path.join(self.directory.name, 'quotes.csv')
+        ticker = AlpacaTickers('AAPL', 'quotes', log=log, initially_stopped=True)
+        ticker.ws = FakeConnection([])
+        ticker.inject(msgpack.packb([quote]))
+        ticker.close_websocket()
+
+        with open(log) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(2, len(lines))
+        self.assertTrue(lines[0].startswith('symbol,'))
+        self.assertTrue(lines[1].startswith('AAPL,V,150.2,3,'))
+        self.assertIn('1650000000.5', lines[1])
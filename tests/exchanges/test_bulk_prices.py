@@ -0,0 +1,77 @@
+"""
+    Tests for quoting many symbols at once with get_prices
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from blankly.exchanges.interfaces.exchange_interface import get_prices_concurrently
+from blankly.exchanges.simulated import SimulatedExchange, LoadTest
+from blankly.utils.exceptions import APIException
+
+SYMBOLS = ['BTC-USDT', 'ETH-USDT', 'SOL-USDT']
+
+
+class BulkPricesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.server = SimulatedExchange(symbols=SYMBOLS, message_rate=0).start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        os.chdir(self.cwd)
+
+    def test_binance_quotes_in_one_request(self):
+        interface = LoadTest('binance', server=self.server).create_interface()
+
+        requests = self.server.stats()['rest_requests']
+        prices = interface.get_prices(SYMBOLS)
+        self.assertEqual(1, self.server.stats()['rest_requests'] - requests)
+
+        self.assertEqual(SYMBOLS, list(prices))
+        for symbol in SYMBOLS:
+            self.assertAlmostEqual(interface.get_price(symbol), prices[symbol])
+
+        with self.assertRaises(APIException):
+            interface.get_prices(['BTC-USDT', 'DOGE-USDT'])
+
+    def test_concurrent_fallback(self):
+        interface = LoadTest('coinbase_pro', server=self.server).create_interface()
+        prices = interface.get_prices(['BTC-USDT', 'ETH-USDT', 'BTC-USDT'])
+        self.assertEqual(['BTC-USDT', 'ETH-USDT'], list(prices))
+        self.assertAlmostEqual(interface.get_price('ETH-USDT'), prices['ETH-USDT'])
+
+        threads = set()
+
+        def slow_price(symbol):
+            threads.add(threading.get_ident())
+            time.sleep(.1)
+            return len(symbol)
+
+        started = time.time()
+        prices = get_prices_concurrently(slow_price, [str(i) * (i + 1) for i in range(10)])
+        self.assertLess(time.time() - started, .5)
+        self.assertEqual(list(range(1, 11)), list(prices.values()))
+        self.assertGreater(len(threads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+    Tests for delivering websocket messages to slow callbacks with the dispatch policies
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+import unittest
+
+from blankly.exchanges.managers.callback_dispatcher import CallbackDispatcher
+
+
+class CallbackDispatcherTest(unittest.TestCase):
+    def dispatcher(self, policy: str, queue_size: int = 3):
+        self.release = threading.Event()
+        self.received = []
+
+        def slow_callback(message, name):
+            self.release.wait(5)
+            self.received.append((name, message))
+
+        dispatcher = CallbackDispatcher(slow_callback, {'name': 'slow'}, policy=policy, queue_size=queue_size)
+        dispatcher.start()
+        self.addCleanup(dispatcher.stop)
+        # The first message is taken by the worker, which then waits in the callback
+        dispatcher.put(0)
+        while dispatcher.depth:
+            time.sleep(0.01)
+        return dispatcher
+
+    def test_drop_oldest_never_waits(self):
+        dispatcher = self.dispatcher('drop_oldest')
+        started = time.time()
+        for i in range(1, 101):
+            dispatcher.put(i)
+        self.assertLess(time.time() - started, 0.5)
+
+        self.release.set()
+        self.assertTrue(dispatcher.join(5))
+        self.assertEqual([0, 98, 99, 100], [message for _, message in self.received])
+        self.assertEqual('slow', self.received[0][0])
+
+        metrics = dispatcher.metrics()
+        self.assertEqual(97, metrics['dropped'])
+        self.assertEqual(3, metrics['max_depth'])
+        self.assertEqual(0, metrics['depth'])
+        self.assertGreater(metrics['max_lag'], 0)
+
+    def test_conflate_keeps_the_newest(self):
+        dispatcher = self.dispatcher('conflate')
+        for i in range(1, 101):
+            dispatcher.put(i)
+        self.assertEqual(1, dispatcher.depth)
+
+        self.release.set()
+        self.assertTrue(dispatcher.join(5))
+        self.assertEqual([0, 100], [message for _, message in self.received])
+        self.assertEqual(99, dispatcher.metrics()['conflated'])
+
+    def test_block_waits_for_space(self):
+        dispatcher = self.dispatcher('block', queue_size=2)
+        dispatcher.put(1)
+        dispatcher.put(2)
+
+        threading.Timer(0.2, self.release.set).start()
+        started = time.time()
+        dispatcher.put(3)
+        self.assertGreater(time.time() - started, 0.1)
+
+        self.assertTrue(dispatcher.join(5))
+        self.assertEqual([0, 1, 2, 3], [message for _, message in self.received])
+        self.assertEqual(1, dispatcher.metrics()['blocked'])
+
+    def test_inline_and_stop(self):
+        received = []
+        dispatcher = CallbackDispatcher(lambda message: received.append((message, threading.get_ident())),
+                                        policy='inline')
+        dispatcher.put(1)
+        dispatcher.start()
+        dispatcher.put(2)
+        dispatcher.stop()
+        dispatcher.put(3)
+        self.assertEqual([(2, threading.get_ident())], received)
+
+        with self.assertRaises(ValueError):
+            CallbackDispatcher(print, policy='drop_newest')
+
+
+if __name__ == '__main__':
+    unittest.main()
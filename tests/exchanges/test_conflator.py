@@ -0,0 +1,139 @@
+"""
+    Tests for conflating orderbook callbacks to the latest book
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from blankly.exchanges.managers.conflator import Conflator
+from blankly.exchanges.managers.orderbook_manager import OrderbookManager
+
+
+def level2_update(price: float, size: float) -> str:
+    return json.dumps({'type': 'l2update', 'product_id': 'BTC-USD', 'time': '2022-01-01T00:00:00.000000Z',
+                       'changes': [['buy', str(price), str(size)]]})
+
+
+class ConflatorTest(unittest.TestCase):
+    def test_interval_delivers_the_latest(self):
+        calls = []
+        conflator = Conflator(lambda message, name: calls.append((name, message)), interval=0.2)
+        for i in range(100):
+            conflator.put(i, name='book')
+        # The first update goes straight through and the rest wait for the interval
+        self.assertEqual([('book', 0)], calls)
+
+        deadline = time.time() + 5
+        while len(calls) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual([('book', 0), ('book', 99)], calls)
+        self.assertEqual((100, 2), (conflator.received, conflator.calls))
+
+        # Once the interval has passed an update is delivered right away, then the pending update is dropped by stop()
+        time.sleep(0.25)
+        conflator.put(100, name='book')
+        conflator.put(101, name='book')
+        conflator.stop()
+        time.sleep(0.3)
+        self.assertEqual([('book', 0), ('book', 99), ('book', 100)], calls)
+
+    def test_updates_or_interval(self):
+        calls = []
+        conflator = Conflator(calls.append, updates=10)
+        for i in range(1, 26):
+            conflator.put(i)
+        self.assertEqual([10, 20], calls)
+
+        calls.clear()
+        conflator = Conflator(calls.append, interval=60, updates=5)
+        for i in range(12):
+            conflator.put(i)
+        conflator.flush()
+        self.assertEqual([0, 5, 10, 11], calls)
+        conflator.stop()
+
+        with self.assertRaises(ValueError):
+            Conflator(calls.append)
+
+    def test_slow_callback_doesnt_block_updates(self):
+        calls = []
+        entered = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow(message):
+            calls.append(message)
+            entered.set()
+            release.wait(5)
+
+        conflator = Conflator(slow, interval=0.05)
+        delivering = threading.Thread(target=conflator.put, args=(0,))
+        delivering.start()
+        self.assertTrue(entered.wait(5))
+
+        # The callback is busy on another thread but updates are still taken right away
+        started = time.time()
+        for i in range(1, 50):
+            conflator.put(i)
+        self.assertLess(time.time() - started, 1)
+
+        release.set()
+        delivering.join(5)
+        deadline = time.time() + 5
+        while calls[-1] != 49 and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertEqual([0, 49], calls)
+        conflator.stop()
+
+
+class ConflatedOrderbookTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+
+    def test_every_update_is_applied(self):
+        manager = OrderbookManager('coinbase_pro', 'BTC-USD')
+        books = []
+        delivered = []
+
+        def on_book(book, name):
+            delivered.append(book)
+            books.append((name, book.best_bid, len(book['bids'])))
+
+        manager.create_orderbook(on_book, initially_stopped=True, conflation_updates=50, name='conflated')
+        websocket = manager.get_ticker('BTC-USD')
+        websocket.inject(json.dumps({'type': 'snapshot', 'product_id': 'BTC-USD', 'bids': [['99', '1']],
+                                     'asks': [['101', '1']]}))
+
+        for i in range(1, 101):
+            websocket.inject(level2_update(99 + i / 1000, 1))
+        # Two calls for a hundred changes, each seeing every level applied so far
+        self.assertEqual([('conflated', 99.05, 51), ('conflated', 99.1, 101)], books)
+        # Each call is given a snapshot that later updates don't change
+        self.assertIsNot(manager.get_most_recent_orderbook('BTC-USD'), delivered[0])
+        self.assertEqual(51, len(delivered[0]['bids']))
+
+
+if __name__ == '__main__':
+    unittest.main()
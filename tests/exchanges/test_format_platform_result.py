@@ -0,0 +1,76 @@
+"""
+    Tests for exporting backtest results
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import io
+import json
+import unittest
+from types import SimpleNamespace
+
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest.format_platform_result import format_platform_result, \
+    write_platform_result
+
+
+class FormatPlatformResult(unittest.TestCase):
+    def setUp(self) -> None:
+        metric_names = ['Calmar Ratio', 'Compound Annual Growth Rate (%)', 'Conditional Value-at-Risk',
+                        'Cumulative Returns (%)', 'Max Drawdown (%)', 'Resampled Time', 'Risk Free Return Rate',
+                        'Sharpe Ratio', 'Sortino Ratio', 'Value-at-Risk', 'Variance (%)', 'Volatility']
+        self.result = SimpleNamespace(
+            exchange='coinbase_pro',
+            quote_currency='USD',
+            start_time=0,
+            stop_time=30,
+            user_callbacks=[],
+            metrics={name: 1.0 for name in metric_names},
+            history_and_returns={
+                'history': pd.DataFrame({'time': [0, 10, 10, 20], 'Account Value (USD)': [100, 101, 102, 103]})
+            },
+            trades={
+                'created': [
+                    {'id': 'a', 'symbol': 'BTC-USD', 'type': 'limit', 'created_at': 1},
+                    {'id': 'b', 'symbol': 'ETH-USD', 'type': 'limit', 'created_at': 2},
+                    {'id': 'c', 'symbol': 'BTC-USD', 'type': 'market', 'created_at': 3}
+                ],
+                'limits_executed': [{'id': 'a', 'executed_time': 5}],
+                'limits_canceled': [{'id': 'b', 'canceled_time': 6}],
+                'executed_market_orders': [{'id': 'c', 'executed_price': 42}]
+            })
+
+    def test_format(self):
+        platform_result = format_platform_result(self.result)
+
+        self.assertEqual(['BTC-USD', 'ETH-USD'], platform_result['symbols'])
+        self.assertEqual([{'time': 0, 'value': 100}, {'time': 10, 'value': 102}, {'time': 20, 'value': 103}],
+                         platform_result['account_values'])
+        self.assertEqual(100, platform_result['initial_account_value'])
+        self.assertEqual(103, platform_result['final_account_value'])
+
+        trades = platform_result['trades']
+        self.assertEqual(5, trades[0]['executed_time'])
+        self.assertEqual(6, trades[1]['canceled_time'])
+        self.assertEqual('spot-market', trades[2]['type'])
+        self.assertEqual(42, trades[2]['price'])
+        self.assertEqual(3, trades[2]['time'])
+
+    def test_stream(self):
+        platform_result = format_platform_result(self.result)
+        file = io.StringIO()
+        write_platform_result(platform_result, file, chunk_size=2)
+        self.assertEqual(platform_result, json.loads(file.getvalue()))
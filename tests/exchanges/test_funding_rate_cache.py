@@ -0,0 +1,97 @@
+"""
+    Tests for the disk backed funding rate history
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+
+from blankly.exchanges.interfaces.paper_trade.futures.funding_rate_cache import FundingRateCache, \
+    FUNDING_RATE_FOLDER
+
+RESOLUTION = 8 * 3600
+START = 1640995200  # 2022-01-01
+
+
+class FakeFuturesInterface:
+    def __init__(self):
+        self.calls = []
+
+    def get_funding_rate_history(self, symbol: str, epoch_start: int, epoch_stop: int) -> list:
+        self.calls.append((epoch_start, epoch_stop))
+        if symbol != 'BTC-USDT':
+            return []
+        first = epoch_start - (epoch_start % RESOLUTION)
+        if first < epoch_start:
+            first += RESOLUTION
+        return [{'rate': (t - START) / RESOLUTION * 0.0001, 'time': t}
+                for t in range(first, epoch_stop + 1, RESOLUTION)]
+
+
+class FundingRateCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.interface = FakeFuturesInterface()
+        self.cache = FundingRateCache('binance_futures', self.interface, self.directory.name)
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_history_is_downloaded_once(self):
+        times, rates = self.cache.history('BTC-USDT', START, START + 10 * RESOLUTION)
+        self.assertEqual(11, len(times))
+        self.cache.history('BTC-USDT', START + RESOLUTION, START + 5 * RESOLUTION)
+        self.assertEqual(1, len(self.interface.calls))
+
+        # A new run reads the file instead of the exchange
+        interface = FakeFuturesInterface()
+        cached_times, cached_rates = FundingRateCache('binance_futures', interface, self.directory.name) \
+            .history('BTC-USDT', START, START + 10 * RESOLUTION)
+        self.assertEqual([], interface.calls)
+        self.assertEqual(times.tolist(), cached_times.tolist())
+        self.assertEqual(rates.tolist(), cached_rates.tolist())
+
+    def test_only_missing_window_is_downloaded(self):
+        self.cache.history('BTC-USDT', START, START + 10 * RESOLUTION)
+        times, _ = self.cache.history('BTC-USDT', START, START + 20 * RESOLUTION)
+
+        self.assertEqual([(START + 10 * RESOLUTION, START + 20 * RESOLUTION)], self.interface.calls[1:])
+        self.assertEqual(21, len(times))
+        self.assertEqual(len(times), len(set(times.tolist())))
+        # The old file is replaced by the extended one
+        self.assertEqual(1, len(os.listdir(os.path.join(self.directory.name, FUNDING_RATE_FOLDER))))
+
+    def test_rate_at(self):
+        self.cache.history('BTC-USDT', START, START + 10 * RESOLUTION)
+
+        rate, next_time = self.cache.rate_at('BTC-USDT', START + 3 * RESOLUTION + 60, RESOLUTION)
+        self.assertAlmostEqual(0.0003, rate)
+        self.assertEqual(START + 4 * RESOLUTION, next_time)
+
+        # Funding exactly at the time hasn't happened yet
+        rate, next_time = self.cache.rate_at('BTC-USDT', START + 3 * RESOLUTION, RESOLUTION)
+        self.assertAlmostEqual(0.0002, rate)
+        self.assertEqual(START + 3 * RESOLUTION, next_time)
+
+        # Nothing is downloaded again for lookups inside the cached window
+        self.assertEqual(1, len(self.interface.calls))
+
+        self.assertIsNone(self.cache.rate_at('ETH-USDT', START, RESOLUTION))
+
+
+if __name__ == '__main__':
+    unittest.main()
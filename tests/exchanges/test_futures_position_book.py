@@ -0,0 +1,115 @@
+"""
+    Tests for the futures paper trade position book
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import unittest
+from pathlib import Path
+
+from blankly.enums import Side, OrderStatus
+from blankly.exchanges.interfaces.paper_trade.futures.futures_paper_trade_interface import FuturesPaperTradeInterface
+from blankly.exchanges.interfaces.paper_trade.futures.position_book import LimitBook
+
+
+class FakeFuturesInterface:
+    calls = None
+
+    @staticmethod
+    def init_exchange():
+        pass
+
+    @staticmethod
+    def get_exchange_type():
+        return 'binance_futures'
+
+    @staticmethod
+    def get_products(symbol=None):
+        return {'symbol': symbol, 'size_precision': 3, 'price_precision': 2}
+
+    @staticmethod
+    def get_taker_fee():
+        return 0.0
+
+    @staticmethod
+    def get_maker_fee():
+        return 0.0
+
+
+class LimitBookTest(unittest.TestCase):
+    def test_triggers(self):
+        book = LimitBook()
+        book.add(1, 95, True)
+        book.add(2, 90, True)
+        book.add(3, 105, False)
+        book.add(4, 95, True)
+        book.remove(4, 95, True)
+
+        self.assertEqual([], book.pop_triggered(100))
+        self.assertEqual([1], book.pop_triggered(95))
+        self.assertEqual([3], book.pop_triggered(110))
+        self.assertEqual(1, len(book))
+
+
+class FuturesPositionBook(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+
+        self.interface = FuturesPaperTradeInterface('binance_futures_paper_trade', FakeFuturesInterface(),
+                                                    {'USDT': 1000})
+        self.interface.set_backtesting(True)
+        self.interface.receive_time(0)
+        self.interface.receive_price('BTC-USDT', 100)
+        self.interface.receive_price('ETH-USDT', 10)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+
+    def test_limit_fills(self):
+        filled = self.interface.limit_order('BTC-USDT', Side.BUY, 95, 2)
+        resting = self.interface.limit_order('BTC-USDT', Side.BUY, 90, 1)
+        canceled = self.interface.limit_order('ETH-USDT', Side.BUY, 9, 1)
+        self.assertIsNone(self.interface.get_position('BTC-USDT'))
+
+        self.interface.cancel_order('ETH-USDT', canceled.id)
+        self.interface.receive_price('BTC-USDT', 94)
+        self.interface.receive_price('ETH-USDT', 8)
+        self.interface.evaluate_limits()
+
+        position = self.interface.get_position('BTC-USDT')
+        self.assertEqual(2, position['size'])
+        self.assertEqual(190, position['exchange_specific']['entry_price'])
+        self.assertEqual([resting.id], [order.id for order in self.interface.get_open_orders()])
+        self.assertEqual(OrderStatus.FILLED, self.interface._executed_orders[filled.id].status)
+        self.assertNotIn('ETH-USDT', self.interface.get_position())
+
+    def test_margin_call(self):
+        self.interface.set_leverage(5)
+        self.interface.market_order('BTC-USDT', Side.BUY, 5)
+        self.interface.market_order('ETH-USDT', Side.BUY, 10)
+        self.assertEqual(2, len(self.interface.get_position()))
+
+        # At 5x a 50% drop leaves the position worth -750, more than the 400 of cash left
+        self.interface.receive_price('BTC-USDT', 50)
+        self.interface.evaluate_limits()
+
+        self.assertEqual(['ETH-USDT'], list(self.interface.get_position()))
+        self.assertEqual(0, self.interface.get_account('BTC-PERP')['available'])
+
+
+if __name__ == '__main__':
+    unittest.main()
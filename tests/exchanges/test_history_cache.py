@@ -0,0 +1,111 @@
+"""
+    Tests for the live history cache
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.abc_base_exchange_interface import ABCBaseExchangeInterface
+from blankly.exchanges.interfaces.history_cache import HistoryCache
+
+START = 1640995200
+RESOLUTION = 60
+
+
+def candles(epoch_start, epoch_stop):
+    times = np.arange(epoch_start, epoch_stop + 1, RESOLUTION)
+    close = times / 1000
+    return pd.DataFrame({'time': times, 'low': close, 'high': close, 'open': close, 'close': close,
+                         'volume': np.ones(len(times))})
+
+
+class FakeInterface(ABCBaseExchangeInterface):
+    def __init__(self):
+        self.history_cache = HistoryCache('coinbase_pro')
+        self.downloaded = []
+
+    def get_exchange_type(self):
+        return 'coinbase_pro'
+
+    def get_product_history(self, symbol, epoch_start, epoch_stop, resolution):
+        self.downloaded.append((epoch_start, epoch_stop))
+        return candles(epoch_start, epoch_stop)
+
+
+class HistoryCacheTest(unittest.TestCase):
+    def test_only_new_candles_are_downloaded(self):
+        interface = FakeInterface()
+        for bar in range(10):
+            end = START + (200 + bar) * RESOLUTION
+            history = interface.history('BTC-USD', to=200, resolution=RESOLUTION, end_date=end)
+            # Matches an uncached download of the same window
+            start, stop, _, _, _ = interface.calculate_epochs(None, end, RESOLUTION, 200)
+            pd.testing.assert_frame_equal(history, candles(start, stop))
+
+        # The first call downloads the window, then one candle per bar
+        self.assertEqual(len(interface.downloaded), 10)
+        self.assertEqual(interface.history_cache.requested_bars, 200 + 9)
+
+        # Windows that are already covered aren't downloaded again
+        interface.history('BTC-USD', to=50, resolution=RESOLUTION, end_date=START + 205 * RESOLUTION)
+        interface.history('BTC-USD', resolution=RESOLUTION, start_date=float(START + 10 * RESOLUTION),
+                          end_date=START + 100 * RESOLUTION)
+        self.assertEqual(len(interface.downloaded), 10)
+
+        # Reaching further back downloads the window again
+        interface.history('BTC-USD', to=500, resolution=RESOLUTION, end_date=START + 209 * RESOLUTION)
+        self.assertEqual(len(interface.downloaded), 11)
+
+    def test_present_window_waits_for_missing_candle(self):
+        cache = HistoryCache('coinbase_pro')
+        downloads = []
+
+        def loader(epoch_start, epoch_stop, to):
+            downloads.append((epoch_start, epoch_stop, to))
+            # The exchange hasn't published the last candle yet
+            return candles(epoch_start, epoch_stop - RESOLUTION)
+
+        stop = START + 99 * RESOLUTION
+        self.assertEqual(len(cache.history('BTC-USD', START, stop, RESOLUTION, 100, True, loader)), 99)
+        cache.history('BTC-USD', START, stop, RESOLUTION, 100, True, loader)
+        # The missing candle is asked for again instead of being treated as cached
+        self.assertEqual(downloads[-1], (stop, stop, 1))
+
+    def test_seed_from_price_caches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            stop = START + 99 * RESOLUTION
+            candles(START, stop).to_csv(os.path.join(directory, f'coinbase_pro,True,BTC-USD,{START},'
+                                                                f'{stop + RESOLUTION},{RESOLUTION}.csv'), index=False)
+            cache = HistoryCache('coinbase_pro', seed_from_price_caches=True, price_cache_location=directory)
+            downloads = []
+
+            def loader(epoch_start, epoch_stop, to):
+                downloads.append((epoch_start, epoch_stop))
+                return candles(epoch_start, epoch_stop)
+
+            history = cache.history('BTC-USD', START + 50 * RESOLUTION, stop + 2 * RESOLUTION, RESOLUTION, None,
+                                    False, loader)
+            self.assertEqual(downloads, [(stop + RESOLUTION, stop + 2 * RESOLUTION)])
+            self.assertEqual(len(history), 52)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""
+    Tests for sharing websockets & orderbooks between subscribers with the market data hub
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from blankly.exchanges.managers.market_data_hub import MarketDataHub, SharedTickerManager, SharedOrderbookManager
+from blankly.exchanges.simulated import SimulatedExchange
+from blankly.utils.utils import load_user_preferences
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+class MarketDataHubTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.server = SimulatedExchange(symbols=['BTC-USD'], message_rate=50).start()
+
+        settings = load_user_preferences()['settings']
+        previous_url = settings['simulated_exchange_url']
+        settings['simulated_exchange_url'] = self.server.url
+
+        def restore():
+            settings['simulated_exchange_url'] = previous_url
+        self.addCleanup(restore)
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        os.chdir(self.cwd)
+
+    def test_strategies_share_one_ticker(self):
+        hub = MarketDataHub()
+        ticks = {'first': [], 'second': []}
+
+        def on_tick(tick, name):
+            ticks[name].append(tick)
+
+        managers = [SharedTickerManager(hub, 'coinbase_pro') for _ in range(2)]
+        for manager, name in zip(managers, ticks):
+            manager.create_ticker(on_tick, override_symbol='BTC-USD', initially_stopped=True, name=name)
+        self.assertFalse(hub.get_feeds()[('ticker', 'coinbase_pro', 'BTC-USD')]['open'])
+
+        for manager in managers:
+            manager.restart_ticker('BTC-USD')
+        self.assertTrue(wait_for(lambda: ticks['first'] and ticks['second']))
+        self.assertEqual(1, self.server.stats()['subscriptions'])
+        self.assertEqual(1, self.server.stats()['open_connections'])
+        # Both received the same parsed message
+        self.assertTrue({id(tick) for tick in ticks['first']} & {id(tick) for tick in ticks['second']})
+
+        # The connection stays open for the remaining subscriber
+        managers[0].close_websocket('BTC-USD')
+        received = len(ticks['second'])
+        self.assertTrue(wait_for(lambda: len(ticks['second']) > received))
+        self.assertTrue(managers[1].is_websocket_open('BTC-USD'))
+        self.assertEqual(1, hub.get_feeds()[('ticker', 'coinbase_pro', 'BTC-USD')]['subscribers'])
+
+        managers[1].close_websocket('BTC-USD')
+        self.assertEqual({}, hub.get_feeds())
+        self.assertIsNone(managers[0].get_most_recent_tick('BTC-USD'))
+        self.assertIsNone(managers[0].subscriptions[('coinbase_pro', 'BTC-USD')][0].get_most_recent_tick())
+        self.assertTrue(wait_for(lambda: self.server.stats()['open_connections'] == 0))
+
+    def test_slow_subscriber_doesnt_hold_up_the_feed(self):
+        hub = MarketDataHub()
+        release = threading.Event()
+        self.addCleanup(release.set)
+        fast = []
+
+        slow = hub.subscribe_ticker('coinbase_pro', 'BTC-USD', lambda tick: release.wait(5),
+                                    dispatch_policy='drop_oldest', queue_size=5)
+        subscription = hub.subscribe_ticker('coinbase_pro', 'BTC-USD', lambda tick: fast.append(tick),
+                                            dispatch_policy='drop_oldest')
+        self.assertTrue(wait_for(lambda: len(fast) > 20))
+
+        metrics = hub.get_feeds()[('ticker', 'coinbase_pro', 'BTC-USD')]['dispatch']
+        self.assertEqual(5, metrics[0]['depth'])
+        self.assertGreater(metrics[0]['dropped'], 0)
+        self.assertEqual(0, metrics[1].get('dropped', 0))
+
+        release.set()
+        slow.close()
+        self.assertEqual(1, hub.get_feeds()[('ticker', 'coinbase_pro', 'BTC-USD')]['subscribers'])
+        subscription.close()
+
+    def test_strategies_share_one_book(self):
+        hub = MarketDataHub()
+        books = []
+        updated = threading.Event()
+
+        def on_book(book):
+            books.append(book)
+            updated.set()
+
+        managers = [SharedOrderbookManager(hub, 'coinbase_pro') for _ in range(3)]
+        for manager in managers:
+            manager.create_orderbook(on_book, override_symbol='BTC-USD', dispatch_policy='inline')
+        self.assertTrue(updated.wait(5))
+        self.assertTrue(wait_for(lambda: len(books) >= 3))
+
+        self.assertEqual(1, self.server.stats()['open_connections'])
+        self.assertTrue(all(book is books[0] for book in books))
+        self.assertIs(books[0], managers[2].get_most_recent_orderbook('BTC-USD'))
+
+        # Callbacks on their own thread get a snapshot the feed doesn't change
+        snapshots = []
+        queued = managers[0].create_orderbook(snapshots.append, override_symbol='BTC-USD', dispatch_policy='block')
+        self.assertTrue(wait_for(lambda: snapshots))
+        self.assertIsNot(books[0], snapshots[0])
+        bids = list(snapshots[0]['bids'])
+        self.assertTrue(wait_for(lambda: len(snapshots) > 3))
+        self.assertEqual(bids, snapshots[0]['bids'])
+        queued.close()
+
+        for manager in managers:
+            manager.close_all_websockets()
+        self.assertEqual({}, hub.get_feeds())
+
+        # The dropped feed no longer publishes, so a new one is the only callback on the book
+        orderbook_manager = hub.get_orderbook_manager('coinbase_pro')
+        callbacks = orderbook_manager._OrderbookManager__websockets_callbacks['coinbase_pro']
+        self.assertEqual([], callbacks['BTC-USD'])
+        subscription = hub.subscribe_orderbook('coinbase_pro', 'BTC-USD', on_book, initially_stopped=True)
+        self.assertEqual(1, len(callbacks['BTC-USD']))
+        subscription.close()
+
+    def test_drop_binance_book(self):
+        hub = MarketDataHub()
+        books = []
+        # The binance book downloads a snapshot over REST when it's created
+        with mock.patch('blankly.exchanges.managers.orderbook_manager.binance_snapshot',
+                        return_value=([(99.0, 1.0)], [(101.0, 1.0)])):
+            subscription = hub.subscribe_orderbook('binance', 'BTC-USDT', books.append, initially_stopped=True)
+
+        orderbook_manager = hub.get_orderbook_manager('binance')
+        callbacks = orderbook_manager._OrderbookManager__websockets_callbacks['binance']
+        self.assertEqual(1, len(callbacks['BTCUSDT']))
+        self.assertEqual([(99.0, 1.0)], orderbook_manager.get_most_recent_orderbook('BTC-USDT', 'binance')['bids'])
+
+        subscription.close()
+        self.assertEqual({}, hub.get_feeds())
+        self.assertEqual([], callbacks['BTCUSDT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
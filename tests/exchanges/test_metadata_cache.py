@@ -0,0 +1,123 @@
+"""
+    Tests for the exchange metadata cache
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import tempfile
+import threading
+import time
+import unittest
+
+from blankly.exchanges.interfaces.metadata_cache import MetadataCache, cached_metadata, get_metadata_cache
+
+
+class FakeInterface:
+    def __init__(self, cache):
+        self.metadata_cache = cache
+        self.downloads = 0
+
+    @cached_metadata('products')
+    def get_products(self):
+        self.downloads += 1
+        return [{'symbol': 'BTC-USD', 'base_increment': 0.0001}, {'symbol': 'ETH-USD', 'base_increment': 0.001}]
+
+    @cached_metadata('fees')
+    def get_fees(self, symbol):
+        self.downloads += 1
+        return {'maker_fee_rate': 0.001, 'taker_fee_rate': 0.002}
+
+
+class FakeAPI:
+    def __init__(self, api_key, api_url='https://api.exchange.com'):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.session = object()
+
+
+class MetadataCacheTest(unittest.TestCase):
+    def test_lookup(self):
+        interface = FakeInterface(MetadataCache('test'))
+        for _ in range(5):
+            product = interface.metadata_cache.lookup('products', 'symbol', 'ETH-USD', interface.get_products)
+            self.assertEqual(0.001, product['base_increment'])
+        self.assertIsNone(interface.metadata_cache.lookup('products', 'symbol', 'DOGE-USD', interface.get_products))
+        self.assertEqual(1, interface.downloads)
+
+        # Callers get copies
+        product['base_increment'] = 5
+        self.assertEqual(0.001, interface.get_products()[1]['base_increment'])
+
+    def test_ttl_and_invalidate(self):
+        interface = FakeInterface(MetadataCache('test', fees_ttl=.05))
+        interface.get_fees('BTC-USD')
+        interface.get_fees('BTC-USD')
+        self.assertEqual(1, interface.downloads)
+
+        time.sleep(.1)
+        interface.get_fees('BTC-USD')
+        self.assertEqual(2, interface.downloads)
+
+        interface.metadata_cache.invalidate('fees', 'BTC-USD')
+        interface.get_fees('BTC-USD')
+        self.assertEqual(3, interface.downloads)
+
+    def test_persist(self):
+        with tempfile.TemporaryDirectory() as directory:
+            interface = FakeInterface(MetadataCache('test', persist=True, cache_location=directory))
+            interface.get_products()
+
+            # A new cache starts warm from disk
+            restarted = FakeInterface(MetadataCache('test', persist=True, cache_location=directory))
+            self.assertEqual(2, len(restarted.get_products()))
+            self.assertEqual(0, restarted.downloads)
+
+    def test_accounts_dont_share(self):
+        cache = get_metadata_cache('test_accounts', authenticated_api=FakeAPI('first'))
+        self.assertIs(cache, get_metadata_cache('test_accounts', authenticated_api=FakeAPI('first')))
+        self.assertIsNot(cache, get_metadata_cache('test_accounts', authenticated_api=FakeAPI('second')))
+        self.assertIsNot(cache, get_metadata_cache('test_accounts', authenticated_api=FakeAPI(
+            'first', 'https://sandbox.exchange.com')))
+
+        # Paper trade wraps the live interface but keeps its own fees
+        paper = get_metadata_cache('test_accounts', authenticated_api=FakeInterface(cache))
+        self.assertIsNot(cache, paper)
+        self.assertNotIn('first', cache.account)
+
+    def test_concurrent_misses_share_one_download(self):
+        cache = MetadataCache('test')
+        release = threading.Event()
+        downloads = []
+
+        def slow_loader():
+            downloads.append(1)
+            release.wait(5)
+            return {'maker_fee_rate': 0.001}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('fees', 'BTC-USD', slow_loader)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(.1)
+
+        # The lock isn't held during the download so other keys are still served
+        self.assertEqual({'maker_fee_rate': 0.002}, cache.get('fees', 'ETH-USD', lambda: {'maker_fee_rate': 0.002}))
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(downloads))
+        self.assertEqual([{'maker_fee_rate': 0.001}] * 5, results)
@@ -0,0 +1,165 @@
+"""
+    Tests for the Oanda pricing stream ticker against a local chunked HTTP server
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+from blankly.exchanges.interfaces.oanda.oanda_websocket import Tickers
+
+PRICES = {'EUR_USD': (1.081, 1.0812), 'USD_JPY': (150.1, 150.12)}
+
+
+class StreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, stall_first: bool = False):
+        super().__init__(('127.0.0.1', 0), StreamHandler)
+        self.stall_first = stall_first
+        self.requests = []
+        self.authorization = None
+        self.stopped = threading.Event()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def write_line(self, message: dict):
+        data = json.dumps(message).encode() + b'\n'
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        instruments = parse_qs(url.query)['instruments'][0].split(',')
+        self.server.requests.append((url.path, instruments))
+        self.server.authorization = self.headers['Authorization']
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        # The first connection goes silent to look like a dropped heartbeat
+        if self.server.stall_first and len(self.server.requests) == 1:
+            self.server.stopped.wait(2)
+            return
+
+        try:
+            while not self.server.stopped.is_set():
+                for instrument in instruments:
+                    bid, ask = PRICES[instrument]
+                    self.write_line({'type': 'PRICE', 'instrument': instrument, 'time': f'{time.time():.9f}',
+                                     'bids': [{'price': str(bid), 'liquidity': 1000000}],
+                                     'asks': [{'price': str(ask), 'liquidity': 1000000}],
+                                     'closeoutBid': str(bid), 'closeoutAsk': str(ask), 'tradeable': True})
+                self.write_line({'type': 'HEARTBEAT', 'time': f'{time.time():.9f}'})
+                time.sleep(0.02)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class OandaPricingStreamTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+
+    def start_server(self, **kwargs) -> StreamServer:
+        server = StreamServer(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        def stop():
+            server.stopped.set()
+            server.shutdown()
+            server.server_close()
+        self.addCleanup(stop)
+        return server
+
+    def ticker(self, server: StreamServer, symbol: str, **kwargs) -> Tickers:
+        ticker = Tickers(symbol, 'pricing', stream_url=server.url, personal_access_token='token',
+                         account_id='account', **kwargs)
+        self.addCleanup(ticker.close_websocket)
+        return ticker
+
+    def test_instruments_share_one_stream(self):
+        server = self.start_server()
+        received = {'EUR-USD': threading.Event(), 'USD-JPY': threading.Event()}
+        ticks = []
+
+        def on_tick(tick):
+            ticks.append(tick)
+            received[tick['symbol']].set()
+
+        eur_usd = self.ticker(server, 'EUR-USD')
+        eur_usd.append_callback(on_tick)
+        usd_jpy = self.ticker(server, 'USD-JPY')
+        usd_jpy.append_callback(on_tick)
+
+        self.assertIs(eur_usd.pricing_stream, usd_jpy.pricing_stream)
+        self.assertTrue(received['EUR-USD'].wait(5))
+        self.assertTrue(received['USD-JPY'].wait(5))
+        self.assertEqual(['EUR_USD', 'USD_JPY'], server.requests[-1][1])
+        self.assertEqual('/v3/accounts/account/pricing/stream', server.requests[-1][0])
+        self.assertEqual('Bearer token', server.authorization)
+
+        tick = eur_usd.get_most_recent_tick()
+        self.assertEqual('EUR-USD', tick['symbol'])
+        self.assertAlmostEqual(1.0811, tick['price'])
+        self.assertEqual((1.081, 1.0812), (tick['bid'], tick['ask']))
+        self.assertAlmostEqual(time.time(), eur_usd.get_most_recent_time(), delta=5)
+        self.assertTrue(all(tick['symbol'] == 'EUR-USD' for tick in eur_usd.get_feed()))
+        self.assertTrue(eur_usd.is_websocket_open())
+
+        # Closing one ticker leaves the other streaming
+        eur_usd.close_websocket()
+        deadline = time.time() + 5
+        while server.requests[-1][1] != ['USD_JPY'] and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(['USD_JPY'], server.requests[-1][1])
+        self.assertTrue(usd_jpy.is_websocket_open())
+
+    def test_reconnects_after_heartbeat_loss(self):
+        server = self.start_server(stall_first=True)
+        received = threading.Event()
+
+        ticker = self.ticker(server, 'EUR-USD', heartbeat_timeout=0.3)
+        ticker.pricing_stream.reconnect_delay = 0.05
+        ticker.append_callback(lambda tick: received.set())
+
+        self.assertTrue(received.wait(5))
+        self.assertEqual(2, len(server.requests))
+        self.assertEqual(2, ticker.pricing_stream.connections)
+
+
+if __name__ == '__main__':
+    unittest.main()
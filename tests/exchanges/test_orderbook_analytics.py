@@ -0,0 +1,114 @@
+"""
+    Tests for the analytics maintained on the orderbook as deltas are applied
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+import unittest
+
+from blankly.exchanges.managers.orderbook import Orderbook
+
+
+def walk_depth(book: Orderbook, side: str, bps: float = None) -> float:
+    mid = book.mid
+    total = 0.0
+    for price, size in book[side]:
+        if bps is None or mid is None or \
+                (price >= mid * (1 - bps / 10000) if side == 'bids' else price <= mid * (1 + bps / 10000)):
+            total += size
+    return total
+
+
+def walk_vwap(book: Orderbook, side: str, size: float):
+    levels = book['asks'] if side == 'buy' else list(reversed(book['bids']))
+    remaining, notional = size, 0.0
+    for price, level_size in levels:
+        filled = min(remaining, level_size)
+        notional += filled * price
+        remaining -= filled
+        if remaining <= 0:
+            return notional / size
+    return None
+
+
+class OrderbookAnalyticsTest(unittest.TestCase):
+    def test_top_of_book(self):
+        book = Orderbook([(99, 1), (98, 3)], [(101, 2), (103, 4)])
+        self.assertEqual(100, book.mid)
+        self.assertEqual(2, book.spread)
+        self.assertAlmostEqual((1 - 2) / 3, book.imbalance())
+
+        # Within 150 bps of 100 is 98.5 to 101.5
+        self.assertEqual(1, book.depth('bids', bps=150))
+        self.assertEqual(2, book.depth('asks', bps=150))
+        self.assertEqual(4, book.depth('bids'))
+        self.assertAlmostEqual((1 - 2) / 3, book.imbalance(bps=150))
+
+        self.assertEqual(101, book.vwap('buy', 1))
+        self.assertAlmostEqual((2 * 101 + 1 * 103) / 3, book.vwap('buy', 3))
+        self.assertAlmostEqual((99 + 3 * 98) / 4, book.vwap('sell', 4))
+        self.assertIsNone(book.vwap('sell', 5))
+
+        empty = Orderbook()
+        self.assertIsNone(empty.mid)
+        self.assertIsNone(empty.spread)
+        self.assertIsNone(empty.imbalance())
+        self.assertEqual(0, empty.depth('asks', bps=10))
+        self.assertIsNone(empty.vwap('buy', 1))
+
+    def test_matches_walking_the_book(self):
+        generator = random.Random(7)
+        book = Orderbook([(100 - i * 0.5, generator.randint(1, 5)) for i in range(1, 40)],
+                         [(100 + i * 0.5, generator.randint(1, 5)) for i in range(1, 40)])
+
+        for step in range(2000):
+            side = generator.choice(['bids', 'asks'])
+            offset = generator.randint(1, 60) * 0.5
+            price = 100 - offset if side == 'bids' else 100 + offset
+            # Removes, inserts and changes anywhere in the book
+            size = generator.choice([0, 0, generator.randint(1, 9)])
+            if side == 'bids':
+                book.apply([(price, size)], [])
+            else:
+                book.apply([], [(price, size)])
+
+            # Read the analytics every few deltas so stale levels build up in between
+            if step % 7 == 0:
+                for book_side in ('bids', 'asks'):
+                    for bps in (None, 10, 100, 1000):
+                        self.assertAlmostEqual(walk_depth(book, book_side, bps), book.depth(book_side, bps))
+                for order_side in ('buy', 'sell'):
+                    for size in (0.5, 3, 17, 80):
+                        expected = walk_vwap(book, order_side, size)
+                        if expected is None:
+                            self.assertIsNone(book.vwap(order_side, size))
+                        else:
+                            self.assertAlmostEqual(expected, book.vwap(order_side, size))
+
+        copy = book.snapshot()
+        book.apply([(100 - 0.5, 0)], [(100 + 0.5, 50)])
+        self.assertNotEqual(copy['asks'], book['asks'])
+        for book_side in ('bids', 'asks'):
+            self.assertAlmostEqual(walk_depth(copy, book_side, 100), copy.depth(book_side, 100))
+        self.assertAlmostEqual(walk_vwap(copy, 'buy', 17), copy.vwap('buy', 17))
+
+        book.set_snapshot([(99, 2)], [(101, 2)])
+        self.assertEqual(0, book.imbalance(bps=500))
+        self.assertEqual(2, book.depth('asks'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""
+    Tests for orderbook maintenance & replaying recorded orderbooks into backtests
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from blankly.data.orderbook_reader import OrderbookReader
+from blankly.exchanges.interfaces.paper_trade.backtest_controller import BackTestController
+from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from blankly.exchanges.managers.orderbook import Orderbook
+from tests.exchanges.test_vectorized_backtest import FakeInterface, FakePaperTrade
+
+START = 1640995200
+RESOLUTION = 3600
+BARS = 6
+
+
+class ReplayModel:
+    def __init__(self):
+        self.has_data = True
+        self.backtester = None
+        self.updates = []
+        self.order = None
+
+    def main(self, args):
+        while self.has_data:
+            self.backtester.value_account()
+            self.backtester.sleep(RESOLUTION)
+
+    def orderbook_update(self, symbol, book):
+        self.updates.append((self.backtester.time, symbol, book.best_bid, book.best_ask))
+        if self.order is None:
+            self.order = self.backtester.interface.limit_order(symbol, 'buy', 99.5, 1)
+
+    def teardown(self):
+        pass
+
+
+class OrderbookReplay(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp = tempfile.TemporaryDirectory()
+        # Unrecognized files in the price cache are removed by the backtester
+        self.cache = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.temp.cleanup()
+        self.cache.cleanup()
+
+    def write_normalized(self, rows: list) -> str:
+        path = os.path.join(self.temp.name, 'book.csv')
+        pd.DataFrame(rows, columns=['time', 'symbol', 'side', 'price', 'size', 'snapshot']).to_csv(path, index=False)
+        return path
+
+    def test_book_levels(self):
+        book = Orderbook([(99, 1), (98, 2), (99, 3)], [(101, 1), (102, 0)])
+        # The later duplicate wins & empty levels are dropped
+        self.assertEqual(book['bids'], [(98.0, 2.0), (99.0, 3.0)])
+        self.assertEqual(book['asks'], [(101.0, 1.0)])
+
+        book.apply([(99.5, 1), (98, 0)], [(100.5, 2)])
+        self.assertEqual(book['bids'], [(99.0, 3.0), (99.5, 1.0)])
+        self.assertEqual((book.best_bid, book.best_ask), (99.5, 100.5))
+
+        book.set_level('asks', 100.5, 0)
+        book.set_level('asks', 101, 0)
+        self.assertIsNone(book.best_ask)
+
+    def test_normalized_messages_span_chunks(self):
+        rows = [
+            (START, 'BTC-USD', 'bids', 99, 1, True),
+            (START, 'BTC-USD', 'bids', 98, 2, True),
+            (START, 'BTC-USD', 'asks', 101, 1, True),
+            (START + 1, 'BTC-USD', 'buy', 99, 0, False),
+            (START + 1, 'BTC-USD', 'sell', 100, 4, False),
+            (START + 2, 'BTC-USD', 'bids', 98.5, 1, False),
+        ]
+        # Every chunk boundary lands inside a message
+        messages = list(OrderbookReader(self.write_normalized(rows), chunk_size=2))
+
+        self.assertEqual([message.time for message in messages], [START, START + 1, START + 2])
+        self.assertTrue(messages[0].snapshot)
+        self.assertEqual(messages[0].bids, [(99.0, 1.0), (98.0, 2.0)])
+        self.assertEqual(messages[1].bids, [(99.0, 0.0)])
+        self.assertEqual(messages[1].asks, [(100.0, 4.0)])
+
+        book = Orderbook()
+        for message in messages:
+            if message.snapshot:
+                book.set_snapshot(message.bids, message.asks)
+            else:
+                book.apply(message.bids, message.asks)
+        self.assertEqual(book['bids'], [(98.0, 2.0), (98.5, 1.0)])
+        self.assertEqual(book['asks'], [(100.0, 4.0), (101.0, 1.0)])
+
+    def test_native_coinbase_messages(self):
+        path = os.path.join(self.temp.name, 'book.jsonl')
+        with open(path, 'w') as file:
+            file.write(json.dumps({'time': START, 'snapshot': True, 'message': {
+                'type': 'snapshot', 'product_id': 'BTC-USD', 'bids': [['99.0', '1']], 'asks': [['101.0', '2']]
+            }}) + '\n')
+            file.write(json.dumps({'time': START + 1, 'message': {
+                'type': 'l2update', 'product_id': 'BTC-USD', 'changes': [['buy', '99.0', '0'], ['sell', '100', '1']]
+            }}) + '\n')
+
+        snapshot, update = OrderbookReader(path, exchange='coinbase_pro')
+        self.assertEqual((snapshot.symbol, snapshot.bids, snapshot.asks), ('BTC-USD', [(99.0, 1.0)], [(101.0, 2.0)]))
+        self.assertFalse(update.snapshot)
+        self.assertEqual((update.bids, update.asks), ([(99.0, 0.0)], [(100.0, 1.0)]))
+
+    def test_paper_orders_fill_against_book(self):
+        interface = PaperTradeInterface(FakeInterface())
+        interface.set_backtesting(True)
+        interface.receive_price('BTC-USD', 100)
+        interface.receive_time(START)
+        buy = interface.limit_order('BTC-USD', 'buy', 99.5, 1)
+
+        book = Orderbook([(99, 1)], [])
+        # No asks means nothing can be bought
+        interface.evaluate_orderbook('BTC-USD', book)
+        self.assertEqual(buy.get_status()['status'], 'pending')
+
+        book.set_level('asks', 99.2, 1)
+        interface.evaluate_orderbook('BTC-USD', book)
+        self.assertEqual(buy.get_status()['status'], 'done')
+
+    def test_backtest_replay(self):
+        cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        try:
+            # Prices never drop to the limit price so only the book can fill the order
+            close = 100 + np.arange(BARS)
+            pd.DataFrame({
+                'time': START + np.arange(BARS) * RESOLUTION,
+                'low': close, 'high': close, 'open': close, 'close': close, 'volume': np.ones(BARS)
+            }).to_csv(os.path.join(self.cache.name, f'coinbase_pro,True,BTC-USD,{START},'
+                                                   f'{START + BARS * RESOLUTION},{RESOLUTION}.csv'), index=False)
+
+            path = self.write_normalized([
+                (START + 100, 'BTC-USD', 'bids', 99, 1, True),
+                (START + 100, 'BTC-USD', 'asks', 101, 1, True),
+                (START + 3700, 'BTC-USD', 'asks', 99, 1, False),
+                (START + 7300, 'BTC-USD', 'asks', 99, 0, False),
+            ])
+
+            model = ReplayModel()
+            controller = BackTestController(model)
+            model.backtester = controller
+            controller.add_prices('BTC-USD', RESOLUTION, start_date=START, stop_date=START + BARS * RESOLUTION)
+            controller.add_orderbook_events(OrderbookReader(path))
+            result = controller.run(None, FakePaperTrade(PaperTradeInterface(FakeInterface())), None,
+                                    cache_location=self.cache.name, GUI_output=False,
+                                    show_progress_during_backtest=False)
+        finally:
+            os.chdir(cwd)
+
+        self.assertEqual([update[0] for update in model.updates], [START + 100, START + 3700, START + 7300])
+        self.assertEqual(model.updates[1][3], 99)
+        self.assertEqual(result.trades['limits_executed'][0]['executed_time'], START + 3700)
+        self.assertEqual(controller.orderbooks['BTC-USD']['asks'], [(101.0, 1.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
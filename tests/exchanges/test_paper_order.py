@@ -0,0 +1,90 @@
+"""
+    Tests for the compact paper trade order records
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import unittest
+from pathlib import Path
+
+from blankly.exchanges.interfaces.paper_trade.paper_order import PaperOrder
+from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from blankly.exchanges.interfaces.paper_trade.utils import OrderIdGenerator
+from tests.exchanges.test_paper_trade_fills import FakeInterface, FakeTickerManager
+
+
+class PaperOrderRecord(unittest.TestCase):
+    def test_market_keys(self):
+        order = PaperOrder('BTC-USD', 'abc', 1.0, 2.0, 'pending', 'market', 'buy')
+        self.assertEqual(['symbol', 'id', 'created_at', 'size', 'status', 'type', 'side', 'exchange_specific'],
+                         list(order))
+        self.assertNotIn('price', order)
+        with self.assertRaises(KeyError):
+            _ = order['price']
+
+    def test_limit_behaves_like_dict(self):
+        order = PaperOrder('BTC-USD', 'abc', 1.0, 2.0, 'pending', 'limit', 'sell', price=50.0,
+                           time_in_force='GTC')
+        order['settled'] = True
+        order['note'] = 'kept'
+        self.assertEqual({
+            'symbol': 'BTC-USD', 'id': 'abc', 'created_at': 1.0, 'price': 50.0, 'size': 2.0, 'status': 'pending',
+            'time_in_force': 'GTC', 'type': 'limit', 'side': 'sell', 'exchange_specific': {}, 'settled': True,
+            'note': 'kept'
+        }, dict(order))
+
+        order.pop('settled')
+        self.assertNotIn('settled', order)
+        self.assertEqual(order.to_dict(), dict(order))
+
+    def test_ids_are_unique(self):
+        generate = OrderIdGenerator()
+        ids = [generate() for _ in range(1000)]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(36, len(ids[0]))
+
+
+class PaperOrderStores(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+
+        self.interface = PaperTradeInterface(FakeInterface())
+        self.manager = FakeTickerManager()
+        self.interface._PaperTradeInterface__ticker_manager = self.manager
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+
+    def test_open_and_history(self):
+        filled = self.interface.limit_order('BTC-USD', 'buy', 99, 1)
+        canceled = self.interface.limit_order('BTC-USD', 'buy', 50, 1)
+
+        self.assertEqual({filled.get_id(), canceled.get_id()},
+                         {order['id'] for order in self.interface.get_open_orders()})
+
+        self.manager.tickers['BTC-USD'].tick({'symbol': 'BTC-USD', 'price': 98})
+        self.assertEqual([canceled.get_id()], [order['id'] for order in self.interface.get_open_orders()])
+        self.assertEqual('done', self.interface.get_order('BTC-USD', filled.get_id())['status'])
+
+        self.interface.cancel_order('BTC-USD', canceled.get_id())
+        self.assertEqual([], self.interface.get_open_orders())
+        self.assertIsNone(self.interface.get_order('BTC-USD', canceled.get_id()))
+        self.assertEqual([filled.get_id()], [order['id'] for order in self.interface.paper_trade_orders])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+"""
+    Tests for filling paper limit orders from ticks
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import unittest
+from pathlib import Path
+
+from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from blankly.utils.utils import AttributeDict
+
+
+class FakeInterface:
+    def __init__(self):
+        self.price_calls = 0
+
+    @staticmethod
+    def get_exchange_type():
+        return 'coinbase_pro'
+
+    @staticmethod
+    def get_account(symbol=None):
+        return AttributeDict({
+            'BTC': AttributeDict({'available': 0, 'hold': 0}),
+            'USD': AttributeDict({'available': 1000, 'hold': 0})
+        })
+
+    @staticmethod
+    def get_fees(symbol):
+        return {'maker_fee_rate': 0.0, 'taker_fee_rate': 0.0}
+
+    @staticmethod
+    def get_order_filter(symbol):
+        return {
+            'symbol': symbol, 'base_asset': 'BTC', 'quote_asset': 'USD', 'max_orders': 100,
+            'limit_order': {'base_min_size': 0.001, 'base_max_size': 100, 'base_increment': 0.001,
+                            'price_increment': 0.01, 'min_price': 0.01, 'max_price': 1e9},
+            'market_order': {'fractionable': True, 'base_min_size': 0.001, 'base_max_size': 100,
+                             'base_increment': 0.001, 'quote_increment': 0.01,
+                             'buy': {'min_funds': 1, 'max_funds': 1e9}, 'sell': {'min_funds': 1, 'max_funds': 1e9}},
+            'exchange_specific': {}
+        }
+
+    def get_price(self, symbol):
+        self.price_calls += 1
+        return 100.0
+
+
+class FakeBinanceInterface(FakeInterface):
+    @staticmethod
+    def get_exchange_type():
+        return 'binance'
+
+    @staticmethod
+    def get_order_filter(symbol):
+        order_filter = FakeInterface.get_order_filter(symbol)
+        order_filter['exchange_specific'] = {'limit_multiplier_up': 5, 'limit_multiplier_down': 0.2}
+        return order_filter
+
+
+class FakeTicker:
+    def __init__(self, callback):
+        self.callbacks = [callback]
+        self.open = True
+        self.restarts = 0
+
+    def tick(self, message):
+        for callback in list(self.callbacks):
+            callback(message)
+
+    def is_websocket_open(self):
+        return self.open
+
+    def append_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self.callbacks.remove(callback)
+
+    def close_websocket(self):
+        self.open = False
+
+    def restart_ticker(self):
+        self.open = True
+        self.restarts += 1
+
+
+class FakeTickerManager:
+    def __init__(self):
+        self.tickers = {}
+
+    def get_all_tickers(self):
+        return {'coinbase_pro': self.tickers}
+
+    def create_ticker(self, callback, override_symbol=None, override_exchange=None):
+        self.tickers[override_symbol] = FakeTicker(callback)
+        return self.tickers[override_symbol]
+
+
+class PaperTradeFills(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+
+        self.derived = FakeInterface()
+        self.interface = PaperTradeInterface(self.derived)
+        self.manager = FakeTickerManager()
+        self.interface._PaperTradeInterface__ticker_manager = self.manager
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+
+    def test_tick_fill(self):
+        self.interface.limit_order('BTC-USD', 'buy', 90, 1)
+        ticker = self.manager.tickers['BTC-USD']
+
+        ticker.tick({'symbol': 'BTC-USD', 'price': 95})
+        self.assertEqual(1, len(self.interface.get_open_orders()))
+
+        ticker.tick({'symbol': 'BTC-USD', 'price': 89})
+        self.assertEqual(0, len(self.interface.get_open_orders()))
+        self.assertEqual(1, self.interface.get_account('BTC')['available'])
+
+        # Everything came from the websocket
+        self.assertEqual(0, self.derived.price_calls)
+
+    def test_binance_ticks_dont_requote(self):
+        interface = PaperTradeInterface(FakeBinanceInterface())
+        interface._PaperTradeInterface__ticker_manager = self.manager
+        interface.limit_order('BTC-USD', 'buy', 90, 1)
+        # Placing the order checks the price limits
+        price_calls = interface.calls.price_calls
+
+        ticker = self.manager.tickers['BTC-USD']
+        ticker.tick({'symbol': 'BTC-USD', 'price': 95})
+        ticker.tick({'symbol': 'BTC-USD', 'price': 89})
+
+        self.assertEqual(0, len(interface.get_open_orders()))
+        self.assertEqual(price_calls, interface.calls.price_calls)
+
+    def test_streaming_symbols_skip_polling(self):
+        self.interface.limit_order('BTC-USD', 'buy', 90, 1)
+        self.manager.tickers['BTC-USD'].tick({'symbol': 'BTC-USD', 'price': 95})
+
+        self.interface.evaluate_limits()
+        self.assertEqual(0, self.derived.price_calls)
+
+    def test_idle_ticker_is_reopened(self):
+        self.interface.limit_order('BTC-USD', 'buy', 90, 1)
+        ticker = self.manager.tickers['BTC-USD']
+        ticker.tick({'symbol': 'BTC-USD', 'price': 89})
+
+        # Nothing is resting so the watchdog closes the websocket it opened
+        self.interface._PaperTradeInterface__close_idle_fill_tickers()
+        self.assertFalse(ticker.is_websocket_open())
+        self.assertEqual([], ticker.callbacks)
+
+        self.interface.limit_order('BTC-USD', 'buy', 80, 1)
+        self.assertIs(ticker, self.manager.tickers['BTC-USD'])
+        self.assertEqual((True, 1, 1), (ticker.is_websocket_open(), ticker.restarts, len(ticker.callbacks)))
+
+        ticker.tick({'symbol': 'BTC-USD', 'price': 79})
+        self.assertEqual(0, len(self.interface.get_open_orders()))
+        self.assertEqual(2, self.interface.get_account('BTC')['available'])
+
+    def test_shared_ticker_stays_open(self):
+        # The price source opened this websocket first
+        prices = []
+        shared = self.manager.create_ticker(prices.append, override_symbol='BTC-USD')
+
+        self.interface.limit_order('BTC-USD', 'buy', 90, 1)
+        shared.tick({'symbol': 'BTC-USD', 'price': 89})
+        self.interface._PaperTradeInterface__close_idle_fill_tickers()
+
+        self.assertTrue(shared.is_websocket_open())
+        self.assertEqual([prices.append], shared.callbacks)
+
@@ -0,0 +1,113 @@
+"""
+    Tests for incremental account valuation in backtests
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest_controller import BackTestController
+from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from tests.exchanges.test_vectorized_backtest import FakeInterface, FakePaperTrade
+
+START = 1640995200
+RESOLUTION = 3600
+BARS = 48
+
+
+class TradingModel:
+    def __init__(self):
+        self.has_data = True
+        self.backtester = None
+        self.compared = 0
+
+    def main(self, args):
+        interface = self.backtester.interface
+        bar = 0
+        while self.has_data:
+            if bar % 7 == 1:
+                interface.market_order('BTC-USD', 'buy', 5)
+            elif bar % 7 == 4:
+                interface.limit_order('BTC-USD', 'sell', round(interface.get_price('BTC-USD') + 3, 2), 2)
+            elif bar % 11 == 6:
+                interface.market_order('BTC-USD', 'sell', 1)
+
+            self.backtester.value_account()
+            if self.backtester.traded_account_values[-1]['time'] == self.backtester.time:
+                # The incremental values match valuing the whole account
+                expected, expected_no_trade = self.backtester.format_account_data(interface, self.backtester.time)
+                recorded = self.backtester.traded_account_values[-1]
+                for key in expected:
+                    np.testing.assert_allclose(recorded[key], expected[key], rtol=1e-12)
+                self.compared += 1
+
+            self.backtester.sleep(RESOLUTION)
+            bar += 1
+
+    def teardown(self):
+        pass
+
+
+class PortfolioValuationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.cache = tempfile.TemporaryDirectory()
+
+        close = 100 + 10 * np.sin(np.arange(BARS) / 4)
+        pd.DataFrame({
+            'time': START + np.arange(BARS) * RESOLUTION,
+            'low': close - 1, 'high': close + 1, 'open': close, 'close': close, 'volume': np.ones(BARS)
+        }).to_csv(os.path.join(self.cache.name, f'coinbase_pro,True,BTC-USD,{START},'
+                                                f'{START + BARS * RESOLUTION},{RESOLUTION}.csv'), index=False)
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.cache.cleanup()
+
+    def run_backtest(self, **settings):
+        model = TradingModel()
+        controller = BackTestController(model)
+        model.backtester = controller
+        controller.add_prices('BTC-USD', RESOLUTION, start_date=START, stop_date=START + BARS * RESOLUTION)
+        result = controller.run(None, FakePaperTrade(PaperTradeInterface(FakeInterface())), None,
+                                cache_location=self.cache.name, GUI_output=False, show_progress_during_backtest=False,
+                                **settings)
+        return model, controller, result
+
+    def test_matches_full_valuation(self):
+        model, controller, result = self.run_backtest(value_account_interval=None)
+        self.assertIsNotNone(controller.valuation)
+        self.assertGreater(model.compared, BARS - 5)
+        self.assertGreater(len(result.trades['executed_market_orders']), 0)
+
+    def test_interval(self):
+        _, controller, _ = self.run_backtest(value_account_interval=4 * RESOLUTION)
+        times = [row['time'] for row in controller.traded_account_values]
+        # The initial row, then one every four bars & the final row
+        self.assertTrue(all(np.diff(times[1:-1]) >= 4 * RESOLUTION))
+        self.assertLessEqual(len(times), BARS // 4 + 3)
+        # The end of the backtest is always valued even when it falls inside the interval
+        self.assertEqual(controller.user_stop, times[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""
+    Tests for coalescing & micro-caching of REST reads
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from blankly.exchanges.interfaces.request_coalescer import RequestCoalescer
+from blankly.exchanges.simulated import SimulatedExchange, LoadTest
+
+
+class RequestCoalescerTest(unittest.TestCase):
+    def test_concurrent_reads_share_one_request(self):
+        coalescer = RequestCoalescer(enabled=True, prices_ttl=.2)
+        calls = []
+
+        def loader():
+            calls.append(threading.get_ident())
+            time.sleep(.1)
+            return {'price': 100}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(coalescer.get('prices', 'BTC-USD', loader)))
+                   for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual([{'price': 100}] * 10, results)
+        # Readers get their own copies
+        self.assertIsNot(results[0], results[1])
+
+        # Served from the cache inside the staleness window, then refreshed
+        coalescer.get('prices', 'BTC-USD', loader)
+        self.assertEqual(1, len(calls))
+        time.sleep(.25)
+        coalescer.get('prices', 'BTC-USD', loader)
+        self.assertEqual(2, len(calls))
+        self.assertEqual({'requests': 2, 'coalesced': 9, 'cached': 1}, dict(coalescer.counters))
+
+    def test_errors_and_disabled(self):
+        coalescer = RequestCoalescer(enabled=True)
+        calls = []
+
+        def failing():
+            calls.append(1)
+            raise ConnectionError
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                coalescer.get('account', None, failing)
+        # Failures aren't cached
+        self.assertEqual(2, len(calls))
+
+        disabled = RequestCoalescer(enabled=False)
+        for _ in range(3):
+            disabled.get('prices', 'BTC-USD', lambda: calls.append(1))
+        self.assertEqual(5, len(calls))
+
+
+class InterfaceCoalescingTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.server = SimulatedExchange(symbols=['BTC-USD'], message_rate=0).start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        os.chdir(self.cwd)
+
+    def test_orders_invalidate_balances(self):
+        interface = LoadTest('coinbase_pro', server=self.server).create_interface()
+        interface.request_coalescer = RequestCoalescer(enabled=True, prices_ttl=60, account_ttl=60)
+
+        requests = self.server.stats().get('rest_requests', 0)
+        price = interface.get_price('BTC-USD')
+        for _ in range(5):
+            self.assertEqual(price, interface.get_price('BTC-USD'))
+            usd = interface.get_account('USD')['available']
+        self.assertEqual(2, self.server.stats().get('rest_requests', 0) - requests)
+
+        interface.market_order('BTC-USD', 'buy', 1)
+        self.assertLess(interface.get_account('USD')['available'], usd)
+        # The price is still cached, only the balances were dropped
+        self.assertEqual(4, self.server.stats().get('rest_requests', 0) - requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+    Tests for building coarse backtest prices from cached fine prices
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest_controller import BackTestController
+from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from blankly.utils.utils import aggregate_candles, get_ohlcv, resample_candles, load_backtest_preferences, \
+    resample_matches_exchange
+from tests.exchanges.test_vectorized_backtest import FakeInterface
+
+START = 1640995200
+HOURS = 6
+
+
+def minute_candles(start: int, stop: int) -> pd.DataFrame:
+    times = np.arange(start, stop, 60)
+    close = 100 + np.sin(times / 3000) * 10
+    return pd.DataFrame({'time': times, 'low': close - np.cos(times), 'high': close + 1 + np.sin(times),
+                         'open': close - 0.5, 'close': close, 'volume': (times % 7) + 1.0})
+
+
+class HistoryInterface(FakeInterface):
+    def __init__(self):
+        self.downloads = []
+
+    def get_product_history(self, symbol, epoch_start, epoch_stop, resolution):
+        self.downloads.append(resolution)
+        candles = minute_candles(int(epoch_start), int(epoch_stop) + 60)
+        return resample_candles(candles, resolution) if resolution != 60 else candles
+
+
+def naive(candles: pd.DataFrame, n: int) -> list:
+    out = []
+    for start in range(0, len(candles), n):
+        group = candles.iloc[start:start + n]
+        out.append([group['time'].iloc[0], group['open'].iloc[0], group['high'].max(), group['low'].min(),
+                    group['close'].iloc[-1], group['volume'].sum()])
+    return out
+
+
+class Aggregation(unittest.TestCase):
+    def test_aggregate_candles(self):
+        candles = minute_candles(START, START + 3600 + 600)
+        aggregated = aggregate_candles(candles, 15)
+        self.assertEqual(naive(candles, 15),
+                         aggregated[['time', 'open', 'high', 'low', 'close', 'volume']].values.tolist())
+
+    def test_get_ohlcv_closes_on_last_candle(self):
+        candles = minute_candles(START, START + 1800)
+        candles.index = pd.to_datetime(candles['time'], unit='s', utc=True)
+        ohlcv = get_ohlcv(candles, 5, from_zero=False)
+        self.assertEqual(naive(candles.reset_index(drop=True), 5),
+                         ohlcv[['time', 'open', 'high', 'low', 'close', 'volume']].values.tolist())
+
+    def test_resample_aligns_to_resolution(self):
+        # Starts half way through an hour
+        candles = minute_candles(START + 1800, START + 3 * 3600)
+        resampled = resample_candles(candles, 3600)
+        self.assertEqual([START, START + 3600, START + 7200], resampled['time'].tolist())
+        self.assertEqual(candles['close'].iloc[-1], resampled['close'].iloc[-1])
+        self.assertEqual(candles['volume'].iloc[:30].sum(), resampled['volume'].iloc[0])
+
+    def test_resample_matches_exchange(self):
+        self.assertTrue(resample_matches_exchange('alpaca', 900))
+        self.assertTrue(resample_matches_exchange('oanda', 3600))
+        self.assertTrue(resample_matches_exchange('binance', 86400))
+        self.assertFalse(resample_matches_exchange('binance', 604800))
+        self.assertFalse(resample_matches_exchange('alpaca', 86400))
+        self.assertFalse(resample_matches_exchange('oanda', 4 * 3600))
+
+
+class ResampledSync(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.cache = tempfile.TemporaryDirectory()
+
+        self.derived = HistoryInterface()
+        self.controller = BackTestController(None)
+        self.controller.interface = PaperTradeInterface(self.derived)
+        self.controller.preferences = load_backtest_preferences()
+        self.controller.preferences['settings']['cache_location'] = self.cache.name
+        self.controller.preferences['settings']['continuous_caching'] = True
+        self.controller.preferences['settings']['resample_from_finer_prices'] = True
+        self.controller.preferences['settings']['cache_resampled_prices'] = False
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.cache.cleanup()
+
+    def test_coarse_built_from_cached_fine(self):
+        stop = START + HOURS * 3600
+        minute_candles(START, stop).to_csv(os.path.join(self.cache.name, f'coinbase_pro,True,BTC-USD,{START},'
+                                                                         f'{stop},60.csv'), index=False)
+        self.controller.add_prices('BTC-USD', 3600, start_date=START, stop_date=stop)
+        prices = self.controller.sync_prices()
+
+        self.assertEqual([], self.derived.downloads)
+        expected = resample_candles(minute_candles(START, stop), 3600)
+        self.assertEqual(expected['time'].tolist(), prices['BTC-USD']['time'].tolist())
+        np.testing.assert_allclose(expected['close'].to_numpy(), prices['BTC-USD']['close'])
+
+    def test_one_download_for_several_resolutions(self):
+        stop = START + HOURS * 3600
+        # The coarse resolution is added first but is still built from the fine one
+        self.controller.add_prices('BTC-USD', 3600, start_date=START, stop_date=stop)
+        self.controller.add_prices('BTC-USD', 60, start_date=START, stop_date=stop)
+        prices = self.controller.sync_prices()
+
+        self.assertEqual([60], self.derived.downloads)
+        self.assertEqual(HOURS, len(self.controller.interface.full_prices['BTC-USD'][3600]))
+        # The last price event added drives the backtest
+        self.assertEqual(HOURS * 60, len(prices['BTC-USD']))
+
+    def test_new_york_days_are_downloaded(self):
+        # Alpaca days start at midnight in New York so they can't be built from UTC aligned windows
+        self.controller.interface.exchange_name = 'alpaca'
+        stop = START + 2 * 86400
+        minute_candles(START, stop).to_csv(os.path.join(self.cache.name, f'alpaca,True,BTC-USD,{START},'
+                                                                         f'{stop},60.csv'), index=False)
+        self.controller.add_prices('BTC-USD', 86400, start_date=START, stop_date=stop)
+        self.controller.sync_prices()
+
+        self.assertEqual([86400], self.derived.downloads)
+
+
+if __name__ == '__main__':
+    unittest.main()
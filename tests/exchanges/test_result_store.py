@@ -0,0 +1,61 @@
+"""
+    Tests for compacting backtest results
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.backtest_result import BacktestResult
+
+
+class ResultStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self.history = pd.DataFrame({'time': np.arange(1600000000, 1600000000 + 3600 * 100, 3600, dtype=float),
+                                     'Account Value (USD)': np.linspace(100, 200, 100),
+                                     'BTC': np.linspace(0, 1, 100)})
+        returns = self.history[['time']].copy()
+        returns['value'] = pd.Series([None] + self.history['Account Value (USD)'].pct_change()[1:].tolist(),
+                                     dtype=object)
+        prices = pd.DataFrame({'time': self.history['time'], 'close': np.linspace(10, 20, 100)}).to_records()
+
+        self.result = BacktestResult({'history': self.history, 'returns': returns}, {'created': []},
+                                     {'BTC-USD': prices}, 0, 1, 'USD', [])
+
+    def check(self):
+        self.assertTrue(self.result.compacted)
+        history = self.result.get_account_history()
+        self.assertEqual(list(self.history.columns), list(history.columns))
+        # Times are whole numbers so they stay exact
+        np.testing.assert_array_equal(self.history['time'].values, history['time'].values)
+        np.testing.assert_allclose(self.history['Account Value (USD)'].values,
+                                   history['Account Value (USD)'].values, rtol=1e-6)
+        self.assertIsNone(self.result.get_returns()['value'][0])
+
+        resampled = self.result.resample_account('BTC-USD', 3600 * 10, use_asset_history=True, use_price='close')
+        self.assertEqual(10, len(resampled))
+
+    def test_compact(self):
+        self.result.compact()
+        self.check()
+
+    def test_spill(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.result.compact(spill_threshold=0, spill_directory=directory)
+            self.check()
@@ -0,0 +1,129 @@
+"""
+    Tests for the simulated exchange server & load test harness
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import threading
+import unittest
+from pathlib import Path
+
+import requests
+
+from blankly.exchanges.interfaces.coinbase_pro.coinbase_pro_websocket import Tickers
+from blankly.exchanges.interfaces.oanda.oanda import Oanda
+from blankly.exchanges.managers.ticker_manager import TickerManager
+from blankly.exchanges.simulated import SimulatedExchange, MarketFeed, LoadTest
+from blankly.utils.utils import load_user_preferences
+
+
+class SimulatedExchangeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        feed = MarketFeed('BTC-USD', trades=[(100, 0.1), (99, 0.2), (101, 0.1)])
+        self.server = SimulatedExchange(symbols=['BTC-USDT'], feeds=[feed], message_rate=0).start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        os.chdir(self.cwd)
+
+    def test_coinbase_pro_orders(self):
+        interface = LoadTest('coinbase_pro', server=self.server).create_interface()
+        self.assertEqual(100, interface.get_price('BTC-USD'))
+
+        interface.market_order('BTC-USD', 'buy', 2)
+        limit = interface.limit_order('BTC-USD', 'sell', 100.5, 1)
+        self.assertEqual([limit.get_id()], [order['id'] for order in interface.get_open_orders('BTC-USD')])
+        self.assertEqual({'available': 1, 'hold': 1}, interface.get_account('BTC'))
+
+        # The replayed trades at 100 & 99 don't reach the limit, the one at 101 does
+        self.server.tick()
+        self.server.tick()
+        self.assertEqual('open', interface.get_order('BTC-USD', limit.get_id())['status'])
+        self.server.tick()
+        self.assertEqual('done', interface.get_order('BTC-USD', limit.get_id())['status'])
+        self.assertEqual(1000000 - 200 + 100.5, interface.get_account('USD')['available'])
+
+        stats = requests.get(self.server.url + '/stats').json()
+        self.assertEqual(2, stats['orders_placed'])
+        self.assertEqual(2, stats['orders_filled'])
+        self.assertEqual(0, stats['open_orders'])
+
+    def test_level2_snapshot_before_updates(self):
+        messages = []
+        snapshot = threading.Event()
+        updated = threading.Event()
+
+        def on_snapshot(message):
+            messages.append(message['type'])
+            snapshot.set()
+
+        def on_update(message):
+            messages.append(message['type'])
+            updated.set()
+
+        websocket = Tickers('BTC-USD', 'level2', pre_event_callback=on_snapshot,
+                            websocket_url=self.server.websocket_url('coinbase_pro'))
+        websocket.append_callback(on_update)
+        try:
+            self.assertTrue(snapshot.wait(5))
+            self.server.tick()
+            self.assertTrue(updated.wait(5))
+        finally:
+            websocket.close_websocket()
+            websocket.thread.join(5)
+        self.assertEqual(['snapshot', 'l2update'], messages)
+        self.assertEqual(1, self.server.stats()['subscriptions'])
+
+    def test_unsupported_exchanges(self):
+        settings = load_user_preferences()['settings']
+        previous_url = settings['simulated_exchange_url']
+        settings['simulated_exchange_url'] = self.server.url
+
+        def restore():
+            settings['simulated_exchange_url'] = previous_url
+        self.addCleanup(restore)
+
+        # Orders would reach the real exchange
+        with self.assertRaises(ValueError):
+            Oanda()
+        # Market data can still come from the real exchange
+        with self.assertWarns(UserWarning):
+            TickerManager('alpaca', 'AAPL').create_ticker(lambda tick: None, initially_stopped=True)
+
+
+class LoadTestTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+
+    def test_report(self):
+        for exchange in ['coinbase_pro', 'binance']:
+            report = LoadTest(exchange, message_rate=100, duration=1, order_rate=4, warmup=0.5, seed=1).run()
+
+            self.assertEqual(0, report['order_errors'])
+            self.assertEqual(4, report['order_placement']['count'])
+            self.assertGreater(report['tick_to_callback']['count'], 0)
+            self.assertGreaterEqual(report['tick_to_callback']['p99'], report['tick_to_callback']['p50'])
+            self.assertEqual(report['server']['orders_placed'], report['server']['orders_filled'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+    Tests for the vectorized backtest controller
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from blankly.exchanges.interfaces.paper_trade.paper_trade_interface import PaperTradeInterface
+from blankly.exchanges.interfaces.paper_trade.vectorized_backtest_controller import VectorizedBacktestController
+from blankly.utils.utils import AttributeDict
+
+START = 1640995200
+RESOLUTION = 3600
+BARS = 48
+
+
+class FakeInterface:
+    @staticmethod
+    def get_exchange_type():
+        return 'coinbase_pro'
+
+    @staticmethod
+    def get_account(symbol=None):
+        return AttributeDict({
+            'BTC': AttributeDict({'available': 0, 'hold': 0}),
+            'USD': AttributeDict({'available': 10000, 'hold': 0})
+        })
+
+    @staticmethod
+    def get_fees(symbol):
+        return {'maker_fee_rate': 0.001, 'taker_fee_rate': 0.002}
+
+    @staticmethod
+    def get_order_filter(symbol):
+        return {
+            'symbol': symbol, 'base_asset': 'BTC', 'quote_asset': 'USD', 'max_orders': 100,
+            'limit_order': {'base_min_size': 0.001, 'base_max_size': 100, 'base_increment': 0.001,
+                            'price_increment': 0.01, 'min_price': 0.01, 'max_price': 1e9},
+            'market_order': {'fractionable': True, 'base_min_size': 0.001, 'base_max_size': 100,
+                             'base_increment': 0.001, 'quote_increment': 0.01,
+                             'buy': {'min_funds': 1, 'max_funds': 1e9}, 'sell': {'min_funds': 1, 'max_funds': 1e9}},
+            'exchange_specific': {}
+        }
+
+
+class FakePaperTrade:
+    def __init__(self, interface):
+        self.interface = interface
+
+    @staticmethod
+    def get_type():
+        return 'paper_trade'
+
+    def get_interface(self):
+        return self.interface
+
+
+def closes():
+    return 100 + 10 * np.sin(np.arange(BARS) / 4)
+
+
+class VectorizedBacktest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cwd = os.getcwd()
+        os.chdir(Path(__file__).parent.parent / 'config')
+        self.cache = tempfile.TemporaryDirectory()
+
+        # Write the prices into the cache so nothing is downloaded
+        close = closes()
+        pd.DataFrame({
+            'time': START + np.arange(BARS) * RESOLUTION,
+            'low': close - 1, 'high': close + 1, 'open': close, 'close': close, 'volume': np.ones(BARS)
+        }).to_csv(os.path.join(self.cache.name, f'coinbase_pro,True,BTC-USD,{START},'
+                                                f'{START + BARS * RESOLUTION},{RESOLUTION}.csv'), index=False)
+
+        self.controller = VectorizedBacktestController(FakePaperTrade(PaperTradeInterface(FakeInterface())))
+        self.controller.add_prices('BTC-USD', RESOLUTION, start_date=START, stop_date=START + BARS * RESOLUTION)
+        self.settings = {
+            'cache_location': self.cache.name,
+            'GUI_output': False,
+            'show_progress_during_backtest': False
+        }
+
+    def tearDown(self) -> None:
+        os.chdir(self.cwd)
+        self.cache.cleanup()
+
+    def test_matches_paper_trade_fills(self):
+        positions = np.zeros(BARS)
+        positions[5:20] = 50
+        positions[30:40] = 20
+        result = self.controller.run(positions={'BTC-USD': positions}, **self.settings)
+
+        # Place the same orders through the paper trade interface
+        reference = PaperTradeInterface(FakeInterface())
+        reference.set_backtesting(True)
+        held = 0
+        for bar, price in enumerate(closes()):
+            reference.receive_price('BTC-USD', price)
+            reference.receive_time(START + bar * RESOLUTION)
+            if positions[bar] != held:
+                size = round(abs(positions[bar] - reference.get_account('BTC')['available']), 3)
+                reference.market_order('BTC-USD', 'buy' if positions[bar] > held else 'sell', size)
+                held = positions[bar]
+
+        history = result.get_account_history()
+        self.assertAlmostEqual(history['USD'].iloc[-1], reference.get_account('USD')['available'], places=6)
+        self.assertAlmostEqual(history['BTC'].iloc[-1], reference.get_account('BTC')['available'], places=6)
+        self.assertEqual(len(result.trades['created']), 4)
+        self.assertEqual([trade['side'] for trade in result.trades['created']], ['buy', 'sell', 'buy', 'sell'])
+
+        # The first row is the initial account and there is one more per bar
+        self.assertEqual(len(history), BARS + 1)
+        self.assertIn('sharpe', result.metrics)
+
+    def test_signals(self):
+        def signal(prices: pd.DataFrame):
+            fast = prices['close'].rolling(3).mean()
+            slow = prices['close'].rolling(8).mean()
+            above = (fast > slow).astype(int)
+            # Buy when crossing above, sell when crossing below
+            return above.diff().fillna(0).to_numpy()
+
+        result = self.controller.run(signals={'BTC-USD': signal}, **self.settings)
+        sides = [trade['side'] for trade in result.trades['created']]
+        self.assertGreater(len(sides), 0)
+        # Never buys twice in a row because each buy spends all the quote
+        self.assertNotIn(('buy', 'buy'), list(zip(sides, sides[1:])))
+
+        history = result.get_account_history()
+        value = history['USD'] + history['BTC'] * closes()[np.clip(np.arange(len(history)) - 1, 0, None)]
+        np.testing.assert_allclose(history['Account Value (USD)'], value)
+
+    def test_rejects_unaffordable(self):
+        positions = np.full(BARS, 1000.0)
+        result = self.controller.run(positions={'BTC-USD': positions}, **self.settings)
+        self.assertEqual(len(result.trades['created']), 0)
+        self.assertEqual(self.controller.rejected_orders, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
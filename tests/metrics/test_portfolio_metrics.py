@@ -52,3 +52,34 @@ class Metrics(unittest.TestCase):
         truth = -0.07880
         result = max_drawdown(self.returns)
         self.assertAlmostEqual(truth, result)
+
+    def test_cvar(self):
+        truth = 100 * abs(sum(sorted(self.returns)[:7]) / 7)
+        result = cvar(100, self.returns, 0.95)
+        self.assertAlmostEqual(truth, result)
+
+    def test_compute_metrics(self):
+        values = [100]
+        for i in self.returns:
+            values.append(values[-1] * (1 + i))
+        result = compute_metrics(values, n=252, years=self.years)
+
+        self.assertAlmostEqual(sharpe(self.returns), result['sharpe'])
+        self.assertAlmostEqual(sortino(self.returns), result['sortino'])
+        self.assertAlmostEqual(calmar(self.returns), result['calmar'])
+        self.assertAlmostEqual(max_drawdown(self.returns), result['max_drawdown'])
+        self.assertAlmostEqual(volatility(self.returns, 252), result['volatility'])
+        self.assertAlmostEqual(var(100, self.returns, 0.95), result['var'])
+        self.assertAlmostEqual(cvar(100, self.returns, 0.95), result['cvar'])
+        self.assertAlmostEqual(cagr(100, values[-1], self.years), result['cagr'])
+
+    def test_rolling(self):
+        window = 4
+        rolling = rolling_sharpe(self.returns, window)
+        self.assertEqual(len(self.returns) - window + 1, len(rolling))
+        for i, value in enumerate(rolling):
+            self.assertAlmostEqual(sharpe(self.returns[i:i + window]), value)
+
+        drawdowns = drawdown_series(self.returns)
+        self.assertAlmostEqual(max_drawdown(self.returns), drawdowns.min())
+        self.assertEqual(0, drawdowns[0])
@@ -0,0 +1,93 @@
+"""
+    Tests for the shared memory state & queues used by multicore bots
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import multiprocessing
+import queue
+import unittest
+
+from blankly.frameworks.multiprocessing.shared_state import SharedState, RingBuffer
+
+
+def _count_up(state, key, times):
+    # Each process owns its key, single writes are atomic but a read followed by a write is not
+    for _ in range(times):
+        state[key] = state[key] + 1
+
+
+def _stream(ring, count):
+    for i in range(count):
+        while not ring.put({'price': i}):
+            pass
+
+
+class SharedStateTest(unittest.TestCase):
+    def test_round_trip(self):
+        state = SharedState(size=4096)
+        state['heartbeat'] = 0
+        state['price'] = '101.5'
+        self.assertEqual(state.copy(), {'heartbeat': 0, 'price': '101.5'})
+        self.assertEqual(state.pop('price'), '101.5')
+        self.assertNotIn('price', state)
+        # Copies don't alias the shared dictionary
+        copied = state.copy()
+        copied['heartbeat'] = 10
+        self.assertEqual(state['heartbeat'], 0)
+
+    def test_too_large(self):
+        state = SharedState(size=64)
+        with self.assertRaises(ValueError):
+            state['data'] = 'x' * 128
+
+    def test_writes_from_another_process(self):
+        state = SharedState(size=4096)
+        state['parent'] = 0
+        state['child'] = 0
+        process = multiprocessing.Process(target=_count_up, args=(state, 'child', 200))
+        process.start()
+        _count_up(state, 'parent', 200)
+        process.join()
+        self.assertEqual(state.copy(), {'parent': 200, 'child': 200})
+
+
+class RingBufferTest(unittest.TestCase):
+    def test_order_and_wrap(self):
+        ring = RingBuffer(capacity=256)
+        received = []
+        for i in range(100):
+            self.assertTrue(ring.put(i))
+            received.append(ring.get(block=False))
+        self.assertEqual(received, list(range(100)))
+        self.assertTrue(ring.empty())
+        with self.assertRaises(queue.Empty):
+            ring.get(timeout=.01)
+
+    def test_full(self):
+        ring = RingBuffer(capacity=64)
+        while ring.put('tick'):
+            pass
+        self.assertEqual(ring.dropped, 1)
+        self.assertEqual(set(ring.get_all()), {'tick'})
+        self.assertTrue(ring.put('tick'))
+
+    def test_stream_between_processes(self):
+        ring = RingBuffer(capacity=512)
+        process = multiprocessing.Process(target=_stream, args=(ring, 1000))
+        process.start()
+        received = [ring.get(timeout=5)['price'] for _ in range(1000)]
+        process.join()
+        self.assertEqual(received, list(range(1000)))
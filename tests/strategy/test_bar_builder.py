@@ -0,0 +1,141 @@
+"""
+    Tests for building live bars from ticks
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+import time
+import unittest
+
+from blankly.frameworks.strategy.bar_builder import BarBuilder
+
+
+class FakeDispatcher:
+    def __init__(self):
+        self.dropped = 0
+
+    def metrics(self):
+        return {'dropped': self.dropped}
+
+
+class FakeTicker:
+    def __init__(self):
+        self.open = True
+        self.dispatcher = FakeDispatcher()
+
+    def is_websocket_open(self):
+        return self.open
+
+    def restart_ticker(self):
+        self.open = True
+
+    def close_websocket(self):
+        self.open = False
+
+
+class BarBuilderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ticker = FakeTicker()
+        self.builder = BarBuilder('BTC-USD', self.ticker, grace_period=0)
+        self.builder.started_at = 1000
+        self.builder.add_resolution(60)
+
+    def test_build_bar(self):
+        for time_, price, size in [(1000, 10, 1), (1010, 12, 2), (1030, 9, 1), (1059, 11, .5), (1060, 15, 1)]:
+            self.builder.add_tick({'time': time_, 'price': price, 'size': size})
+
+        bar = self.builder.build_bar(1060, 60)
+        self.assertEqual(bar, {'open': 10, 'high': 12, 'low': 9, 'close': 11, 'volume': 4.5, 'time': 1000})
+
+        # An empty bar carries the last close forward
+        bar = self.builder.build_bar(1180, 60)
+        self.assertEqual(bar['volume'], 0)
+
+    def test_range_ignores_previous_close(self):
+        self.builder.reconcile({'close': 20}, 60)
+        for time_, price in [(1000, 10), (1030, 12), (1050, 11)]:
+            self.builder.add_tick({'time': time_, 'price': price, 'size': 1})
+
+        bar = self.builder.build_bar(1060, 60)
+        self.assertEqual((10, 12, 10, 11), (bar['open'], bar['high'], bar['low'], bar['close']))
+
+    def test_fallback(self):
+        # Partial first bar
+        self.assertIsNone(self.builder.build_bar(1030, 60))
+        # Never saw a tick
+        self.assertIsNone(self.builder.build_bar(1060, 60))
+
+        self.builder.reconcile({'close': 20}, 60)
+        self.assertEqual(self.builder.build_bar(1120, 60)['close'], 20)
+
+        self.ticker.open = False
+        self.builder.add_tick({'time': 1130, 'price': 21, 'size': 1})
+        self.assertIsNone(self.builder.build_bar(1180, 60))
+
+
+    def test_started_by_first_tick(self):
+        builder = BarBuilder('BTC-USD', self.ticker, grace_period=0, monitor_interval=60)
+        builder.add_resolution(60)
+        builder.start()
+        self.addCleanup(builder.stop)
+
+        # Nothing streamed yet, such as while init downloads history
+        self.assertIsNone(builder.started_at)
+        self.assertIsNone(builder.build_bar(time.time() + 60, 60))
+
+        builder.add_tick({'time': time.time(), 'price': 10, 'size': 1})
+        self.assertLessEqual(builder.started_at, time.time())
+
+    def test_waits_for_late_ticks(self):
+        self.builder.grace_period = 5
+
+        def late():
+            self.builder.add_tick({'time': 1059, 'price': 11, 'size': 1})
+            self.builder.add_tick({'time': 1061, 'price': 12, 'size': 1})
+        self.builder.add_tick({'time': 1000, 'price': 10, 'size': 1})
+        threading.Timer(.1, late).start()
+
+        bar = self.builder.build_bar(1060, 60)
+        self.assertEqual((11, 2), (bar['close'], bar['volume']))
+
+    def test_disconnect_gap(self):
+        now = time.time()
+        self.builder.started_at = now - 120
+        self.builder.add_tick({'time': now - 100, 'price': 10, 'size': 1})
+        self.builder.check()
+
+        # Down and back up between two bar closes
+        self.ticker.open = False
+        self.builder.check()
+        self.ticker.open = True
+        self.builder.check()
+
+        self.assertEqual(10, self.builder.build_bar(now - 60, 60)['close'])
+        self.assertIsNone(self.builder.build_bar(now + 60, 60))
+        self.assertIsNotNone(self.builder.build_bar(time.time() + 120, 60))
+
+    def test_dropped_ticks_gap(self):
+        now = time.time()
+        self.builder.started_at = now - 120
+        self.builder.add_tick({'time': now - 100, 'price': 10, 'size': 1})
+        self.builder.check()
+
+        self.ticker.dispatcher.dropped = 3
+        self.builder.check()
+
+        self.assertEqual(10, self.builder.build_bar(now - 60, 60)['close'])
+        self.assertIsNone(self.builder.build_bar(now + 60, 60))
+        self.assertIsNotNone(self.builder.build_bar(time.time() + 120, 60))
@@ -0,0 +1,168 @@
+"""
+    Tests for the background reporting pipeline
+    Copyright (C) 2022  Emerson Dove
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU Lesser General Public License as published
+    by the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU Lesser General Public License for more details.
+
+    You should have received a copy of the GNU Lesser General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import blankly
+from blankly.deployment.reporter_headers import Reporter
+from blankly.deployment.reporting_pipeline import ReportingPipeline, FileSink, UnixSocketSink
+from blankly.exchanges.strategy_logger import StrategyLogger
+
+
+class SlowReporter:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.threads = set()
+
+    def log_market_order(self, exchange_out: dict, exchange_type: str):
+        time.sleep(self.delay)
+        self.threads.add(threading.get_ident())
+        self.calls.append(exchange_out['id'])
+
+    def update_live_var(self, var):
+        return var
+
+
+class FakeOrder:
+    @staticmethod
+    def get_id():
+        return 'order'
+
+
+class FakeInterface:
+    @staticmethod
+    def get_exchange_type():
+        return 'coinbase_pro'
+
+    @staticmethod
+    def market_order(symbol, side, size):
+        return FakeOrder()
+
+
+class ReportingPipelineTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def pipeline(self, reporter, **kwargs) -> ReportingPipeline:
+        options = {'asynchronous': True, 'max_queued_events': 100, 'batch_size': 10, 'flush_interval': 0.05,
+                   'overflow_policy': 'drop_oldest', 'sink': FileSink(os.path.join(self.directory.name, 'events'))}
+        options.update(kwargs)
+        pipeline = ReportingPipeline(reporter, **options)
+        self.addCleanup(pipeline.close)
+        return pipeline
+
+    def test_orders_never_wait_on_reporting(self):
+        reporter = SlowReporter(delay=0.05)
+        pipeline = self.pipeline(reporter)
+        logger = StrategyLogger(FakeInterface())
+
+        original = blankly.reporter
+        blankly.reporter = pipeline
+        try:
+            started = time.perf_counter()
+            for _ in range(25):
+                logger.market_order('BTC-USD', 'buy', 1)
+            elapsed = time.perf_counter() - started
+        finally:
+            blankly.reporter = original
+
+        # Reporting inline would take more than a second
+        self.assertLess(elapsed, 0.5)
+        self.assertTrue(pipeline.flush(timeout=5))
+        self.assertEqual(['order'] * 25, reporter.calls)
+        self.assertNotIn(threading.get_ident(), reporter.threads)
+
+        stats = pipeline.stats()
+        self.assertEqual(25, stats['delivered'])
+        self.assertEqual(3, stats['batches'])
+        with open(os.path.join(self.directory.name, 'events')) as file:
+            events = [json.loads(line) for line in file]
+        self.assertEqual(['log_market_order'] * 25, [event['method'] for event in events])
+        self.assertEqual('coinbase_pro', events[0]['args'][1])
+
+    def test_overflow_policies(self):
+        for policy, expected in [('drop_oldest', [7, 8, 9]), ('drop_newest', [0, 1, 2])]:
+            reporter = SlowReporter()
+            # A long flush interval keeps everything queued until the flush
+            pipeline = self.pipeline(reporter, max_queued_events=3, flush_interval=60, overflow_policy=policy)
+            for i in range(10):
+                pipeline.log_market_order({'id': i}, 'coinbase_pro')
+            self.assertEqual(3, pipeline.stats()['pending'])
+
+            self.assertTrue(pipeline.flush(timeout=5))
+            self.assertEqual(expected, reporter.calls)
+            self.assertEqual(7, pipeline.stats()['dropped'])
+
+    def test_calls_with_results_pass_through(self):
+        reporter = SlowReporter()
+        pipeline = self.pipeline(reporter, asynchronous=False)
+        self.assertEqual(5, pipeline.update_live_var(5))
+
+        pipeline.log_market_order({'id': 1}, 'coinbase_pro')
+        self.assertEqual([1], reporter.calls)
+        self.assertEqual({threading.get_ident()}, reporter.threads)
+
+    def test_annotations_and_notify_errors_reach_the_caller(self):
+        reporter = Reporter()
+        reporter.annotate_order = lambda order_id, annotation: {'id': order_id, 'annotation': annotation}
+        pipeline = self.pipeline(reporter)
+        self.assertEqual({'id': 'order', 'annotation': 'note'}, pipeline.annotate_order('order', 'note'))
+
+        notify = {'text': {'phone_number': '1234567683', 'provider': 'carrier_pigeon'}, 'email': {}}
+        with mock.patch('blankly.deployment.reporter_headers.load_notify_preferences', return_value=notify):
+            with self.assertRaises(KeyError):
+                pipeline.text('hello')
+            with self.assertRaises(KeyError):
+                pipeline.chat('hello')
+        self.assertEqual(0, pipeline.stats().get('submitted', 0))
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "Unix sockets aren't available")
+    def test_unix_socket_sink(self):
+        path = os.path.join(self.directory.name, 'reporter.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+        self.addCleanup(listener.close)
+
+        pipeline = self.pipeline(SlowReporter(), sink=UnixSocketSink(path))
+        for i in range(3):
+            pipeline.log_market_order({'id': i}, 'coinbase_pro')
+        self.assertTrue(pipeline.flush(timeout=5))
+
+        connection, _ = listener.accept()
+        connection.settimeout(5)
+        received = b''
+        while received.count(b'\n') < 3:
+            received += connection.recv(4096)
+        connection.close()
+        self.assertEqual([0, 1, 2], [json.loads(line)['args'][0]['id'] for line in received.splitlines()])
+
+
+if __name__ == '__main__':
+    unittest.main()